@@ -0,0 +1,99 @@
+"""
+benchmarks/bench_export.py
+Xuất khen thưởng cá nhân (mặc định 1 triệu dòng) ra CSV bằng exporter.export (fetchmany theo lô)
+và so sánh bộ nhớ đỉnh (tracemalloc) với cách fetchall() rồi mới ghi.
+
+Chạy: python benchmarks/bench_export.py [--rows 1000000] [--xlsx]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrm_app.db import DatabaseManager
+from hrm_app import exporter
+
+
+def seed_awards(db, rows, staffs=20000, batches=2000):
+    rnd = random.Random(1)
+    conn = db.get_connection()
+    cur = conn.cursor()
+    dept_ids = [r[0] for r in cur.execute("SELECT id FROM departments")]
+    cur.executemany("INSERT INTO staffs (stt, full_name, department_id) VALUES (?, ?, ?)",
+                    [(i, f"Nhân viên {i}", dept_ids[i % len(dept_ids)]) for i in range(staffs)])
+    staff_ids = [r[0] for r in cur.execute("SELECT id FROM staffs")]
+    year_ids = [r[0] for r in cur.execute("SELECT id FROM award_years")]
+    title_ids = [r[0] for r in cur.execute("SELECT id FROM award_titles")]
+    cur.executemany("INSERT INTO award_batches (award_year_id, award_title_id, decision_no) VALUES (?, ?, ?)",
+                    [(rnd.choice(year_ids), rnd.choice(title_ids), f"QĐ-{i}") for i in range(batches)])
+    batch_ids = [r[0] for r in cur.execute("SELECT id FROM award_batches")]
+    # mỗi nhân viên chỉ nhận 1 lần mỗi đợt (index UNIQUE): cặp trùng bị bỏ qua, thêm tới khi đủ số dòng
+    while True:
+        count = cur.execute("SELECT COUNT(*) FROM staff_awards").fetchone()[0]
+        if count >= rows:
+            break
+        cur.executemany('''
+            INSERT INTO staff_awards (staff_id, award_batch_id, note) VALUES (?, ?, ?)
+            ON CONFLICT (award_batch_id, staff_id) DO NOTHING
+        ''', ((rnd.choice(staff_ids), rnd.choice(batch_ids), "") for _ in range(rows - count)))
+    conn.commit()
+    conn.close()
+
+
+def export_fetchall(db, path):
+    """Cách làm thẳng: fetchall() toàn bộ rồi ghi"""
+    sql, params = exporter._query("staff_awards", None)
+    conn = db.get_connection(readonly=True)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f)
+        w.writerow(exporter.DATASETS["staff_awards"].headers)
+        w.writerows(rows)
+    return len(rows)
+
+
+def measure(fn):
+    """(kết quả, giây, RAM đỉnh MB): đo thời gian ở lần chạy không bật tracemalloc (tracemalloc làm chậm nhiều lần)"""
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--xlsx", action="store_true", help="đo thêm xuất .xlsx (cần openpyxl)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(db_name=os.path.join(tmp, "bench.db"), seed_sample_data=True)
+        print(f"Tạo {args.rows} khen thưởng cá nhân ...")
+        seed_awards(db, args.rows)
+
+        out = os.path.join(tmp, "awards.csv")
+        result, t_stream, m_stream = measure(lambda: exporter.export(db, "staff_awards", out))
+        n_all, t_all, m_all = measure(lambda: export_fetchall(db, out))
+        print(f"{'Cách':<22}{'dòng':>10}{'giây':>8}{'RAM đỉnh (MB)':>16}")
+        print(f"{'fetchmany (exporter)':<22}{result.rows:>10}{t_stream:>8.2f}{m_stream:>16.1f}")
+        print(f"{'fetchall':<22}{n_all:>10}{t_all:>8.2f}{m_all:>16.1f}")
+        if args.xlsx:
+            out = os.path.join(tmp, "awards.xlsx")
+            result, t, m = measure(lambda: exporter.export(db, "staff_awards", out))
+            print(f"{'fetchmany -> xlsx':<22}{result.rows:>10}{t:>8.2f}{m:>16.1f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+benchmarks/bench_import.py
+Đo nhập nhân viên từ file CSV: importer.import_staffs (executemany, mỗi lô 1 giao dịch)
+so với gọi add_staff từng dòng (chỉ đo trên --per-row dòng đầu rồi suy ra cho cả file).
+
+Chạy: python benchmarks/bench_import.py [--rows 100000] [--per-row 2000]
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrm_app.db import DatabaseManager
+from hrm_app.importer import import_staffs
+
+
+def write_csv(path, rows, dept_names):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f)
+        w.writerow(["Họ và tên", "Ngày sinh", "Chức vụ", "SĐT", "Phòng ban"])
+        for i in range(rows):
+            w.writerow([f"Nhân viên {i}", f"{i % 28 + 1:02d}/{i % 12 + 1:02d}/{1970 + i % 30}",
+                        "Chuyên viên", f"09{i:08d}", dept_names[i % len(dept_names)]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--per-row", type=int, default=2000, help="số dòng đo bằng add_staff từng dòng")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "staffs.csv")
+        db = DatabaseManager(db_name=os.path.join(tmp, "bulk.db"))
+        dept_names = [d[1] for d in db.get_all_departments()]
+        write_csv(csv_path, args.rows, dept_names)
+
+        start = time.perf_counter()
+        dry = import_staffs(db, csv_path, dry_run=True)
+        dry_s = time.perf_counter() - start
+        start = time.perf_counter()
+        report = import_staffs(db, csv_path)
+        bulk_s = time.perf_counter() - start
+        bad = db.check_stt_invariant()
+        db.close()
+
+        db = DatabaseManager(db_name=os.path.join(tmp, "per_row.db"))
+        lookup = {d[1]: d[0] for d in db.get_all_departments()}
+        n = min(args.per_row, args.rows)
+        start = time.perf_counter()
+        for i in range(n):
+            db.add_staff(None, f"Nhân viên {i}", "1980-01-01", "Chuyên viên", f"09{i:08d}",
+                         lookup[dept_names[i % len(dept_names)]])
+        per_row_s = (time.perf_counter() - start) / n * args.rows
+        db.close()
+
+    print(f"{args.rows} dòng CSV")
+    print(f"  kiểm tra (dry run):      {dry_s:8.2f} s  ({dry.valid} hợp lệ, {dry.error_count} lỗi)")
+    print(f"  nhập theo lô:            {bulk_s:8.2f} s  ({report.inserted} nhân viên)")
+    print(f"  add_staff từng dòng:     {per_row_s:8.2f} s  (ước tính từ {n} dòng)")
+    print("✓ STT 1..n ở mọi phòng ban" if not bad else f"✗ phòng ban sai STT: {bad}")
+
+
+if __name__ == "__main__":
+    main()
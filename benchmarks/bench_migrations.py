@@ -0,0 +1,70 @@
+"""
+benchmarks/bench_migrations.py
+Nâng cấp database cũ (mặc định 1 triệu nhân viên, ngày sinh dạng DD/MM/YYYY, STT trống)
+bằng migrations.run_migrations: so sánh chia lô (mặc định) với 1 giao dịch duy nhất
+(batch_size lớn hơn số dòng). "Giữ khóa lâu nhất" là thời gian process khác phải chờ để ghi.
+
+Chạy: python benchmarks/bench_migrations.py [--rows 1000000] [--batch-size 5000]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrm_app import migrations
+
+
+def build_old_database(path, rows, departments=200):
+    """Schema của bản cũ: user_version = 0, staffs chưa có stt, ngày sinh nhập tay"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE departments (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL, description TEXT)")
+    conn.execute('''
+        CREATE TABLE staffs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, full_name TEXT NOT NULL, dob DATE,
+            position TEXT, phone TEXT, department_id INTEGER NOT NULL
+        )
+    ''')
+    conn.executemany("INSERT INTO departments (name) VALUES (?)", [(f"Phòng {i}",) for i in range(departments)])
+    conn.executemany("INSERT INTO staffs (full_name, dob, department_id) VALUES (?, ?, ?)",
+                     ((f"Nhân viên {i}", f"{i % 28 + 1:02d}/{i % 12 + 1:02d}/{1970 + i % 30}", i % departments + 1)
+                      for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def upgrade(path, batch_size):
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    log = migrations.run_migrations(conn, batch_size=batch_size, log=None)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, max(entry.max_batch_seconds for entry in log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=migrations.BATCH_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "old.db")
+        print(f"Tạo database cũ với {args.rows} nhân viên ...")
+        build_old_database(source, args.rows)
+        print(f"{'Cách':<28}{'tổng (giây)':>14}{'giữ khóa lâu nhất (giây)':>28}")
+        for label, batch_size in ((f"chia lô {args.batch_size} dòng", args.batch_size),
+                                  ("1 giao dịch", args.rows * 100 + 1)):
+            path = os.path.join(tmp, "upgrade.db")
+            shutil.copyfile(source, path)
+            total, hold = upgrade(path, batch_size)
+            print(f"{label:<28}{total:>14.2f}{hold:>28.3f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+benchmarks/bench_pool.py
+So sánh pool kết nối với cách cũ (mở/đóng kết nối mỗi lần gọi) cho
+get_all_staffs, add_staff và get_statistics trên database 100k nhân viên.
+
+Chạy: python benchmarks/bench_pool.py [--rows 100000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrm_app.db import DatabaseManager
+
+
+def seed_staffs(db_path, rows):
+    db = DatabaseManager(db_name=db_path, pool_readers=0)
+    conn = db.get_connection()
+    dept_ids = [r[0] for r in conn.execute("SELECT id FROM departments ORDER BY id")]
+    data = []
+    for i in range(rows):
+        dept_id = dept_ids[i % len(dept_ids)]
+        data.append((i // len(dept_ids) + 1, f"Nhân viên {i}", "1990-01-01", "Chuyên viên", f"09{i:08d}", dept_id))
+    conn.executemany('''
+        INSERT INTO staffs (stt, full_name, dob, position, phone, department_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', data)
+    conn.commit()
+    conn.close()
+    return dept_ids[0]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(db_path, pool_readers, repeat, dept_id):
+    db = DatabaseManager(db_name=db_path, pool_readers=pool_readers)
+    results = {
+        "get_all_staffs": timed(db.get_all_staffs, max(1, repeat // 4)),
+        "add_staff": timed(lambda: db.add_staff(None, "Bench", "1990-01-01", "NV", "0900000000", dept_id), repeat),
+        "get_statistics": timed(db.get_statistics, repeat),
+    }
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        print(f"Tạo {args.rows} nhân viên trong {db_path} ...")
+        dept_id = seed_staffs(db_path, args.rows)
+
+        legacy = run(db_path, 0, args.repeat, dept_id)
+        pooled = run(db_path, 4, args.repeat, dept_id)
+
+    print(f"{'Thao tác':<18}{'connect/call (ms)':>20}{'pool (ms)':>14}{'x':>8}")
+    for name in legacy:
+        speedup = legacy[name] / pooled[name] if pooled[name] else float("inf")
+        print(f"{name:<18}{legacy[name]:>20.3f}{pooled[name]:>14.3f}{speedup:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+benchmarks/bench_rows.py
+Bộ nhớ giữ lại (tracemalloc) cho danh sách quá trình công tác (mặc định 100k dòng) theo từng cách:
+- tuple + display: fetchall() rồi dựng sẵn tuple hiển thị ("or '-'") cho mọi dòng như view làm trước đây
+- namedtuple: repository.fetch_all (list namedtuple, định dạng lúc chèn)
+- ResultSet: repository.fetch_columns (lưu theo cột, giá trị lặp lại dùng chung; định dạng lúc chèn)
+Cột "đỉnh" là RAM cao nhất trong lúc đọc; "đọc + định dạng" là thời gian đọc và tạo values cho Treeview
+của mọi dòng (đo ở lần chạy không bật tracemalloc).
+
+Chạy: python benchmarks/bench_rows.py [--rows 100000] [--staffs 5000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrm_app.db import DatabaseManager
+from hrm_app import repository
+from hrm_app.widgets import RowFormat
+
+POSITIONS = ("Trưởng phòng", "Phó phòng", "Chuyên viên", "Chuyên viên chính", "Nhân viên", "Kế toán")
+AGENCIES = ("Sở Nội vụ", "UBND tỉnh", "Sở Tài chính", "Văn phòng", "Sở Kế hoạch và Đầu tư")
+FIELDS = ("id", "staff_name", "decision_no", "ngay_quyet_dinh", "cac_vi_tri_cong_tac", "giu_chuc_vu",
+          "cong_tac_tai_cq", "ghi_chu")
+BLANKS = {"staff_name": "-", "decision_no": "-", "ngay_quyet_dinh": "-", "cac_vi_tri_cong_tac": "-",
+          "giu_chuc_vu": "-", "cong_tac_tai_cq": "-", "ghi_chu": ""}
+
+
+def seed(db, rows, staffs):
+    rnd = random.Random(1)
+    conn = db.get_connection()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO departments (name) VALUES ('Phòng bench')")
+    dept_id = cur.lastrowid
+    cur.executemany("INSERT INTO staffs (stt, full_name, department_id) VALUES (?, ?, ?)",
+                    [(i + 1, f"Nguyễn Văn {i}", dept_id) for i in range(staffs)])
+    staff_ids = [r[0] for r in cur.execute("SELECT id FROM staffs")]
+    cur.executemany('''
+        INSERT INTO work_histories (staff_id, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu,
+                                    cong_tac_tai_cq, ghi_chu)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', ((rnd.choice(staff_ids), f"QĐ-{i}/{2000 + i % 25}", f"{2000 + i % 25}-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+           f"{rnd.choice(POSITIONS)} tại {rnd.choice(AGENCIES)}", rnd.choice(POSITIONS), rnd.choice(AGENCIES),
+           "" if i % 10 else "Điều động") for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def load_tuples_with_display(conn):
+    rows = conn.execute(repository.STATEMENTS["work_histories.all"].sql).fetchall()
+    display = [(r[0], r[1] or "-", r[2] or "-", r[3] or "-", r[4] or "-", r[5] or "-", r[6] or "-", r[7] or "")
+               for r in rows]
+    return rows, display
+
+
+def load_namedtuples(conn):
+    return repository.fetch_all(conn, "work_histories.all")
+
+
+def load_result_set(conn):
+    return repository.fetch_columns(conn, "work_histories.all")
+
+
+def measure(fn, conn):
+    """(kết quả, byte giữ lại, byte đỉnh)"""
+    gc.collect()
+    tracemalloc.start()
+    result = fn(conn)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def load_and_format_seconds(fn, conn, fmt):
+    start = time.perf_counter()
+    result = fn(conn)
+    # cách cũ đã dựng sẵn values lúc đọc; 2 cách còn lại định dạng lúc chèn vào Treeview
+    for _ in (result[1] if isinstance(result, tuple) else fmt.iter_values(result)):
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--staffs", type=int, default=5000)
+    args = parser.parse_args()
+
+    fmt = RowFormat(repository.WorkHistory, FIELDS, BLANKS)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(db_name=os.path.join(tmp, "rows.db"), pool_readers=0, seed_sample_data=False,
+                             instrument=False)
+        print(f"Tạo {args.rows} quá trình công tác cho {args.staffs} nhân viên ...")
+        seed(db, args.rows, args.staffs)
+        conn = db.get_connection(readonly=True)
+        print(f"{'Cách':<20}{'byte/dòng':>12}{'đỉnh (MB)':>12}{'đọc + định dạng (giây)':>26}")
+        for label, fn in (("tuple + display", load_tuples_with_display),
+                          ("namedtuple", load_namedtuples),
+                          ("ResultSet", load_result_set)):
+            seconds = load_and_format_seconds(fn, conn, fmt)
+            result, current, peak = measure(fn, conn)
+            rows = len(result[0]) if isinstance(result, tuple) else len(result)
+            print(f"{label:<20}{current / rows:>12.0f}{peak / 1024 / 1024:>12.1f}{seconds:>26.3f}")
+            del result
+        conn.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
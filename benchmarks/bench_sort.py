@@ -0,0 +1,99 @@
+"""
+benchmarks/bench_sort.py
+Thời gian sắp xếp danh sách nhân viên trong SQLite (repository.LISTINGS["staffs"], mặc định 100k nhân viên)
+theo từng thứ tự của tiêu đề cột, khi có và khi bỏ các index sắp xếp (SORT_INDEXES):
+- trang đầu: list_page 100 dòng (lúc mở bảng / bấm tiêu đề cột)
+- nhảy giữa: listing_cursor_at ở giữa danh sách + 1 trang (kéo thanh cuộn)
+- đếm: count_listing (VirtualTreeview đếm 1 lần khi đổi nguồn)
+Mỗi ô là trung vị của --repeat lần chạy (ms).
+
+Chạy: python benchmarks/bench_sort.py [--staffs 100000] [--departments 40] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrm_app.db import DatabaseManager
+
+SORT_INDEXES = ("idx_staffs_full_name", "idx_staffs_dob_sort", "idx_staffs_department")
+ORDERS = ("full_name", "dob", "-dob", "department", ("department", "-dob"), ("-dob", "full_name"))
+LAST_NAMES = ("Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Vũ", "Đặng", "Bùi")
+MIDDLE_NAMES = ("Văn", "Thị", "Minh", "Thu", "Quốc", "Ngọc")
+
+
+def seed(db, staffs, departments):
+    rnd = random.Random(1)
+    conn = db.get_connection()
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO departments (name) VALUES (?)", [(f"Phòng {i:03d}",) for i in range(departments)])
+    dept_ids = [r[0] for r in cur.execute("SELECT id FROM departments")]
+    cur.executemany("INSERT INTO staffs (stt, full_name, dob, department_id) VALUES (?, ?, ?, ?)",
+                    ((i + 1, f"{rnd.choice(LAST_NAMES)} {rnd.choice(MIDDLE_NAMES)} {i}",
+                      None if i % 50 == 0 else f"{rnd.randint(1960, 2003)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+                      rnd.choice(dept_ids)) for i in range(staffs)))
+    conn.commit()
+    conn.close()
+
+
+def median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def run(db, staffs, repeat):
+    middle = staffs // 2
+    for order_by in ORDERS:
+        first = median_ms(lambda: db.list_page("staffs", 100, order_by=order_by), repeat)
+        jump = median_ms(lambda: db.list_page("staffs", 100, db.listing_cursor_at("staffs", middle, order_by),
+                                              order_by), repeat)
+        label = ",".join(order_by) if isinstance(order_by, tuple) else order_by
+        print(f"  {label:<22}{first:>14.1f}{jump:>14.1f}")
+    print(f"  {'đếm':<22}{median_ms(lambda: db.count_listing('staffs'), repeat):>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--staffs", type=int, default=100_000)
+    parser.add_argument("--departments", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(db_name=os.path.join(tmp, "sort.db"), pool_readers=0, seed_sample_data=False,
+                             instrument=False)
+        print(f"Tạo {args.staffs} nhân viên trong {args.departments} phòng ban ...")
+        seed(db, args.staffs, args.departments)
+        conn = db.get_connection()
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.close()
+
+        header = f"  {'Thứ tự':<22}{'trang đầu':>14}{'nhảy giữa':>14}"
+        print("\nCó index sắp xếp (ms):")
+        print(header)
+        run(db, args.staffs, args.repeat)
+
+        conn = db.get_connection()
+        for name in SORT_INDEXES:
+            conn.execute(f"DROP INDEX {name}")
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.close()
+        print("\nBỏ " + ", ".join(SORT_INDEXES) + " (ms):")
+        print(header)
+        run(db, args.staffs, args.repeat)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+benchmarks/bench_stt.py
+So sánh cách resequence STT cũ (SELECT cả phòng ban rồi UPDATE từng dòng, trên kết nối
+thứ 2 sau khi đã commit lệnh xóa) với delete_staff hiện tại (1 câu UPDATE ... ROW_NUMBER()
+trong cùng giao dịch) khi xóa nhân viên ở đầu / giữa / cuối 1 phòng ban lớn.
+Sau mỗi lần xóa kiểm tra bất biến STT = 1..n bằng db.check_stt_invariant().
+
+Chạy: python benchmarks/bench_stt.py [--size 5000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrm_app.db import DatabaseManager
+
+
+def seed_department(db, size, name):
+    conn = db.get_connection()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO departments (name, description) VALUES (?, '')", (name,))
+    dept_id = cur.lastrowid
+    cur.executemany('''
+        INSERT INTO staffs (stt, full_name, dob, position, phone, department_id)
+        VALUES (?, ?, '1990-01-01', 'Chuyên viên', '0900000000', ?)
+    ''', [(i, f"Nhân viên {i}", dept_id) for i in range(1, size + 1)])
+    conn.commit()
+    conn.close()
+    return dept_id
+
+
+def legacy_delete_staff(db, staff_id):
+    """delete_staff trước đây: commit lệnh xóa, rồi UPDATE từng dòng trên kết nối khác"""
+    conn = db.get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT department_id FROM staffs WHERE id = ?", (staff_id,))
+    dept_id = cur.fetchone()[0]
+    cur.execute("DELETE FROM staffs WHERE id=?", (staff_id,))
+    conn.commit()
+    conn.close()
+
+    conn = db.get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM staffs WHERE department_id = ? ORDER BY id", (dept_id,))
+    for idx, (sid,) in enumerate(cur.fetchall(), start=1):
+        cur.execute("UPDATE staffs SET stt = ? WHERE id = ?", (idx, sid))
+    conn.commit()
+    conn.close()
+
+
+def pick_staff(db, dept_id, position):
+    conn = db.get_connection(readonly=True)
+    ids = [r[0] for r in conn.execute("SELECT id FROM staffs WHERE department_id = ? ORDER BY id", (dept_id,))]
+    conn.close()
+    return ids[{"đầu": 0, "giữa": len(ids) // 2, "cuối": -1}[position]]
+
+
+def run(db, dept_id, delete, position, repeat):
+    total = 0.0
+    for _ in range(repeat):
+        staff_id = pick_staff(db, dept_id, position)
+        start = time.perf_counter()
+        delete(staff_id)
+        total += time.perf_counter() - start
+        bad = db.check_stt_invariant(dept_id)
+        if bad:
+            raise SystemExit(f"✗ STT sai sau khi xóa: {bad}")
+    return total / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=5000, help="số nhân viên trong phòng ban")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(db_name=os.path.join(tmp, "bench.db"), seed_sample_data=False)
+        print(f"Phòng ban {args.size} nhân viên, xóa {args.repeat} lần mỗi vị trí")
+        print(f"{'Xóa ở':<8}{'cũ (ms)':>12}{'mới (ms)':>12}{'x':>8}")
+        for position in ("đầu", "giữa", "cuối"):
+            dept_id = seed_department(db, args.size, f"Benchmark cũ - {position}")
+            legacy = run(db, dept_id, lambda sid: legacy_delete_staff(db, sid), position, args.repeat)
+            dept_id = seed_department(db, args.size, f"Benchmark mới - {position}")
+            current = run(db, dept_id, db.delete_staff, position, args.repeat)
+            speedup = legacy / current if current else float("inf")
+            print(f"{position:<8}{legacy:>12.3f}{current:>12.3f}{speedup:>8.2f}")
+        bad = db.check_stt_invariant()
+        db.close()
+    print("✓ STT của mọi phòng ban đều là 1..n" if not bad else f"✗ phòng ban sai STT: {bad}")
+
+
+if __name__ == "__main__":
+    main()
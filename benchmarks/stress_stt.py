@@ -0,0 +1,105 @@
+"""
+benchmarks/stress_stt.py
+Nhiều process cùng gọi add_staff (stt=None) vào cùng vài phòng ban trên 1 file database,
+sau đó kiểm tra không có STT trùng / thiếu (db.check_stt_invariant).
+
+--legacy chạy cách cấp STT cũ (đọc MAX(stt) trên 1 kết nối rồi INSERT trên kết nối khác,
+không khóa) để thấy bài kiểm tra bắt được STT trùng.
+
+Chạy: python benchmarks/stress_stt.py [--workers 8] [--inserts 200] [--departments 2] [--legacy]
+Thoát với mã 1 nếu có phòng ban sai STT.
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrm_app.db import DatabaseManager
+
+
+def legacy_add_staff(db, full_name, department_id):
+    """add_staff trước đây: MAX(stt)+1 trên 1 kết nối, INSERT trên kết nối khác"""
+    conn = sqlite3.connect(db.db_name, timeout=30)
+    next_stt = conn.execute("SELECT COALESCE(MAX(stt), 0) FROM staffs WHERE department_id = ?",
+                            (department_id,)).fetchone()[0] + 1
+    conn.close()
+    conn = sqlite3.connect(db.db_name, timeout=30)
+    conn.execute('''
+        INSERT INTO staffs (stt, full_name, dob, position, phone, department_id)
+        VALUES (?, ?, NULL, NULL, NULL, ?)
+    ''', (next_stt, full_name, department_id))
+    conn.commit()
+    conn.close()
+
+
+def worker(db_path, worker_id, inserts, dept_ids, legacy, start_event):
+    db = DatabaseManager(db_name=db_path, pool_readers=0, pool_timeout=30.0,
+                         profile="performance", seed_sample_data=False)
+    start_event.wait()
+    for i in range(inserts):
+        dept_id = dept_ids[(worker_id + i) % len(dept_ids)]
+        name = f"Worker {worker_id} - {i}"
+        if legacy:
+            legacy_add_staff(db, name, dept_id)
+        else:
+            db.add_staff(None, name, None, None, None, dept_id)
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--inserts", type=int, default=200, help="số nhân viên mỗi process thêm")
+    parser.add_argument("--departments", type=int, default=2)
+    parser.add_argument("--legacy", action="store_true", help="dùng cách cấp STT cũ (không khóa)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "stress.db")
+        db = DatabaseManager(db_name=db_path, pool_readers=0, profile="performance", seed_sample_data=False)
+        conn = db.get_connection()
+        dept_ids = []
+        for i in range(args.departments):
+            cur = conn.execute("INSERT INTO departments (name, description) VALUES (?, '')", (f"Phòng stress {i}",))
+            dept_ids.append(cur.lastrowid)
+        conn.commit()
+        conn.close()
+
+        start_event = multiprocessing.Event()
+        procs = [multiprocessing.Process(target=worker,
+                                         args=(db_path, w, args.inserts, dept_ids, args.legacy, start_event))
+                 for w in range(args.workers)]
+        for p in procs:
+            p.start()
+        time.sleep(0.5)  # chờ các process mở xong database rồi mới cho chạy cùng lúc
+        begin = time.perf_counter()
+        start_event.set()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - begin
+        failed = [p.exitcode for p in procs if p.exitcode != 0]
+
+        total = db.get_statistics()[1]
+        bad = db.check_stt_invariant()
+        db.close()
+
+    mode = "cũ (không khóa)" if args.legacy else "BEGIN IMMEDIATE"
+    print(f"Cách cấp STT: {mode}")
+    print(f"{args.workers} process x {args.inserts} add_staff vào {args.departments} phòng ban: "
+          f"{total} nhân viên trong {elapsed:.2f} s")
+    if failed:
+        print(f"✗ {len(failed)} process lỗi (exit code {failed})")
+    for dept_id, count, min_stt, max_stt, distinct in bad:
+        print(f"✗ phòng ban {dept_id}: {count} nhân viên, stt {min_stt}..{max_stt}, {distinct} giá trị khác nhau")
+    if not bad and not failed:
+        print("✓ không có STT trùng hoặc thiếu")
+    return 1 if bad or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
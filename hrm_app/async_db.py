@@ -0,0 +1,108 @@
+"""
+async_db.py
+AsyncDatabase: chạy truy vấn của DatabaseManager trên 1 thread riêng ("db") thay vì ngay trong
+callback Tk, để truy vấn chậm (JOIN lớn ở trang tra cứu, thống kê dashboard) không làm đứng cửa sổ.
+
+- call("get_all_staffs", ..., on_done=..., owner=widget) / submit(func, ...): trả về
+  concurrent.futures.Future; func nhận db làm tham số đầu (hàm gộp nhiều truy vấn)
+- on_done(result) / on_error(exc) luôn được gọi trên Tk main thread: kết quả đi qua queue,
+  HRMApp lấy ra bằng drain() trong cùng vòng after() với db.changes.drain()
+- owner: widget hiển thị kết quả; widget đã bị hủy (chuyển trang...) thì kết quả bị bỏ qua
+- key: chỉ giao kết quả của lần gọi mới nhất cùng key (bấm "Tra cứu" nhiều lần liên tiếp);
+  lần gọi cũ chưa chạy thì bị hủy luôn; cancel(key) bỏ cả lần mới nhất
+- widgets.DebouncedQuery: debounce (tìm khi gõ, đếm theo bộ lọc) gửi truy vấn qua call / submit với key riêng
+
+Thao tác ghi chạy trên thread "db" vẫn phát ChangeEvent: bus đã bật queue_foreign_events
+nên sự kiện cũng được giao trên main thread.
+"""
+import queue
+import threading
+import tkinter as tk
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncDatabase:
+    def __init__(self, db, workers=1):
+        """workers: số thread chạy truy vấn (mỗi thread 1 kết nối đọc trong pool)"""
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+        self._done = queue.SimpleQueue()
+        self._latest = {}           # key -> Future mới nhất
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def call(self, method, *args, on_done=None, on_error=None, owner=None, key=None, **kwargs):
+        """Gọi db.<method>(*args, **kwargs) trên thread db"""
+        func = getattr(self.db, method)
+        return self._submit(lambda: func(*args, **kwargs), on_done, on_error, owner, key)
+
+    def submit(self, func, *args, on_done=None, on_error=None, owner=None, key=None, **kwargs):
+        """Chạy func(db, *args, **kwargs) trên thread db"""
+        return self._submit(lambda: func(self.db, *args, **kwargs), on_done, on_error, owner, key)
+
+    def _submit(self, work, on_done, on_error, owner, key):
+        if self._closed:
+            raise RuntimeError("AsyncDatabase is shut down")
+        future = self._executor.submit(work)
+        if key is not None:
+            with self._lock:
+                previous = self._latest.get(key)
+                self._latest[key] = future
+            if previous is not None:
+                previous.cancel()
+        future.add_done_callback(lambda f: self._done.put((f, on_done, on_error, owner, key)))
+        return future
+
+    def cancel(self, key):
+        """Bỏ lần gọi mới nhất của key: chưa chạy thì bị hủy, đã chạy thì kết quả không được giao"""
+        with self._lock:
+            future = self._latest.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def pending(self):
+        """Số kết quả đang chờ main thread lấy (dùng cho kiểm tra / chẩn đoán)"""
+        return self._done.qsize()
+
+    def drain(self):
+        """Gọi on_done / on_error của các truy vấn đã xong; chạy trên Tk main thread. Trả về số callback đã gọi"""
+        delivered = 0
+        while True:
+            try:
+                future, on_done, on_error, owner, key = self._done.get_nowait()
+            except queue.Empty:
+                return delivered
+            if key is not None:
+                with self._lock:
+                    if self._latest.get(key) is not future:
+                        continue
+                    del self._latest[key]
+            if future.cancelled() or not _alive(owner):
+                continue
+            error = future.exception()
+            try:
+                if error is None:
+                    if on_done is not None:
+                        on_done(future.result())
+                elif on_error is not None:
+                    on_error(error)
+                else:
+                    traceback.print_exception(type(error), error, error.__traceback__)
+            except Exception:
+                traceback.print_exc()
+            delivered += 1
+
+    def shutdown(self):
+        """Bỏ các truy vấn chưa chạy và chờ truy vấn đang chạy xong (gọi trước db.close())"""
+        self._closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _alive(widget):
+    if widget is None:
+        return True
+    try:
+        return bool(widget.winfo_exists())
+    except tk.TclError:
+        return False
@@ -0,0 +1,81 @@
+"""
+award_stats.py
+Tổng hợp số khen thưởng theo năm / cấp / phạm vi / cơ quan ban hành.
+
+Mỗi đợt (award_batches) được đếm riêng số khen thưởng cá nhân và tập thể trong
+subquery đã gộp sẵn (per_batch) rồi mới JOIN với năm / danh hiệu / cơ quan. Không
+LEFT JOIN staff_awards và department_awards cùng lúc vào award_batches (tích
+Descartes: 1 đợt có 3 cá nhân + 2 tập thể thành 6 dòng -> đếm sai).
+
+- per_batch mặc định lấy từ award_rollups (trigger cập nhật, xem db._ensure_stats);
+  use_rollups=False thì đếm trực tiếp từ staff_awards / department_awards
+
+Đối chiếu với cách đếm tham chiếu bằng Python thuần: tests/test_award_stats.py
+"""
+from collections import namedtuple
+
+AwardCount = namedtuple("AwardCount", "key staff_awards department_awards total")
+
+# dimension -> (biểu thức khóa nhóm, JOIN cần thêm)
+DIMENSIONS = {
+    "year": ("ay.year", "JOIN award_years ay ON ay.id = ab.award_year_id"),
+    "level": ("at.level", "JOIN award_titles at ON at.id = ab.award_title_id"),
+    "scope": ("at.scope", "JOIN award_titles at ON at.id = ab.award_title_id"),
+    "authority": ("au.name", "LEFT JOIN award_authorities au ON au.id = ab.authority_id"),
+}
+
+_PER_BATCH_ROLLUPS = '''
+    SELECT ab.id AS batch_id,
+           COALESCE(r.staff_awards, 0) AS staff_awards,
+           COALESCE(r.department_awards, 0) AS department_awards
+    FROM award_batches ab
+    LEFT JOIN award_rollups r ON r.award_batch_id = ab.id
+'''
+
+_PER_BATCH_LIVE = '''
+    SELECT ab.id AS batch_id,
+           COALESCE(sa.n, 0) AS staff_awards,
+           COALESCE(da.n, 0) AS department_awards
+    FROM award_batches ab
+    LEFT JOIN (SELECT award_batch_id, COUNT(*) AS n FROM staff_awards GROUP BY award_batch_id) sa
+        ON sa.award_batch_id = ab.id
+    LEFT JOIN (SELECT award_batch_id, COUNT(*) AS n FROM department_awards GROUP BY award_batch_id) da
+        ON da.award_batch_id = ab.id
+'''
+
+
+def award_counts(conn, dimension, year=None, use_rollups=True):
+    """
+    Trả về list AwardCount(key, staff_awards, department_awards, total) nhóm theo dimension
+    ("year" | "level" | "scope" | "authority"), sắp theo key. year: chỉ tính các đợt của năm đó.
+    Đợt chưa có khen thưởng nào vẫn tạo nhóm (với số 0).
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown dimension: {dimension!r} (có: {', '.join(DIMENSIONS)})")
+    key_expr, join = DIMENSIONS[dimension]
+    joins = [join]
+    params = []
+    where = ""
+    if year is not None:
+        if dimension != "year":
+            joins.append(DIMENSIONS["year"][1])
+        where = "WHERE ay.year = ?"
+        params.append(year)
+    per_batch = _PER_BATCH_ROLLUPS if use_rollups else _PER_BATCH_LIVE
+    sql = f'''
+        WITH per_batch AS ({per_batch})
+        SELECT {key_expr} AS k, SUM(pb.staff_awards), SUM(pb.department_awards)
+        FROM per_batch pb
+        JOIN award_batches ab ON ab.id = pb.batch_id
+        {" ".join(joins)}
+        {where}
+        GROUP BY k
+        ORDER BY k
+    '''
+    return [AwardCount(k, s, d, s + d) for k, s, d in conn.execute(sql, params)]
+
+
+def award_summary(conn, year, use_rollups=True):
+    """Tổng số khen thưởng của 1 năm: AwardCount(year, cá nhân, tập thể, tổng) hoặc None nếu năm không có đợt nào"""
+    rows = award_counts(conn, "year", year=year, use_rollups=use_rollups)
+    return rows[0] if rows else None
@@ -1,564 +1,1125 @@
 # hrm_app/db.py
 # Database layer (cập nhật): tự động gán STT cho nhân viên theo phòng ban,
-# và resequence STT khi xóa nhân viên.
+# và resequence STT khi xóa nhân viên (1 câu UPDATE, cùng giao dịch với lệnh xóa).
 
 import sqlite3
 import random
+import threading
+from collections import namedtuple
 from datetime import datetime, timedelta
 
+from .pool import ConnectionPool, PooledConnection
+from .instrumentation import Instrumentation, InstrumentedConnection
+from .events import ChangeBus, ChangeEvent
+from . import tuning
+from .search import FTS_TOKENIZER, build_match_query, sql_fold
+from . import award_stats
+from . import migrations
+from . import repository
+from . import staff_filter
+
+# Bộ index phụ (ngoài khóa chính). Khi thêm/bớt index hãy tăng INDEX_SET_VERSION:
+# lần khởi động sau sẽ xóa các index "idx_*" không còn trong danh sách và tạo index mới.
+INDEX_SET_VERSION = 4
+SECONDARY_INDEXES = {
+    # STT theo phòng ban: MAX(stt), ORDER BY stt, resequence
+    "idx_staffs_department_stt": "staffs (department_id, stt)",
+    # Sắp xếp theo tiêu đề cột (repository.LISTINGS): biểu thức phải giống hệt biểu thức trong sorts
+    # (IFNULL(...) để keyset so sánh được ô trống) thì SQLite mới đọc theo index, không sắp cả bảng.
+    # Sắp theo phòng ban: departments.name (UNIQUE) rồi nhân viên theo (department_id, id)
+    "idx_staffs_full_name": "staffs (full_name)",
+    "idx_staffs_dob_sort": "staffs (IFNULL(dob, ''))",
+    "idx_staffs_department": "staffs (department_id)",
+    "idx_work_histories_decision_date_sort": "work_histories (IFNULL(ngay_quyet_dinh, ''))",
+    # khen thưởng theo nhân viên; có cả award_batch_id để NOT EXISTS của bộ lọc nhân sự (staff_filter) chỉ đọc index
+    "idx_staff_awards_staff_batch": "staff_awards (staff_id, award_batch_id)",
+    "idx_department_awards_department": "department_awards (department_id)",
+    "idx_award_batches_year": "award_batches (award_year_id)",
+    "idx_award_batches_title": "award_batches (award_title_id)",
+    "idx_award_batches_decision_date_sort": "award_batches (IFNULL(decision_date, ''))",
+    "idx_documents_staff": "documents (staff_id, created_at)",
+    "idx_work_histories_staff": "work_histories (staff_id)",
+}
+
+# Index UNIQUE: 1 nhân viên / phòng ban chỉ nhận 1 lần mỗi đợt khen thưởng. Cột đầu award_batch_id
+# nên cũng dùng cho tra cứu theo đợt (thay idx_*_batch cũ). Dữ liệu trùng có sẵn được dọn
+# (_dedup_awards) trước khi tạo index. Tên cột trong ON CONFLICT(...) phải khớp đúng các cột này.
+UNIQUE_INDEXES = {
+    "idx_staff_awards_batch_staff": "staff_awards (award_batch_id, staff_id)",
+    "idx_department_awards_batch_department": "department_awards (award_batch_id, department_id)",
+}
+
+# Bảng được đếm sẵn trong stats_counters (trigger INSERT/DELETE cộng/trừ 1).
+# Khi sửa danh sách hoặc trigger hãy tăng STATS_VERSION để dựng lại trigger và đếm lại.
+STATS_VERSION = 1
+COUNTED_TABLES = ("departments", "staffs", "documents", "staff_awards", "department_awards",
+                  "award_batches", "award_titles")
+
+# Kết quả từng nhân viên của add_staff_awards_bulk. status: "added" | "duplicate" | "missing_staff"
+AwardAssignResult = namedtuple("AwardAssignResult", "staff_id status staff_award_id")
+
+# Bảng con bị ảnh hưởng khi xóa dòng ở bảng cha (ON DELETE CASCADE / SET NULL), dùng cho _publish
+DELETE_CASCADES = {
+    "departments": ("staffs", "documents", "work_histories", "staff_awards", "department_awards"),
+    "staffs": ("documents", "work_histories", "staff_awards"),
+    "award_years": ("award_batches", "staff_awards", "department_awards"),
+    "award_titles": ("award_batches", "staff_awards", "department_awards"),
+    "award_authorities": ("award_batches",),
+    "award_batches": ("staff_awards", "department_awards"),
+}
+
 class DatabaseManager:
-    def __init__(self, db_name="hrm_ultimate.db"):
+    def __init__(self, db_name="hrm_ultimate.db", pool_readers=4, pool_timeout=5.0, health_check_interval=30.0,
+                 profile="default", checkpoint_interval=30.0, seed_sample_data=True, instrument=True,
+                 slow_query_ms=100.0):
+        """
+        - pool_readers: số kết nối đọc tối đa dùng đồng thời; 0 hoặc None = tắt pool
+          (mở/đóng kết nối mới cho mỗi lần gọi như cách cũ)
+        - pool_timeout: số giây chờ khi pool bận / database bị khóa
+        - health_check_interval: kết nối rảnh lâu hơn số giây này sẽ được kiểm tra lại trước khi dùng
+        - profile: bộ PRAGMA trong tuning.PROFILES ("default" | "performance").
+          "performance" bật WAL và chạy CheckpointScheduler nền mỗi checkpoint_interval giây
+        - seed_sample_data: thêm dữ liệu mẫu vào các bảng còn trống khi khởi tạo
+        - instrument: đo số lần / thời gian / số dòng của mọi hàm public và mọi câu SQL qua get_connection()
+          (xem self.instrumentation và trang Chẩn đoán); câu chậm hơn slow_query_ms được ghi kèm EXPLAIN QUERY PLAN
+        """
         self.db_name = db_name
+        self.profile = profile
+        self.seed_sample_data = seed_sample_data
+        tuning.get_profile(profile)  # báo lỗi sớm nếu sai tên profile
+        self.instrumentation = None
+        self._connection_factory = sqlite3.Connection
+        if instrument:
+            self.instrumentation = Instrumentation(slow_ms=slow_query_ms)
+            self.instrumentation.wrap_methods(self)
+            self._connection_factory = InstrumentedConnection
+        self.pool = None
+        if pool_readers:
+            self.pool = ConnectionPool(db_name, readers=pool_readers, timeout=pool_timeout,
+                                       health_check_interval=health_check_interval,
+                                       on_connect=self._configure_connection, factory=self._connection_factory,
+                                       cached_statements=repository.STATEMENT_CACHE_SIZE)
+        self.checkpointer = None
+        self._table_versions = {}  # tên bảng -> số lần thay đổi (xem get_table_versions)
+        self._versions_lock = threading.Lock()
+        self.changes = ChangeBus()  # sự kiện thêm/sửa/xóa để view cập nhật từng dòng
+        self.staff_filters = staff_filter.RecentFilters()  # tổ hợp lọc nhân sự gần đây + số nhân viên khớp
+        self.fts_enabled = False  # True nếu SQLite hỗ trợ FTS5 (đặt trong init_database)
+        self.migration_log = []  # MigrationLog của các bước nâng cấp đã chạy khi mở database
         self.init_database()
+        if tuning.uses_wal(profile) and checkpoint_interval:
+            self.checkpointer = tuning.CheckpointScheduler(db_name, interval=checkpoint_interval, timeout=pool_timeout)
+            self.checkpointer.start()
+
+    def _configure_connection(self, conn):
+        if self.instrumentation is not None:
+            conn.instrumentation = self.instrumentation
+        tuning.apply_profile(conn, self.profile)
+
+    def get_connection(self, readonly=False):
+        """
+        Lấy kết nối tới database, dùng với with (rollback khi lỗi, luôn trả kết nối):
+            with self.get_connection() as conn: ...
+        hoặc tự gọi conn.close() sau khi dùng - với pool, close() chỉ trả kết nối về pool để dùng lại.
+        - readonly=True: lấy kết nối đọc của thread hiện tại (không ghi được)
+        - mặc định: kết nối ghi dùng chung
+        """
+        if self.pool is None:
+            conn = sqlite3.connect(self.db_name, factory=self._connection_factory,
+                                   cached_statements=repository.STATEMENT_CACHE_SIZE)
+            self._configure_connection(conn)
+            conn.execute("PRAGMA foreign_keys = ON")
+            # bọc như kết nối của pool để with ... as conn đóng kết nối khi ra khỏi khối
+            return PooledConnection(conn, sqlite3.Connection.close)
+        if readonly:
+            return self.pool.reader()
+        return self.pool.writer()
+
+    def close(self):
+        """Dừng checkpoint nền và đóng toàn bộ kết nối trong pool (gọi khi thoát ứng dụng)"""
+        if self.checkpointer is not None:
+            self.checkpointer.stop()
+            self.checkpointer.checkpoint("TRUNCATE")
+            self.checkpointer = None
+        if self.pool is not None:
+            self.pool.close_all()
+
+    # ----------------------------
+    # WAL / checkpoint
+    # ----------------------------
+    def checkpoint(self, mode="PASSIVE"):
+        """Chạy checkpoint ngay (PASSIVE | FULL | RESTART | TRUNCATE)"""
+        if self.checkpointer is not None:
+            return self.checkpointer.checkpoint(mode)
+        with self.get_connection() as conn:
+            row = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        return row
 
-    def get_connection(self):
-        conn = sqlite3.connect(self.db_name)
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
+    # -----------------------
+    # Phiên bản dữ liệu theo bảng + sự kiện thay đổi (self.changes)
+    # -----------------------
+    def _touch(self, *tables):
+        with self._versions_lock:
+            for t in tables:
+                self._table_versions[t] = self._table_versions.get(t, 0) + 1
+
+    def _publish(self, table, op, row_id):
+        """
+        Gọi sau commit trong các hàm CRUD: tăng phiên bản bảng và phát ChangeEvent(table, op, row_id).
+        Xóa dòng ở bảng cha còn phát "reload" cho các bảng con trong DELETE_CASCADES
+        (không biết dòng con nào bị xóa theo).
+        """
+        cascaded = DELETE_CASCADES.get(table, ()) if op == "delete" else ()
+        self._touch(table, *cascaded)
+        self.changes.publish(ChangeEvent(table, op, row_id))
+        for child in cascaded:
+            self.changes.publish(ChangeEvent(child, "reload", None))
+
+    def _publish_reload(self, *tables):
+        """Nhiều dòng thay đổi cùng lúc (resequence STT, dữ liệu mẫu...): view tải lại phần đang hiển thị"""
+        self._touch(*tables)
+        for table in tables:
+            self.changes.publish(ChangeEvent(table, "reload", None))
+
+    def get_table_versions(self, tables):
+        """
+        Trả về tuple số phiên bản của các bảng (theo thứ tự truyền vào). Số tăng mỗi khi
+        dữ liệu bảng được ghi qua DatabaseManager này; so sánh 2 lần gọi để biết có gì đổi không.
+        """
+        with self._versions_lock:
+            return tuple(self._table_versions.get(t, 0) for t in tables)
+
+    def get_wal_stats(self):
+        """
+        Trả về dict thông tin WAL: journal_mode, wal_size_bytes và thống kê
+        checkpoint (số lần chạy, độ trễ lần cuối / trung bình / lớn nhất, ms)
+        """
+        with self.get_connection(readonly=True) as conn:
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        stats = self.checkpointer.stats() if self.checkpointer is not None else {"running": False}
+        stats["profile"] = self.profile
+        stats["journal_mode"] = journal_mode
+        stats["wal_size_bytes"] = tuning.wal_size(self.db_name)
+        return stats
+
+    def dump_diagnostics(self, path):
+        """
+        Ghi số liệu đo truy vấn (instrumentation.snapshot) + thông tin database (phiên bản SQLite,
+        schema, WAL, các bước nâng cấp đã chạy) ra file JSON để gửi kèm báo lỗi. Trả về path.
+        """
+        if self.instrumentation is None:
+            raise ValueError("Instrumentation is disabled (DatabaseManager(instrument=False))")
+        with self.get_connection(readonly=True) as conn:
+            user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        return self.instrumentation.dump_json(path, extra={
+            "database": {"path": self.db_name, "profile": self.profile, "sqlite_version": sqlite3.sqlite_version,
+                         "user_version": user_version, "fts_enabled": self.fts_enabled},
+            "wal": self.get_wal_stats(),
+            "migrations": [m._asdict() for m in self.migration_log],
+        })
 
     def init_database(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
+        with self.get_connection() as conn:
+            # journal_mode (WAL) được lưu trong file database nên chỉ cần đặt ở đây
+            tuning.apply_profile(conn, self.profile, persistent=True)
+            # bảng / cột / dữ liệu theo PRAGMA user_version (xem migrations.py); tự commit
+            self.migration_log = migrations.run_migrations(conn)
+            cur = conn.cursor()
 
-        # departments
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS departments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                description TEXT
-            )
-        ''')
+            self._ensure_indexes(cur)
+            self.fts_enabled = self._ensure_search_index(cur)
+            self._ensure_stats(cur)
 
-        # staffs
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS staffs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                stt INTEGER,
-                full_name TEXT NOT NULL,
-                dob DATE,
-                position TEXT,
-                phone TEXT,
-                department_id INTEGER NOT NULL,
-                FOREIGN KEY (department_id) REFERENCES departments (id) ON DELETE CASCADE
-            )
-        ''')
+            conn.commit()
 
-        # documents
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS documents (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                staff_id INTEGER NOT NULL,
-                loai_ho_so TEXT,
-                so_va_ky_hieu TEXT,
-                ngay_thang TEXT,
-                ten_loai_trich_yeu_noi_dung TEXT,
-                so_to INTEGER,
-                ghi_chu TEXT,
-                file_url TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (staff_id) REFERENCES staffs (id) ON DELETE CASCADE
-            )
-        ''')
+        # (Tùy chọn) Add some sample data if empty
+        if self.seed_sample_data:
+            self._ensure_complete_sample_data()
 
-        # work_histories
+    def _ensure_indexes(self, cur):
+        """Tạo bộ index phụ theo SECONDARY_INDEXES nếu phiên bản trong app_meta đã cũ"""
+        cur.execute("SELECT value FROM app_meta WHERE key = 'index_set_version'")
+        row = cur.fetchone()
+        if row is not None and int(row[0]) == INDEX_SET_VERSION:
+            return
+        cur.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name GLOB 'idx_*'")
+        for (name,) in cur.fetchall():
+            if name not in SECONDARY_INDEXES and name not in UNIQUE_INDEXES:
+                cur.execute(f"DROP INDEX IF EXISTS {name}")
+        for name, target in SECONDARY_INDEXES.items():
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+        removed = self._dedup_awards(cur)
+        if removed:
+            print(f"✓ Đã xóa {removed} khen thưởng bị trùng (cùng đợt, cùng nhân viên / phòng ban)")
+        for name, target in UNIQUE_INDEXES.items():
+            cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {target}")
         cur.execute('''
-            CREATE TABLE IF NOT EXISTS work_histories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                staff_id INTEGER NOT NULL,
-                decision_no TEXT,
-                ngay_quyet_dinh DATE,
-                cac_vi_tri_cong_tac TEXT,
-                giu_chuc_vu DATE,
-                cong_tac_tai_cq DATE,
-                ghi_chu TEXT,
-                FOREIGN KEY (staff_id) REFERENCES staffs(id) ON DELETE CASCADE
-            )
-        ''')
+            INSERT INTO app_meta (key, value) VALUES ('index_set_version', ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        ''', (str(INDEX_SET_VERSION),))
+        # cập nhật thống kê cho query planner sau khi đổi index
+        cur.execute("PRAGMA optimize")
 
-        # award_years (giữ nguyên)
+    def _dedup_awards(self, cur, chunk_size=5000):
+        """
+        Xóa khen thưởng trùng (cùng award_batch_id + staff_id / department_id), giữ bản ghi id nhỏ nhất.
+        Đọc bảng theo thứ tự khóa bằng fetchmany, chỉ giữ lại id của các dòng trùng (thường rất ít)
+        rồi xóa theo lô - không nạp cả bảng vào bộ nhớ. Trigger thống kê chạy khi xóa nên
+        stats_counters / award_rollups vẫn đúng. Trả về số dòng đã xóa.
+        """
+        removed = 0
+        for table, owner in (("staff_awards", "staff_id"), ("department_awards", "department_id")):
+            reader = cur.connection.execute(
+                f"SELECT id, award_batch_id, {owner} FROM {table} ORDER BY award_batch_id, {owner}, id")
+            duplicates = []
+            previous = None
+            while True:
+                rows = reader.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row_id, batch_id, owner_id in rows:
+                    key = (batch_id, owner_id)
+                    if key == previous:
+                        duplicates.append((row_id,))
+                    previous = key
+            reader.close()
+            for i in range(0, len(duplicates), chunk_size):
+                cur.executemany(f"DELETE FROM {table} WHERE id = ?", duplicates[i:i + chunk_size])
+            removed += len(duplicates)
+        return removed
+
+    def _ensure_stats(self, cur):
+        """
+        Bảng thống kê được trigger cập nhật dần, để dashboard đọc O(1) thay vì COUNT(*):
+        - stats_counters(name, value): số dòng của từng bảng trong COUNTED_TABLES
+        - award_rollups(award_batch_id, staff_awards, department_awards): số khen thưởng
+          cá nhân / tập thể của mỗi đợt
+        Xóa dây chuyền (ON DELETE CASCADE) cũng chạy trigger nên số liệu vẫn đúng.
+        """
         cur.execute('''
-            CREATE TABLE IF NOT EXISTS award_years (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                year INTEGER UNIQUE NOT NULL
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
             )
         ''')
-
-        # award_titles: thêm column level nếu cần; scope có thể đã tồn tại ở schema cũ
         cur.execute('''
-            CREATE TABLE IF NOT EXISTS award_titles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                scope TEXT,
-                level TEXT
+            CREATE TABLE IF NOT EXISTS award_rollups (
+                award_batch_id INTEGER PRIMARY KEY,
+                staff_awards INTEGER NOT NULL DEFAULT 0,
+                department_awards INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (award_batch_id) REFERENCES award_batches (id) ON DELETE CASCADE
             )
         ''')
+        cur.execute("SELECT value FROM app_meta WHERE key = 'stats_version'")
+        row = cur.fetchone()
+        if row is not None and int(row[0]) == STATS_VERSION:
+            return
 
-        # award_authorities (mới)
+        cur.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name GLOB 'trg_stats_*'")
+        for (name,) in cur.fetchall():
+            cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for table in COUNTED_TABLES:
+            cur.execute(f'''
+                CREATE TRIGGER trg_stats_{table}_insert AFTER INSERT ON {table} BEGIN
+                    UPDATE stats_counters SET value = value + 1 WHERE name = '{table}';
+                END
+            ''')
+            cur.execute(f'''
+                CREATE TRIGGER trg_stats_{table}_delete AFTER DELETE ON {table} BEGIN
+                    UPDATE stats_counters SET value = value - 1 WHERE name = '{table}';
+                END
+            ''')
+        for table in ("staff_awards", "department_awards"):
+            cur.execute(f'''
+                CREATE TRIGGER trg_stats_{table}_rollup_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO award_rollups (award_batch_id, {table}) VALUES (new.award_batch_id, 1)
+                    ON CONFLICT(award_batch_id) DO UPDATE SET {table} = {table} + 1;
+                END
+            ''')
+            cur.execute(f'''
+                CREATE TRIGGER trg_stats_{table}_rollup_delete AFTER DELETE ON {table} BEGIN
+                    UPDATE award_rollups SET {table} = {table} - 1 WHERE award_batch_id = old.award_batch_id;
+                END
+            ''')
+            cur.execute(f'''
+                CREATE TRIGGER trg_stats_{table}_rollup_update AFTER UPDATE OF award_batch_id ON {table}
+                WHEN new.award_batch_id IS NOT old.award_batch_id BEGIN
+                    UPDATE award_rollups SET {table} = {table} - 1 WHERE award_batch_id = old.award_batch_id;
+                    INSERT INTO award_rollups (award_batch_id, {table}) VALUES (new.award_batch_id, 1)
+                    ON CONFLICT(award_batch_id) DO UPDATE SET {table} = {table} + 1;
+                END
+            ''')
+        self._fill_stats(cur)
         cur.execute('''
-            CREATE TABLE IF NOT EXISTS award_authorities (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE
-            )
+            INSERT INTO app_meta (key, value) VALUES ('stats_version', ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        ''', (str(STATS_VERSION),))
+
+    def _fill_stats(self, cur):
+        """Đếm lại toàn bộ stats_counters và award_rollups từ dữ liệu gốc"""
+        cur.execute("DELETE FROM stats_counters")
+        for table in COUNTED_TABLES:
+            cur.execute(f"INSERT INTO stats_counters (name, value) SELECT '{table}', COUNT(*) FROM {table}")
+        cur.execute("DELETE FROM award_rollups")
+        cur.execute('''
+            INSERT INTO award_rollups (award_batch_id, staff_awards, department_awards)
+            SELECT ab.id,
+                   (SELECT COUNT(*) FROM staff_awards sa WHERE sa.award_batch_id = ab.id),
+                   (SELECT COUNT(*) FROM department_awards da WHERE da.award_batch_id = ab.id)
+            FROM award_batches ab
         ''')
 
-        # award_batches: ensure authority_id column exists
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS award_batches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                award_year_id INTEGER NOT NULL,
-                award_title_id INTEGER NOT NULL,
-                authority_id INTEGER,
-                decision_no TEXT,
-                decision_date DATE,
-                note TEXT,
-                FOREIGN KEY (award_year_id) REFERENCES award_years(id) ON DELETE CASCADE,
-                FOREIGN KEY (award_title_id) REFERENCES award_titles(id) ON DELETE CASCADE,
-                FOREIGN KEY (authority_id) REFERENCES award_authorities(id) ON DELETE SET NULL
-            )
+    def rebuild_statistics(self):
+        """Đếm lại bảng thống kê (khi dữ liệu bị sửa trực tiếp ngoài ứng dụng với trigger bị tắt...)"""
+        with self.get_connection() as conn:
+            self._fill_stats(conn.cursor())
+            conn.commit()
+
+    def _ensure_search_index(self, cur):
+        """
+        Tạo bảng FTS5 staffs_fts (rowid = staffs.id) + trigger đồng bộ với staffs.
+        Nội dung được bỏ dấu khi ghi (tokenizer bỏ dấu, trigger đổi đ -> d) để
+        "Nguyen Van An" khớp "Nguyễn Văn An". Trả về False nếu SQLite không có FTS5.
+        """
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'staffs_fts'")
+        created = cur.fetchone() is None
+        if created:
+            try:
+                cur.execute(f'''
+                    CREATE VIRTUAL TABLE staffs_fts USING fts5(
+                        full_name, position, phone,
+                        tokenize = "{FTS_TOKENIZER}"
+                    )
+                ''')
+            except sqlite3.OperationalError:
+                return False
+
+        values = f"{sql_fold('new.full_name')}, {sql_fold('new.position')}, {sql_fold('new.phone')}"
+        cur.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_staffs_fts_insert AFTER INSERT ON staffs BEGIN
+                INSERT INTO staffs_fts (rowid, full_name, position, phone) VALUES (new.id, {values});
+            END
         ''')
-      
-        # staff_awards (giữ nguyên schema nhưng đảm bảo FK)
         cur.execute('''
-            CREATE TABLE IF NOT EXISTS staff_awards (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                staff_id INTEGER NOT NULL,
-                award_batch_id INTEGER NOT NULL,
-                note TEXT,
-                FOREIGN KEY (staff_id) REFERENCES staffs (id) ON DELETE CASCADE,
-                FOREIGN KEY (award_batch_id) REFERENCES award_batches (id) ON DELETE CASCADE
-            )
+            CREATE TRIGGER IF NOT EXISTS trg_staffs_fts_delete AFTER DELETE ON staffs BEGIN
+                DELETE FROM staffs_fts WHERE rowid = old.id;
+            END
         ''')
-
-        # department_awards
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS department_awards (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                department_id INTEGER NOT NULL,
-                award_batch_id INTEGER NOT NULL,
-                note TEXT,
-                FOREIGN KEY (department_id) REFERENCES departments (id) ON DELETE CASCADE,
-                FOREIGN KEY (award_batch_id) REFERENCES award_batches (id) ON DELETE CASCADE
-            )
+        cur.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_staffs_fts_update AFTER UPDATE OF full_name, position, phone ON staffs BEGIN
+                DELETE FROM staffs_fts WHERE rowid = old.id;
+                INSERT INTO staffs_fts (rowid, full_name, position, phone) VALUES (new.id, {values});
+            END
+        ''')
+        if created:
+            self._fill_search_index(cur)
+        return True
+
+    def _fill_search_index(self, cur):
+        cur.execute(f'''
+            INSERT INTO staffs_fts (rowid, full_name, position, phone)
+            SELECT id, {sql_fold('full_name')}, {sql_fold('position')}, {sql_fold('phone')} FROM staffs
         ''')
 
-        conn.commit()
-        conn.close()
-
-        # (Tùy chọn) Add some sample data if empty
-        self._ensure_complete_sample_data()
+    def rebuild_search_index(self):
+        """Dựng lại toàn bộ staffs_fts từ bảng staffs (khi nghi ngờ index lệch dữ liệu)"""
+        if not self.fts_enabled:
+            return
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM staffs_fts")
+            self._fill_search_index(cur)
+            cur.execute("INSERT INTO staffs_fts (staffs_fts) VALUES ('optimize')")
+            conn.commit()
 
    
     # ----------------------------
     # Award Years
     # ----------------------------
     def get_all_award_years(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT id, year FROM award_years ORDER BY year DESC")
-        rows = cur.fetchall()
-        conn.close()
+        """list AwardYear(id, year), năm mới nhất trước"""
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_all(conn, "award_years.all")
         return rows
 
     def add_award_year(self, year):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        try:
-            cur.execute("INSERT INTO award_years (year) VALUES (?)", (year,))
-            conn.commit()
-            conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute("INSERT INTO award_years (year) VALUES (?)", (year,))
+                conn.commit()
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                return False
+            self._publish("award_years", "insert", cur.lastrowid)
             return True
-        except sqlite3.IntegrityError:
-            conn.close()
-            return False
 
     def delete_award_year(self, year_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM award_years WHERE id = ?", (year_id,))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM award_years WHERE id = ?", (year_id,))
+            conn.commit()
+            self._publish("award_years", "delete", year_id)
 
     # ----------------------------
     # Award Titles
     # ----------------------------
     def get_all_award_titles(self):
-        """Trả về id, name, scope, level"""
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT id, name, scope, level FROM award_titles ORDER BY id")
-        rows = cur.fetchall()
-        conn.close()
+        """list AwardTitle(id, name, scope, level)"""
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_all(conn, "award_titles.all")
         return rows
 
     def add_award_title(self, name, scope, level):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("INSERT INTO award_titles (name, scope, level) VALUES (?, ?, ?)", (name, scope, level))
-        conn.commit()
-        conn.close()
+        """
+        Thêm 1 danh hiệu khen thưởng.
+        - name: tên danh hiệu
+        - scope: 'ca_nhan' hoặc 'tap_the'
+        - level: 'co_so' | 'tinh' | 'trung_uong'
+        """
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("INSERT INTO award_titles (name, scope, level) VALUES (?, ?, ?)", (name, scope, level))
+            conn.commit()
+            self._publish("award_titles", "insert", cur.lastrowid)
 
     def update_award_title(self, title_id, name, scope, level):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("UPDATE award_titles SET name = ?, scope = ?, level = ? WHERE id = ?", (name, scope, level, title_id))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("UPDATE award_titles SET name = ?, scope = ?, level = ? WHERE id = ?", (name, scope, level, title_id))
+            conn.commit()
+            self._publish("award_titles", "update", title_id)
 
     def delete_award_title(self, title_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM award_titles WHERE id = ?", (title_id,))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM award_titles WHERE id = ?", (title_id,))
+            conn.commit()
+            self._publish("award_titles", "delete", title_id)
 
     # ----------------------------
     # Award Authorities
     # ----------------------------
     def get_all_award_authorities(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT id, name FROM award_authorities ORDER BY name")
-        rows = cur.fetchall()
-        conn.close()
+        """list AwardAuthority(id, name)"""
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_all(conn, "award_authorities.all")
         return rows
 
     def add_award_authority(self, name):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        try:
-            cur.execute("INSERT INTO award_authorities (name) VALUES (?)", (name,))
-            conn.commit()
-        except sqlite3.IntegrityError:
-            pass
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute("INSERT INTO award_authorities (name) VALUES (?)", (name,))
+                conn.commit()
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                return
+            self._publish("award_authorities", "insert", cur.lastrowid)
 
     def delete_award_authority(self, auth_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM award_authorities WHERE id = ?", (auth_id,))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM award_authorities WHERE id = ?", (auth_id,))
+            conn.commit()
+            self._publish("award_authorities", "delete", auth_id)
 
     # ----------------------------
     # Award Batches (Đợt / Quyết định)
     # ----------------------------
     def get_all_award_batches(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT ab.id, ay.year, at.name, at.level, aa.name, ab.decision_no, ab.decision_date, ab.note, ab.award_year_id, ab.award_title_id, ab.authority_id
-            FROM award_batches ab
-            LEFT JOIN award_years ay ON ab.award_year_id = ay.id
-            LEFT JOIN award_titles at ON ab.award_title_id = at.id
-            LEFT JOIN award_authorities aa ON ab.authority_id = aa.id
-            ORDER BY ab.decision_date DESC
-        ''')
-        rows = cur.fetchall()
-        conn.close()
+        """
+        ResultSet AwardBatch(id, year, title, level, authority, decision_no, decision_date, note,
+        award_year_id, award_title_id, authority_id), đợt mới nhất trước
+        """
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_columns(conn, "award_batches.all")
         return rows
 
+    def list_award_batches(self, limit=100, cursor=None, order_by=None, **filters):
+        """
+        1 trang đợt khen thưởng (Page), như list_staffs. Mặc định "-decision_date" (mới nhất trước).
+        order_by: id, year, title, level, authority, decision_no, decision_date, note;
+        filters: year, award_title_id, authority_id
+        """
+        return self.list_page("award_batches", limit, cursor, order_by, filters)
+
     def add_award_batch(self, award_year_id, award_title_id, authority_id, decision_no, decision_date, note):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            INSERT INTO award_batches (award_year_id, award_title_id, authority_id, decision_no, decision_date, note)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (award_year_id, award_title_id, authority_id, decision_no, decision_date, note))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                INSERT INTO award_batches (award_year_id, award_title_id, authority_id, decision_no, decision_date, note)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (award_year_id, award_title_id, authority_id, decision_no, decision_date, note))
+            conn.commit()
+            self._publish("award_batches", "insert", cur.lastrowid)
 
     def update_award_batch(self, batch_id, award_year_id, award_title_id, authority_id, decision_no, decision_date, note):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            UPDATE award_batches
-            SET award_year_id = ?, award_title_id = ?, authority_id = ?, decision_no = ?, decision_date = ?, note = ?
-            WHERE id = ?
-        ''', (award_year_id, award_title_id, authority_id, decision_no, decision_date, note, batch_id))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                UPDATE award_batches
+                SET award_year_id = ?, award_title_id = ?, authority_id = ?, decision_no = ?, decision_date = ?, note = ?
+                WHERE id = ?
+            ''', (award_year_id, award_title_id, authority_id, decision_no, decision_date, note, batch_id))
+            conn.commit()
+            self._publish("award_batches", "update", batch_id)
 
     def delete_award_batch(self, batch_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM award_batches WHERE id = ?", (batch_id,))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM award_batches WHERE id = ?", (batch_id,))
+            conn.commit()
+            self._publish("award_batches", "delete", batch_id)
 
     # ----------------------------
     # Staff awards (khen cho cá nhân)
     # ----------------------------
     def add_staff_award(self, staff_id, award_batch_id, note):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("INSERT INTO staff_awards (staff_id, award_batch_id, note) VALUES (?, ?, ?)", (staff_id, award_batch_id, note))
-        conn.commit()
-        conn.close()
+        """
+        Phân khen thưởng cho 1 nhân viên. Nhân viên đã có khen thưởng của đợt này thì không thêm dòng mới,
+        chỉ cập nhật ghi chú (nếu có nhập). Trả về True nếu thêm mới, False nếu đã có.
+        """
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                INSERT INTO staff_awards (staff_id, award_batch_id, note) VALUES (?, ?, ?)
+                ON CONFLICT (award_batch_id, staff_id) DO NOTHING
+            ''', (staff_id, award_batch_id, note))
+            created = cur.rowcount == 1
+            if created:
+                row_id = cur.lastrowid
+            else:
+                if note:
+                    cur.execute("UPDATE staff_awards SET note = ? WHERE award_batch_id = ? AND staff_id = ?",
+                                (note, award_batch_id, staff_id))
+                cur.execute("SELECT id FROM staff_awards WHERE award_batch_id = ? AND staff_id = ?",
+                            (award_batch_id, staff_id))
+                row_id = cur.fetchone()[0]
+            conn.commit()
+            if created:
+                self._publish("staff_awards", "insert", row_id)
+            elif note:
+                self._publish("staff_awards", "update", row_id)
+        return created
+
+    def add_staff_awards_bulk(self, award_batch_id, staff_ids, note=None):
+        """
+        Phân 1 đợt khen thưởng cho nhiều nhân viên trong 1 giao dịch (1 executemany).
+        Bỏ qua nhân viên đã có khen thưởng của đợt này (hoặc lặp lại trong staff_ids) và id không tồn tại.
+        Trả về list AwardAssignResult(staff_id, status, staff_award_id) theo đúng thứ tự staff_ids.
+        Đợt không tồn tại -> ValueError.
+        """
+        staff_ids = list(staff_ids)
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            self._begin_immediate(conn)
+            cur.execute("SELECT 1 FROM award_batches WHERE id = ?", (award_batch_id,))
+            if cur.fetchone() is None:
+                raise ValueError(f"Award batch {award_batch_id} does not exist")
+            cur.execute("SELECT staff_id FROM staff_awards WHERE award_batch_id = ?", (award_batch_id,))
+            taken = {r[0] for r in cur.fetchall()}
+            unique_ids = list(dict.fromkeys(staff_ids))
+            existing = set()
+            for i in range(0, len(unique_ids), 500):     # giới hạn số tham số của SQLite
+                chunk = unique_ids[i:i + 500]
+                cur.execute(f"SELECT id FROM staffs WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                existing.update(r[0] for r in cur.fetchall())
+
+            statuses = []
+            to_insert = []
+            for staff_id in staff_ids:
+                if staff_id not in existing:
+                    statuses.append("missing_staff")
+                elif staff_id in taken:
+                    statuses.append("duplicate")
+                else:
+                    statuses.append("added")
+                    taken.add(staff_id)
+                    to_insert.append(staff_id)
+
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM staff_awards")
+            last_id = cur.fetchone()[0]
+            cur.executemany('''
+                INSERT INTO staff_awards (staff_id, award_batch_id, note) VALUES (?, ?, ?)
+                ON CONFLICT (award_batch_id, staff_id) DO NOTHING
+            ''', [(staff_id, award_batch_id, note) for staff_id in to_insert])
+            cur.execute("SELECT staff_id, id FROM staff_awards WHERE award_batch_id = ? AND id > ?",
+                        (award_batch_id, last_id))
+            new_ids = dict(cur.fetchall())
+            conn.commit()
+            if to_insert:
+                self._publish_reload("staff_awards")
+        return [AwardAssignResult(staff_id, status, new_ids.get(staff_id) if status == "added" else None)
+                for staff_id, status in zip(staff_ids, statuses)]
+
+    def get_staff_ids_with_award_batch(self, award_batch_id):
+        """Tập id nhân viên đã được phân đợt khen thưởng này"""
+        with self.get_connection(readonly=True) as conn:
+            ids = {r[0] for r in repository.execute(conn, "staff_awards.staff_ids_by_batch", (award_batch_id,))}
+        return ids
 
     def delete_staff_award(self, sa_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM staff_awards WHERE id = ?", (sa_id,))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM staff_awards WHERE id = ?", (sa_id,))
+            conn.commit()
+            self._publish("staff_awards", "delete", sa_id)
 
-    def get_staff_awards_by_staff(self, staff_id):
+    def get_staff_awards_by_staff(self, staff_id, year=None):
         """
-        Trả về danh sách khen thưởng cho 1 nhân viên (dùng query mẫu của bạn).
-        Kết quả: list tuple gồm (full_name, year, danh_hieu, level, decision_no, decision_date, authority_name, staff_award_id, award_batch_id, note)
+        Khen thưởng của 1 nhân viên (year: chỉ năm đó), năm mới nhất trước.
+        ResultSet StaffAward(id, year, title, level, authority, decision_no, decision_date, note, staff_id, award_batch_id)
         """
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT
-                s.full_name,
-                ay.year,
-                at.name AS danh_hieu,
-                at.level AS cap,
-                ab.decision_no,
-                ab.decision_date,
-                aa.name AS co_quan,
-                sa.id AS staff_award_id,
-                sa.award_batch_id,
-                sa.note
-            FROM staffs s
-            JOIN staff_awards sa ON s.id = sa.staff_id
-            JOIN award_batches ab ON sa.award_batch_id = ab.id
-            JOIN award_titles at ON ab.award_title_id = at.id
-            JOIN award_years ay ON ab.award_year_id = ay.id
-            LEFT JOIN award_authorities aa ON ab.authority_id = aa.id
-            WHERE s.id = ?
-            ORDER BY ay.year DESC, ab.decision_date DESC
-        ''', (staff_id,))
-        rows = cur.fetchall()
-        conn.close()
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_columns(conn, "staff_awards.by_staff", {"owner_id": staff_id, "year": year})
         return rows
 
+    def lookup_staff_awards(self, staff_id, year=None, order_by=None):
+        """
+        Trang tra cứu: (tổng số khen thưởng của nhân viên - mọi năm, list StaffAward của năm year).
+        order_by như list_page("staff_awards"), mặc định năm rồi ngày quyết định, mới nhất trước
+        """
+        with self.get_connection(readonly=True) as conn:
+            total = repository.fetch_value(conn, "staff_awards.count_by_staff", (staff_id,))
+            page = repository.list_page(conn, "staff_awards", order_by, {"staff_id": staff_id, "year": year}, limit=None)
+        return total, page.rows
+
     # ----------------------------
     # Department awards (khen cho tập thể)
     # ----------------------------
     def add_department_award(self, department_id, award_batch_id, note):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("INSERT INTO department_awards (department_id, award_batch_id, note) VALUES (?, ?, ?)", (department_id, award_batch_id, note))
-        conn.commit()
-        conn.close()
+        """Giống add_staff_award cho phòng ban: trả về True nếu thêm mới, False nếu phòng ban đã có khen thưởng của đợt"""
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                INSERT INTO department_awards (department_id, award_batch_id, note) VALUES (?, ?, ?)
+                ON CONFLICT (award_batch_id, department_id) DO NOTHING
+            ''', (department_id, award_batch_id, note))
+            created = cur.rowcount == 1
+            if created:
+                row_id = cur.lastrowid
+            else:
+                if note:
+                    cur.execute("UPDATE department_awards SET note = ? WHERE award_batch_id = ? AND department_id = ?",
+                                (note, award_batch_id, department_id))
+                cur.execute("SELECT id FROM department_awards WHERE award_batch_id = ? AND department_id = ?",
+                            (award_batch_id, department_id))
+                row_id = cur.fetchone()[0]
+            conn.commit()
+            if created:
+                self._publish("department_awards", "insert", row_id)
+            elif note:
+                self._publish("department_awards", "update", row_id)
+        return created
 
     def delete_department_award(self, da_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM department_awards WHERE id = ?", (da_id,))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM department_awards WHERE id = ?", (da_id,))
+            conn.commit()
+            self._publish("department_awards", "delete", da_id)
 
-    def get_department_awards_by_department(self, department_id):
+    def get_department_awards_by_department(self, department_id, year=None):
         """
-        Trả về danh sách khen thưởng cho 1 phòng ban.
-        Kết quả: (department_name, year, title_name, decision_no, decision_date, authority_name, department_award_id, award_batch_id, note)
+        Khen thưởng của 1 phòng ban (year: chỉ năm đó), năm mới nhất trước.
+        ResultSet DepartmentAward(id, year, title, level, authority, decision_no, decision_date, note,
+        department_id, award_batch_id)
         """
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT
-                d.name,
-                ay.year,
-                at.name,
-                ab.decision_no,
-                ab.decision_date,
-                aa.name AS co_quan,
-                da.id AS department_award_id,
-                da.award_batch_id,
-                da.note
-            FROM departments d
-            JOIN department_awards da ON d.id = da.department_id
-            JOIN award_batches ab ON da.award_batch_id = ab.id
-            JOIN award_titles at ON ab.award_title_id = at.id
-            JOIN award_years ay ON ab.award_year_id = ay.id
-            LEFT JOIN award_authorities aa ON ab.authority_id = aa.id
-            WHERE d.id = ?
-            ORDER BY ay.year DESC, ab.decision_date DESC
-        ''', (department_id,))
-        rows = cur.fetchall()
-        conn.close()
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_columns(conn, "department_awards.by_department", {"owner_id": department_id, "year": year})
         return rows
 
+    def lookup_department_awards(self, department_id, year=None, order_by=None):
+        """Như lookup_staff_awards cho phòng ban"""
+        with self.get_connection(readonly=True) as conn:
+            total = repository.fetch_value(conn, "department_awards.count_by_department", (department_id,))
+            page = repository.list_page(conn, "department_awards", order_by,
+                                        {"department_id": department_id, "year": year}, limit=None)
+        return total, page.rows
+
     # ----------------------------
     # Helpful report queries
     # ----------------------------
-    def get_awards_summary_by_year(self, year):
-        """Trả về tóm tắt (số cá nhân/tập thể) cho 1 năm"""
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT ay.year,
-                SUM(CASE WHEN at.scope = 'ca_nhan' THEN 1 ELSE 0 END) as ca_nhan_count,
-                SUM(CASE WHEN at.scope = 'tap_the' THEN 1 ELSE 0 END) as tap_the_count
-            FROM award_batches ab
-            JOIN award_years ay ON ab.award_year_id = ay.id
-            JOIN award_titles at ON ab.award_title_id = at.id
-            LEFT JOIN staff_awards sa ON sa.award_batch_id = ab.id
-            LEFT JOIN department_awards da ON da.award_batch_id = ab.id
-            WHERE ay.year = ?
-            GROUP BY ay.year
-        ''', (year,))
-        rows = cur.fetchall()
-        conn.close()
+    def get_award_counts(self, dimension, year=None):
+        """
+        Số khen thưởng nhóm theo dimension ("year" | "level" | "scope" | "authority"),
+        list AwardCount(key, staff_awards, department_awards, total) - xem award_stats.award_counts
+        """
+        with self.get_connection(readonly=True) as conn:
+            rows = award_stats.award_counts(conn, dimension, year=year)
         return rows
+
+    def get_awards_summary_by_year(self, year):
+        """Trả về tóm tắt (số khen thưởng thuộc danh hiệu cá nhân / tập thể) cho 1 năm: [(year, ca_nhan, tap_the)]"""
+        by_scope = {r.key: r.total for r in self.get_award_counts("scope", year=year)}
+        if not by_scope:
+            return []
+        return [(year, by_scope.get('ca_nhan', 0), by_scope.get('tap_the', 0))]
+
     def add_sample_data(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM departments")
-        if cur.fetchone()[0] == 0:
-            sample_depts = [
-                ("Phòng Công nghệ thông tin", "Quản lý hệ thống và phát triển phần mềm"),
-                ("Phòng Nhân sự", "Quản lý nhân sự và tuyển dụng"),
-                ("Phòng Kế toán", "Quản lý tài chính và kế toán"),
-            ]
-            cur.executemany("INSERT INTO departments (name, description) VALUES (?, ?)", sample_depts)
-
-            # Thêm nhân viên mẫu (stt được tự gán bằng add_staff)
-            # để gọi add_staff với stt=None (hàm tự xử lý)
-            conn = self.get_connection()
-            conn.close()
-
-            # Thêm bản ghi award mẫu
-            conn = self.get_connection()
+        with self.get_connection() as conn:
             cur = conn.cursor()
-            cur.execute("INSERT INTO award_years (year) VALUES (2023)")
-            cur.execute("INSERT INTO award_years (year) VALUES (2024)")
-            cur.execute("INSERT INTO award_titles (name, scope) VALUES ('Chiến sĩ thi đua cơ sở', 'Cấp cơ sở')")
-            cur.execute("INSERT INTO award_titles (name, scope) VALUES ('Lao động tiên tiến', 'Cấp cơ sở')")
-            conn.commit()
-            conn.close()
-        conn.close()
+            cur.execute("SELECT COUNT(*) FROM departments")
+            if cur.fetchone()[0] == 0:
+                sample_depts = [
+                    ("Phòng Công nghệ thông tin", "Quản lý hệ thống và phát triển phần mềm"),
+                    ("Phòng Nhân sự", "Quản lý nhân sự và tuyển dụng"),
+                    ("Phòng Kế toán", "Quản lý tài chính và kế toán"),
+                ]
+                cur.executemany("INSERT INTO departments (name, description) VALUES (?, ?)", sample_depts)
+
+                # Thêm nhân viên mẫu (stt được tự gán bằng add_staff)
+                # để gọi add_staff với stt=None (hàm tự xử lý)
+
+                # Thêm bản ghi award mẫu (dùng chung kết nối: với pool, kết nối
+                # mở lồng nhau mà không close sẽ giữ khóa ghi mãi)
+                cur.execute("INSERT INTO award_years (year) VALUES (2023)")
+                cur.execute("INSERT INTO award_years (year) VALUES (2024)")
+                cur.execute("INSERT INTO award_titles (name, scope) VALUES ('Chiến sĩ thi đua cơ sở', 'Cấp cơ sở')")
+                cur.execute("INSERT INTO award_titles (name, scope) VALUES ('Lao động tiên tiến', 'Cấp cơ sở')")
+                conn.commit()
+                self._publish_reload("departments", "award_years", "award_titles")
 
     # -----------------------
     # Helpers for STT
     # -----------------------
-    def _get_next_stt_for_department(self, department_id):
-        """Trả về số STT tiếp theo cho department_id: max(stt)+1 (0 -> 1)"""
-        conn = self.get_connection()
-        cur = conn.cursor()
+    @staticmethod
+    def _begin_immediate(conn):
+        """
+        Mở giao dịch ghi ngay (BEGIN IMMEDIATE): lấy khóa ghi trước khi đọc MAX(stt), nên
+        process / kết nối khác không thể chen vào giữa lúc đọc và lúc INSERT.
+        Bỏ qua nếu kết nối đã ở trong giao dịch (gọi lồng: giao dịch ngoài đã giữ khóa).
+        """
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+
+    def _next_stt(self, cur, department_id):
+        """
+        Số STT tiếp theo cho department_id: max(stt)+1 (0 -> 1), đọc trên cursor của giao dịch
+        đang mở. Caller phải gọi _begin_immediate trước để 2 người thêm cùng lúc không nhận trùng STT.
+        """
         cur.execute("SELECT COALESCE(MAX(stt), 0) FROM staffs WHERE department_id = ?", (department_id,))
-        next_stt = cur.fetchone()[0] + 1
-        conn.close()
-        return next_stt
+        return cur.fetchone()[0] + 1
+
+    def _resequence_stt(self, cur, department_id):
+        """
+        Gán lại stt = 1..n cho nhân viên trong department theo thứ tự id, bằng 1 câu UPDATE
+        (ROW_NUMBER() OVER) trên cursor của giao dịch đang mở - caller tự commit.
+        Chỉ ghi những dòng có stt đổi (xóa người cuối danh sách: không ghi dòng nào).
+        Trả về số dòng đã đổi.
+        """
+        if sqlite3.sqlite_version_info >= (3, 33, 0):
+            cur.execute('''
+                UPDATE staffs SET stt = seq.rn
+                FROM (
+                    SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS rn
+                    FROM staffs WHERE department_id = ?
+                ) AS seq
+                WHERE staffs.id = seq.id AND staffs.stt IS NOT seq.rn
+            ''', (department_id,))
+            return cur.rowcount
+        # SQLite < 3.33 chưa có UPDATE ... FROM: tính trong Python, vẫn chỉ ghi dòng đổi
+        cur.execute("SELECT id, stt FROM staffs WHERE department_id = ? ORDER BY id", (department_id,))
+        changed = [(idx, staff_id) for idx, (staff_id, stt) in enumerate(cur.fetchall(), start=1) if stt != idx]
+        cur.executemany("UPDATE staffs SET stt = ? WHERE id = ?", changed)
+        return len(changed)
 
     def _resequence_stt_for_department(self, department_id):
         """
         Sắp lại STT cho tất cả nhân viên trong department theo thứ tự id (hoặc theo created order),
-        gán lại stt = 1..n. Gọi sau khi xóa để giữ liên tục STT trong phòng ban.
+        gán lại stt = 1..n. Dùng để sửa phòng ban bị check_stt_invariant báo sai.
+        """
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            changed = self._resequence_stt(cur, department_id)
+            conn.commit()
+            if changed:
+                self._publish_reload("staffs")
+
+    def check_stt_invariant(self, department_id=None):
+        """
+        Kiểm tra STT trong mỗi phòng ban là đúng 1..n (không trống, không trùng, không thiếu).
+        Trả về list (department_id, số nhân viên, min stt, max stt, số stt khác nhau)
+        của các phòng ban sai; list rỗng = đúng.
         """
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT id FROM staffs WHERE department_id = ? ORDER BY id", (department_id,))
-        rows = cur.fetchall()
-        for idx, (staff_id,) in enumerate(rows, start=1):
-            cur.execute("UPDATE staffs SET stt = ? WHERE id = ?", (idx, staff_id))
-        conn.commit()
-        conn.close()
+        with self.get_connection(readonly=True) as conn:
+            cur = conn.cursor()
+            where = "WHERE department_id = ?" if department_id is not None else ""
+            params = (department_id,) if department_id is not None else ()
+            cur.execute(f'''
+                SELECT department_id, COUNT(*), MIN(stt), MAX(stt), COUNT(DISTINCT stt)
+                FROM staffs
+                {where}
+                GROUP BY department_id
+                HAVING MIN(stt) != 1 OR MAX(stt) != COUNT(*) OR COUNT(DISTINCT stt) != COUNT(*)
+                    OR COUNT(stt) != COUNT(*)
+                ORDER BY department_id
+            ''', params)
+            rows = cur.fetchall()
+        return rows
 
     # -----------------------
     # Departments CRUD
     # -----------------------
     def get_all_departments(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM departments ORDER BY id")
-        rows = cur.fetchall()
-        conn.close()
+        """list Department(id, name, description)"""
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_all(conn, "departments.all")
         return rows
 
+    def get_department(self, dept_id):
+        """1 Department hoặc None"""
+        with self.get_connection(readonly=True) as conn:
+            row = repository.fetch_one(conn, "departments.get", (dept_id,))
+        return row
+
     def add_department(self, name, description):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        try:
-            cur.execute("INSERT INTO departments (name, description) VALUES (?, ?)", (name, description))
-            conn.commit()
-            conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute("INSERT INTO departments (name, description) VALUES (?, ?)", (name, description))
+                conn.commit()
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                return False
+            self._publish("departments", "insert", cur.lastrowid)
             return True
-        except sqlite3.IntegrityError:
-            conn.close()
-            return False
 
     def update_department(self, dept_id, name, description):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("UPDATE departments SET name=?, description=? WHERE id=?", (name, description, dept_id))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("UPDATE departments SET name=?, description=? WHERE id=?", (name, description, dept_id))
+            conn.commit()
+            self._publish("departments", "update", dept_id)
 
     def delete_department(self, dept_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM departments WHERE id=?", (dept_id,))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM departments WHERE id=?", (dept_id,))
+            conn.commit()
+            self._publish("departments", "delete", dept_id)
+
+    # -----------------------
+    # Danh sách phân trang (repository.LISTINGS): staffs, documents, work_histories, award_batches
+    # -----------------------
+    def list_page(self, listing, limit=100, cursor=None, order_by=None, filters=None):
+        """
+        1 trang của danh sách listing: repository.Page(rows, cursor). cursor=None -> trang đầu;
+        page.cursor=None -> đã hết. order_by / filters chỉ nhận tên có trong LISTINGS (sai -> ValueError)
+        """
+        with self.get_connection(readonly=True) as conn:
+            page = repository.list_page(conn, listing, order_by, filters, cursor, limit)
+        return page
+
+    def count_listing(self, listing, filters=None):
+        with self.get_connection(readonly=True) as conn:
+            count = repository.count_listing(conn, listing, filters)
+        return count
+
+    def listing_cursor_at(self, listing, offset, order_by=None, filters=None):
+        """cursor để list_page lấy các dòng từ vị trí offset + 1 - dùng khi nhảy tới vị trí chưa có mốc"""
+        with self.get_connection(readonly=True) as conn:
+            cursor = repository.cursor_at(conn, listing, offset, order_by, filters)
+        return cursor
+
+    def get_view_sort(self, view, listing=None, default=None):
+        """
+        Thứ tự sắp xếp đã lưu của 1 bảng (view: tên bảng trên giao diện, ví dụ "staffs", "department_members")
+        dạng tuple order_by; chưa lưu / không còn hợp lệ với LISTINGS[listing or view] -> default
+        """
+        with self.get_connection(readonly=True) as conn:
+            row = conn.execute("SELECT value FROM app_meta WHERE key = ?", (f"sort.{view}",)).fetchone()
+        if row is None or not row[0]:
+            return default
+        try:
+            return repository.order_fields(listing or view, row[0].split(","))
+        except ValueError:
+            return default
+
+    def set_view_sort(self, view, order_by):
+        """Lưu thứ tự sắp xếp của 1 bảng vào app_meta (giữ qua các lần mở app)"""
+        if isinstance(order_by, str):
+            order_by = (order_by,)
+        with self.get_connection() as conn:
+            conn.execute('''
+                INSERT INTO app_meta (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            ''', (f"sort.{view}", ",".join(order_by)))
+            conn.commit()
 
     # -----------------------
     # Staffs CRUD + helper
     # -----------------------
     def get_all_staffs(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT s.id, s.stt, s.full_name, s.position, s.phone, s.dob, d.name
-            FROM staffs s
-            LEFT JOIN departments d ON s.department_id = d.id
-            ORDER BY s.id
-        ''')
-        rows = cur.fetchall()
-        conn.close()
+        """ResultSet Staff(id, stt, full_name, position, phone, dob, department)"""
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_columns(conn, "staffs.all")
+        return rows
+
+    def count_staffs(self):
+        with self.get_connection(readonly=True) as conn:
+            count = repository.fetch_value(conn, "staffs.count")
+        return count
+
+    def get_staffs_page(self, after_id=None, limit=100):
+        """
+        Phân trang theo khóa (keyset): trả về tối đa limit nhân viên có id > after_id,
+        cùng kiểu dòng như get_all_staffs. after_id=None -> trang đầu.
+        """
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_all(conn, "staffs.page", (after_id if after_id is not None else -1, limit))
         return rows
 
+    def get_staff_key_at(self, offset):
+        """id của nhân viên ở vị trí offset (0-based, theo thứ tự id) - dùng làm mốc khi nhảy trang"""
+        with self.get_connection(readonly=True) as conn:
+            key = repository.fetch_value(conn, "staffs.key_at", (offset,))
+        return key
+
+    def list_staffs(self, limit=100, cursor=None, order_by=None, **filters):
+        """
+        1 trang nhân viên (repository.Page(rows, cursor)), lọc / sắp xếp trong SQLite.
+        order_by: id, stt, full_name, position, phone, dob, department ("-dob" = giảm dần; mặc định id)
+        filters: department_id, position (chứa chuỗi), born_from / born_to (năm sinh), awarded_since /
+        not_awarded_since (có / chưa có khen thưởng từ năm, 0 = mọi năm) - ghép nhiều bộ lọc: staff_filter.to_filters.
+        Trang tiếp: list_staffs(cursor=page.cursor, ...)
+        """
+        return self.list_page("staffs", limit, cursor, order_by, filters)
+
+    def count_staff_filter(self, flt):
+        """
+        Số nhân viên khớp StaffFilter (panel Bộ lọc) - 1 câu COUNT trên LISTINGS["staffs"]. Tổ hợp đã đếm gần đây
+        lấy từ self.staff_filters, trừ khi các bảng staff_filter.TABLES đã bị ghi sau lần đếm đó - qua
+        DatabaseManager này (phiên bản bảng) hoặc qua kết nối / tiến trình khác (_data_version).
+        """
+        flt = staff_filter.normalize(flt)
+        with self.get_connection(readonly=True) as conn:
+            data_version = self._data_version(conn)
+            versions = (self.get_table_versions(staff_filter.TABLES), data_version)
+            count = None if data_version is None else self.staff_filters.get(flt, versions)
+            if count is None:
+                count = repository.count_listing(conn, "staffs", staff_filter.to_filters(flt))
+                self.staff_filters.put(flt, versions, count)
+        return count
+
+    def _data_version(self, conn):
+        """
+        (kết nối, PRAGMA data_version): đổi khi 1 kết nối khác - kể cả client WAL khác mở cùng file - commit.
+        data_version chỉ so được trên cùng 1 kết nối nên kèm kết nối đọc của pool; không có pool thì mỗi lần là
+        kết nối mới, không so được -> None (count_staff_filter đếm lại mỗi lần)
+        """
+        if self.pool is None:
+            return None
+        return conn.connection, conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_staff_row(self, staff_id):
+        """1 Staff (như get_all_staffs) hoặc None - dùng khi cập nhật từng dòng trên bảng"""
+        with self.get_connection(readonly=True) as conn:
+            row = repository.fetch_one(conn, "staffs.get", (staff_id,))
+        return row
+
     def get_staffs_by_department(self, department_id):
-        """Trả về list nhân viên thuộc department_id (có stt)"""
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT s.id, s.stt, s.full_name, s.position, s.phone, s.dob, d.name
-            FROM staffs s
-            LEFT JOIN departments d ON s.department_id = d.id
-            WHERE s.department_id = ?
-            ORDER BY s.stt ASC
-        ''', (department_id,))
-        rows = cur.fetchall()
-        conn.close()
+        """ResultSet Staff thuộc department_id, theo stt"""
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_columns(conn, "staffs.by_department", (department_id,))
         return rows
 
-    def search_staffs_by_name(self, query):
-        """Tìm nhân sự theo tên (LIKE)"""
-        conn = self.get_connection()
-        cur = conn.cursor()
-        likeq = f"%{query}%"
-        cur.execute('''
-            SELECT s.id, s.stt, s.full_name, s.position, s.phone, s.dob, d.name
-            FROM staffs s
-            LEFT JOIN departments d ON s.department_id = d.id
-            WHERE s.full_name LIKE ?
-            ORDER BY s.id
-        ''', (likeq,))
-        rows = cur.fetchall()
-        conn.close()
+    def filter_staffs(self, department_id=None, position=None):
+        """
+        Nhân viên theo phòng ban (None = tất cả) và/hoặc vị trí chứa chuỗi position
+        (không phân biệt hoa thường với chữ không dấu). ResultSet Staff như get_all_staffs.
+        """
+        where = []
+        params = []
+        if department_id is not None:
+            where.append("s.department_id = ?")
+            params.append(department_id)
+        if position:
+            where.append("s.position LIKE ?")
+            params.append(f"%{position}%")
+        # câu ghép theo bộ lọc (giữ index theo phòng ban), cùng cột với repository.STAFF_SELECT
+        with self.get_connection(readonly=True) as conn:
+            cur = conn.cursor()
+            cur.execute(f'''{repository.STAFF_SELECT}
+                {"WHERE " + " AND ".join(where) if where else ""}
+                ORDER BY s.department_id, s.stt
+            ''', params)
+            rows = repository.ResultSet.from_cursor(repository.Staff, cur)
+        return rows
+
+    def search_staffs(self, query, limit=200):
+        """
+        Tìm nhân sự theo tên, chức vụ, số điện thoại (FTS5).
+        - Không phân biệt dấu: "nguyen van an" khớp "Nguyễn Văn An"
+        - Mỗi từ khớp theo tiền tố và phải có đủ mọi từ: "ng an" khớp "Nguyễn Văn An"
+        - Sắp xếp theo độ liên quan (bm25, khớp ở tên được ưu tiên hơn chức vụ / SĐT)
+        limit=None: trả về tất cả. Khi SQLite không có FTS5 thì dùng LIKE như cũ.
+        """
+        limit = -1 if limit is None else limit
+        if self.fts_enabled:
+            match = build_match_query(query)
+            if match is None:
+                return []
+            name, params = "staffs.search_fts", (match, limit)
+        else:
+            name, params = "staffs.search_like", {"q": f"%{query}%", "limit": limit}
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_columns(conn, name, params)
         return rows
 
+    def search_staffs_by_name(self, query):
+        """Tìm nhân sự (giữ tên cũ cho tương thích) - xem search_staffs"""
+        return self.search_staffs(query, limit=None)
+
     def add_staff(self, stt, full_name, dob, position, phone, department_id):
         """
         Thêm nhân viên. Nếu stt là None, tự gán stt = next trong phòng ban.
         (Gọi với stt=None khi người dùng không nhập STT)
         """
-        conn = self.get_connection()
-        cur = conn.cursor()
-        if stt is None:
-            stt_to_use = self._get_next_stt_for_department(department_id)
-        else:
-            stt_to_use = stt
-        cur.execute('''
-            INSERT INTO staffs (stt, full_name, dob, position, phone, department_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (stt_to_use, full_name, dob, position, phone, department_id))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            self._begin_immediate(conn)
+            if stt is None:
+                stt_to_use = self._next_stt(cur, department_id)
+            else:
+                stt_to_use = stt
+            cur.execute('''
+                INSERT INTO staffs (stt, full_name, dob, position, phone, department_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (stt_to_use, full_name, dob, position, phone, department_id))
+            conn.commit()
+            self._publish("staffs", "insert", cur.lastrowid)
+
+    def add_staffs_bulk(self, rows):
+        """
+        Thêm 1 lô nhân viên trong 1 giao dịch (1 executemany) - importer gọi cho từng lô.
+        rows: list (full_name, dob, position, phone, department_id) đã kiểm tra xong; đọc / kiểm tra file
+        phải làm trước, ngoài hàm này, để khóa ghi chỉ bị giữ trong lúc ghi lô.
+        STT: nối tiếp MAX(stt) của từng phòng ban (đọc 1 lần cho mỗi phòng, trong giao dịch
+        BEGIN IMMEDIATE nên không trùng với người đang thêm cùng lúc).
+        Lỗi -> rollback cả lô, ném lại exception. Trả về số nhân viên đã thêm.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            self._begin_immediate(conn)
+            next_stt = {}       # department_id -> stt sẽ cấp tiếp
+            batch = []
+            for full_name, dob, position, phone, department_id in rows:
+                if department_id not in next_stt:
+                    next_stt[department_id] = self._next_stt(cur, department_id)
+                batch.append((next_stt[department_id], full_name, dob, position, phone, department_id))
+                next_stt[department_id] += 1
+            cur.executemany('''
+                INSERT INTO staffs (stt, full_name, dob, position, phone, department_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', batch)
+            conn.commit()
+        self._publish_reload("staffs")
+        return len(batch)
 
     def update_staff(self, staff_id, stt, full_name, dob, position, phone, department_id):
         """
@@ -566,164 +1127,133 @@ class DatabaseManager:
         - Nếu stt là None: không thay đổi stt hiện tại.
         - Nếu thay đổi department, ta set stt mới tự động (append) và resequence phòng cũ.
         """
-        conn = self.get_connection()
-        cur = conn.cursor()
-
-        # Lấy department cũ của staff
-        cur.execute("SELECT department_id FROM staffs WHERE id = ?", (staff_id,))
-        row = cur.fetchone()
-        old_dept = row[0] if row else None
-
-        # Nếu department_id thay đổi và stt không được cung cấp -> gán stt mới cho phòng mới
-        if old_dept is not None and old_dept != department_id:
-            # cập nhật rồi resequence phòng cũ
-            # set stt mới cho staff khi chuyển phòng
-            new_stt = self._get_next_stt_for_department(department_id) if stt is None else stt
-            cur.execute('''
-                UPDATE staffs SET stt=?, full_name=?, dob=?, position=?, phone=?, department_id=?
-                WHERE id=?
-            ''', (new_stt, full_name, dob, position, phone, department_id, staff_id))
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            self._begin_immediate(conn)
+
+            # Lấy department cũ của staff
+            cur.execute("SELECT department_id FROM staffs WHERE id = ?", (staff_id,))
+            row = cur.fetchone()
+            old_dept = row[0] if row else None
+
+            # Nếu department_id thay đổi và stt không được cung cấp -> gán stt mới cho phòng mới
+            if old_dept is not None and old_dept != department_id:
+                # cập nhật rồi resequence phòng cũ
+                # set stt mới cho staff khi chuyển phòng
+                new_stt = self._next_stt(cur, department_id) if stt is None else stt
+                cur.execute('''
+                    UPDATE staffs SET stt=?, full_name=?, dob=?, position=?, phone=?, department_id=?
+                    WHERE id=?
+                ''', (new_stt, full_name, dob, position, phone, department_id, staff_id))
+                # resequence phòng cũ trong cùng giao dịch
+                changed = self._resequence_stt(cur, old_dept)
+                conn.commit()
+                self._publish("staffs", "update", staff_id)
+                if changed:
+                    self._publish_reload("staffs")
+                return
+
+            # Nếu stt provided not None -> set it, else preserve current stt
+            if stt is None:
+                # preserve current stt
+                cur.execute('''
+                    UPDATE staffs SET full_name=?, dob=?, position=?, phone=?, department_id=?
+                    WHERE id=?
+                ''', (full_name, dob, position, phone, department_id, staff_id))
+            else:
+                cur.execute('''
+                    UPDATE staffs SET stt=?, full_name=?, dob=?, position=?, phone=?, department_id=?
+                    WHERE id=?
+                ''', (stt, full_name, dob, position, phone, department_id, staff_id))
             conn.commit()
-            # resequence phòng cũ
-            self._resequence_stt_for_department(old_dept)
-            conn.close()
-            return
-
-        # Nếu stt provided not None -> set it, else preserve current stt
-        if stt is None:
-            # preserve current stt
-            cur.execute('''
-                UPDATE staffs SET full_name=?, dob=?, position=?, phone=?, department_id=?
-                WHERE id=?
-            ''', (full_name, dob, position, phone, department_id, staff_id))
-        else:
-            cur.execute('''
-                UPDATE staffs SET stt=?, full_name=?, dob=?, position=?, phone=?, department_id=?
-                WHERE id=?
-            ''', (stt, full_name, dob, position, phone, department_id, staff_id))
-        conn.commit()
-        conn.close()
+            self._publish("staffs", "update", staff_id)
 
     def delete_staff(self, staff_id):
         """
         Xóa staff, sau đó resequence stt cho phòng ban tương ứng để đảm bảo stt là 1..n
+        (cùng 1 giao dịch với lệnh xóa)
         """
-        # Lấy department trước khi xóa
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT department_id FROM staffs WHERE id = ?", (staff_id,))
-        row = cur.fetchone()
-        dept_id = row[0] if row else None
-
-        cur.execute("DELETE FROM staffs WHERE id=?", (staff_id,))
-        conn.commit()
-        conn.close()
-
-        if dept_id is not None:
-            # resequence
-            self._resequence_stt_for_department(dept_id)
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            self._begin_immediate(conn)
+            # Lấy department trước khi xóa
+            cur.execute("SELECT department_id FROM staffs WHERE id = ?", (staff_id,))
+            row = cur.fetchone()
+            dept_id = row[0] if row else None
+
+            cur.execute("DELETE FROM staffs WHERE id=?", (staff_id,))
+            changed = self._resequence_stt(cur, dept_id) if dept_id is not None else 0
+            conn.commit()
+            self._publish("staffs", "delete", staff_id)
+            if changed:
+                self._publish_reload("staffs")
 
     # -----------------------
-    # Award methods (unchanged)
+    # Documents methods (unchanged)
     # -----------------------
-    def get_all_award_years(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM award_years ORDER BY year DESC")
-        rows = cur.fetchall()
-        conn.close()
+    def get_all_documents(self):
+        """ResultSet Document(id, staff_name, loai_ho_so, so_va_ky_hieu, ngay_thang, file_url)"""
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_columns(conn, "documents.all")
         return rows
 
-    def add_award_year(self, year):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        try:
-            cur.execute("INSERT INTO award_years (year) VALUES (?)", (year,))
-            conn.commit()
-            conn.close()
-            return True
-        except sqlite3.IntegrityError:
-            conn.close()
-            return False
+    def count_documents(self):
+        with self.get_connection(readonly=True) as conn:
+            count = repository.fetch_value(conn, "documents.count")
+        return count
 
-    def get_all_award_titles(self):
-        """Trả về id, name, scope, level"""
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT id, name, scope, level FROM award_titles ORDER BY id")
-        rows = cur.fetchall()
-        conn.close()
+    def get_documents_page(self, after_id=None, limit=100):
+        """Phân trang keyset cho get_all_documents (id > after_id)"""
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_all(conn, "documents.page", (after_id if after_id is not None else -1, limit))
         return rows
 
-    def add_award_title(self, name, scope, level):
+    def get_document_key_at(self, offset):
+        with self.get_connection(readonly=True) as conn:
+            key = repository.fetch_value(conn, "documents.key_at", (offset,))
+        return key
+
+    def list_documents(self, limit=100, cursor=None, order_by=None, **filters):
         """
-        Thêm 1 danh hiệu khen thưởng.
-        - name: tên danh hiệu
-        - scope: 'ca_nhan' hoặc 'tap_the'
-        - level: 'co_so' | 'tinh' | 'trung_uong'
+        1 trang văn bản (Page), như list_staffs.
+        order_by: id, staff_name, loai_ho_so, so_va_ky_hieu, ngay_thang, file_url; filters: staff_id, loai_ho_so
         """
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("INSERT INTO award_titles (name, scope, level) VALUES (?, ?, ?)", (name, scope, level))
-        conn.commit()
-        conn.close()
-        # -----------------------
-    # Documents methods (unchanged)
-    # -----------------------
-    def get_all_documents(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT d.id, s.full_name, d.loai_ho_so, d.so_va_ky_hieu, d.ngay_thang, d.file_url
-            FROM documents d
-            LEFT JOIN staffs s ON d.staff_id = s.id
-            ORDER BY d.id
-        ''')
-        rows = cur.fetchall()
-        conn.close()
-        return rows
+        return self.list_page("documents", limit, cursor, order_by, filters)
 
     def get_documents_by_staff(self, staff_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT id, loai_ho_so, so_va_ky_hieu, ngay_thang, ten_loai_trich_yeu_noi_dung, so_to, ghi_chu, file_url, created_at
-            FROM documents
-            WHERE staff_id = ?
-            ORDER BY created_at DESC
-        ''', (staff_id,))
-        rows = cur.fetchall()
-        conn.close()
+        """ResultSet StaffDocument của 1 nhân viên, mới nhất trước"""
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_columns(conn, "documents.by_staff", (staff_id,))
         return rows
 
     def add_document(self, staff_id, loai_ho_so, so_va_ky_hieu, ngay_thang, ten_loai, so_to, ghi_chu, file_url):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            INSERT INTO documents (staff_id, loai_ho_so, so_va_ky_hieu, ngay_thang,
-                                   ten_loai_trich_yeu_noi_dung, so_to, ghi_chu, file_url)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (staff_id, loai_ho_so, so_va_ky_hieu, ngay_thang, ten_loai, so_to, ghi_chu, file_url))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                INSERT INTO documents (staff_id, loai_ho_so, so_va_ky_hieu, ngay_thang,
+                                       ten_loai_trich_yeu_noi_dung, so_to, ghi_chu, file_url)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (staff_id, loai_ho_so, so_va_ky_hieu, ngay_thang, ten_loai, so_to, ghi_chu, file_url))
+            conn.commit()
+            self._publish("documents", "insert", cur.lastrowid)
 
     def update_document(self, doc_id, loai_ho_so, so_va_ky_hieu, ngay_thang, ten_loai, so_to, ghi_chu, file_url):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            UPDATE documents
-            SET loai_ho_so = ?, so_va_ky_hieu = ?, ngay_thang = ?, ten_loai_trich_yeu_noi_dung = ?, so_to = ?, ghi_chu = ?, file_url = ?
-            WHERE id = ?
-        ''', (loai_ho_so, so_va_ky_hieu, ngay_thang, ten_loai, so_to, ghi_chu, file_url, doc_id))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                UPDATE documents
+                SET loai_ho_so = ?, so_va_ky_hieu = ?, ngay_thang = ?, ten_loai_trich_yeu_noi_dung = ?, so_to = ?, ghi_chu = ?, file_url = ?
+                WHERE id = ?
+            ''', (loai_ho_so, so_va_ky_hieu, ngay_thang, ten_loai, so_to, ghi_chu, file_url, doc_id))
+            conn.commit()
+            self._publish("documents", "update", doc_id)
 
     def delete_document(self, doc_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            conn.commit()
+            self._publish("documents", "delete", doc_id)
      # -----------------------
     # Work histories (Quá trình công tác) CRUD
     # -----------------------
@@ -732,350 +1262,372 @@ class DatabaseManager:
         Thêm bản ghi quá trình công tác cho staff_id.
         Các trường ngày có thể lưu dạng text 'YYYY-MM-DD' hoặc định dạng khác tuỳ bạn.
         """
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            INSERT INTO work_histories (staff_id, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (staff_id, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                INSERT INTO work_histories (staff_id, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (staff_id, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu))
+            conn.commit()
+            self._publish("work_histories", "insert", cur.lastrowid)
 
     def get_work_histories_by_staff(self, staff_id):
         """
-        Trả về tất cả bản ghi work_histories của 1 nhân viên (staff_id).
-        Kết quả: list các tuple (id, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu)
+        Trả về tất cả bản ghi work_histories của 1 nhân viên (staff_id), mới nhất trước.
+        Kết quả: ResultSet WorkHistory như get_all_work_histories
         """
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT id, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu
-            FROM work_histories
-            WHERE staff_id = ?
-            ORDER BY id DESC
-        ''', (staff_id,))
-        rows = cur.fetchall()
-        conn.close()
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_columns(conn, "work_histories.by_staff", (staff_id,))
         return rows
 
     def get_all_work_histories(self):
         """
         Trả về tất cả work histories, kèm tên nhân viên và id nhân viên để hiển thị ở view chung.
-        Kết quả: (wh.id, s.full_name, wh.decision_no, wh.ngay_quyet_dinh, ...)
+        Kết quả: ResultSet WorkHistory(id, staff_name, decision_no, ngay_quyet_dinh, ..., staff_id)
         """
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT wh.id, s.full_name, wh.decision_no, wh.ngay_quyet_dinh, wh.cac_vi_tri_cong_tac, wh.giu_chuc_vu, wh.cong_tac_tai_cq, wh.ghi_chu, wh.staff_id
-            FROM work_histories wh
-            LEFT JOIN staffs s ON wh.staff_id = s.id
-            ORDER BY wh.id DESC
-        ''')
-        rows = cur.fetchall()
-        conn.close()
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_columns(conn, "work_histories.all")
         return rows
 
+    def get_work_history_row(self, wh_id):
+        """1 WorkHistory (như get_all_work_histories) hoặc None"""
+        with self.get_connection(readonly=True) as conn:
+            row = repository.fetch_one(conn, "work_histories.get", (wh_id,))
+        return row
+
+    def count_work_histories(self):
+        with self.get_connection(readonly=True) as conn:
+            count = repository.fetch_value(conn, "work_histories.count")
+        return count
+
+    def get_work_histories_page(self, after_id=None, limit=100):
+        """
+        Phân trang keyset cho get_all_work_histories. Danh sách sắp theo id giảm dần
+        nên trang tiếp theo là các bản ghi có id < after_id.
+        """
+        with self.get_connection(readonly=True) as conn:
+            rows = repository.fetch_all(conn, "work_histories.page",
+                                        (after_id if after_id is not None else 2**63 - 1, limit))
+        return rows
+
+    def get_work_history_key_at(self, offset):
+        with self.get_connection(readonly=True) as conn:
+            key = repository.fetch_value(conn, "work_histories.key_at", (offset,))
+        return key
+
+    def list_work_histories(self, limit=100, cursor=None, order_by=None, **filters):
+        """
+        1 trang quá trình công tác (Page), như list_staffs. Mặc định "-id" (mới nhất trước).
+        order_by: id, staff_name, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu,
+        cong_tac_tai_cq, ghi_chu; filters: staff_id
+        """
+        return self.list_page("work_histories", limit, cursor, order_by, filters)
+
     def update_work_history(self, wh_id, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            UPDATE work_histories
-            SET decision_no = ?, ngay_quyet_dinh = ?, cac_vi_tri_cong_tac = ?, giu_chuc_vu = ?, cong_tac_tai_cq = ?, ghi_chu = ?
-            WHERE id = ?
-        ''', (decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu, wh_id))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                UPDATE work_histories
+                SET decision_no = ?, ngay_quyet_dinh = ?, cac_vi_tri_cong_tac = ?, giu_chuc_vu = ?, cong_tac_tai_cq = ?, ghi_chu = ?
+                WHERE id = ?
+            ''', (decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu, wh_id))
+            conn.commit()
+            self._publish("work_histories", "update", wh_id)
 
     def delete_work_history(self, wh_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM work_histories WHERE id = ?", (wh_id,))
-        conn.commit()
-        conn.close()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM work_histories WHERE id = ?", (wh_id,))
+            conn.commit()
+            self._publish("work_histories", "delete", wh_id)
 
     # -----------------------
     # Statistics
     # -----------------------
     def get_statistics(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM departments")
-        dept_count = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(*) FROM staffs")
-        staff_count = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(*) FROM staff_awards")
-        award_count = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(*) FROM documents")
-        doc_count = cur.fetchone()[0]
-        conn.close()
-        return dept_count, staff_count, award_count, doc_count
-    
+        """(số phòng ban, nhân sự, khen thưởng cá nhân, văn bản) - đọc từ stats_counters"""
+        counters = self._get_counters()
+        return (counters.get("departments", 0), counters.get("staffs", 0),
+                counters.get("staff_awards", 0), counters.get("documents", 0))
+
+    def get_award_statistics(self):
+        """Thống kê cho trang khen thưởng: số đợt, KT cá nhân, KT tập thể, danh hiệu"""
+        counters = self._get_counters()
+        return {
+            'batches': counters.get("award_batches", 0),
+            'staff_awards': counters.get("staff_awards", 0),
+            'dept_awards': counters.get("department_awards", 0),
+            'titles': counters.get("award_titles", 0),
+        }
+
+    def _get_counters(self):
+        with self.get_connection(readonly=True) as conn:
+            counters = dict(repository.fetch_all(conn, "stats_counters.all"))
+        return counters
+
     # -----------------------
     # Sample Data Ensurance
     # -----------------------
     def _ensure_complete_sample_data(self):
         """Thêm dữ liệu mẫu đầy đủ cho tất cả các bảng"""
-        conn = self.get_connection()
-        cur = conn.cursor()
+        with self.get_connection() as conn:
+            cur = conn.cursor()
         
-        # 1. Kiểm tra và thêm Departments
-        cur.execute("SELECT COUNT(*) FROM departments")
-        if cur.fetchone()[0] == 0:
-            departments = [
-                ("Phòng Công nghệ thông tin", "Quản lý hệ thống và phát triển phần mềm"),
-                ("Phòng Nhân sự", "Quản lý nhân sự và tuyển dụng"),
-                ("Phòng Kế toán", "Quản lý tài chính và kế toán"),
-                ("Phòng Hành chính", "Quản lý hành chính tổng hợp"),
-                ("Phòng Kinh doanh", "Phát triển kinh doanh và chăm sóc khách hàng"),
-            ]
-            cur.executemany("INSERT INTO departments (name, description) VALUES (?, ?)", departments)
-            print("✓ Đã thêm 5 phòng ban mẫu")
-
-        # 2. Kiểm tra và thêm Award Years
-        cur.execute("SELECT COUNT(*) FROM award_years")
-        if cur.fetchone()[0] == 0:
-            years = [(2020,), (2021,), (2022,), (2023,), (2024,), (2025,)]
-            cur.executemany("INSERT INTO award_years (year) VALUES (?)", years)
-            print("✓ Đã thêm năm khen thưởng 2020-2025")
-
-        # 3. Kiểm tra và thêm Award Authorities
-        cur.execute("SELECT COUNT(*) FROM award_authorities")
-        if cur.fetchone()[0] == 0:
-            authorities = [
-                ("UBND Thành phố",),
-                ("Sở Nội vụ",),
-                ("Ban Tổ chức Tỉnh ủy",),
-                ("Bộ Nội vụ",),
-                ("Thủ tướng Chính phủ",),
-            ]
-            cur.executemany("INSERT INTO award_authorities (name) VALUES (?)", authorities)
-            print("✓ Đã thêm 5 cơ quan ban hành")
-
-        # 4. Kiểm tra và thêm Award Titles
-        cur.execute("SELECT COUNT(*) FROM award_titles")
-        if cur.fetchone()[0] == 0:
-            titles = [
-                # Cá nhân - Cơ sở
-                ("Lao động tiên tiến", "ca_nhan", "co_so"),
-                ("Chiến sĩ thi đua cơ sở", "ca_nhan", "co_so"),
-                ("Hoàn thành xuất sắc nhiệm vụ", "ca_nhan", "co_so"),
-                # Cá nhân - Tỉnh
-                ("Chiến sĩ thi đua cấp tỉnh", "ca_nhan", "tinh"),
-                ("Bằng khen UBND Tỉnh", "ca_nhan", "tinh"),
-                # Cá nhân - Trung ương
-                ("Chiến sĩ thi đua toàn quốc", "ca_nhan", "trung_uong"),
-                ("Huân chương Lao động hạng Ba", "ca_nhan", "trung_uong"),
-                ("Bằng khen Thủ tướng Chính phủ", "ca_nhan", "trung_uong"),
-                # Tập thể - Cơ sở
-                ("Tập thể lao động tiên tiến", "tap_the", "co_so"),
-                ("Tập thể xuất sắc", "tap_the", "co_so"),
-                # Tập thể - Tỉnh
-                ("Cờ thi đua cấp tỉnh", "tap_the", "tinh"),
-                ("Bằng khen UBND Tỉnh (Tập thể)", "tap_the", "tinh"),
-                # Tập thể - Trung ương
-                ("Cờ thi đua của Chính phủ", "tap_the", "trung_uong"),
-                ("Huân chương Lao động hạng Ba (Tập thể)", "tap_the", "trung_uong"),
-            ]
-            cur.executemany("INSERT INTO award_titles (name, scope, level) VALUES (?, ?, ?)", titles)
-            print("✓ Đã thêm 14 danh hiệu khen thưởng")
-
-        conn.commit()
-
-        # 5. Kiểm tra và thêm Staffs
-        cur.execute("SELECT COUNT(*) FROM staffs")
-        if cur.fetchone()[0] == 0:
-            # Lấy danh sách department_id
-            cur.execute("SELECT id FROM departments ORDER BY id")
-            dept_ids = [row[0] for row in cur.fetchall()]
+            # 1. Kiểm tra và thêm Departments
+            cur.execute("SELECT COUNT(*) FROM departments")
+            if cur.fetchone()[0] == 0:
+                departments = [
+                    ("Phòng Công nghệ thông tin", "Quản lý hệ thống và phát triển phần mềm"),
+                    ("Phòng Nhân sự", "Quản lý nhân sự và tuyển dụng"),
+                    ("Phòng Kế toán", "Quản lý tài chính và kế toán"),
+                    ("Phòng Hành chính", "Quản lý hành chính tổng hợp"),
+                    ("Phòng Kinh doanh", "Phát triển kinh doanh và chăm sóc khách hàng"),
+                ]
+                cur.executemany("INSERT INTO departments (name, description) VALUES (?, ?)", departments)
+                print("✓ Đã thêm 5 phòng ban mẫu")
+
+            # 2. Kiểm tra và thêm Award Years
+            cur.execute("SELECT COUNT(*) FROM award_years")
+            if cur.fetchone()[0] == 0:
+                years = [(2020,), (2021,), (2022,), (2023,), (2024,), (2025,)]
+                cur.executemany("INSERT INTO award_years (year) VALUES (?)", years)
+                print("✓ Đã thêm năm khen thưởng 2020-2025")
+
+            # 3. Kiểm tra và thêm Award Authorities
+            cur.execute("SELECT COUNT(*) FROM award_authorities")
+            if cur.fetchone()[0] == 0:
+                authorities = [
+                    ("UBND Thành phố",),
+                    ("Sở Nội vụ",),
+                    ("Ban Tổ chức Tỉnh ủy",),
+                    ("Bộ Nội vụ",),
+                    ("Thủ tướng Chính phủ",),
+                ]
+                cur.executemany("INSERT INTO award_authorities (name) VALUES (?)", authorities)
+                print("✓ Đã thêm 5 cơ quan ban hành")
+
+            # 4. Kiểm tra và thêm Award Titles
+            cur.execute("SELECT COUNT(*) FROM award_titles")
+            if cur.fetchone()[0] == 0:
+                titles = [
+                    # Cá nhân - Cơ sở
+                    ("Lao động tiên tiến", "ca_nhan", "co_so"),
+                    ("Chiến sĩ thi đua cơ sở", "ca_nhan", "co_so"),
+                    ("Hoàn thành xuất sắc nhiệm vụ", "ca_nhan", "co_so"),
+                    # Cá nhân - Tỉnh
+                    ("Chiến sĩ thi đua cấp tỉnh", "ca_nhan", "tinh"),
+                    ("Bằng khen UBND Tỉnh", "ca_nhan", "tinh"),
+                    # Cá nhân - Trung ương
+                    ("Chiến sĩ thi đua toàn quốc", "ca_nhan", "trung_uong"),
+                    ("Huân chương Lao động hạng Ba", "ca_nhan", "trung_uong"),
+                    ("Bằng khen Thủ tướng Chính phủ", "ca_nhan", "trung_uong"),
+                    # Tập thể - Cơ sở
+                    ("Tập thể lao động tiên tiến", "tap_the", "co_so"),
+                    ("Tập thể xuất sắc", "tap_the", "co_so"),
+                    # Tập thể - Tỉnh
+                    ("Cờ thi đua cấp tỉnh", "tap_the", "tinh"),
+                    ("Bằng khen UBND Tỉnh (Tập thể)", "tap_the", "tinh"),
+                    # Tập thể - Trung ương
+                    ("Cờ thi đua của Chính phủ", "tap_the", "trung_uong"),
+                    ("Huân chương Lao động hạng Ba (Tập thể)", "tap_the", "trung_uong"),
+                ]
+                cur.executemany("INSERT INTO award_titles (name, scope, level) VALUES (?, ?, ?)", titles)
+                print("✓ Đã thêm 14 danh hiệu khen thưởng")
+
+            conn.commit()
+
+            # 5. Kiểm tra và thêm Staffs
+            cur.execute("SELECT COUNT(*) FROM staffs")
+            if cur.fetchone()[0] == 0:
+                # Lấy danh sách department_id
+                cur.execute("SELECT id FROM departments ORDER BY id")
+                dept_ids = [row[0] for row in cur.fetchall()]
             
-            staff_data = [
-                # Phòng IT (dept 1)
-                (1, "Nguyễn Văn An", "1985-03-15", "Trưởng phòng", "0901234567", dept_ids[0]),
-                (2, "Trần Thị Bích", "1990-07-22", "Lập trình viên", "0902345678", dept_ids[0]),
-                (3, "Lê Văn Cường", "1992-11-08", "Lập trình viên", "0903456789", dept_ids[0]),
-                (4, "Phạm Thị Dung", "1988-05-12", "System Admin", "0904567890", dept_ids[0]),
-                # Phòng Nhân sự (dept 2)
-                (1, "Hoàng Văn Em", "1987-09-25", "Trưởng phòng", "0905678901", dept_ids[1]),
-                (2, "Đỗ Thị Phượng", "1991-02-14", "Chuyên viên", "0906789012", dept_ids[1]),
-                (3, "Vũ Văn Giang", "1993-06-30", "Chuyên viên", "0907890123", dept_ids[1]),
-                # Phòng Kế toán (dept 3)
-                (1, "Ngô Thị Hoa", "1986-12-05", "Trưởng phòng", "0908901234", dept_ids[2]),
-                (2, "Bùi Văn Ích", "1989-08-18", "Kế toán trưởng", "0909012345", dept_ids[2]),
-                (3, "Đinh Thị Kim", "1994-04-27", "Kế toán viên", "0900123456", dept_ids[2]),
-                # Phòng Hành chính (dept 4)
-                (1, "Trương Văn Long", "1984-10-11", "Trưởng phòng", "0911234567", dept_ids[3]),
-                (2, "Phan Thị Mai", "1992-01-20", "Văn thư", "0912345678", dept_ids[3]),
-                # Phòng Kinh doanh (dept 5)
-                (1, "Lý Văn Nam", "1988-07-09", "Trưởng phòng", "0913456789", dept_ids[4]),
-                (2, "Cao Thị Oanh", "1991-03-16", "Nhân viên kinh doanh", "0914567890", dept_ids[4]),
-                (3, "Đặng Văn Phúc", "1995-09-23", "Nhân viên kinh doanh", "0915678901", dept_ids[4]),
-            ]
+                staff_data = [
+                    # Phòng IT (dept 1)
+                    (1, "Nguyễn Văn An", "1985-03-15", "Trưởng phòng", "0901234567", dept_ids[0]),
+                    (2, "Trần Thị Bích", "1990-07-22", "Lập trình viên", "0902345678", dept_ids[0]),
+                    (3, "Lê Văn Cường", "1992-11-08", "Lập trình viên", "0903456789", dept_ids[0]),
+                    (4, "Phạm Thị Dung", "1988-05-12", "System Admin", "0904567890", dept_ids[0]),
+                    # Phòng Nhân sự (dept 2)
+                    (1, "Hoàng Văn Em", "1987-09-25", "Trưởng phòng", "0905678901", dept_ids[1]),
+                    (2, "Đỗ Thị Phượng", "1991-02-14", "Chuyên viên", "0906789012", dept_ids[1]),
+                    (3, "Vũ Văn Giang", "1993-06-30", "Chuyên viên", "0907890123", dept_ids[1]),
+                    # Phòng Kế toán (dept 3)
+                    (1, "Ngô Thị Hoa", "1986-12-05", "Trưởng phòng", "0908901234", dept_ids[2]),
+                    (2, "Bùi Văn Ích", "1989-08-18", "Kế toán trưởng", "0909012345", dept_ids[2]),
+                    (3, "Đinh Thị Kim", "1994-04-27", "Kế toán viên", "0900123456", dept_ids[2]),
+                    # Phòng Hành chính (dept 4)
+                    (1, "Trương Văn Long", "1984-10-11", "Trưởng phòng", "0911234567", dept_ids[3]),
+                    (2, "Phan Thị Mai", "1992-01-20", "Văn thư", "0912345678", dept_ids[3]),
+                    # Phòng Kinh doanh (dept 5)
+                    (1, "Lý Văn Nam", "1988-07-09", "Trưởng phòng", "0913456789", dept_ids[4]),
+                    (2, "Cao Thị Oanh", "1991-03-16", "Nhân viên kinh doanh", "0914567890", dept_ids[4]),
+                    (3, "Đặng Văn Phúc", "1995-09-23", "Nhân viên kinh doanh", "0915678901", dept_ids[4]),
+                ]
             
-            cur.executemany('''
-                INSERT INTO staffs (stt, full_name, dob, position, phone, department_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', staff_data)
-            print("✓ Đã thêm 15 nhân viên mẫu")
+                cur.executemany('''
+                    INSERT INTO staffs (stt, full_name, dob, position, phone, department_id)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', staff_data)
+                print("✓ Đã thêm 15 nhân viên mẫu")
 
-        conn.commit()
+            conn.commit()
 
-        # 6. Kiểm tra và thêm Award Batches
-        cur.execute("SELECT COUNT(*) FROM award_batches")
-        if cur.fetchone()[0] == 0:
-            # Lấy IDs
-            cur.execute("SELECT id FROM award_years ORDER BY year DESC")
-            year_ids = [row[0] for row in cur.fetchall()]
+            # 6. Kiểm tra và thêm Award Batches
+            cur.execute("SELECT COUNT(*) FROM award_batches")
+            if cur.fetchone()[0] == 0:
+                # Lấy IDs
+                cur.execute("SELECT id FROM award_years ORDER BY year DESC")
+                year_ids = [row[0] for row in cur.fetchall()]
             
-            cur.execute("SELECT id FROM award_titles")
-            title_ids = [row[0] for row in cur.fetchall()]
+                cur.execute("SELECT id FROM award_titles")
+                title_ids = [row[0] for row in cur.fetchall()]
             
-            cur.execute("SELECT id FROM award_authorities")
-            auth_ids = [row[0] for row in cur.fetchall()]
+                cur.execute("SELECT id FROM award_authorities")
+                auth_ids = [row[0] for row in cur.fetchall()]
             
-            # Tạo các đợt khen thưởng (20 đợt)
-            batches = []
-            for i in range(20):
-                year_id = random.choice(year_ids)
-                title_id = random.choice(title_ids)
-                auth_id = random.choice(auth_ids)
+                # Tạo các đợt khen thưởng (20 đợt)
+                batches = []
+                for i in range(20):
+                    year_id = random.choice(year_ids)
+                    title_id = random.choice(title_ids)
+                    auth_id = random.choice(auth_ids)
                 
-                # Tạo ngày quyết định ngẫu nhiên
-                base_date = datetime(2020, 1, 1)
-                random_days = random.randint(0, 1825)  # 5 years
-                decision_date = (base_date + timedelta(days=random_days)).strftime("%Y-%m-%d")
+                    # Tạo ngày quyết định ngẫu nhiên
+                    base_date = datetime(2020, 1, 1)
+                    random_days = random.randint(0, 1825)  # 5 years
+                    decision_date = (base_date + timedelta(days=random_days)).strftime("%Y-%m-%d")
                 
-                decision_no = f"QD-{1000 + i}/2024"
-                note = f"Đợt khen thưởng lần {i+1}"
+                    decision_no = f"QD-{1000 + i}/2024"
+                    note = f"Đợt khen thưởng lần {i+1}"
                 
-                batches.append((year_id, title_id, auth_id, decision_no, decision_date, note))
+                    batches.append((year_id, title_id, auth_id, decision_no, decision_date, note))
             
-            cur.executemany('''
-                INSERT INTO award_batches (award_year_id, award_title_id, authority_id, decision_no, decision_date, note)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', batches)
-            print("✓ Đã thêm 20 đợt khen thưởng")
+                cur.executemany('''
+                    INSERT INTO award_batches (award_year_id, award_title_id, authority_id, decision_no, decision_date, note)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', batches)
+                print("✓ Đã thêm 20 đợt khen thưởng")
 
-        conn.commit()
+            conn.commit()
 
-        # 7. Kiểm tra và thêm Staff Awards
-        cur.execute("SELECT COUNT(*) FROM staff_awards")
-        if cur.fetchone()[0] == 0:
-            cur.execute("SELECT id FROM staffs")
-            staff_ids = [row[0] for row in cur.fetchall()]
+            # 7. Kiểm tra và thêm Staff Awards
+            cur.execute("SELECT COUNT(*) FROM staff_awards")
+            if cur.fetchone()[0] == 0:
+                cur.execute("SELECT id FROM staffs")
+                staff_ids = [row[0] for row in cur.fetchall()]
             
-            cur.execute("SELECT id FROM award_batches")
-            batch_ids = [row[0] for row in cur.fetchall()]
+                cur.execute("SELECT id FROM award_batches")
+                batch_ids = [row[0] for row in cur.fetchall()]
             
-            # Tạo 30 khen thưởng cá nhân ngẫu nhiên
-            staff_awards = []
-            for _ in range(30):
-                staff_id = random.choice(staff_ids)
-                batch_id = random.choice(batch_ids)
-                note = random.choice([
-                    "Hoàn thành xuất sắc nhiệm vụ",
-                    "Có nhiều đóng góp cho đơn vị",
-                    "Gương mẫu, tận tụy",
-                    "",
-                ])
-                staff_awards.append((staff_id, batch_id, note))
+                # Tạo 30 khen thưởng cá nhân ngẫu nhiên (30 cặp nhân viên - đợt khác nhau)
+                staff_awards = []
+                pairs = [(s_id, b_id) for s_id in staff_ids for b_id in batch_ids]
+                for staff_id, batch_id in random.sample(pairs, min(30, len(pairs))):
+                    note = random.choice([
+                        "Hoàn thành xuất sắc nhiệm vụ",
+                        "Có nhiều đóng góp cho đơn vị",
+                        "Gương mẫu, tận tụy",
+                        "",
+                    ])
+                    staff_awards.append((staff_id, batch_id, note))
             
-            cur.executemany('''
-                INSERT INTO staff_awards (staff_id, award_batch_id, note)
-                VALUES (?, ?, ?)
-            ''', staff_awards)
-            print("✓ Đã thêm 30 khen thưởng cá nhân")
-
-        conn.commit()
-
-        # 8. Kiểm tra và thêm Department Awards
-        cur.execute("SELECT COUNT(*) FROM department_awards")
-        if cur.fetchone()[0] == 0:
-            cur.execute("SELECT id FROM departments")
-            dept_ids = [row[0] for row in cur.fetchall()]
+                cur.executemany('''
+                    INSERT INTO staff_awards (staff_id, award_batch_id, note)
+                    VALUES (?, ?, ?)
+                ''', staff_awards)
+                print("✓ Đã thêm 30 khen thưởng cá nhân")
+
+            conn.commit()
+
+            # 8. Kiểm tra và thêm Department Awards
+            cur.execute("SELECT COUNT(*) FROM department_awards")
+            if cur.fetchone()[0] == 0:
+                cur.execute("SELECT id FROM departments")
+                dept_ids = [row[0] for row in cur.fetchall()]
             
-            cur.execute("SELECT id FROM award_batches")
-            batch_ids = [row[0] for row in cur.fetchall()]
+                cur.execute("SELECT id FROM award_batches")
+                batch_ids = [row[0] for row in cur.fetchall()]
             
-            # Tạo 15 khen thưởng tập thể
-            dept_awards = []
-            for _ in range(15):
-                dept_id = random.choice(dept_ids)
-                batch_id = random.choice(batch_ids)
-                note = random.choice([
-                    "Tập thể hoàn thành xuất sắc nhiệm vụ năm",
-                    "Đơn vị dẫn đầu phong trào thi đua",
-                    "Có nhiều thành tích nổi bật",
-                    "",
-                ])
-                dept_awards.append((dept_id, batch_id, note))
+                # Tạo 15 khen thưởng tập thể (15 cặp phòng ban - đợt khác nhau)
+                dept_awards = []
+                pairs = [(d_id, b_id) for d_id in dept_ids for b_id in batch_ids]
+                for dept_id, batch_id in random.sample(pairs, min(15, len(pairs))):
+                    note = random.choice([
+                        "Tập thể hoàn thành xuất sắc nhiệm vụ năm",
+                        "Đơn vị dẫn đầu phong trào thi đua",
+                        "Có nhiều thành tích nổi bật",
+                        "",
+                    ])
+                    dept_awards.append((dept_id, batch_id, note))
             
-            cur.executemany('''
-                INSERT INTO department_awards (department_id, award_batch_id, note)
-                VALUES (?, ?, ?)
-            ''', dept_awards)
-            print("✓ Đã thêm 15 khen thưởng tập thể")
-
-        conn.commit()
-
-        # 9. Kiểm tra và thêm Documents
-        cur.execute("SELECT COUNT(*) FROM documents")
-        if cur.fetchone()[0] == 0:
-            cur.execute("SELECT id FROM staffs")
-            staff_ids = [row[0] for row in cur.fetchall()]
+                cur.executemany('''
+                    INSERT INTO department_awards (department_id, award_batch_id, note)
+                    VALUES (?, ?, ?)
+                ''', dept_awards)
+                print("✓ Đã thêm 15 khen thưởng tập thể")
+
+            conn.commit()
+
+            # 9. Kiểm tra và thêm Documents
+            cur.execute("SELECT COUNT(*) FROM documents")
+            if cur.fetchone()[0] == 0:
+                cur.execute("SELECT id FROM staffs")
+                staff_ids = [row[0] for row in cur.fetchall()]
             
-            loai_ho_so_list = ["Hợp đồng", "Quyết định", "Văn bằng", "Chứng chỉ", "Sơ yếu lý lịch"]
+                loai_ho_so_list = ["Hợp đồng", "Quyết định", "Văn bằng", "Chứng chỉ", "Sơ yếu lý lịch"]
             
-            docs = []
-            for i, staff_id in enumerate(staff_ids[:10]):  # 10 nhân viên đầu
-                for j in range(2):  # Mỗi người 2 tài liệu
-                    loai = random.choice(loai_ho_so_list)
-                    so_ky_hieu = f"SV-{100+i*10+j}"
-                    ngay_thang = f"2024-{random.randint(1,12):02d}-{random.randint(1,28):02d}"
-                    ten_loai = f"Tài liệu {loai}"
-                    so_to = random.randint(1, 10)
-                    ghi_chu = f"Ghi chú cho {loai}"
-                    file_url = f"/files/doc_{i}_{j}.pdf"
+                docs = []
+                for i, staff_id in enumerate(staff_ids[:10]):  # 10 nhân viên đầu
+                    for j in range(2):  # Mỗi người 2 tài liệu
+                        loai = random.choice(loai_ho_so_list)
+                        so_ky_hieu = f"SV-{100+i*10+j}"
+                        ngay_thang = f"2024-{random.randint(1,12):02d}-{random.randint(1,28):02d}"
+                        ten_loai = f"Tài liệu {loai}"
+                        so_to = random.randint(1, 10)
+                        ghi_chu = f"Ghi chú cho {loai}"
+                        file_url = f"/files/doc_{i}_{j}.pdf"
                     
-                    docs.append((staff_id, loai, so_ky_hieu, ngay_thang, ten_loai, so_to, ghi_chu, file_url))
+                        docs.append((staff_id, loai, so_ky_hieu, ngay_thang, ten_loai, so_to, ghi_chu, file_url))
             
-            cur.executemany('''
-                INSERT INTO documents (staff_id, loai_ho_so, so_va_ky_hieu, ngay_thang, 
-                                      ten_loai_trich_yeu_noi_dung, so_to, ghi_chu, file_url)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', docs)
-            print("✓ Đã thêm 20 tài liệu mẫu")
+                cur.executemany('''
+                    INSERT INTO documents (staff_id, loai_ho_so, so_va_ky_hieu, ngay_thang, 
+                                          ten_loai_trich_yeu_noi_dung, so_to, ghi_chu, file_url)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', docs)
+                print("✓ Đã thêm 20 tài liệu mẫu")
 
-        conn.commit()
+            conn.commit()
 
-        # 10. Kiểm tra và thêm Work Histories
-        cur.execute("SELECT COUNT(*) FROM work_histories")
-        if cur.fetchone()[0] == 0:
-            cur.execute("SELECT id FROM staffs")
-            staff_ids = [row[0] for row in cur.fetchall()]
+            # 10. Kiểm tra và thêm Work Histories
+            cur.execute("SELECT COUNT(*) FROM work_histories")
+            if cur.fetchone()[0] == 0:
+                cur.execute("SELECT id FROM staffs")
+                staff_ids = [row[0] for row in cur.fetchall()]
             
-            histories = []
-            positions = ["Nhân viên", "Chuyên viên", "Trưởng phòng phó", "Trưởng phòng"]
+                histories = []
+                positions = ["Nhân viên", "Chuyên viên", "Trưởng phòng phó", "Trưởng phòng"]
             
-            for staff_id in staff_ids[:8]:  # 8 nhân viên đầu
-                for k in range(2):  # Mỗi người 2 quá trình
-                    decision_no = f"QĐ-{200+staff_id*10+k}/2024"
-                    ngay_qd = f"202{random.randint(0,4)}-{random.randint(1,12):02d}-01"
-                    vi_tri = random.choice(positions)
-                    giu_chuc = f"202{random.randint(0,4)}-{random.randint(1,12):02d}-01"
-                    cong_tac = f"202{random.randint(0,4)}-{random.randint(1,12):02d}-01"
-                    ghi_chu = f"Bổ nhiệm {vi_tri}"
+                for staff_id in staff_ids[:8]:  # 8 nhân viên đầu
+                    for k in range(2):  # Mỗi người 2 quá trình
+                        decision_no = f"QĐ-{200+staff_id*10+k}/2024"
+                        ngay_qd = f"202{random.randint(0,4)}-{random.randint(1,12):02d}-01"
+                        vi_tri = random.choice(positions)
+                        giu_chuc = f"202{random.randint(0,4)}-{random.randint(1,12):02d}-01"
+                        cong_tac = f"202{random.randint(0,4)}-{random.randint(1,12):02d}-01"
+                        ghi_chu = f"Bổ nhiệm {vi_tri}"
                     
-                    histories.append((staff_id, decision_no, ngay_qd, vi_tri, giu_chuc, cong_tac, ghi_chu))
+                        histories.append((staff_id, decision_no, ngay_qd, vi_tri, giu_chuc, cong_tac, ghi_chu))
             
-            cur.executemany('''
-                INSERT INTO work_histories (staff_id, decision_no, ngay_quyet_dinh, 
-                                           cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', histories)
-            print("✓ Đã thêm 16 quá trình công tác")
+                cur.executemany('''
+                    INSERT INTO work_histories (staff_id, decision_no, ngay_quyet_dinh, 
+                                               cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', histories)
+                print("✓ Đã thêm 16 quá trình công tác")
 
-        conn.commit()
-        conn.close()
+            conn.commit()
         print("=" * 60)
         print("✓ HOÀN TẤT: Đã thêm đầy đủ dữ liệu mẫu vào database")
         print("=" * 60)
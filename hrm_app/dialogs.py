@@ -3,9 +3,14 @@ dialogs.py
 Các helper dialog / utility UI dùng trong nhiều view:
 - center_window: căn giữa một Toplevel
 - show_info, show_error, ask_confirm: wrapper messagebox
+- ProgressDialog: cửa sổ tiến độ (thanh tiến độ + nút Hủy) cho công việc chạy nền
+- show_text: cửa sổ hiển thị báo cáo dài (chỉ đọc)
+- run_export: chọn file rồi xuất dữ liệu (exporter) trên thread nền, có tiến độ và nút Hủy
 """
+import os
+
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 
 def center_window(win, width, height):
     """Căn giữa cửa sổ win với kích thước width x height"""
@@ -24,4 +29,99 @@ def show_error(title, message):
 
 def ask_confirm(title, message):
     return messagebox.askyesno(title, message)
+
+class ProgressDialog:
+    """
+    Cửa sổ modal hiện tiến độ. update(done, total=None, text=None): total=None khi chưa biết
+    tổng số (thanh tiến độ chạy qua lại). on_cancel: gọi khi bấm Hủy / đóng cửa sổ.
+    """
+    def __init__(self, parent, title, text="", on_cancel=None):
+        self.on_cancel = on_cancel
+        self.win = ctk.CTkToplevel(parent)
+        self.win.title(title)
+        center_window(self.win, 420, 150)
+        self.win.transient(parent)
+        self.win.grab_set()
+        self.win.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        self.label = ctk.CTkLabel(self.win, text=text)
+        self.label.pack(fill="x", padx=16, pady=(16, 8))
+        self.bar = ctk.CTkProgressBar(self.win, mode="indeterminate")
+        self.bar.pack(fill="x", padx=16)
+        self.bar.start()
+        self._determinate = False
+        self.cancel_btn = ctk.CTkButton(self.win, text="Hủy", width=100, fg_color="#ef4444",
+                                        hover_color="#dc2626", command=self.cancel)
+        self.cancel_btn.pack(pady=12)
+
+    def update(self, done, total=None, text=None):
+        if total:
+            if not self._determinate:
+                self.bar.stop()
+                self.bar.configure(mode="determinate")
+                self._determinate = True
+            self.bar.set(min(done / total, 1.0))
+        if text is not None:
+            self.label.configure(text=text)
+
+    def cancel(self):
+        self.cancel_btn.configure(state="disabled", text="Đang hủy...")
+        if self.on_cancel is not None:
+            self.on_cancel()
+
+    def close(self):
+        if self.win.winfo_exists():
+            self.win.grab_release()
+            self.win.destroy()
+
+def show_text(parent, title, text, width=640, height=480):
+    """Hiện văn bản dài (báo cáo nhập file...) trong cửa sổ riêng; trả về Toplevel để thêm nút"""
+    win = ctk.CTkToplevel(parent)
+    win.title(title)
+    center_window(win, width, height)
+    win.transient(parent)
+    box = ctk.CTkTextbox(win, wrap="none")
+    box.pack(fill="both", expand=True, padx=12, pady=(12, 0))
+    box.insert("1.0", text)
+    box.configure(state="disabled")
+    return win
+
+def run_export(parent, db, dataset, staff_id=None, initialfile=None):
+    """
+    Hỏi nơi lưu (.xlsx / .csv) rồi xuất dataset của exporter ("staffs" | "staff_awards" |
+    "work_histories"), staff_id: chỉ dữ liệu của 1 nhân viên.
+    """
+    from . import exporter
+    from .widgets import BackgroundTask
+
+    title = exporter.DATASETS[dataset].title
+    path = filedialog.asksaveasfilename(
+        parent=parent, title=f"Xuất {title.lower()}", defaultextension=".xlsx",
+        initialfile=initialfile or title,
+        filetypes=[("Excel", "*.xlsx"), ("CSV", "*.csv")])
+    if not path:
+        return
+    total = exporter.count_rows(db, dataset, staff_id)
+    progress = ProgressDialog(parent, "Xuất dữ liệu", f"Đang xuất {os.path.basename(path)}...",
+                              on_cancel=lambda: task.cancel())
+
+    def work(report_progress, cancel_event):
+        return exporter.export(db, dataset, path, staff_id=staff_id,
+                               progress=report_progress, cancel_event=cancel_event)
+
+    def on_progress(done):
+        progress.update(done, total, f"Đang xuất: {done} / {total} dòng")
+
+    def on_done(result):
+        progress.close()
+        if result.cancelled:
+            show_info("Đã hủy", "Đã hủy xuất file")
+        else:
+            show_info("Thành công", f"Đã xuất {result.rows} dòng ra {os.path.basename(result.path)}")
+
+    def on_error(error):
+        progress.close()
+        show_error("Lỗi", f"Không thể xuất file: {error}")
+
+    task = BackgroundTask(progress.win, work, on_done, on_error=on_error, on_progress=on_progress).start()
 # Thay thế toàn bộ file hrm_app/dialogs.py bằng nội dung dưới nếu bạn dùng custom popups
@@ -0,0 +1,80 @@
+# hrm_app/events.py
+# Bus sự kiện thay đổi dữ liệu: DatabaseManager phát ChangeEvent sau mỗi thao tác
+# thêm/sửa/xóa, các view đang mở đăng ký để cập nhật đúng dòng bị đổi trong Treeview
+# thay vì xóa hết và tải lại toàn bộ.
+#
+# op:
+# - "insert" / "update" / "delete": 1 dòng, row_id = id của dòng
+# - "reload": nhiều dòng đổi cùng lúc (xóa dây chuyền, resequence STT...), row_id = None
+
+import queue
+import threading
+import traceback
+from collections import namedtuple
+
+ChangeEvent = namedtuple("ChangeEvent", "table op row_id")
+
+OPS = ("insert", "update", "delete", "reload")
+
+
+class ChangeBus:
+    """
+    Gọi callback đồng bộ, ngay trong thread vừa ghi dữ liệu. Callback cập nhật giao diện
+    Tk phải được gọi từ main thread: khi có thao tác ghi chạy trên thread nền (nhập file...),
+    gọi queue_foreign_events() để sự kiện từ thread khác được xếp hàng và chỉ giao khi
+    thread tạo bus gọi drain() (HRMApp gọi định kỳ bằng after()).
+    Lỗi trong 1 callback được in ra và không ảnh hưởng callback khác / thao tác ghi.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}      # token -> (callback, tables hoặc None = mọi bảng)
+        self._next_token = 0
+        self._owner = threading.get_ident()
+        self._foreign = None        # queue sự kiện từ thread khác (None = giao ngay)
+
+    def subscribe(self, callback, tables=None):
+        """Đăng ký callback(event); trả về hàm hủy đăng ký"""
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscribers[token] = (callback, frozenset(tables) if tables is not None else None)
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers.pop(token, None)
+        return unsubscribe
+
+    def queue_foreign_events(self):
+        """Từ giờ sự kiện phát từ thread khác thread tạo bus được giữ lại tới lần drain() kế tiếp"""
+        if self._foreign is None:
+            self._foreign = queue.SimpleQueue()
+
+    def drain(self):
+        """Giao các sự kiện đang xếp hàng (gọi trên thread tạo bus); trả về số sự kiện đã giao"""
+        delivered = 0
+        while self._foreign is not None:
+            try:
+                event = self._foreign.get_nowait()
+            except queue.Empty:
+                break
+            self._deliver(event)
+            delivered += 1
+        return delivered
+
+    def publish(self, event):
+        if event.op not in OPS:
+            raise ValueError(f"Unknown change op: {event.op!r}")
+        if self._foreign is not None and threading.get_ident() != self._owner:
+            self._foreign.put(event)
+            return
+        self._deliver(event)
+
+    def _deliver(self, event):
+        with self._lock:
+            targets = [cb for cb, tables in self._subscribers.values()
+                       if tables is None or event.table in tables]
+        for callback in targets:
+            try:
+                callback(event)
+            except Exception:
+                traceback.print_exc()
@@ -0,0 +1,205 @@
+"""
+exporter.py
+Xuất dữ liệu ra file CSV / XLSX:
+- staffs: danh sách nhân viên (phòng ban, STT, ...)
+- staff_awards: quá trình khen thưởng cá nhân (cùng phép JOIN với db.get_staff_awards_by_staff),
+  của mọi nhân viên hoặc 1 nhân viên (staff_id)
+- work_histories: quá trình công tác
+
+Đọc bằng cursor.fetchmany theo lô và ghi ngay ra file (openpyxl write_only với .xlsx), nên bộ nhớ
+không tăng theo số dòng. Sheet Excel tối đa 1.048.576 dòng: vượt quá thì sang sheet mới.
+openpyxl chỉ cần khi xuất .xlsx.
+
+Không cần giao diện:
+    python -m hrm_app.exporter staff_awards khen_thuong.csv [--db hrm_ultimate.db]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import namedtuple
+
+Dataset = namedtuple("Dataset", "title headers sql")
+
+# Thứ tự ORDER BY đi theo index (idx_staffs_department_stt, idx_staff_awards_staff_batch,
+# idx_work_histories_staff) để SQLite không phải sắp xếp cả bảng trước khi trả dòng đầu tiên
+DATASETS = {
+    "staffs": Dataset(
+        "Danh sách nhân viên",
+        ("Phòng ban", "STT", "Họ và tên", "Ngày sinh", "Vị trí", "Điện thoại"),
+        '''
+            SELECT d.name, s.stt, s.full_name, s.dob, s.position, s.phone
+            FROM staffs s
+            JOIN departments d ON d.id = s.department_id
+            {where}
+            ORDER BY s.department_id, s.stt
+        '''),
+    "staff_awards": Dataset(
+        "Khen thưởng cá nhân",
+        ("Họ và tên", "Năm", "Danh hiệu", "Cấp", "Số quyết định", "Ngày quyết định", "Cơ quan ban hành", "Ghi chú"),
+        '''
+            SELECT s.full_name, ay.year, at.name, at.level, ab.decision_no, ab.decision_date, aa.name, sa.note
+            FROM staff_awards sa
+            JOIN staffs s ON s.id = sa.staff_id
+            JOIN award_batches ab ON sa.award_batch_id = ab.id
+            JOIN award_titles at ON ab.award_title_id = at.id
+            JOIN award_years ay ON ab.award_year_id = ay.id
+            LEFT JOIN award_authorities aa ON ab.authority_id = aa.id
+            {where}
+            ORDER BY sa.staff_id, sa.award_batch_id
+        '''),
+    "work_histories": Dataset(
+        "Quá trình công tác",
+        ("Họ và tên", "Số quyết định", "Ngày quyết định", "Các vị trí công tác", "Giữ chức vụ",
+         "Công tác tại CQ", "Ghi chú"),
+        '''
+            SELECT s.full_name, wh.decision_no, wh.ngay_quyet_dinh, wh.cac_vi_tri_cong_tac,
+                   wh.giu_chuc_vu, wh.cong_tac_tai_cq, wh.ghi_chu
+            FROM work_histories wh
+            JOIN staffs s ON s.id = wh.staff_id
+            {where}
+            ORDER BY wh.staff_id, wh.id
+        '''),
+}
+
+# cột lọc theo nhân viên của từng dataset
+_STAFF_FILTER = {"staffs": "s.id", "staff_awards": "sa.staff_id", "work_histories": "wh.staff_id"}
+
+FETCH_SIZE = 5000
+XLSX_MAX_ROWS = 1_048_576
+
+ExportResult = namedtuple("ExportResult", "path rows cancelled elapsed")
+
+
+class ExportCancelled(Exception):
+    """Người dùng hủy giữa chừng (cancel_event được đặt)"""
+
+
+def _query(dataset, staff_id):
+    ds = DATASETS[dataset]
+    if staff_id is None:
+        return ds.sql.format(where=""), ()
+    return ds.sql.format(where=f"WHERE {_STAFF_FILTER[dataset]} = ?"), (staff_id,)
+
+
+def iter_rows(conn, sql, params=(), size=FETCH_SIZE):
+    """Duyệt kết quả truy vấn theo lô fetchmany(size) - không giữ toàn bộ kết quả trong bộ nhớ"""
+    cur = conn.execute(sql, params)
+    try:
+        while True:
+            batch = cur.fetchmany(size)
+            if not batch:
+                return
+            yield from batch
+    finally:
+        cur.close()
+
+
+def _write_csv(path, headers, rows):
+    # utf-8-sig: Excel mở đúng tiếng Việt
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+
+
+def _write_xlsx(path, title, headers, rows):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ValueError("Cần cài openpyxl để xuất file Excel (pip install openpyxl)") from None
+    wb = Workbook(write_only=True)
+    sheet, sheet_rows, sheet_no = None, 0, 0
+    for row in rows:
+        if sheet is None or sheet_rows >= XLSX_MAX_ROWS:
+            sheet_no += 1
+            sheet = wb.create_sheet(title[:28] if sheet_no == 1 else f"{title[:24]} ({sheet_no})")
+            sheet.append(headers)
+            sheet_rows = 1
+        sheet.append(row)
+        sheet_rows += 1
+    if sheet is None:
+        wb.create_sheet(title[:28]).append(headers)
+    wb.save(path)
+
+
+def count_rows(db, dataset, staff_id=None):
+    sql, params = _query(dataset, staff_id)
+    conn = db.get_connection(readonly=True)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def export(db, dataset, path, staff_id=None, progress=None, cancel_event=None, progress_every=FETCH_SIZE):
+    """
+    Xuất dataset ("staffs" | "staff_awards" | "work_histories") ra path (.csv hoặc .xlsx).
+    - staff_id: chỉ xuất dữ liệu của 1 nhân viên
+    - progress(số dòng đã ghi): gọi mỗi progress_every dòng (từ thread đang chạy hàm này)
+    - cancel_event (threading.Event): đặt để hủy; file đang ghi dở bị xóa
+    Trả về ExportResult(path, rows, cancelled, elapsed).
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset!r} (có: {', '.join(DATASETS)})")
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in (".csv", ".xlsx"):
+        raise ValueError(f"Không hỗ trợ định dạng {ext or '(không có đuôi)'}: chỉ xuất .csv hoặc .xlsx")
+    start = time.perf_counter()
+    ds = DATASETS[dataset]
+    sql, params = _query(dataset, staff_id)
+    written = 0
+
+    def tracked(rows):
+        nonlocal written
+        for row in rows:
+            yield row
+            written += 1
+            if written % progress_every == 0:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ExportCancelled()
+                if progress is not None:
+                    progress(written)
+
+    conn = db.get_connection(readonly=True)
+    try:
+        rows = tracked(iter_rows(conn, sql, params))
+        if ext == ".csv":
+            _write_csv(path, ds.headers, rows)
+        else:
+            _write_xlsx(path, ds.title, ds.headers, rows)
+    except ExportCancelled:
+        if os.path.exists(path):
+            os.remove(path)
+        return ExportResult(path, written, True, time.perf_counter() - start)
+    finally:
+        conn.close()
+    if progress is not None:
+        progress(written)
+    return ExportResult(path, written, False, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Xuất dữ liệu ra file CSV / XLSX")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("path")
+    parser.add_argument("--db", default="hrm_ultimate.db")
+    parser.add_argument("--staff-id", type=int, help="chỉ xuất dữ liệu của 1 nhân viên")
+    args = parser.parse_args(argv)
+
+    from .db import DatabaseManager
+    db = DatabaseManager(db_name=args.db, seed_sample_data=False)
+    try:
+        result = export(db, args.dataset, args.path, staff_id=args.staff_id)
+    except ValueError as e:
+        print("✗", e)
+        return 1
+    finally:
+        db.close()
+    print(f"✓ Đã xuất {result.rows} dòng ra {result.path} ({result.elapsed:.1f} giây)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
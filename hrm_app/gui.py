@@ -7,7 +7,11 @@ import customtkinter as ctk
 import tkinter as tk
 
 from .db import DatabaseManager
-from .views import dashboard, departments, staff, awards, documents,work_histories
+from .async_db import AsyncDatabase
+from .startup import StartupTimer
+from .view_cache import ViewCache
+# Chỉ import sẵn view mặc định; các view khác import khi mở lần đầu (khởi động nhanh hơn)
+from .views import dashboard
 
 ctk.set_appearance_mode("light")
 ctk.set_default_color_theme("blue")
@@ -17,21 +21,43 @@ class HRMApp(ctk.CTk):
     HRMApp là cửa sổ chính, giữ một instance DatabaseManager (self.db)
     và is_admin flag để bật/tắt quyền chỉnh sửa.
     """
-    def __init__(self, is_admin=True, db_name="hrm_ultimate.db"):
-        super().__init__()
+    def __init__(self, is_admin=True, db_name="hrm_ultimate.db", db_profile="default", sample_data=True,
+                 startup_timer=None):
+        """
+        - sample_data: thêm dữ liệu mẫu vào bảng trống khi khởi tạo database
+        - startup_timer: StartupTimer để đo thời gian từng giai đoạn khởi động (main.py --profile-startup)
+        """
+        timer = startup_timer or StartupTimer()
+        with timer.phase("cửa sổ Tk"):
+            super().__init__()
+        self.startup_timer = timer
         self.is_admin = is_admin
         self.title("QANGNINH ULTIMATE - Database Management System")
         self.geometry("1920x1080")
         self.state("zoomed")
 
         # Database
-        self.db = DatabaseManager(db_name=db_name)
+        # db_profile="performance" bật WAL + checkpoint nền khi nhiều người dùng chung file database
+        with timer.phase("database"):
+            self.db = DatabaseManager(db_name=db_name, profile=db_profile, seed_sample_data=sample_data)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Thao tác ghi trên thread nền (nhập file...): sự kiện thay đổi được giao lại trên main thread
+        self.db.changes.queue_foreign_events()
+        # Truy vấn chậm của các view chạy trên thread "db", kết quả giao lại trong _drain_changes
+        self.adb = AsyncDatabase(self.db)
+        self._drain_changes()
 
         # Layout cơ bản
-        self.create_layout()
+        with timer.phase("layout"):
+            self.create_layout()
+
+        # in báo cáo khi cửa sổ đã vẽ xong và vòng lặp sự kiện rảnh lần đầu
+        # (đăng ký trước show_dashboard để chạy trước phần vẽ biểu đồ hoãn lại của dashboard)
+        self.after_idle(timer.report)
 
         # Mặc định hiển thị dashboard
-        self.show_dashboard()
+        with timer.phase("view đầu tiên"):
+            self.show_dashboard()
 
     def create_layout(self):
         # cấu hình grid
@@ -56,6 +82,7 @@ class HRMApp(ctk.CTk):
         self.create_menu_button("🏆 Danh hiệu & Năm", 4, self.show_awards)
         # self.create_menu_button("📄 Hồ sơ tài liệu", 5, self.show_documents)
         self.create_menu_button("📝 Quá trình công tác", 6, self.show_work_histories)
+        self.create_menu_button("🩺 Chẩn đoán", 7, self.show_diagnostics)
 
         # MAIN CONTENT
         self.main_content = ctk.CTkFrame(self, fg_color="#f8fafc", corner_radius=0)
@@ -73,6 +100,9 @@ class HRMApp(ctk.CTk):
         self.content_frame = ctk.CTkScrollableFrame(self.main_content, fg_color="#f8fafc")
         self.content_frame.grid(row=1, column=0, sticky="nsew", padx=20, pady=20)
 
+        # Các view đã dựng được giữ lại (ẩn) để chuyển trang tức thì
+        self.views = ViewCache(self.content_frame, self.db)
+
     def create_menu_button(self, text, row, command, active=False):
         btn = ctk.CTkButton(self.sidebar, text=text, font=ctk.CTkFont(size=14, weight="bold"),
                             fg_color="#4338ca" if active else "transparent", hover_color="#4338ca",
@@ -80,38 +110,48 @@ class HRMApp(ctk.CTk):
         btn.grid(row=row, column=0, padx=16, pady=8, sticky="ew")
         return btn
 
-    def clear_content(self):
-        """Xóa widget hiện có trong content_frame trước khi render view mới"""
-        for w in self.content_frame.winfo_children():
-            w.destroy()
+    CHANGES_POLL_MS = 100
+
+    def _drain_changes(self):
+        self.db.changes.drain()
+        self.adb.drain()
+        self.after(self.CHANGES_POLL_MS, self._drain_changes)
+
+    def on_close(self):
+        """Dừng thread truy vấn, đóng pool kết nối database rồi thoát"""
+        self.adb.shutdown()
+        self.db.close()
+        self.destroy()
+
+    def show_view(self, key, title, view_class):
+        """Hiện view từ cache (tạo mới nếu chưa có / đã bị loại khỏi cache)"""
+        self.page_title.configure(text=title)
+        return self.views.show(key, lambda parent: view_class(self, self.db, parent=parent))
 
     # Các phương thức show_xxx sẽ gọi module tương ứng để render view
     def show_dashboard(self):
-        self.clear_content()
-        self.page_title.configure(text="📊 TỔNG QUAN")
-        dashboard.DashboardView(self, self.db).render()
+        self.show_view("dashboard", "📊 TỔNG QUAN", dashboard.DashboardView)
 
     def show_departments(self):
-        self.clear_content()
-        self.page_title.configure(text="🏢 QUẢN LÝ PHÒNG BAN")
-        departments.DepartmentsView(self, self.db).render()
+        from .views import departments
+        self.show_view("departments", "🏢 QUẢN LÝ PHÒNG BAN", departments.DepartmentsView)
 
     def show_staff(self):
-        self.clear_content()
-        self.page_title.configure(text="👥 QUẢN LÝ NHÂN SỰ")
-        staff.StaffView(self, self.db).render()
+        from .views import staff
+        self.show_view("staff", "👥 QUẢN LÝ NHÂN SỰ", staff.StaffView)
 
     def show_awards(self):
-        self.clear_content()
-        self.page_title.configure(text="🏆 DANH HIỆU & NĂM KHEN THƯỞNG")
-        awards.AwardsView(self, self.db).render()
+        from .views import awards
+        self.show_view("awards", "🏆 DANH HIỆU & NĂM KHEN THƯỞNG", awards.AwardsView)
 
     def show_documents(self):
-        self.clear_content()
-        self.page_title.configure(text="📄 QUẢN LÝ HỒ SƠ TÀI LIỆU")
-        documents.DocumentsView(self, self.db).render()
-    
+        from .views import documents
+        self.show_view("documents", "📄 QUẢN LÝ HỒ SƠ TÀI LIỆU", documents.DocumentsView)
+
     def show_work_histories(self):
-        self.clear_content()
-        self.page_title.configure(text="📝 QUÁ TRÌNH CÔNG TÁC")
-        work_histories.WorkHistoriesView(self, self.db).render()
\ No newline at end of file
+        from .views import work_histories
+        self.show_view("work_histories", "📝 QUÁ TRÌNH CÔNG TÁC", work_histories.WorkHistoriesView)
+
+    def show_diagnostics(self):
+        from .views import diagnostics
+        self.show_view("diagnostics", "🩺 CHẨN ĐOÁN HIỆU NĂNG", diagnostics.DiagnosticsView)
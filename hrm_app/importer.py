@@ -0,0 +1,361 @@
+"""
+importer.py
+Nhập danh sách nhân viên từ file CSV / XLSX.
+
+- Đọc file theo dòng (csv.reader / openpyxl read_only), không nạp cả file vào bộ nhớ
+- Nhận diện cột theo tiêu đề (không phân biệt hoa thường / dấu): Họ và tên, Ngày sinh,
+  Vị trí (Chức vụ), Điện thoại (SĐT), Phòng ban
+- Kiểm tra ngày sinh, số điện thoại; tra tên phòng ban ra id (nạp 1 lần vào dict)
+- Dòng hợp lệ được gom thành lô batch_size dòng, mỗi lô thêm bằng db.add_staffs_bulk (1 executemany,
+  1 giao dịch, STT nối tiếp theo từng phòng ban). Đọc / kiểm tra file nằm ngoài giao dịch nên khóa ghi
+  chỉ bị giữ trong lúc ghi 1 lô: thêm / sửa trên giao diện vẫn chạy trong lúc nhập file lớn.
+  Dòng lỗi được bỏ qua và ghi vào báo cáo
+- dry_run=True: chỉ kiểm tra, không ghi gì
+
+openpyxl chỉ cần khi nhập file .xlsx.
+
+Dùng thử không cần giao diện:
+    python -m hrm_app.importer staffs.csv [--db hrm_ultimate.db] [--dry-run]
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from collections import Counter, namedtuple
+from datetime import date, datetime
+from itertools import islice
+
+from .search import fold_vietnamese
+
+# field -> các tiêu đề cột chấp nhận (so sánh sau khi bỏ dấu, viết thường)
+COLUMNS = {
+    "full_name": ("họ và tên", "họ tên", "tên", "full_name", "name"),
+    "dob": ("ngày sinh", "dob", "birthday"),
+    "position": ("vị trí", "chức vụ", "position"),
+    "phone": ("điện thoại", "số điện thoại", "sđt", "phone"),
+    "department": ("phòng ban", "phòng", "department"),
+}
+REQUIRED = ("full_name", "department")
+
+# YYYY-MM-DD hoặc DD/MM/YYYY (DD-MM-YYYY, DD.MM.YYYY); regex nhanh hơn strptime nhiều lần
+_ISO_DATE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_VN_DATE = re.compile(r"(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})")
+
+MAX_ERRORS = 1000   # số lỗi giữ chi tiết trong báo cáo (vẫn đếm hết)
+
+RowError = namedtuple("RowError", "line field value message")
+
+
+class ImportCancelled(Exception):
+    """Người dùng hủy giữa chừng (cancel_event được đặt)"""
+
+
+class ImportReport:
+    def __init__(self, path, dry_run):
+        self.path = path
+        self.dry_run = dry_run
+        self.total = 0              # số dòng dữ liệu đã đọc
+        self.valid = 0
+        self.inserted = 0
+        self.error_count = 0
+        self.errors = []            # tối đa MAX_ERRORS RowError
+        self.departments = Counter()  # tên phòng ban -> số dòng hợp lệ
+        self.cancelled = False
+        self.error = None           # exception làm dừng giữa chừng (đọc file / ghi database); các lô trước đó đã được ghi
+        self.elapsed = 0.0
+
+    def add_error(self, line, field, value, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(RowError(line, field, value, message))
+
+    def cancelled_message(self):
+        if self.inserted:
+            return f"Đã hủy - giữ {self.inserted} nhân viên đã thêm trước khi hủy"
+        return "Đã hủy - không có nhân viên nào được thêm"
+
+    def error_message(self):
+        text = f"Dừng sau {self.total} dòng vì lỗi: {self.error}"
+        if self.dry_run:
+            return text
+        if self.inserted:
+            return (f"{text}\nĐã thêm {self.inserted} nhân viên trước khi lỗi "
+                    f"(nhập lại cả file sẽ thêm trùng những người này)")
+        return f"{text}\nKhông có nhân viên nào được thêm"
+
+    def summary(self):
+        """Báo cáo dạng văn bản (hiện trong dialog / in ra console)"""
+        lines = [
+            f"File: {os.path.basename(self.path)}",
+            f"Số dòng đọc được: {self.total}",
+            f"Hợp lệ: {self.valid}    Lỗi: {self.error_count}",
+        ]
+        if not self.dry_run:
+            lines.append(f"Đã thêm: {self.inserted} nhân viên ({self.elapsed:.1f} giây)")
+        if self.cancelled:
+            lines.append(self.cancelled_message())
+        if self.error is not None:
+            lines.append(self.error_message())
+        if self.departments:
+            lines.append("")
+            lines.append("Theo phòng ban:")
+            for name, count in self.departments.most_common():
+                lines.append(f"  {name}: {count}")
+        if self.errors:
+            lines.append("")
+            lines.append("Lỗi:")
+            for e in self.errors:
+                lines.append(f"  Dòng {e.line} - {e.field}: {e.message} ({e.value!r})")
+            if self.error_count > len(self.errors):
+                lines.append(f"  ... và {self.error_count - len(self.errors)} lỗi khác")
+        return "\n".join(lines)
+
+
+# -----------------------
+# Đọc file
+# -----------------------
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(f, dialect)
+
+
+def _read_xlsx(path):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ValueError("Cần cài openpyxl để nhập file Excel (pip install openpyxl)") from None
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def read_table(path):
+    """Trả về iterator các dòng (list giá trị) của file CSV / XLSX, dòng đầu là tiêu đề"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return _read_csv(path)
+    if ext in (".xlsx", ".xlsm"):
+        return _read_xlsx(path)
+    raise ValueError(f"Không hỗ trợ định dạng {ext or '(không có đuôi)'}: chỉ nhận .csv hoặc .xlsx")
+
+
+def map_columns(header):
+    """Tiêu đề -> dict field -> vị trí cột; thiếu cột bắt buộc thì ném ValueError"""
+    aliases = {fold_vietnamese(a): field for field, names in COLUMNS.items() for a in names}
+    columns = {}
+    for idx, title in enumerate(header):
+        field = aliases.get(fold_vietnamese(str(title or "")).strip())
+        if field and field not in columns:
+            columns[field] = idx
+    missing = [COLUMNS[f][0] for f in REQUIRED if f not in columns]
+    if missing:
+        raise ValueError(f"File thiếu cột: {', '.join(missing)}")
+    return columns
+
+
+# -----------------------
+# Kiểm tra giá trị
+# -----------------------
+def parse_date(value):
+    """Ngày sinh -> 'YYYY-MM-DD' (None nếu trống); sai định dạng / ngày vô lý thì ném ValueError"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    if not isinstance(value, date):
+        text = str(value).strip()
+        if not text:
+            return None
+        m = _ISO_DATE.fullmatch(text)
+        if m:
+            y, mo, d = m.groups()
+        else:
+            m = _VN_DATE.fullmatch(text)
+            if not m:
+                raise ValueError("ngày không đúng định dạng (YYYY-MM-DD hoặc DD/MM/YYYY)")
+            d, mo, y = m.groups()
+        try:
+            value = date(int(y), int(mo), int(d))
+        except ValueError:
+            raise ValueError("ngày không tồn tại") from None
+    if not 1900 <= value.year <= date.today().year:
+        raise ValueError("năm sinh không hợp lệ")
+    return value.isoformat()
+
+
+_PHONE_SEPARATORS = re.compile(r"[\s.\-()]")
+
+
+def normalize_phone(value):
+    """
+    Số điện thoại -> chỉ gồm chữ số, bắt đầu bằng 0 (None nếu trống).
+    Chấp nhận +84 / 84, dấu cách, chấm, gạch; ô số trong Excel bị mất số 0 đầu cũng được thêm lại.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = _PHONE_SEPARATORS.sub("", str(value))
+    if not text:
+        return None
+    if text.startswith("+84"):
+        text = "0" + text[3:]
+    elif text.startswith("84") and len(text) == 11:
+        text = "0" + text[2:]
+    elif isinstance(value, int) and len(text) in (9, 10):
+        text = "0" + text
+    if not text.isdigit() or not text.startswith("0") or len(text) not in (10, 11):
+        raise ValueError("số điện thoại phải có 10-11 chữ số, bắt đầu bằng 0")
+    return text
+
+
+class DepartmentLookup:
+    """
+    Tên phòng ban -> id, nạp 1 lần từ db.get_all_departments().
+    Khớp đúng tên trước; nếu không có thì khớp không phân biệt hoa thường / dấu
+    (bỏ qua nếu 2 phòng ban trùng tên sau khi bỏ dấu).
+    """
+    def __init__(self, db):
+        self.exact = {}
+        self.folded = {}
+        self.names = {}     # id -> tên chuẩn (báo cáo theo phòng ban)
+        for dept_id, name, *_ in db.get_all_departments():
+            self.exact[name] = dept_id
+            self.names[dept_id] = name
+            key = fold_vietnamese(name).strip()
+            self.folded[key] = None if key in self.folded else dept_id
+
+    def resolve(self, name):
+        name = str(name or "").strip()
+        if name in self.exact:
+            return self.exact[name]
+        return self.folded.get(fold_vietnamese(name))
+
+
+# -----------------------
+# Nhập
+# -----------------------
+def _cell(row, columns, field):
+    idx = columns.get(field)
+    if idx is None or idx >= len(row):
+        return None
+    value = row[idx]
+    return value.strip() if isinstance(value, str) else value
+
+
+def validate_rows(rows, columns, lookup, report, progress=None, cancel_event=None, progress_every=1000):
+    """
+    Generator: đọc rows (không gồm dòng tiêu đề), yield (full_name, dob, position, phone, department_id)
+    cho dòng hợp lệ, ghi dòng lỗi vào report. progress(số dòng đã đọc) được gọi mỗi progress_every dòng.
+    cancel_event được đặt -> ném ImportCancelled.
+    """
+    for line, row in enumerate(rows, start=2):
+        if not any(v not in (None, "") for v in row):
+            continue    # dòng trống
+        report.total += 1
+        if report.total % progress_every == 0:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ImportCancelled()
+            if progress is not None:
+                progress(report.total)
+
+        ok = True
+        full_name = " ".join(str(_cell(row, columns, "full_name") or "").split())
+        if not full_name:
+            report.add_error(line, "Họ và tên", "", "không được để trống")
+            ok = False
+        dept_name = _cell(row, columns, "department")
+        dept_id = lookup.resolve(dept_name)
+        if dept_id is None:
+            report.add_error(line, "Phòng ban", dept_name, "không tìm thấy phòng ban")
+            ok = False
+        try:
+            dob = parse_date(_cell(row, columns, "dob"))
+        except ValueError as e:
+            report.add_error(line, "Ngày sinh", _cell(row, columns, "dob"), str(e))
+            ok = False
+        try:
+            phone = normalize_phone(_cell(row, columns, "phone"))
+        except ValueError as e:
+            report.add_error(line, "Điện thoại", _cell(row, columns, "phone"), str(e))
+            ok = False
+        if not ok:
+            continue
+
+        position = _cell(row, columns, "position")
+        report.valid += 1
+        report.departments[lookup.names[dept_id]] += 1
+        yield full_name, dob, str(position) if position not in (None, "") else None, phone, dept_id
+    if progress is not None:
+        progress(report.total)
+
+
+def import_staffs(db, path, dry_run=False, progress=None, cancel_event=None, batch_size=2000):
+    """
+    Nhập nhân viên từ file. Trả về ImportReport.
+    - dry_run: chỉ kiểm tra và thống kê, không ghi database
+    - progress(số dòng đã đọc): gọi định kỳ (từ thread đang chạy hàm này)
+    - cancel_event (threading.Event): đặt để hủy; khi nhập thật thì dừng trước lô kế tiếp,
+      các lô đã ghi được giữ lại (report.inserted)
+    Lỗi đọc file / thiếu cột: ném ValueError. Lỗi giữa chừng (dòng hỏng trong file, lỗi ghi database):
+    không ném, trả về report với report.error và report.inserted = số nhân viên của các lô đã ghi trước đó.
+    """
+    start = time.perf_counter()
+    report = ImportReport(path, dry_run)
+    rows = iter(read_table(path))
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("File trống")
+    columns = map_columns(header)
+    valid_rows = validate_rows(rows, columns, DepartmentLookup(db), report,
+                               progress=progress, cancel_event=cancel_event)
+    try:
+        if dry_run:
+            for _ in valid_rows:
+                pass
+        else:
+            while True:
+                batch = list(islice(valid_rows, batch_size))   # đọc + kiểm tra lô kế tiếp, chưa giữ khóa ghi
+                if not batch:
+                    break
+                report.inserted += db.add_staffs_bulk(batch)
+    except ImportCancelled:
+        report.cancelled = True
+    except Exception as e:
+        report.error = e
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nhập nhân viên từ file CSV / XLSX")
+    parser.add_argument("path")
+    parser.add_argument("--db", default="hrm_ultimate.db")
+    parser.add_argument("--dry-run", action="store_true", help="chỉ kiểm tra, không ghi database")
+    args = parser.parse_args(argv)
+
+    from .db import DatabaseManager
+    db = DatabaseManager(db_name=args.db, seed_sample_data=False)
+    try:
+        report = import_staffs(db, args.path, dry_run=args.dry_run)
+    except ValueError as e:
+        print("✗", e)
+        return 1
+    finally:
+        db.close()
+    print(report.summary())
+    return 1 if report.error is not None else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+index_advisor.py
+"Index advisor": gom mọi câu SQL viết sẵn trong hrm_app/db.py, hrm_app/views/*.py và repository.STATEMENTS,
+chạy EXPLAIN QUERY PLAN trên database thật và báo các bước SCAN (quét toàn bảng)
+trên bảng lớn.
+
+Chạy:
+    python -m hrm_app.index_advisor [--db hrm_ultimate.db] [--min-rows 1000]
+
+Trả về mã thoát 1 nếu có SCAN trên bảng có từ min-rows dòng trở lên.
+"""
+import argparse
+import ast
+import glob
+import os
+import re
+import sqlite3
+import sys
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCES = [os.path.join(PACKAGE_DIR, "db.py")] + sorted(glob.glob(os.path.join(PACKAGE_DIR, "views", "*.py")))
+
+# cần khoảng trắng sau từ khóa: bỏ qua chuỗi "update" / "delete" (tên thao tác của ChangeEvent)
+_SQL_START = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|INSERT\s+INTO\s+\w+\s*(\([^)]*\))?\s*SELECT)\s", re.I | re.S)
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+_SCAN = re.compile(r"^SCAN (\w+)(.*)$")
+_BINDINGS = re.compile(r"uses (\d+)")
+_NOT_ALIAS = {"on", "where", "left", "right", "inner", "outer", "cross", "join", "order", "group",
+              "limit", "using", "natural", "set", "values", "select", "union", "having", "window"}
+
+
+def collect_statements(paths=None):
+    """
+    Trả về list (path, lineno, sql) cho mọi string literal trông giống câu SQL đọc dữ liệu.
+    Bỏ qua f-string (không biết trước nội dung) và INSERT ... VALUES (không quét bảng).
+    """
+    statements = []
+    for path in paths or DEFAULT_SOURCES:
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.JoinedStr):
+                # các phần hằng trong f-string không phải câu SQL hoàn chỉnh
+                for part in node.values:
+                    part._skip_sql = True
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                if getattr(node, "_skip_sql", False):
+                    continue
+                if _SQL_START.match(node.value):
+                    statements.append((path, node.lineno, " ".join(node.value.split())))
+    if paths is None:
+        statements += repository_statements()
+    return statements
+
+
+def repository_statements():
+    """(path, lineno, sql) cho repository.STATEMENTS - câu ghép từ nhiều đoạn nên không là 1 string literal"""
+    from . import repository
+    path = os.path.join(PACKAGE_DIR, "repository.py")
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    lines = {node.value: node.lineno for node in ast.walk(tree)
+             if isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value in repository.STATEMENTS}
+    return [(path, lines.get(name, 0), " ".join(statement.sql.split()))
+            for name, statement in repository.STATEMENTS.items()]
+
+
+def _alias_map(sql):
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in _NOT_ALIAS:
+            aliases[alias] = table
+    return aliases
+
+
+def explain(conn, sql):
+    """Chạy EXPLAIN QUERY PLAN với tham số NULL; tự dò số tham số khi câu dùng nhiều '?'"""
+    n = sql.count("?")
+    for _ in range(3):
+        try:
+            return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, (None,) * n)]
+        except sqlite3.ProgrammingError as e:
+            m = _BINDINGS.search(str(e))
+            if not m:
+                raise
+            n = int(m.group(1))
+    raise sqlite3.ProgrammingError(f"Không dò được số tham số cho: {sql}")
+
+
+def analyze(conn, statements, min_rows=1000):
+    """
+    Trả về list dict cho mỗi bước SCAN:
+    {path, lineno, sql, table, detail, rows, large}
+    """
+    row_counts = {}
+
+    def count_rows(table):
+        if table not in row_counts:
+            try:
+                row_counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            except sqlite3.Error:
+                row_counts[table] = 0
+        return row_counts[table]
+
+    findings = []
+    for path, lineno, sql in statements:
+        try:
+            plan = explain(conn, sql)
+        except sqlite3.Error as e:
+            findings.append({"path": path, "lineno": lineno, "sql": sql, "table": None,
+                             "detail": f"lỗi: {e}", "rows": 0, "large": False})
+            continue
+        aliases = _alias_map(sql)
+        for detail in plan:
+            m = _SCAN.match(detail)
+            if not m:
+                continue
+            table = aliases.get(m.group(1), m.group(1))
+            rows = count_rows(table)
+            findings.append({"path": path, "lineno": lineno, "sql": sql, "table": table,
+                             "detail": detail, "rows": rows, "large": rows >= min_rows})
+    return findings
+
+
+def format_report(findings, min_rows):
+    lines = []
+    for f in sorted(findings, key=lambda f: (not f["large"], -f["rows"], f["path"], f["lineno"])):
+        mark = "⚠" if f["large"] else " "
+        where = f"{os.path.relpath(f['path'], os.path.dirname(PACKAGE_DIR))}:{f['lineno']}"
+        table = f"{f['table']} ({f['rows']} dòng)" if f["table"] else "-"
+        lines.append(f"{mark} {where:<36} {table:<34} {f['detail']}")
+        if f["large"]:
+            sql = f["sql"]
+            lines.append(f"    {sql[:160]}{'...' if len(sql) > 160 else ''}")
+    large = sum(1 for f in findings if f["large"])
+    lines.append(f"Tổng: {len(findings)} bước SCAN, {large} trên bảng >= {min_rows} dòng")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Báo cáo các câu SQL quét toàn bảng (EXPLAIN QUERY PLAN)")
+    parser.add_argument("--db", default="hrm_ultimate.db", help="đường dẫn database (mặc định hrm_ultimate.db)")
+    parser.add_argument("--min-rows", type=int, default=1000, help="ngưỡng số dòng để coi là bảng lớn")
+    args = parser.parse_args(argv)
+
+    from .db import DatabaseManager
+    # Đảm bảo schema + bộ index hiện tại đã được tạo trước khi phân tích
+    DatabaseManager(db_name=args.db, pool_readers=0, seed_sample_data=False).close()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        findings = analyze(conn, collect_statements(), min_rows=args.min_rows)
+    finally:
+        conn.close()
+    print(format_report(findings, args.min_rows))
+    return 1 if any(f["large"] for f in findings) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
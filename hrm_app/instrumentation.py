@@ -0,0 +1,338 @@
+"""
+instrumentation.py
+Đo thời gian truy vấn để biết câu nào làm ứng dụng chậm:
+- InstrumentedConnection / InstrumentedCursor: kết nối sqlite3 (factory cho pool) ghi lại mọi câu
+  SQL chạy qua get_connection() - kể cả SQL viết thẳng trong view: số lần, tổng / lớn nhất, histogram
+  độ trễ, số dòng trả về. Thời gian = execute + các lần fetch tới khi hết kết quả (SQLite chỉ chạy
+  tới dòng đầu khi execute, phần lớn công việc nằm ở fetch)
+- Instrumentation.wrap_methods(db): bọc các hàm public của DatabaseManager, đo tương tự theo tên hàm
+- Câu chạy lâu hơn slow_ms được ghi vào slow log (giữ max_slow câu gần nhất) cùng EXPLAIN QUERY PLAN,
+  hàm DatabaseManager đang chạy và vị trí gọi trong code (file:dòng)
+
+snapshot() trả về dict (JSON được) để xem trong trang Chẩn đoán hoặc dump_json(path) gửi kèm báo lỗi.
+"""
+import bisect
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import traceback
+from collections import deque, namedtuple
+from datetime import datetime
+from functools import wraps
+
+from .repository import Page
+
+# cận trên (ms) của các ô histogram; ô cuối: lớn hơn mọi cận
+HISTOGRAM_BOUNDS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+SlowQuery = namedtuple("SlowQuery", "at sql params ms rows method caller plan")
+
+_WHITESPACE = re.compile(r"\s+")
+# chỉ EXPLAIN các câu đọc / ghi dữ liệu (không EXPLAIN PRAGMA, BEGIN, CREATE...)
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_SKIP_FILES = (os.path.abspath(__file__), os.path.join(_PACKAGE_DIR, "pool.py"))
+
+
+def normalize_sql(sql):
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class _Stat:
+    __slots__ = ("calls", "total_ms", "max_ms", "rows", "errors", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, ms, rows=0, error=False):
+        self.calls += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows
+        self.errors += error
+        self.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, ms)] += 1
+
+    def as_dict(self):
+        return {"calls": self.calls, "total_ms": round(self.total_ms, 3), "max_ms": round(self.max_ms, 3),
+                "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+                "rows": self.rows, "errors": self.errors, "histogram": list(self.histogram)}
+
+
+class Instrumentation:
+    def __init__(self, slow_ms=100.0, max_slow=200, explain=True):
+        """
+        - slow_ms: câu SQL chạy lâu hơn (ms) được ghi vào slow log (hàm chậm xem max_ms / histogram)
+        - max_slow: số câu chậm giữ lại (cũ nhất bị bỏ)
+        - explain: chạy EXPLAIN QUERY PLAN cho câu chậm (trên chính kết nối đó, sau khi câu đã xong)
+        """
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._queries = {}          # sql đã chuẩn hóa -> _Stat
+        self._methods = {}          # tên hàm DatabaseManager -> _Stat
+        self._slow = deque(maxlen=max_slow)
+        self._local = threading.local()   # stack tên hàm đang chạy của từng thread
+        self.started_at = datetime.now()
+
+    # -----------------------
+    # Ghi nhận
+    # -----------------------
+    def record_query(self, conn, sql, params, ms, rows, error=False):
+        key = normalize_sql(sql)
+        with self._lock:
+            stat = self._queries.get(key)
+            if stat is None:
+                stat = self._queries[key] = _Stat()
+            stat.add(ms, rows, error)
+        if ms >= self.slow_ms:
+            self._log_slow(conn, key, params, ms, rows)
+
+    def _log_slow(self, conn, sql, params, ms, rows):
+        plan = []
+        # params None: executemany (không giữ tham số) - không EXPLAIN được
+        if self.explain and conn is not None and params is not None and sql.upper().startswith(_EXPLAINABLE):
+            try:
+                # sqlite3.Connection.execute gốc: không đo (và không ghi log) chính câu EXPLAIN
+                cur = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params or ())
+                plan = [row[-1] for row in cur.fetchall()]
+            except sqlite3.Error as e:
+                plan = [f"(không EXPLAIN được: {e})"]
+        stack = getattr(self._local, "stack", None)
+        entry = SlowQuery(datetime.now().isoformat(timespec="seconds"), sql, _short_repr(params),
+                          round(ms, 3), rows, stack[-1] if stack else None, _caller(), plan)
+        with self._lock:
+            self._slow.append(entry)
+
+    def wrap_methods(self, db):
+        """Bọc các hàm public (không bắt đầu bằng _) của db để đo theo tên hàm"""
+        for name in dir(type(db)):
+            if name.startswith("_") or name in ("get_connection", "close"):
+                continue
+            method = getattr(db, name)
+            if callable(method):
+                setattr(db, name, self._timed(name, method))
+
+    def _timed(self, name, method):
+        @wraps(method)
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return method(*args, **kwargs)
+            stack = getattr(self._local, "stack", None)
+            if stack is None:
+                stack = self._local.stack = []
+            stack.append(name)
+            start = time.perf_counter()
+            error = True
+            try:
+                result = method(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                ms = (time.perf_counter() - start) * 1000
+                stack.pop()
+                with self._lock:
+                    stat = self._methods.get(name)
+                    if stat is None:
+                        stat = self._methods[name] = _Stat()
+                    stat.add(ms, _row_count(result) if not error else 0, error)
+        return timed
+
+    # -----------------------
+    # Đọc kết quả
+    # -----------------------
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._methods.clear()
+            self._slow.clear()
+            self.started_at = datetime.now()
+
+    def snapshot(self, top=None):
+        """
+        dict {"started_at", "slow_ms", "histogram_bounds_ms", "methods", "queries", "slow_queries"}:
+        methods / queries là list dict (name hoặc sql + số liệu) sắp theo tổng thời gian giảm dần,
+        top: chỉ lấy top dòng đầu mỗi list
+        """
+        with self._lock:
+            methods = [dict(name=k, **v.as_dict()) for k, v in self._methods.items()]
+            queries = [dict(sql=k, **v.as_dict()) for k, v in self._queries.items()]
+            slow = [e._asdict() for e in self._slow]
+        methods.sort(key=lambda d: d["total_ms"], reverse=True)
+        queries.sort(key=lambda d: d["total_ms"], reverse=True)
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "slow_ms": self.slow_ms,
+            "histogram_bounds_ms": list(HISTOGRAM_BOUNDS_MS),
+            "methods": methods[:top] if top else methods,
+            "queries": queries[:top] if top else queries,
+            "slow_queries": slow[::-1],     # mới nhất trước
+        }
+
+    def dump_json(self, path, extra=None):
+        """Ghi snapshot() (+ extra: dict thông tin thêm, ví dụ WAL / migration) ra file JSON"""
+        data = self.snapshot()
+        if extra:
+            data.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        return path
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor đo thời gian từ execute tới khi kết quả được đọc hết (fetchall / fetchone trả None /
+    fetchmany ít hơn size / hết vòng for), câu execute kế tiếp, close() hoặc khi cursor bị bỏ
+    (conn.execute(...).fetchone() rồi không dùng nữa).
+    """
+    def _begin(self, sql, params):
+        self._finish()
+        self._sql, self._params = sql, params
+        self._ms, self._rows = 0.0, 0
+
+    def _finish(self, error=False):
+        sql = getattr(self, "_sql", None)
+        if sql is None:
+            return
+        self._sql = None
+        self.connection.instrumentation.record_query(self.connection, sql, self._params, self._ms,
+                                                     self._rows, error)
+
+    def _run(self, method, sql, params, explain_params):
+        instr = self.connection.instrumentation
+        if instr is None or not instr.enabled:
+            self._finish()
+            return method(self, sql, params)
+        self._begin(sql, explain_params)
+        start = time.perf_counter()
+        try:
+            method(self, sql, params)
+        except Exception:
+            self._ms += (time.perf_counter() - start) * 1000
+            self._finish(error=True)
+            raise
+        self._ms += (time.perf_counter() - start) * 1000
+        if self.description is None:    # INSERT / UPDATE / DDL: không có dòng để đọc
+            self._rows = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def execute(self, sql, params=()):
+        return self._run(sqlite3.Cursor.execute, sql, params, params)
+
+    def executemany(self, sql, seq_of_params):
+        # tham số có thể là generator (đã dùng hết): không giữ lại để EXPLAIN
+        return self._run(sqlite3.Cursor.executemany, sql, seq_of_params, None)
+
+    def _timed_fetch(self, fetch, *args):
+        if getattr(self, "_sql", None) is None:
+            return fetch(self, *args)
+        start = time.perf_counter()
+        try:
+            return fetch(self, *args)
+        finally:
+            self._ms += (time.perf_counter() - start) * 1000
+
+    def fetchone(self):
+        row = self._timed_fetch(sqlite3.Cursor.fetchone)
+        if getattr(self, "_sql", None) is not None:
+            if row is None:
+                self._finish()
+            else:
+                self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed_fetch(sqlite3.Cursor.fetchmany, size)
+        if getattr(self, "_sql", None) is not None:
+            self._rows += len(rows)
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed_fetch(sqlite3.Cursor.fetchall)
+        if getattr(self, "_sql", None) is not None:
+            self._rows += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        if getattr(self, "_sql", None) is None:
+            return sqlite3.Cursor.__next__(self)
+        start = time.perf_counter()
+        try:
+            row = sqlite3.Cursor.__next__(self)
+        except StopIteration:
+            self._ms += (time.perf_counter() - start) * 1000
+            self._finish()
+            raise
+        self._ms += (time.perf_counter() - start) * 1000
+        self._rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        sqlite3.Cursor.close(self)
+
+    def __del__(self):
+        # cursor chưa đọc hết mà bị bỏ: vẫn ghi câu SQL (thời gian / số dòng tới lúc đó)
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Kết nối sqlite3 dùng InstrumentedCursor; instrumentation = None thì không đo"""
+    instrumentation = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return sqlite3.Connection.cursor(self, factory)
+
+    # sqlite3.Connection.execute không đi qua cursor() nên phải viết lại
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def _row_count(result):
+    """
+    Số dòng của kết quả hàm DatabaseManager: len() của list / ResultSet / set..., Page -> số dòng của trang;
+    0 nếu không có len() hoặc là chuỗi / dict (đường dẫn, thống kê)
+    """
+    rows = result.rows if isinstance(result, Page) else result
+    if isinstance(rows, (str, bytes, dict)):
+        return 0
+    try:
+        return len(rows)
+    except TypeError:
+        return 0
+
+
+def _short_repr(params, limit=200):
+    if params is None:
+        return None
+    text = repr(params)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _caller():
+    """file:dòng (hàm) gần nhất trong code ứng dụng đã gọi câu SQL (bỏ qua instrumentation / pool)"""
+    for frame in reversed(traceback.extract_stack(limit=30)[:-2]):
+        path = os.path.abspath(frame.filename)
+        if path in _SKIP_FILES or not path.startswith(os.path.dirname(_PACKAGE_DIR)):
+            continue
+        return f"{os.path.relpath(path, os.path.dirname(_PACKAGE_DIR))}:{frame.lineno} ({frame.name})"
+    return None
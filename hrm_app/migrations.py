@@ -0,0 +1,361 @@
+"""
+migrations.py
+Nâng cấp schema database theo phiên bản, lưu trong PRAGMA user_version.
+
+MIGRATIONS là danh sách Migration(version, name, apply, batched) theo thứ tự tăng dần;
+run_migrations chạy lần lượt các bước có version > user_version hiện tại:
+- bước thường (batched=False): apply(cur) chạy trong 1 giao dịch BEGIN IMMEDIATE, cùng lệnh
+  đặt user_version -> lỗi giữa chừng thì rollback, lần mở sau chạy lại từ đầu bước đó
+- bước ghi lại dữ liệu (batched=True): apply(conn, batch_size, stats) tự chia lô theo id, mỗi lô
+  là 1 giao dịch ngắn và lưu vị trí đã làm vào app_meta (migration_<version>_<bảng>), nên
+  database lớn vẫn nâng cấp được mà process khác không bị khóa ghi nhiều phút, và bị ngắt
+  giữa chừng thì lần sau làm tiếp từ lô dở. user_version chỉ tăng khi cả bước xong.
+
+Thời gian từng bước được in ra và trả về dạng list MigrationLog.
+Thêm bước mới: viết hàm rồi thêm Migration(version + 1, ...) vào cuối MIGRATIONS,
+không sửa bước đã phát hành (database của người dùng đã chạy qua).
+
+Không cần giao diện:
+    python -m hrm_app.migrations [--db hrm_ultimate.db] [--status]
+"""
+import argparse
+import re
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from datetime import date
+
+Migration = namedtuple("Migration", "version name apply batched")
+MigrationLog = namedtuple("MigrationLog", "version name seconds rows batches max_batch_seconds")
+
+BATCH_SIZE = 5000
+
+_VN_DATE = re.compile(r"(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})")
+
+
+def _begin_immediate(conn):
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+# -----------------------
+# Các bước nâng cấp
+# -----------------------
+def _v1_base_schema(cur):
+    """Các bảng của ứng dụng (database cũ đã có bảng thì giữ nguyên)"""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS departments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            description TEXT
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS staffs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            stt INTEGER,
+            full_name TEXT NOT NULL,
+            dob DATE,
+            position TEXT,
+            phone TEXT,
+            department_id INTEGER NOT NULL,
+            FOREIGN KEY (department_id) REFERENCES departments (id) ON DELETE CASCADE
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER NOT NULL,
+            loai_ho_so TEXT,
+            so_va_ky_hieu TEXT,
+            ngay_thang TEXT,
+            ten_loai_trich_yeu_noi_dung TEXT,
+            so_to INTEGER,
+            ghi_chu TEXT,
+            file_url TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (staff_id) REFERENCES staffs (id) ON DELETE CASCADE
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS work_histories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER NOT NULL,
+            decision_no TEXT,
+            ngay_quyet_dinh DATE,
+            cac_vi_tri_cong_tac TEXT,
+            giu_chuc_vu DATE,
+            cong_tac_tai_cq DATE,
+            ghi_chu TEXT,
+            FOREIGN KEY (staff_id) REFERENCES staffs(id) ON DELETE CASCADE
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS award_years (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            year INTEGER UNIQUE NOT NULL
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS award_titles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            scope TEXT,
+            level TEXT
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS award_authorities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS award_batches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            award_year_id INTEGER NOT NULL,
+            award_title_id INTEGER NOT NULL,
+            authority_id INTEGER,
+            decision_no TEXT,
+            decision_date DATE,
+            note TEXT,
+            FOREIGN KEY (award_year_id) REFERENCES award_years(id) ON DELETE CASCADE,
+            FOREIGN KEY (award_title_id) REFERENCES award_titles(id) ON DELETE CASCADE,
+            FOREIGN KEY (authority_id) REFERENCES award_authorities(id) ON DELETE SET NULL
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS staff_awards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER NOT NULL,
+            award_batch_id INTEGER NOT NULL,
+            note TEXT,
+            FOREIGN KEY (staff_id) REFERENCES staffs (id) ON DELETE CASCADE,
+            FOREIGN KEY (award_batch_id) REFERENCES award_batches (id) ON DELETE CASCADE
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS department_awards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            department_id INTEGER NOT NULL,
+            award_batch_id INTEGER NOT NULL,
+            note TEXT,
+            FOREIGN KEY (department_id) REFERENCES departments (id) ON DELETE CASCADE,
+            FOREIGN KEY (award_batch_id) REFERENCES award_batches (id) ON DELETE CASCADE
+        )
+    ''')
+    # app_meta: lưu các thông tin phiên bản (index_set_version, ...) và vị trí của bước chia lô
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS app_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+
+# cột được thêm dần qua các bản cũ: CREATE TABLE IF NOT EXISTS không thêm cột vào bảng đã có
+_ADDED_COLUMNS = (
+    ("staffs", "stt", "INTEGER"),
+    ("award_titles", "scope", "TEXT"),
+    ("award_titles", "level", "TEXT"),
+    ("award_batches", "authority_id", "INTEGER REFERENCES award_authorities(id) ON DELETE SET NULL"),
+    ("staff_awards", "note", "TEXT"),
+    ("department_awards", "note", "TEXT"),
+)
+
+
+def _v2_added_columns(cur):
+    """Thêm các cột mà database tạo bởi bản cũ còn thiếu (ALTER TABLE ADD COLUMN không chép lại bảng)"""
+    for table, column, decl in _ADDED_COLUMNS:
+        existing = {r[1] for r in cur.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def _iso_date(text):
+    """'DD/MM/YYYY' (hoặc . -) -> 'YYYY-MM-DD'; None nếu không phải dạng đó hoặc ngày không tồn tại"""
+    m = _VN_DATE.fullmatch(text.strip())
+    if not m:
+        return None
+    d, mo, y = m.groups()
+    try:
+        return date(int(y), int(mo), int(d)).isoformat()
+    except ValueError:
+        return None
+
+
+# (bảng, cột) lưu ngày; ORDER BY / so sánh trên các cột này cần dạng YYYY-MM-DD
+_DATE_COLUMNS = (
+    ("staffs", "dob"),
+    ("work_histories", "ngay_quyet_dinh"),
+    ("award_batches", "decision_date"),
+)
+
+
+def _batched_rewrite(conn, version, table, select_sql, rewrite, batch_size, stats):
+    """
+    Duyệt table theo cửa sổ id (last_id, last_id + batch_size], tới MAX(id) lúc bắt đầu (dòng
+    ghi sau đó do code mới tạo nên đã đúng). Mỗi cửa sổ là 1 giao dịch riêng:
+    rewrite(rows) trả về (sql, list tham số) cho executemany hoặc None nếu không có gì để ghi.
+    id cuối của cửa sổ được lưu trong app_meta cùng giao dịch nên bị ngắt thì lần chạy sau
+    bắt đầu lại từ cửa sổ kế tiếp.
+    select_sql: "SELECT id, ... FROM table WHERE id > ? AND id <= ? ..." (2 tham số: đầu, cuối cửa sổ)
+    """
+    key = f"migration_{version}_{table}"
+    row = conn.execute("SELECT value FROM app_meta WHERE key = ?", (key,)).fetchone()
+    last_id = int(row[0]) if row else 0
+    max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+    while last_id < max_id:
+        started = time.perf_counter()
+        end_id = last_id + batch_size
+        _begin_immediate(conn)
+        rows = conn.execute(select_sql, (last_id, end_id)).fetchall()
+        changes = rewrite(rows) if rows else None
+        if changes:
+            conn.executemany(*changes)
+            stats["rows"] += len(changes[1])
+        last_id = end_id
+        conn.execute('''
+            INSERT INTO app_meta (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        ''', (key, str(last_id)))
+        conn.commit()
+        stats["batches"] += 1
+        stats["max_batch_seconds"] = max(stats["max_batch_seconds"], time.perf_counter() - started)
+    conn.execute("DELETE FROM app_meta WHERE key = ?", (key,))
+    conn.commit()
+
+
+def _v3_iso_dates(conn, batch_size, stats):
+    """Đổi ngày nhập tay dạng DD/MM/YYYY sang YYYY-MM-DD (như importer.parse_date); giá trị khác giữ nguyên"""
+    for table, column in _DATE_COLUMNS:
+        def rewrite(rows, column=column, table=table):
+            updates = []
+            for row_id, value in rows:
+                iso = _iso_date(value) if isinstance(value, str) else None
+                if iso is not None:
+                    updates.append((iso, row_id))
+            return (f"UPDATE {table} SET {column} = ? WHERE id = ?", updates) if updates else None
+
+        # chỉ đọc dòng có thể là DD/MM/YYYY (có / . hoặc kết thúc bằng -YYYY); ngày ISO bị GLOB loại sớm
+        _batched_rewrite(conn, 3, table, f'''
+            SELECT id, {column} FROM {table}
+            WHERE id > ? AND id <= ?
+              AND ({column} GLOB '*[/.]*' OR {column} GLOB '*-[0-9][0-9][0-9][0-9]')
+        ''', rewrite, batch_size, stats)
+
+
+def _v4_stt_backfill(conn, batch_size, stats):
+    """
+    Nhân viên tạo bởi bản chưa tự gán STT có stt trống / trùng: gán lại 1..n theo id cho
+    từng phòng ban sai. Cửa sổ theo id phòng ban (batch_size // 1000 phòng ban mỗi giao dịch:
+    mỗi phòng ban có thể có nhiều nhân viên). Cần index (department_id, stt) - cùng tên với
+    db.SECONDARY_INDEXES nên _ensure_indexes không tạo lại - để không quét cả bảng mỗi phòng ban.
+    """
+    started = time.perf_counter()
+    _begin_immediate(conn)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_staffs_department_stt ON staffs (department_id, stt)")
+    conn.commit()
+    stats["max_batch_seconds"] = max(stats["max_batch_seconds"], time.perf_counter() - started)
+
+    def rewrite(rows):
+        updates = []
+        for (department_id,) in rows:
+            n, with_stt, low, high, distinct = conn.execute('''
+                SELECT COUNT(*), COUNT(stt), MIN(stt), MAX(stt), COUNT(DISTINCT stt)
+                FROM staffs WHERE department_id = ?
+            ''', (department_id,)).fetchone()
+            if n == 0 or (with_stt == n and low == 1 and high == n and distinct == n):
+                continue
+            ids = conn.execute("SELECT id FROM staffs WHERE department_id = ? ORDER BY id", (department_id,))
+            updates.extend((i, staff_id) for i, (staff_id,) in enumerate(ids, start=1))
+        return ("UPDATE staffs SET stt = ? WHERE id = ?", updates) if updates else None
+
+    _batched_rewrite(conn, 4, "departments", "SELECT id FROM departments WHERE id > ? AND id <= ?",
+                     rewrite, max(1, batch_size // 1000), stats)
+
+
+MIGRATIONS = [
+    Migration(1, "base_schema", _v1_base_schema, False),
+    Migration(2, "added_columns", _v2_added_columns, False),
+    Migration(3, "iso_dates", _v3_iso_dates, True),
+    Migration(4, "stt_backfill", _v4_stt_backfill, True),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def pending(conn):
+    current = get_version(conn)
+    return [m for m in MIGRATIONS if m.version > current]
+
+
+def run_migrations(conn, batch_size=BATCH_SIZE, log=print):
+    """
+    Chạy các bước còn thiếu trên conn (kết nối ghi, không ở trong giao dịch).
+    Trả về list MigrationLog(version, name, seconds, rows, batches, max_batch_seconds);
+    rows / batches chỉ có ở bước chia lô, max_batch_seconds là thời gian giữ khóa ghi lâu nhất.
+    log(text): nơi in thời gian từng bước (None để tắt).
+    """
+    current = get_version(conn)
+    if current > LATEST_VERSION and log is not None:
+        log(f"⚠ Database ở phiên bản {current}, mới hơn ứng dụng ({LATEST_VERSION}): bỏ qua nâng cấp")
+    results = []
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        started = time.perf_counter()
+        stats = {"rows": 0, "batches": 0, "max_batch_seconds": 0.0}
+        try:
+            if migration.batched:
+                migration.apply(conn, batch_size, stats)
+                _begin_immediate(conn)
+            else:
+                _begin_immediate(conn)
+                migration.apply(conn.cursor())
+            # PRAGMA không nhận tham số ?; version là số nguyên trong MIGRATIONS
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        elapsed = time.perf_counter() - started
+        if not migration.batched:
+            stats["max_batch_seconds"] = elapsed
+        entry = MigrationLog(migration.version, migration.name, elapsed, **stats)
+        results.append(entry)
+        if log is not None:
+            detail = f", {entry.rows} dòng / {entry.batches} lô" if migration.batched else ""
+            log(f"✓ Migration {entry.version} ({entry.name}): {entry.seconds:.2f} giây{detail}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nâng cấp schema database (PRAGMA user_version)")
+    parser.add_argument("--db", default="hrm_ultimate.db")
+    parser.add_argument("--status", action="store_true", help="chỉ in phiên bản hiện tại và các bước còn thiếu")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA foreign_keys = ON")
+    try:
+        todo = pending(conn)
+        print(f"Phiên bản: {get_version(conn)} / {LATEST_VERSION}")
+        if args.status:
+            for m in todo:
+                print(f"  chưa chạy: {m.version} {m.name}")
+            return 0
+        run_migrations(conn, batch_size=args.batch_size)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# hrm_app/pool.py
+# Pool kết nối SQLite dùng chung cho DatabaseManager.
+# - 1 kết nối ghi (writer) dùng chung, khóa bằng RLock nên gọi lồng nhau trong cùng thread vẫn dùng lại kết nối
+# - tối đa N kết nối đọc (reader) dùng đồng thời; mỗi thread giữ kết nối đọc riêng (thread affinity)
+# - kiểm tra sức khỏe (SELECT 1) khi kết nối để rảnh quá health_check_interval giây
+
+import sqlite3
+import threading
+import time
+
+
+class PooledConnection:
+    """
+    Proxy quanh sqlite3.Connection lấy từ pool.
+    close() trả kết nối về pool thay vì đóng thật, nên code cũ
+    (conn = get_connection() ... conn.close()) vẫn chạy nguyên như trước.
+    Dùng được với with (xem __exit__) để kết nối luôn được trả kể cả khi có exception.
+    """
+    def __init__(self, conn, release):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_release", release)
+        object.__setattr__(self, "_closed", False)
+
+    def close(self):
+        if not self._closed:
+            object.__setattr__(self, "_closed", True)
+            self._release(self._conn)
+
+    @property
+    def connection(self):
+        """sqlite3.Connection thật bên dưới (so danh tính kết nối, ví dụ kèm PRAGMA data_version)"""
+        return self._conn
+
+    def __getattr__(self, name):
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """
+        with db.get_connection() as conn: ... - lỗi giữa chừng thì rollback giao dịch đang mở,
+        luôn trả kết nối về pool (nhả khóa ghi). Commit vẫn do caller gọi như trước.
+        """
+        try:
+            if exc_type is not None and not self._closed and self._conn.in_transaction:
+                self._conn.rollback()
+        finally:
+            self.close()
+        return False
+
+
+class ConnectionPool:
+    def __init__(self, db_name, readers=4, timeout=5.0, health_check_interval=30.0, on_connect=None,
+                 factory=sqlite3.Connection, cached_statements=128):
+        """
+        factory: lớp kết nối truyền cho sqlite3.connect (ví dụ instrumentation.InstrumentedConnection)
+        cached_statements: số câu SQL đã biên dịch mỗi kết nối giữ lại (xem repository.STATEMENT_CACHE_SIZE)
+        """
+        self.db_name = db_name
+        self.factory = factory
+        self.cached_statements = cached_statements
+        self.readers = max(1, int(readers))
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.on_connect = on_connect
+
+        self._write_lock = threading.RLock()
+        self._writer = None
+        self._writer_depth = 0
+
+        self._reader_slots = threading.BoundedSemaphore(self.readers)
+        self._local = threading.local()
+        self._readers = {}          # thread ident -> sqlite3.Connection
+        self._lock = threading.Lock()
+        self._last_used = {}        # id(conn) -> time.monotonic()
+        self._closed = False
+
+    # -----------------------
+    # Tạo / kiểm tra kết nối
+    # -----------------------
+    def _connect(self, readonly=False):
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False, factory=self.factory,
+                               cached_statements=self.cached_statements)
+        conn.execute("PRAGMA foreign_keys = ON")
+        if self.on_connect is not None:
+            self.on_connect(conn)
+        if readonly:
+            # Kết nối đọc không được phép ghi nhầm
+            conn.execute("PRAGMA query_only = ON")
+        self._last_used[id(conn)] = time.monotonic()
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _checked(self, conn, readonly=False):
+        """Trả về conn nếu còn tốt, ngược lại mở kết nối mới thay thế"""
+        idle = time.monotonic() - self._last_used.get(id(conn), 0)
+        if idle < self.health_check_interval or self._is_healthy(conn):
+            return conn
+        self._discard(conn)
+        return self._connect(readonly=readonly)
+
+    # -----------------------
+    # Writer
+    # -----------------------
+    def writer(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        if not self._write_lock.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError("Timed out waiting for the writer connection")
+        try:
+            if self._writer_depth == 0:
+                self._writer = self._connect() if self._writer is None else self._checked(self._writer)
+            self._writer_depth += 1
+        except Exception:
+            self._write_lock.release()
+            raise
+        return PooledConnection(self._writer, self._release_writer)
+
+    def _release_writer(self, conn):
+        try:
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                # Giống sqlite3 close(): bỏ các thay đổi chưa commit
+                if conn.in_transaction:
+                    conn.rollback()
+                self._last_used[id(conn)] = time.monotonic()
+        finally:
+            self._write_lock.release()
+
+    # -----------------------
+    # Readers (mỗi thread 1 kết nối)
+    # -----------------------
+    def reader(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            if not self._reader_slots.acquire(timeout=self.timeout):
+                raise sqlite3.OperationalError("Timed out waiting for a reader connection")
+            try:
+                conn = getattr(self._local, "conn", None)
+                if conn is None:
+                    self._prune_dead_readers()
+                    conn = self._connect(readonly=True)
+                    with self._lock:
+                        stale = self._readers.pop(threading.get_ident(), None)
+                        if stale is not None:
+                            self._discard(stale)
+                        self._readers[threading.get_ident()] = conn
+                else:
+                    fresh = self._checked(conn, readonly=True)
+                    if fresh is not conn:
+                        with self._lock:
+                            self._readers[threading.get_ident()] = fresh
+                    conn = fresh
+                self._local.conn = conn
+            except Exception:
+                self._reader_slots.release()
+                raise
+        self._local.depth = depth + 1
+        return PooledConnection(self._local.conn, self._release_reader)
+
+    def _release_reader(self, conn):
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            if conn.in_transaction:
+                conn.rollback()
+            self._last_used[id(conn)] = time.monotonic()
+            self._reader_slots.release()
+
+    def _prune_dead_readers(self):
+        """Đóng kết nối đọc của các thread đã kết thúc"""
+        alive = {t.ident for t in threading.enumerate()}
+        with self._lock:
+            dead = [ident for ident in self._readers if ident not in alive]
+            for ident in dead:
+                self._discard(self._readers.pop(ident))
+
+    # -----------------------
+    # Thông tin / đóng pool
+    # -----------------------
+    def stats(self):
+        with self._lock:
+            readers_open = len(self._readers)
+        return {
+            "writer_open": self._writer is not None,
+            "readers_open": readers_open,
+            "readers_max": self.readers,
+        }
+
+    def close_all(self):
+        self._closed = True
+        with self._write_lock:
+            if self._writer is not None:
+                self._discard(self._writer)
+                self._writer = None
+        with self._lock:
+            for conn in self._readers.values():
+                self._discard(conn)
+            self._readers.clear()
@@ -0,0 +1,544 @@
+"""
+repository.py
+Câu đọc của DatabaseManager: mỗi thao tác có đúng 1 câu SQL (STATEMENTS, đặt tên "<bảng>.<thao tác>")
+và 1 kiểu dòng (namedtuple) thay cho tuple theo vị trí - view viết s.full_name thay vì s[2].
+Kiểu dòng vẫn là tuple nên code cũ còn đánh chỉ số r[0], r[1]... vẫn chạy.
+
+- SQL là hằng số: sqlite3 giữ câu lệnh đã biên dịch theo chuỗi SQL trên từng kết nối
+  (cached_statements), nên lần gọi sau chỉ bind tham số. Pool mở kết nối với
+  STATEMENT_CACHE_SIZE (mặc định của sqlite3 là 128, ít hơn số câu SQL của ứng dụng)
+- fetch_all / fetch_one / fetch_value(conn, "staffs.page", params)
+- rows(Staff, cur.fetchall()): dùng cho câu ghép động (lọc, tìm kiếm) cùng kiểu dòng
+- list_page(conn, "staffs", order_by=("department", "-dob"), filters={"department_id": 2}, cursor=..., limit=100)
+  -> Page:
+  danh sách trong LISTINGS lọc / sắp xếp trong SQLite (tên trường, bộ lọc chỉ nhận theo danh sách cho phép),
+  phân trang keyset theo (khóa sắp xếp, id) - không OFFSET, không đọc cả bảng. count_listing / cursor_at đi kèm
+- fetch_columns(...) / ResultSet.from_cursor(...): danh sách lớn giữ lâu (combo nhân viên, kết quả tìm kiếm,
+  danh sách đợt...) lưu theo cột; giá trị lặp lại trong cột SHARED_FIELDS chỉ giữ 1 object.
+  Đo: python benchmarks/bench_rows.py
+
+Kiểm tra mọi câu trong STATEMENTS / LISTINGS trên schema hiện tại (số cột khớp kiểu dòng, phân trang keyset):
+    python -m pytest tests/test_repository.py
+"""
+import re
+from collections import namedtuple
+from collections.abc import MutableSequence
+from itertools import repeat
+
+STATEMENT_CACHE_SIZE = 256
+
+# -----------------------
+# Kiểu dòng
+# -----------------------
+Department = namedtuple("Department", "id name description")
+Staff = namedtuple("Staff", "id stt full_name position phone dob department")
+AwardYear = namedtuple("AwardYear", "id year")
+AwardTitle = namedtuple("AwardTitle", "id name scope level")
+AwardAuthority = namedtuple("AwardAuthority", "id name")
+AwardBatch = namedtuple("AwardBatch", "id year title level authority decision_no decision_date note "
+                                      "award_year_id award_title_id authority_id")
+StaffAward = namedtuple("StaffAward", "id year title level authority decision_no decision_date note "
+                                      "staff_id award_batch_id")
+DepartmentAward = namedtuple("DepartmentAward", "id year title level authority decision_no decision_date note "
+                                                "department_id award_batch_id")
+Document = namedtuple("Document", "id staff_name loai_ho_so so_va_ky_hieu ngay_thang file_url")
+StaffDocument = namedtuple("StaffDocument", "id loai_ho_so so_va_ky_hieu ngay_thang ten_loai_trich_yeu_noi_dung "
+                                            "so_to ghi_chu file_url created_at")
+WorkHistory = namedtuple("WorkHistory", "id staff_name decision_no ngay_quyet_dinh cac_vi_tri_cong_tac "
+                                        "giu_chuc_vu cong_tac_tai_cq ghi_chu staff_id")
+
+# Cột có ít giá trị khác nhau (tên phòng ban, năm, cấp...): ResultSet dùng chung 1 object cho mỗi giá trị
+SHARED_FIELDS = {
+    Staff: ("position", "department"),
+    AwardBatch: ("year", "title", "level", "authority", "award_year_id", "award_title_id", "authority_id"),
+    StaffAward: ("year", "title", "level", "authority", "staff_id", "award_batch_id"),
+    DepartmentAward: ("year", "title", "level", "authority", "department_id", "award_batch_id"),
+    Document: ("staff_name", "loai_ho_so"),
+    StaffDocument: ("loai_ho_so",),
+    WorkHistory: ("staff_name", "giu_chuc_vu", "cong_tac_tai_cq", "staff_id"),
+}
+FETCH_CHUNK = 1000
+
+# row=None: câu trả về giá trị đơn (COUNT, id) hoặc cặp (name, value) - giữ tuple thường
+Statement = namedtuple("Statement", "sql row")
+
+# -----------------------
+# Đoạn SQL dùng chung (cột phải khớp kiểu dòng)
+# -----------------------
+# (cột, FROM ... JOIN) tách riêng để LISTINGS ghép thêm cột khóa sắp xếp
+_STAFF_COLUMNS = "s.id, s.stt, s.full_name, s.position, s.phone, s.dob, d.name"
+_STAFF_SOURCE = '''
+    FROM staffs s
+    LEFT JOIN departments d ON s.department_id = d.id
+'''
+STAFF_SELECT = "\n    SELECT " + _STAFF_COLUMNS + _STAFF_SOURCE
+
+_DOCUMENT_COLUMNS = "d.id, s.full_name, d.loai_ho_so, d.so_va_ky_hieu, d.ngay_thang, d.file_url"
+_DOCUMENT_SOURCE = '''
+    FROM documents d
+    LEFT JOIN staffs s ON d.staff_id = s.id
+'''
+_DOCUMENT_SELECT = "\n    SELECT " + _DOCUMENT_COLUMNS + _DOCUMENT_SOURCE
+
+_WORK_HISTORY_COLUMNS = ("wh.id, s.full_name, wh.decision_no, wh.ngay_quyet_dinh, wh.cac_vi_tri_cong_tac, "
+                         "wh.giu_chuc_vu, wh.cong_tac_tai_cq, wh.ghi_chu, wh.staff_id")
+_WORK_HISTORY_SOURCE = '''
+    FROM work_histories wh
+    LEFT JOIN staffs s ON wh.staff_id = s.id
+'''
+_WORK_HISTORY_SELECT = "\n    SELECT " + _WORK_HISTORY_COLUMNS + _WORK_HISTORY_SOURCE
+
+_AWARD_BATCH_COLUMNS = ("ab.id, ay.year, at.name, at.level, aa.name, ab.decision_no, ab.decision_date, ab.note, "
+                        "ab.award_year_id, ab.award_title_id, ab.authority_id")
+_AWARD_BATCH_SOURCE = '''
+    FROM award_batches ab
+    LEFT JOIN award_years ay ON ab.award_year_id = ay.id
+    LEFT JOIN award_titles at ON ab.award_title_id = at.id
+    LEFT JOIN award_authorities aa ON ab.authority_id = aa.id
+'''
+
+# LISTINGS dùng JOIN (không LEFT JOIN) với bảng cha của cột NOT NULL có khóa ngoại (foreign_keys=ON):
+# cùng kết quả, nhưng SQLite được đổi thứ tự bảng - sắp theo tên phòng ban / năm thì đi index của bảng cha
+# (departments.name, award_years.year) rồi index department_id / award_year_id, không sắp cả bảng
+_STAFF_LISTING_SOURCE = '''
+    FROM staffs s
+    JOIN departments d ON s.department_id = d.id
+'''
+_AWARD_BATCH_LISTING_SOURCE = '''
+    FROM award_batches ab
+    JOIN award_years ay ON ab.award_year_id = ay.id
+    JOIN award_titles at ON ab.award_title_id = at.id
+    LEFT JOIN award_authorities aa ON ab.authority_id = aa.id
+'''
+
+# Đợt khen thưởng kèm năm / danh hiệu / cơ quan - dùng cho khen thưởng cá nhân (sa) và tập thể (da)
+_AWARD_JOINS = '''
+    JOIN award_batches ab ON {alias}.award_batch_id = ab.id
+    JOIN award_titles at ON ab.award_title_id = at.id
+    JOIN award_years ay ON ab.award_year_id = ay.id
+    LEFT JOIN award_authorities aa ON ab.authority_id = aa.id
+'''
+
+STATEMENTS = {
+    # Phòng ban
+    "departments.all": Statement("SELECT id, name, description FROM departments ORDER BY id", Department),
+    "departments.get": Statement("SELECT id, name, description FROM departments WHERE id = ?", Department),
+
+    # Nhân viên
+    "staffs.all": Statement(STAFF_SELECT + "ORDER BY s.id", Staff),
+    "staffs.get": Statement(STAFF_SELECT + "WHERE s.id = ?", Staff),
+    "staffs.count": Statement("SELECT COUNT(*) FROM staffs", None),
+    "staffs.page": Statement(STAFF_SELECT + "WHERE s.id > ? ORDER BY s.id LIMIT ?", Staff),
+    "staffs.key_at": Statement("SELECT id FROM staffs ORDER BY id LIMIT 1 OFFSET ?", None),
+    "staffs.by_department": Statement(STAFF_SELECT + "WHERE s.department_id = ? ORDER BY s.stt ASC", Staff),
+    "staffs.search_fts": Statement('''
+        SELECT s.id, s.stt, s.full_name, s.position, s.phone, s.dob, d.name
+        FROM staffs_fts
+        JOIN staffs s ON s.id = staffs_fts.rowid
+        LEFT JOIN departments d ON s.department_id = d.id
+        WHERE staffs_fts MATCH ?
+        ORDER BY bm25(staffs_fts, 10.0, 3.0, 1.0), s.id
+        LIMIT ?
+    ''', Staff),
+    "staffs.search_like": Statement(STAFF_SELECT + '''
+        WHERE s.full_name LIKE :q OR s.position LIKE :q OR s.phone LIKE :q
+        ORDER BY s.id
+        LIMIT :limit
+    ''', Staff),
+
+    # Danh mục khen thưởng
+    "award_years.all": Statement("SELECT id, year FROM award_years ORDER BY year DESC", AwardYear),
+    "award_titles.all": Statement("SELECT id, name, scope, level FROM award_titles ORDER BY id", AwardTitle),
+    "award_authorities.all": Statement("SELECT id, name FROM award_authorities ORDER BY name", AwardAuthority),
+    "award_batches.all": Statement("SELECT " + _AWARD_BATCH_COLUMNS + _AWARD_BATCH_SOURCE
+                                   + "ORDER BY IFNULL(ab.decision_date, '') DESC", AwardBatch),
+
+    # Khen thưởng cá nhân / tập thể. :year NULL = mọi năm
+    "staff_awards.staff_ids_by_batch": Statement("SELECT staff_id FROM staff_awards WHERE award_batch_id = ?", None),
+    "staff_awards.count_by_staff": Statement("SELECT COUNT(*) FROM staff_awards WHERE staff_id = ?", None),
+    "staff_awards.by_staff": Statement('''
+        SELECT sa.id, ay.year, at.name, at.level, aa.name, ab.decision_no, ab.decision_date, sa.note,
+               sa.staff_id, sa.award_batch_id
+        FROM staff_awards sa
+    ''' + _AWARD_JOINS.format(alias="sa") + '''
+        WHERE sa.staff_id = :owner_id AND (:year IS NULL OR ay.year = :year)
+        ORDER BY ay.year DESC, ab.decision_date DESC
+    ''', StaffAward),
+    "department_awards.count_by_department": Statement(
+        "SELECT COUNT(*) FROM department_awards WHERE department_id = ?", None),
+    "department_awards.by_department": Statement('''
+        SELECT da.id, ay.year, at.name, at.level, aa.name, ab.decision_no, ab.decision_date, da.note,
+               da.department_id, da.award_batch_id
+        FROM department_awards da
+    ''' + _AWARD_JOINS.format(alias="da") + '''
+        WHERE da.department_id = :owner_id AND (:year IS NULL OR ay.year = :year)
+        ORDER BY ay.year DESC, ab.decision_date DESC
+    ''', DepartmentAward),
+
+    # Văn bản / hồ sơ
+    "documents.all": Statement(_DOCUMENT_SELECT + "ORDER BY d.id", Document),
+    "documents.count": Statement("SELECT COUNT(*) FROM documents", None),
+    "documents.page": Statement(_DOCUMENT_SELECT + "WHERE d.id > ? ORDER BY d.id LIMIT ?", Document),
+    "documents.key_at": Statement("SELECT id FROM documents ORDER BY id LIMIT 1 OFFSET ?", None),
+    "documents.by_staff": Statement('''
+        SELECT id, loai_ho_so, so_va_ky_hieu, ngay_thang, ten_loai_trich_yeu_noi_dung, so_to, ghi_chu,
+               file_url, created_at
+        FROM documents
+        WHERE staff_id = ?
+        ORDER BY created_at DESC
+    ''', StaffDocument),
+
+    # Quá trình công tác (sắp theo id giảm dần)
+    "work_histories.all": Statement(_WORK_HISTORY_SELECT + "ORDER BY wh.id DESC", WorkHistory),
+    "work_histories.get": Statement(_WORK_HISTORY_SELECT + "WHERE wh.id = ?", WorkHistory),
+    "work_histories.count": Statement("SELECT COUNT(*) FROM work_histories", None),
+    "work_histories.page": Statement(_WORK_HISTORY_SELECT + "WHERE wh.id < ? ORDER BY wh.id DESC LIMIT ?",
+                                     WorkHistory),
+    "work_histories.key_at": Statement("SELECT id FROM work_histories ORDER BY id DESC LIMIT 1 OFFSET ?", None),
+    "work_histories.by_staff": Statement(_WORK_HISTORY_SELECT + "WHERE wh.staff_id = ? ORDER BY wh.id DESC",
+                                         WorkHistory),
+
+    # Thống kê
+    "stats_counters.all": Statement("SELECT name, value FROM stats_counters", None),
+}
+
+# -----------------------
+# Danh sách phân trang (list_page): lọc + sắp xếp trong SQLite, phân trang keyset theo (khóa sắp xếp, id)
+# -----------------------
+# sql: điều kiện WHERE 1 tham số; convert: đổi giá trị trước khi bind (None = giữ nguyên)
+Filter = namedtuple("Filter", "sql convert")
+# columns / source: cột (khớp row) và FROM ... JOIN; key: cột id (khóa phụ cho thứ tự ổn định);
+# sorts: tên trường -> biểu thức sắp xếp (không NULL, để so sánh keyset đúng); filters: tên -> Filter;
+# default_order: như order_by của list_page
+Listing = namedtuple("Listing", "columns source row key sorts filters default_order")
+# rows: các dòng của trang; cursor: truyền vào lần gọi sau để lấy trang tiếp (None = hết dữ liệu)
+Page = namedtuple("Page", "rows cursor")
+
+
+def _contains(value):
+    return f"%{value}%"
+
+
+def _year_start(year):
+    return f"{int(year):04d}-01-01"
+
+
+def _after_year(year):
+    return f"{int(year) + 1:04d}-01-01"
+
+
+# nhân viên có khen thưởng từ năm ? trở đi (0 = bất kỳ năm nào); tương quan theo s.id, đi index staff_id
+_STAFF_AWARDED_SINCE = (
+    "EXISTS (SELECT 1 FROM staff_awards sa JOIN award_batches ab ON sa.award_batch_id = ab.id "
+    "JOIN award_years ay ON ab.award_year_id = ay.id WHERE sa.staff_id = s.id AND ay.year >= ?)")
+
+
+# cột chung của khen thưởng cá nhân / tập thể (qua _AWARD_JOINS)
+_AWARD_SORTS = {"year": "ay.year", "title": "at.name", "level": "IFNULL(at.level, '')",
+                "authority": "IFNULL(aa.name, '')", "decision_no": "IFNULL(ab.decision_no, '')",
+                "decision_date": "IFNULL(ab.decision_date, '')"}
+
+
+LISTINGS = {
+    "staffs": Listing(
+        _STAFF_COLUMNS, _STAFF_LISTING_SOURCE, Staff, "s.id",
+        sorts={"id": "s.id", "stt": "IFNULL(s.stt, 0)", "full_name": "s.full_name",
+               "position": "IFNULL(s.position, '')", "phone": "IFNULL(s.phone, '')", "dob": "IFNULL(s.dob, '')",
+               "department": "d.name"},
+        # born_from / born_to: năm sinh (dob dạng YYYY-MM-DD; so sánh cùng biểu thức với idx_staffs_dob_sort,
+        # không có ngày sinh thì không khớp); awarded_since / not_awarded_since: năm (0 = mọi năm)
+        filters={"department_id": Filter("s.department_id = ?", None),
+                 "position": Filter("s.position LIKE ?", _contains),
+                 "born_from": Filter("IFNULL(s.dob, '') >= ?", _year_start),
+                 "born_to": Filter("(s.dob IS NOT NULL AND IFNULL(s.dob, '') < ?)", _after_year),
+                 "awarded_since": Filter(_STAFF_AWARDED_SINCE, int),
+                 "not_awarded_since": Filter("NOT " + _STAFF_AWARDED_SINCE, int)},
+        default_order="id"),
+    "departments": Listing(
+        "dp.id, dp.name, dp.description", "FROM departments dp", Department, "dp.id",
+        sorts={"id": "dp.id", "name": "dp.name", "description": "IFNULL(dp.description, '')"},
+        filters={}, default_order="id"),
+    "documents": Listing(
+        _DOCUMENT_COLUMNS, _DOCUMENT_SOURCE, Document, "d.id",
+        sorts={"id": "d.id", "staff_name": "IFNULL(s.full_name, '')", "loai_ho_so": "IFNULL(d.loai_ho_so, '')",
+               "so_va_ky_hieu": "IFNULL(d.so_va_ky_hieu, '')", "ngay_thang": "IFNULL(d.ngay_thang, '')",
+               "file_url": "IFNULL(d.file_url, '')"},
+        filters={"staff_id": Filter("d.staff_id = ?", None),
+                 "loai_ho_so": Filter("d.loai_ho_so LIKE ?", _contains)},
+        default_order="id"),
+    # hồ sơ của 1 nhân viên (dialog "Hồ sơ của ...")
+    "staff_documents": Listing(
+        "d.id, d.loai_ho_so, d.so_va_ky_hieu, d.ngay_thang, d.ten_loai_trich_yeu_noi_dung, d.so_to, d.ghi_chu, "
+        "d.file_url, d.created_at", "FROM documents d", StaffDocument, "d.id",
+        sorts={"id": "d.id", "loai_ho_so": "IFNULL(d.loai_ho_so, '')",
+               "so_va_ky_hieu": "IFNULL(d.so_va_ky_hieu, '')", "ngay_thang": "IFNULL(d.ngay_thang, '')",
+               "ten_loai_trich_yeu_noi_dung": "IFNULL(d.ten_loai_trich_yeu_noi_dung, '')",
+               "so_to": "IFNULL(d.so_to, 0)", "ghi_chu": "IFNULL(d.ghi_chu, '')",
+               "file_url": "IFNULL(d.file_url, '')", "created_at": "IFNULL(d.created_at, '')"},
+        filters={"staff_id": Filter("d.staff_id = ?", None)},
+        default_order="-created_at"),
+    "work_histories": Listing(
+        _WORK_HISTORY_COLUMNS, _WORK_HISTORY_SOURCE, WorkHistory, "wh.id",
+        sorts={"id": "wh.id", "staff_name": "IFNULL(s.full_name, '')",
+               "decision_no": "IFNULL(wh.decision_no, '')", "ngay_quyet_dinh": "IFNULL(wh.ngay_quyet_dinh, '')",
+               "cac_vi_tri_cong_tac": "IFNULL(wh.cac_vi_tri_cong_tac, '')",
+               "giu_chuc_vu": "IFNULL(wh.giu_chuc_vu, '')", "cong_tac_tai_cq": "IFNULL(wh.cong_tac_tai_cq, '')",
+               "ghi_chu": "IFNULL(wh.ghi_chu, '')"},
+        filters={"staff_id": Filter("wh.staff_id = ?", None)},
+        default_order="-id"),
+    "award_years": Listing(
+        "ay.id, ay.year", "FROM award_years ay", AwardYear, "ay.id",
+        sorts={"id": "ay.id", "year": "ay.year"}, filters={}, default_order="-year"),
+    "award_titles": Listing(
+        "at.id, at.name, at.scope, at.level", "FROM award_titles at", AwardTitle, "at.id",
+        sorts={"id": "at.id", "name": "at.name", "scope": "IFNULL(at.scope, '')", "level": "IFNULL(at.level, '')"},
+        filters={}, default_order="id"),
+    "award_authorities": Listing(
+        "aa.id, aa.name", "FROM award_authorities aa", AwardAuthority, "aa.id",
+        sorts={"id": "aa.id", "name": "aa.name"}, filters={}, default_order="name"),
+    "award_batches": Listing(
+        _AWARD_BATCH_COLUMNS, _AWARD_BATCH_LISTING_SOURCE, AwardBatch, "ab.id",
+        sorts={"id": "ab.id", "year": "ay.year", "title": "at.name", "level": "IFNULL(at.level, '')",
+               "authority": "IFNULL(aa.name, '')", "decision_no": "IFNULL(ab.decision_no, '')",
+               "decision_date": "IFNULL(ab.decision_date, '')", "note": "IFNULL(ab.note, '')"},
+        filters={"year": Filter("ay.year = ?", None), "award_title_id": Filter("ab.award_title_id = ?", None),
+                 "authority_id": Filter("ab.authority_id = ?", None)},
+        default_order="-decision_date"),
+    # khen thưởng của 1 nhân viên / phòng ban (trang tra cứu), mặc định như staff_awards.by_staff
+    "staff_awards": Listing(
+        "sa.id, ay.year, at.name, at.level, aa.name, ab.decision_no, ab.decision_date, sa.note, sa.staff_id, "
+        "sa.award_batch_id", "FROM staff_awards sa" + _AWARD_JOINS.format(alias="sa"), StaffAward, "sa.id",
+        sorts=dict(id="sa.id", **_AWARD_SORTS, note="IFNULL(sa.note, '')"),
+        filters={"staff_id": Filter("sa.staff_id = ?", None), "year": Filter("ay.year = ?", None)},
+        default_order=("-year", "-decision_date")),
+    "department_awards": Listing(
+        "da.id, ay.year, at.name, at.level, aa.name, ab.decision_no, ab.decision_date, da.note, da.department_id, "
+        "da.award_batch_id", "FROM department_awards da" + _AWARD_JOINS.format(alias="da"), DepartmentAward,
+        "da.id",
+        sorts=dict(id="da.id", **_AWARD_SORTS, note="IFNULL(da.note, '')"),
+        filters={"department_id": Filter("da.department_id = ?", None), "year": Filter("ay.year = ?", None)},
+        default_order=("-year", "-decision_date")),
+}
+
+
+# -----------------------
+# Chạy câu lệnh
+# -----------------------
+def rows(row_type, tuples):
+    """list tuple -> list row_type (tuple.__new__ chạy trong C, không qua __new__ của namedtuple)"""
+    return list(map(tuple.__new__, repeat(row_type), tuples))
+
+
+class ResultSet(MutableSequence):
+    """
+    Kết quả lưu theo cột (mỗi cột 1 list) thay vì list namedtuple: không có object tuple cho từng dòng
+    và giá trị lặp lại trong cột SHARED_FIELDS chỉ giữ 1 object.
+    Dùng như list các row_type: len, rs[i] (namedtuple tạo lúc truy cập), lặp, rs[a:b] (ResultSet mới),
+    insert / append / rs[i] = row / del rs[i]. select(fields) lặp tuple các cột đã chọn mà không tạo namedtuple.
+    """
+    __slots__ = ("row_type", "columns")
+
+    def __init__(self, row_type, columns=None):
+        self.row_type = row_type
+        self.columns = columns if columns is not None else [[] for _ in row_type._fields]
+
+    @classmethod
+    def from_cursor(cls, row_type, cursor, chunk_size=FETCH_CHUNK):
+        """Đọc hết cursor theo lô fetchmany: chỉ giữ tuple của 1 lô cùng lúc"""
+        result = cls(row_type)
+        shared = SHARED_FIELDS.get(row_type, ())
+        caches = [{} if field in shared else None for field in row_type._fields]
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                return result
+            for column, values, cache in zip(result.columns, zip(*chunk), caches):
+                if cache is None:
+                    column.extend(values)
+                else:
+                    column.extend(map(cache.setdefault, values, values))
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ResultSet(self.row_type, [column[index] for column in self.columns])
+        return tuple.__new__(self.row_type, [column[index] for column in self.columns])
+
+    def __iter__(self):
+        return map(tuple.__new__, repeat(self.row_type), zip(*self.columns))
+
+    def __setitem__(self, index, row):
+        for column, value in zip(self.columns, row):
+            column[index] = value
+
+    def __delitem__(self, index):
+        for column in self.columns:
+            del column[index]
+
+    def insert(self, index, row):
+        for column, value in zip(self.columns, row):
+            column.insert(index, value)
+
+    def __repr__(self):
+        return f"<ResultSet {self.row_type.__name__} x {len(self)}>"
+
+    def column(self, field):
+        """list giá trị của 1 trường (không chép)"""
+        return self.columns[self.row_type._fields.index(field)]
+
+    def select(self, fields):
+        """Lặp tuple (giá trị các trường fields) của từng dòng"""
+        return zip(*[self.column(field) for field in fields])
+
+
+def execute(conn, name, params=()):
+    """Chạy câu STATEMENTS[name], trả về cursor"""
+    return conn.execute(STATEMENTS[name].sql, params)
+
+
+def fetch_all(conn, name, params=()):
+    statement = STATEMENTS[name]
+    result = conn.execute(statement.sql, params).fetchall()
+    return result if statement.row is None else rows(statement.row, result)
+
+
+def fetch_columns(conn, name, params=()):
+    """Như fetch_all nhưng trả về ResultSet (câu phải có kiểu dòng)"""
+    statement = STATEMENTS[name]
+    return ResultSet.from_cursor(statement.row, conn.execute(statement.sql, params))
+
+
+def fetch_one(conn, name, params=()):
+    """1 dòng hoặc None"""
+    statement = STATEMENTS[name]
+    row = conn.execute(statement.sql, params).fetchone()
+    return row if row is None or statement.row is None else tuple.__new__(statement.row, row)
+
+
+def fetch_value(conn, name, params=(), default=None):
+    """Cột đầu của dòng đầu (COUNT, id ...) hoặc default"""
+    row = conn.execute(STATEMENTS[name].sql, params).fetchone()
+    return default if row is None else row[0]
+
+
+def order_fields(name, order_by):
+    """
+    order_by -> tuple tên trường đã kiểm tra theo LISTINGS[name].sorts. Nhận "dob", "-dob" (giảm dần)
+    hoặc nhiều trường ("department", "-dob"); None / () = default_order. Trường lạ -> ValueError
+    """
+    listing = LISTINGS[name]
+    order_by = order_by or listing.default_order
+    fields = (order_by,) if isinstance(order_by, str) else tuple(order_by)
+    seen = set()
+    for item in fields:
+        field = item.lstrip("-")
+        if field not in listing.sorts:
+            raise ValueError(f"Không sắp xếp được theo {field!r} (cho phép: {', '.join(listing.sorts)})")
+        if field in seen:
+            raise ValueError(f"Trường {field!r} xuất hiện 2 lần trong order_by")
+        seen.add(field)
+    return fields
+
+
+def _order_keys(name, order_by):
+    """[(biểu thức, giảm dần?)] theo order_by; luôn kết thúc bằng id (cùng chiều khóa đầu) để thứ tự ổn định"""
+    listing = LISTINGS[name]
+    keys = [(listing.sorts[item.lstrip("-")], item.startswith("-")) for item in order_fields(name, order_by)]
+    if all(expr != listing.key for expr, _ in keys):
+        keys.append((listing.key, keys[0][1]))
+    return keys
+
+
+def _where(listing, filters):
+    """filters {tên: giá trị} -> (list điều kiện, list tham số); giá trị None / "" bị bỏ qua"""
+    clauses, params = [], []
+    for name, value in (filters or {}).items():
+        if value is None or value == "":
+            continue
+        if name not in listing.filters:
+            raise ValueError(f"Không lọc được theo {name!r} (cho phép: {', '.join(listing.filters)})")
+        flt = listing.filters[name]
+        clauses.append(flt.sql)
+        params.append(value if flt.convert is None else flt.convert(value))
+    return clauses, params
+
+
+def _after(keys, cursor):
+    """
+    Điều kiện "đứng sau cursor" theo thứ tự keys: (k1 > v1) OR (k1 = v1 AND k2 > v2) ...
+    (mỗi khóa có chiều riêng). Thêm k1 >= v1 ở đầu để SQLite dùng index của khóa đầu.
+    """
+    if len(cursor) != len(keys):
+        raise ValueError("cursor không thuộc thứ tự sắp xếp này")
+    first, descending = keys[0]
+    parts = []
+    params = [cursor[0]]
+    for i, (expr, desc) in enumerate(keys):
+        parts.append(" AND ".join([f"{e} = ?" for e, _ in keys[:i]] + [f"{expr} {'<' if desc else '>'} ?"]))
+        params.extend(cursor[:i + 1])
+    return f"{first} {'<=' if descending else '>='} ? AND (({') OR ('.join(parts)}))", params
+
+
+def _listing_sql(listing, keys, clauses):
+    """FROM ... WHERE ... ORDER BY ... (chung cho trang và cursor_at)"""
+    where = "WHERE " + " AND ".join(clauses) if clauses else ""
+    order = ", ".join(f"{expr}{' DESC' if desc else ''}" for expr, desc in keys)
+    return f"{listing.source} {where} ORDER BY {order}"
+
+
+def list_page(conn, name, order_by=None, filters=None, cursor=None, limit=100):
+    """
+    1 trang của LISTINGS[name]: tối đa limit dòng (None = tất cả) sau cursor (None = trang đầu), lọc theo
+    filters, sắp theo order_by (xem order_fields). Trả về Page(rows, cursor).
+    Câu SQL chỉ phụ thuộc tên trường / bộ lọc (giá trị đều là tham số) nên vẫn dùng statement cache.
+    """
+    listing = LISTINGS[name]
+    keys = _order_keys(name, order_by)
+    clauses, params = _where(listing, filters)
+    if cursor is not None:
+        after, after_params = _after(keys, cursor)
+        clauses.append(after)
+        params += after_params
+    exprs = ", ".join(expr for expr, _ in keys)
+    result = conn.execute(f"SELECT {listing.columns}, {exprs} {_listing_sql(listing, keys, clauses)} LIMIT ?",
+                          params + [-1 if limit is None else limit]).fetchall()
+    # các cột khóa sắp xếp nằm sau cột của kiểu dòng: cursor = khóa của dòng cuối
+    n = len(listing.row._fields)
+    page_rows = rows(listing.row, [r[:n] for r in result])
+    return Page(page_rows, tuple(result[-1][n:]) if len(result) == limit else None)
+
+
+def _key_source(listing, exprs):
+    """
+    FROM cho count / cursor_at: chỉ bảng chính khi exprs (khóa sắp xếp, điều kiện lọc) không dùng bảng JOIN.
+    Các JOIN trong LISTINGS không bớt / nhân dòng (khóa ngoại NOT NULL hoặc LEFT JOIN theo id) nên số dòng và
+    thứ tự như nhau, còn SQLite đi thẳng index của bảng chính thay vì JOIN rồi sắp bằng temp B-tree.
+    """
+    joined = set(re.findall(r"JOIN\s+\w+\s+(\w+)", listing.source))
+    # alias trong subquery của bộ lọc (EXISTS ...) không phải bảng JOIN nên không tính
+    if not any(prefix in joined for expr in exprs for prefix in re.findall(r"\b(\w+)\.", expr)):
+        return listing.source.strip().splitlines()[0]
+    return listing.source
+
+
+def count_listing(conn, name, filters=None):
+    """Số dòng của LISTINGS[name] sau khi lọc"""
+    listing = LISTINGS[name]
+    clauses, params = _where(listing, filters)
+    where = "WHERE " + " AND ".join(clauses) if clauses else ""
+    source = _key_source(listing, clauses)
+    return conn.execute(f"SELECT COUNT(*) {source} {where}", params).fetchone()[0]
+
+
+def cursor_at(conn, name, offset, order_by=None, filters=None):
+    """cursor của dòng ở vị trí offset (0-based) - list_page(cursor=...) trả về các dòng sau nó; None nếu quá cuối"""
+    listing = LISTINGS[name]
+    keys = _order_keys(name, order_by)
+    clauses, params = _where(listing, filters)
+    exprs = ", ".join(expr for expr, _ in keys)
+    source = _key_source(listing, [expr for expr, _ in keys] + clauses)
+    row = conn.execute(f"SELECT {exprs} {_listing_sql(listing._replace(source=source), keys, clauses)} "
+                       "LIMIT 1 OFFSET ?", params + [offset]).fetchone()
+    return None if row is None else tuple(row)
@@ -0,0 +1,38 @@
+# hrm_app/search.py
+# Hỗ trợ tìm kiếm toàn văn (FTS5) cho nhân sự:
+# - fold_vietnamese: bỏ dấu tiếng Việt ("Nguyễn Văn Đức" -> "nguyen van duc")
+# - build_match_query: chuyển chuỗi người dùng gõ thành biểu thức MATCH dạng tiền tố
+
+import re
+import unicodedata
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Tokenizer unicode61 tự bỏ dấu (remove_diacritics 2) nhưng "đ" không phải chữ có dấu
+# nên vẫn phải đổi sang "d" khi ghi vào index (trong trigger) và khi tìm.
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def fold_vietnamese(text):
+    """Bỏ dấu, đổi đ -> d và viết thường"""
+    if not text:
+        return ""
+    text = text.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn").lower()
+
+
+def sql_fold(expr):
+    """Biểu thức SQL đổi đ/Đ -> d/D (phần dấu còn lại do tokenizer xử lý)"""
+    return f"replace(replace(COALESCE({expr}, ''), 'đ', 'd'), 'Đ', 'D')"
+
+
+def build_match_query(query):
+    """
+    "nguyen van a" -> '"nguyen"* AND "van"* AND "a"*'
+    Trả về None nếu không có từ nào để tìm.
+    """
+    tokens = _TOKEN.findall(fold_vietnamese(query))
+    if not tokens:
+        return None
+    return " AND ".join('"' + t.replace('"', '""') + '"*' for t in tokens)
@@ -0,0 +1,113 @@
+# hrm_app/staff_filter.py
+# Bộ lọc kết hợp cho danh sách nhân sự (panel "Bộ lọc" ở trang Nhân sự):
+# - StaffFilter: phòng ban, vị trí, khoảng năm sinh, tình trạng khen thưởng; to_filters() ra bộ lọc của
+#   repository.LISTINGS["staffs"] nên cả tổ hợp thành 1 câu SQL có tham số (khen thưởng: [NOT] EXISTS)
+# - parse_year: đọc ô năm người dùng gõ
+# - RecentFilters: LRU các tổ hợp lọc gần đây kèm số nhân viên khớp (db.count_staff_filter), bỏ khi
+#   các bảng liên quan bị ghi (so phiên bản bảng như ViewCache, kèm PRAGMA data_version cho ghi từ tiến trình khác)
+
+import threading
+from collections import OrderedDict, namedtuple
+
+# award: None (không lọc) | "yes" (có khen thưởng) | "no" (chưa có); award_since: từ năm (None = mọi năm)
+StaffFilter = namedtuple("StaffFilter", "department_id position born_from born_to award award_since",
+                         defaults=(None,) * 6)
+
+AWARD_CHOICES = {None: "Tất cả", "yes": "Có khen thưởng", "no": "Chưa có khen thưởng"}
+
+# bảng mà kết quả lọc phụ thuộc vào (khóa phiên bản của cache)
+TABLES = ("staffs", "departments", "staff_awards", "award_batches", "award_years")
+
+
+def parse_year(text):
+    """Ô năm: rỗng -> None, "1990" -> 1990; sai dạng -> ValueError"""
+    text = (text or "").strip()
+    if not text:
+        return None
+    if not (text.isdigit() and len(text) == 4):
+        raise ValueError(f"Năm không hợp lệ: {text!r} (nhập dạng YYYY)")
+    return int(text)
+
+
+def normalize(staff_filter):
+    """Bỏ khoảng trắng / giá trị rỗng để 2 tổ hợp giống nhau có cùng khóa cache; kiểm tra khoảng năm"""
+    flt = staff_filter._replace(position=(staff_filter.position or "").strip() or None)
+    if flt.award is None:
+        flt = flt._replace(award_since=None)
+    elif flt.award not in AWARD_CHOICES:
+        raise ValueError(f"Tình trạng khen thưởng không hợp lệ: {flt.award!r}")
+    if flt.born_from is not None and flt.born_to is not None and flt.born_from > flt.born_to:
+        raise ValueError("Năm sinh 'từ' lớn hơn năm sinh 'đến'")
+    return flt
+
+
+def to_filters(staff_filter):
+    """StaffFilter -> filters của list_page / count_listing("staffs")"""
+    flt = staff_filter
+    filters = {"department_id": flt.department_id, "position": flt.position,
+               "born_from": flt.born_from, "born_to": flt.born_to}
+    if flt.award is not None:
+        since = flt.award_since if flt.award_since is not None else 0
+        filters["awarded_since" if flt.award == "yes" else "not_awarded_since"] = since
+    return {name: value for name, value in filters.items() if value is not None}
+
+
+def is_empty(staff_filter):
+    return not to_filters(staff_filter)
+
+
+def describe(staff_filter, departments=None):
+    """Mô tả ngắn cho danh sách "Gần đây" (ví dụ: Phòng Kế toán · sinh ≤ 1989 · chưa có khen thưởng từ 2022)"""
+    flt = staff_filter
+    parts = []
+    if flt.department_id is not None:
+        parts.append((departments or {}).get(flt.department_id, f"Phòng ban #{flt.department_id}"))
+    if flt.position:
+        parts.append(f"vị trí \"{flt.position}\"")
+    if flt.born_from is not None and flt.born_to is not None:
+        parts.append(f"sinh {flt.born_from}–{flt.born_to}")
+    elif flt.born_from is not None:
+        parts.append(f"sinh ≥ {flt.born_from}")
+    elif flt.born_to is not None:
+        parts.append(f"sinh ≤ {flt.born_to}")
+    if flt.award is not None:
+        text = AWARD_CHOICES[flt.award].lower()
+        parts.append(f"{text} từ {flt.award_since}" if flt.award_since is not None else text)
+    return " · ".join(parts) or "Tất cả nhân viên"
+
+
+class RecentFilters:
+    """
+    LRU tối đa max_size tổ hợp lọc: StaffFilter -> (phiên bản bảng, số nhân viên khớp).
+    Dùng chung giữa thread db (AsyncDatabase) và main thread nên có khóa.
+    """
+
+    def __init__(self, max_size=20):
+        self.max_size = max_size
+        self._entries = OrderedDict()   # cuối = dùng gần nhất
+        self._lock = threading.Lock()
+
+    def get(self, staff_filter, versions):
+        """Số nhân viên khớp đã lưu, None nếu chưa có hoặc dữ liệu đã đổi"""
+        with self._lock:
+            entry = self._entries.get(staff_filter)
+            if entry is None or entry[0] != versions:
+                return None
+            self._entries.move_to_end(staff_filter)
+            return entry[1]
+
+    def put(self, staff_filter, versions, count):
+        with self._lock:
+            self._entries[staff_filter] = (versions, count)
+            self._entries.move_to_end(staff_filter)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def recent(self):
+        """Các tổ hợp đã dùng, gần nhất trước"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,42 @@
+# hrm_app/startup.py
+# Đo thời gian khởi động theo từng giai đoạn (import, database, layout, view đầu tiên...)
+# Bật bằng: python main.py --profile-startup
+
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    def __init__(self, enabled=False, start=None):
+        self.enabled = enabled
+        self.start = start if start is not None else time.perf_counter()
+        self.phases = []            # list (tên, ms)
+
+    @contextmanager
+    def phase(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - begin) * 1000))
+
+    def mark(self, name, since):
+        """Ghi 1 giai đoạn đã đo sẵn (since = time.perf_counter() lúc bắt đầu)"""
+        self.phases.append((name, (time.perf_counter() - since) * 1000))
+
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def report(self, file=None):
+        """In bảng thời gian từng giai đoạn (không làm gì nếu chưa bật)"""
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        if file is None:  # bản đóng gói không có console
+            return
+        total = self.total_ms()
+        print("Thời gian khởi động:", file=file)
+        for name, ms in self.phases:
+            print(f"  {name:<28} {ms:8.1f} ms", file=file)
+        print(f"  {'tổng (tới khi cửa sổ rảnh)':<28} {total:8.1f} ms", file=file)
@@ -0,0 +1,139 @@
+# hrm_app/tuning.py
+# Cấu hình PRAGMA theo "profile" và bộ lập lịch checkpoint WAL chạy nền.
+# - "default": giữ nguyên thiết lập mặc định của SQLite (rollback journal)
+# - "performance": WAL + synchronous=NORMAL + cache/mmap lớn + temp_store trong RAM,
+#   đọc không còn bị chặn bởi ghi khi nhiều người dùng chung 1 file database
+
+import os
+import sqlite3
+import threading
+import time
+
+PROFILES = {
+    "default": {},
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,          # số âm = KiB -> 64 MB
+        "mmap_size": 268435456,        # 256 MB
+        "temp_store": "MEMORY",
+        # checkpoint chủ yếu do CheckpointScheduler làm, commit không phải gánh
+        "wal_autocheckpoint": 4000,
+    },
+}
+
+# journal_mode lưu trong file database, chỉ cần đặt 1 lần; các PRAGMA còn lại theo từng kết nối
+_PERSISTENT_PRAGMAS = ("journal_mode",)
+
+
+def get_profile(name):
+    if name not in PROFILES:
+        raise ValueError(f"Unknown database profile: {name!r} (có: {', '.join(PROFILES)})")
+    return PROFILES[name]
+
+
+def uses_wal(name):
+    return str(get_profile(name).get("journal_mode", "")).upper() == "WAL"
+
+
+def apply_profile(conn, name, persistent=False):
+    """Áp dụng PRAGMA của profile cho 1 kết nối. persistent=True để đặt cả journal_mode."""
+    for key, value in get_profile(name).items():
+        if key in _PERSISTENT_PRAGMAS and not persistent:
+            continue
+        conn.execute(f"PRAGMA {key} = {value}")
+
+
+def wal_size(db_name):
+    """Kích thước file -wal (bytes), 0 nếu không có"""
+    try:
+        return os.path.getsize(db_name + "-wal")
+    except OSError:
+        return 0
+
+
+class CheckpointScheduler:
+    """
+    Thread nền chạy PRAGMA wal_checkpoint định kỳ trên kết nối riêng.
+    - Mỗi interval giây: checkpoint PASSIVE (không chờ, không chặn người đọc/ghi)
+    - Khi file WAL vượt truncate_above bytes: checkpoint TRUNCATE để thu nhỏ file
+    Ghi lại độ trễ từng lần checkpoint để xem qua stats().
+    """
+    def __init__(self, db_name, interval=30.0, truncate_above=64 * 1024 * 1024, timeout=5.0):
+        self.db_name = db_name
+        self.interval = interval
+        self.truncate_above = truncate_above
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "runs": 0,
+            "last_mode": None,
+            "last_latency_ms": None,
+            "max_latency_ms": 0.0,
+            "total_latency_ms": 0.0,
+            "last_busy": None,
+            "last_log_frames": None,
+            "last_checkpointed_frames": None,
+            "last_error": None,
+            "last_run_at": None,
+        }
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="wal-checkpoint", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout)
+            self._thread = None
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False)
+        try:
+            while not self._stop.wait(self.interval):
+                mode = "TRUNCATE" if wal_size(self.db_name) > self.truncate_above else "PASSIVE"
+                self.checkpoint(mode, conn=conn)
+        finally:
+            conn.close()
+
+    def checkpoint(self, mode="PASSIVE", conn=None):
+        """Chạy 1 lần checkpoint, trả về (busy, log_frames, checkpointed_frames)"""
+        own = conn is None
+        if own:
+            conn = sqlite3.connect(self.db_name, timeout=self.timeout)
+        start = time.perf_counter()
+        try:
+            busy, log_frames, done = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            error = None
+        except sqlite3.Error as e:
+            busy, log_frames, done, error = None, None, None, str(e)
+        finally:
+            if own:
+                conn.close()
+        latency = (time.perf_counter() - start) * 1000
+        with self._lock:
+            s = self._stats
+            s["runs"] += 1
+            s["last_mode"] = mode
+            s["last_latency_ms"] = latency
+            s["max_latency_ms"] = max(s["max_latency_ms"], latency)
+            s["total_latency_ms"] += latency
+            s["last_busy"] = busy
+            s["last_log_frames"] = log_frames
+            s["last_checkpointed_frames"] = done
+            s["last_error"] = error
+            s["last_run_at"] = time.time()
+        return busy, log_frames, done
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        s["avg_latency_ms"] = s["total_latency_ms"] / s["runs"] if s["runs"] else None
+        s["wal_size_bytes"] = wal_size(self.db_name)
+        s["running"] = self._thread is not None
+        return s
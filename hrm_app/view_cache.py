@@ -0,0 +1,106 @@
+# hrm_app/view_cache.py
+# Cache các view đã dựng: chuyển qua lại giữa các trang chỉ ẩn/hiện frame thay vì
+# hủy và dựng lại toàn bộ widget + chạy lại mọi truy vấn.
+# - LRU: giữ tối đa max_views view; vượt quá thì hủy view lâu không dùng nhất
+# - Giới hạn bộ nhớ (xấp xỉ bằng số widget + số dòng trong Treeview): vượt max_widgets cũng hủy bớt
+# - Khi hiện lại 1 view: so phiên bản các bảng trong view.TABLES (db.get_table_versions)
+#   với lúc view bị ẩn, nếu khác thì gọi view.refresh(). View có live = True tự cập nhật
+#   theo db.changes (kể cả khi đang ẩn) nên không cần refresh
+
+from collections import OrderedDict
+from tkinter import ttk
+
+import customtkinter as ctk
+
+
+def count_widgets(widget):
+    """Số widget con (đệ quy) + số dòng trong các Treeview - ước lượng bộ nhớ view đang giữ"""
+    total = 0
+    stack = [widget]
+    while stack:
+        w = stack.pop()
+        total += 1
+        if isinstance(w, ttk.Treeview):
+            total += len(w.get_children())
+        stack.extend(w.winfo_children())
+    return total
+
+
+class _Entry:
+    def __init__(self, frame, view):
+        self.frame = frame
+        self.view = view
+        self.versions = None    # phiên bản các bảng lúc view được ẩn
+        self.size = 0
+
+
+class ViewCache:
+    def __init__(self, container, db, max_views=4, max_widgets=6000):
+        self.container = container
+        self.db = db
+        self.max_views = max_views
+        self.max_widgets = max_widgets
+        self._entries = OrderedDict()   # key -> _Entry, cuối = dùng gần nhất
+        self.current = None
+
+    def show(self, key, factory):
+        """
+        Hiện view theo key. factory(parent_frame) tạo view mới khi chưa có trong cache.
+        Trả về instance view.
+        """
+        if key == self.current and key in self._entries:
+            return self._entries[key].view
+        self._hide_current()
+
+        entry = self._entries.get(key)
+        if entry is None:
+            frame = ctk.CTkFrame(self.container, fg_color="transparent")
+            frame.pack(fill="both", expand=True)
+            view = factory(frame)
+            view.render()
+            entry = self._entries[key] = _Entry(frame, view)
+        else:
+            self._entries.move_to_end(key)
+            entry.frame.pack(fill="both", expand=True)
+            tables = getattr(entry.view, "TABLES", ())
+            stale = entry.versions != self.db.get_table_versions(tables)
+            if stale and not getattr(entry.view, "live", False) and hasattr(entry.view, "refresh"):
+                entry.view.refresh()
+        entry.size = count_widgets(entry.frame)
+        self.current = key
+        self._evict()
+        return entry.view
+
+    def invalidate(self, key=None):
+        """Hủy view trong cache (key=None: tất cả trừ view đang hiện)"""
+        keys = [key] if key is not None else list(self._entries)
+        for k in keys:
+            if k != self.current and k in self._entries:
+                self._entries.pop(k).frame.destroy()
+
+    def stats(self):
+        return {
+            "views": list(self._entries),
+            "current": self.current,
+            "widgets": sum(e.size for e in self._entries.values()),
+        }
+
+    def _hide_current(self):
+        entry = self._entries.get(self.current)
+        if entry is None:
+            return
+        # view luôn tự tải lại sau thao tác của chính nó, nên lúc ẩn coi như đã cập nhật
+        entry.versions = self.db.get_table_versions(getattr(entry.view, "TABLES", ()))
+        entry.size = count_widgets(entry.frame)
+        entry.frame.pack_forget()
+        self.current = None
+
+    def _evict(self):
+        def too_big():
+            return (len(self._entries) > self.max_views
+                    or sum(e.size for e in self._entries.values()) > self.max_widgets)
+        for key in list(self._entries):
+            if not too_big():
+                break
+            if key != self.current:
+                self._entries.pop(key).frame.destroy()
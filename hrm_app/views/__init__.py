@@ -1,7 +1,15 @@
 """
 views package
 Cập nhật: export work_histories module mới
+Các module view được import khi dùng lần đầu (views.staff, from .views import staff...)
+để khởi động ứng dụng không phải nạp mọi view cùng lúc.
 """
-from . import dashboard, departments, staff, awards, documents, work_histories
+import importlib
 
-__all__ = ["dashboard", "departments", "staff", "awards", "documents", "work_histories"]
\ No newline at end of file
+__all__ = ["dashboard", "departments", "staff", "awards", "documents", "work_histories", "diagnostics"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
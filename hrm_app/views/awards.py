@@ -629,19 +629,47 @@ Các trang chức năng:
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk
-from ..dialogs import center_window, show_info, show_error, ask_confirm
+from ..dialogs import center_window, show_info, show_error, ask_confirm, show_text
+from ..repository import AwardBatch, StaffAward, DepartmentAward
+from ..widgets import show_tree_placeholder, RowFormat, fill_tree, VirtualTreeview, KeysetSource, HeadingSort, sort_rows
+
+_AWARD_BLANKS = {"authority": "-", "decision_no": "-", "decision_date": "-", "note": ""}
+BATCH_FORMAT = RowFormat(AwardBatch, ("id", "year", "title", "level", "authority", "decision_no", "decision_date",
+                                      "note"), _AWARD_BLANKS)
+# tổng quan khen thưởng: bỏ cột cơ quan
+RECENT_BATCH_FORMAT = RowFormat(AwardBatch, ("id", "year", "title", "level", "decision_no", "decision_date", "note"),
+                                _AWARD_BLANKS)
+STAFF_AWARD_FORMAT = RowFormat(StaffAward, ("id", "year", "title", "level", "authority", "decision_no",
+                                            "decision_date", "note"), _AWARD_BLANKS)
+DEPARTMENT_AWARD_FORMAT = RowFormat(DepartmentAward, ("id", "year", "title", "level", "decision_no", "decision_date",
+                                                      "note"), _AWARD_BLANKS)
+# trang Đợt/Quyết định: cột -> trường order_by của repository.LISTINGS["award_batches"]
+BATCH_SORT_FIELDS = {"ID": "id", "Năm": "year", "Danh hiệu": "title", "Cấp": "level", "Cơ quan": "authority",
+                     "Số QĐ": "decision_no", "Ngày": "decision_date", "Ghi chú": "note"}
+# các bảng còn lại: cột -> trường order_by của LISTINGS tương ứng
+RECENT_BATCH_SORT_FIELDS = {c: f for c, f in BATCH_SORT_FIELDS.items() if c != "Cơ quan"}
+YEAR_SORT_FIELDS = {"ID": "id", "Năm": "year"}
+TITLE_SORT_FIELDS = {"ID": "id", "Tên danh hiệu": "name", "Scope": "scope", "Level": "level"}
+AUTHORITY_SORT_FIELDS = {"ID": "id", "Tên cơ quan": "name"}
+ASSIGN_SORT_FIELDS = {"ID": "id", "Họ và tên": "full_name", "Vị trí": "position", "Phòng ban": "department"}
+STAFF_AWARD_SORT_FIELDS = BATCH_SORT_FIELDS
+DEPARTMENT_AWARD_SORT_FIELDS = RECENT_BATCH_SORT_FIELDS
 
 class AwardsView:
-    def __init__(self, app, db):
+    TABLES = ("award_years", "award_titles", "award_authorities", "award_batches",
+              "staff_awards", "department_awards", "staffs", "departments")
+    def __init__(self, app, db, parent=None):
         self.app = app
         self.db = db
+        # Frame chứa view (HRMApp tạo 1 frame riêng cho mỗi view để giữ lại trong cache)
+        self.parent = parent if parent is not None else app.content_frame
         self.current_page = None
         self.main_container = None
         self.content_area = None
 
     def render(self):
         # Container chính
-        self.main_container = ctk.CTkFrame(self.app.content_frame, fg_color="transparent")
+        self.main_container = ctk.CTkFrame(self.parent, fg_color="transparent")
         self.main_container.pack(fill="both", expand=True)
 
         # Left sidebar - Menu điều hướng
@@ -654,6 +682,20 @@ class AwardsView:
         # Load trang mặc định
         self.show_dashboard()
 
+    def refresh(self):
+        """Dựng lại trang con đang mở với dữ liệu mới"""
+        pages = {
+            "dashboard": self.show_dashboard,
+            "years": self.show_years_page,
+            "titles": self.show_titles_page,
+            "authorities": self.show_authorities_page,
+            "batches": self.show_batches_page,
+            "assign": self.show_assign_page,
+            "staff_lookup": self.show_staff_lookup_page,
+            "dept_lookup": self.show_dept_lookup_page,
+        }
+        pages.get(self.current_page, self.show_dashboard)()
+
     def create_sidebar(self):
         """Tạo sidebar menu điều hướng"""
         sidebar = ctk.CTkFrame(self.main_container, fg_color="#1e293b", width=240, corner_radius=10)
@@ -705,6 +747,11 @@ class AwardsView:
             widget.destroy()
 
     # ========================== TRANG 1: TỔNG QUAN ==========================
+    def _heading_sort(self, tree, view, fields, on_sort, default, listing=None):
+        """HeadingSort của 1 bảng trong trang; thứ tự lưu vào app_meta nên giữ khi dựng lại trang / mở lại app"""
+        return HeadingSort(tree, fields, on_sort, order_by=self.db.get_view_sort(view, listing, default),
+                           save=lambda order_by: self.db.set_view_sort(view, order_by))
+
     def show_dashboard(self):
         self.clear_content()
         self.current_page = "dashboard"
@@ -719,23 +766,23 @@ class AwardsView:
         stats_frame = ctk.CTkFrame(self.content_area, fg_color="transparent")
         stats_frame.pack(fill="x", padx=12, pady=8)
 
-        # Lấy thống kê
-        stats = self._get_statistics()
-        
+        # Card thống kê ("…" tới khi số liệu đọc trên thread db về)
         cards_data = [
-            ("🗂️ Tổng đợt", stats['batches'], "#3b82f6"),
-            ("👤 KT Cá nhân", stats['staff_awards'], "#10b981"),
-            ("🏢 KT Tập thể", stats['dept_awards'], "#f59e0b"),
-            ("🏅 Danh hiệu", stats['titles'], "#8b5cf6"),
+            ("🗂️ Tổng đợt", "batches", "#3b82f6"),
+            ("👤 KT Cá nhân", "staff_awards", "#10b981"),
+            ("🏢 KT Tập thể", "dept_awards", "#f59e0b"),
+            ("🏅 Danh hiệu", "titles", "#8b5cf6"),
         ]
 
-        for i, (label, value, color) in enumerate(cards_data):
+        value_labels = {}
+        for i, (label, stat_key, color) in enumerate(cards_data):
             card = ctk.CTkFrame(stats_frame, fg_color=color, corner_radius=8)
             card.pack(side="left", fill="both", expand=True, padx=4)
             ctk.CTkLabel(card, text=label, font=ctk.CTkFont(size=12), 
                         text_color="white").pack(pady=(12,4))
-            ctk.CTkLabel(card, text=str(value), font=ctk.CTkFont(size=28, weight="bold"),
-                        text_color="white").pack(pady=(0,12))
+            value_labels[stat_key] = ctk.CTkLabel(card, text="…", font=ctk.CTkFont(size=28, weight="bold"),
+                                                 text_color="white")
+            value_labels[stat_key].pack(pady=(0,12))
 
         # Recent batches
         recent_frame = ctk.CTkFrame(self.content_area, fg_color="transparent")
@@ -762,36 +809,28 @@ class AwardsView:
         sb.pack(side="right", fill="y")
 
         # Load data
-        rows = self.db.get_all_award_batches()
-        for r in rows[:20]:  # Top 20
-            display = (r[0], r[1], r[2], r[3], r[5] or "-", r[6] or "-", r[7] or "")
-            tree.insert("", "end", values=display)
-
-    def _get_statistics(self):
-        """Lấy thống kê tổng quan"""
-        conn = self.db.get_connection()
-        cur = conn.cursor()
-        
-        cur.execute("SELECT COUNT(*) FROM award_batches")
-        batches = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM staff_awards")
-        staff_awards = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM department_awards")
-        dept_awards = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM award_titles")
-        titles = cur.fetchone()[0]
-        
-        conn.close()
-        
-        return {
-            'batches': batches,
-            'staff_awards': staff_awards,
-            'dept_awards': dept_awards,
-            'titles': titles
-        }
+        show_tree_placeholder(tree)
+
+        recent = []
+        # chỉ 20 đợt mới nhất: sắp lại trong bộ nhớ khi bấm tiêu đề cột
+        sort = self._heading_sort(tree, "awards_recent", RECENT_BATCH_SORT_FIELDS,
+                                  lambda order_by: fill_tree(tree, sort_rows(recent, order_by), RECENT_BATCH_FORMAT),
+                                  ("-decision_date",), listing="award_batches")
+
+        def show(result):
+            stats, rows = result
+            for stat_key, value_label in value_labels.items():
+                value_label.configure(text=str(stats[stat_key]))
+            recent[:] = rows
+            fill_tree(tree, sort_rows(recent, sort.order_by), RECENT_BATCH_FORMAT)
+
+        self.app.adb.submit(self._load_dashboard, owner=tree, key="awards_dashboard", on_done=show,
+                            on_error=lambda e: show_tree_placeholder(tree, f"Lỗi: {e}"))
+
+    @staticmethod
+    def _load_dashboard(db):
+        """Chạy trên thread db: thống kê tổng quan (bảng thống kê do trigger cập nhật) + 20 đợt mới nhất"""
+        return db.get_award_statistics(), db.list_award_batches(limit=20).rows
 
     # ========================== TRANG 2: NĂM KHEN THƯỞNG ==========================
     def show_years_page(self):
@@ -843,12 +882,13 @@ class AwardsView:
         tree.pack(side="left", fill="both", expand=True)
         sb.pack(side="right", fill="y")
 
-        def load_years():
+        def load_years(order_by=None):
             for i in tree.get_children():
                 tree.delete(i)
-            for r in self.db.get_all_award_years():
+            for r in self.db.list_page("award_years", limit=None, order_by=order_by or sort.order_by).rows:
                 tree.insert("", "end", values=r)
 
+        sort = self._heading_sort(tree, "award_years", YEAR_SORT_FIELDS, load_years, ("-year",))
         load_years()
 
         # Context menu xóa (nếu admin)
@@ -870,10 +910,7 @@ class AwardsView:
             year_id = tree.item(sel[0])['values'][0]
             if ask_confirm("Xác nhận", "Xóa năm này?"):
                 try:
-                    conn = self.db.get_connection()
-                    conn.execute("DELETE FROM award_years WHERE id=?", (year_id,))
-                    conn.commit()
-                    conn.close()
+                    self.db.delete_award_year(year_id)
                     show_info("Thành công", "Đã xóa")
                     load_years()
                 except Exception as e:
@@ -942,12 +979,13 @@ class AwardsView:
         tree.pack(side="left", fill="both", expand=True)
         sb.pack(side="right", fill="y")
 
-        def load_titles():
+        def load_titles(order_by=None):
             for i in tree.get_children():
                 tree.delete(i)
-            for r in self.db.get_all_award_titles():
+            for r in self.db.list_page("award_titles", limit=None, order_by=order_by or sort.order_by).rows:
                 tree.insert("", "end", values=r)
 
+        sort = self._heading_sort(tree, "award_titles", TITLE_SORT_FIELDS, load_titles, ("id",))
         load_titles()
 
     # ========================== TRANG 4: CƠ QUAN BAN HÀNH ==========================
@@ -998,12 +1036,13 @@ class AwardsView:
         tree.pack(side="left", fill="both", expand=True)
         sb.pack(side="right", fill="y")
 
-        def load_auths():
+        def load_auths(order_by=None):
             for i in tree.get_children():
                 tree.delete(i)
-            for r in self.db.get_all_award_authorities():
+            for r in self.db.list_page("award_authorities", limit=None, order_by=order_by or sort.order_by).rows:
                 tree.insert("", "end", values=r)
 
+        sort = self._heading_sort(tree, "award_authorities", AUTHORITY_SORT_FIELDS, load_auths, ("name",))
         load_auths()
 
     # ========================== TRANG 5: ĐỢT/QUYẾT ĐỊNH ==========================
@@ -1034,7 +1073,9 @@ class AwardsView:
         list_frame.pack(fill="both", expand=True, padx=12, pady=8)
 
         cols = ("ID","Năm","Danh hiệu","Cấp","Cơ quan","Số QĐ","Ngày","Ghi chú")
-        tree = ttk.Treeview(list_frame, columns=cols, show="headings", height=15)
+        # bảng ảo: lấy từng trang từ SQLite theo thứ tự của tiêu đề cột đang chọn
+        table = VirtualTreeview(list_frame, columns=cols, height=15)
+        tree = table.tree
         for c in cols:
             tree.heading(c, text=c)
         tree.column("ID", width=50, anchor="center")
@@ -1046,16 +1087,14 @@ class AwardsView:
         tree.column("Ngày", width=100)
         tree.column("Ghi chú", width=200)
 
-        sb = ttk.Scrollbar(list_frame, orient="vertical", command=tree.yview)
-        tree.configure(yscrollcommand=sb.set)
         tree.pack(side="left", fill="both", expand=True)
-        sb.pack(side="right", fill="y")
+        table.scrollbar.pack(side="right", fill="y")
 
-        # Load data
-        rows = self.db.get_all_award_batches()
-        for r in rows:
-            display = (r[0], r[1], r[2], r[3], r[4] or "-", r[5] or "-", r[6] or "-", r[7] or "")
-            tree.insert("", "end", values=display)
+        def load(order_by):
+            table.set_source(KeysetSource.listing(self.db, "award_batches", order_by=order_by, values=BATCH_FORMAT))
+
+        sort = self._heading_sort(tree, "award_batches", BATCH_SORT_FIELDS, load, ("-decision_date",))
+        load(sort.order_by)
 
         # Context menu
         if self.app.is_admin:
@@ -1076,7 +1115,7 @@ class AwardsView:
             return
         batch_id = tree.item(sel[0])['values'][0]
         rows = self.db.get_all_award_batches()
-        batch = next((r for r in rows if r[0] == batch_id), None)
+        batch = next((r for r in rows if r.id == batch_id), None)
         if batch:
             self.open_edit_batch_dialog(batch)
 
@@ -1114,7 +1153,7 @@ class AwardsView:
         
         ctk.CTkLabel(row1, text="Chọn đợt:", font=ctk.CTkFont(size=12, weight="bold")).pack(anchor="w")
         batches = self.db.get_all_award_batches()
-        batch_map = {f"[{r[1]}] {r[2]} - {r[5] or 'N/A'}": r[0] for r in batches}
+        batch_map = {f"[{r.year}] {r.title} - {r.decision_no or 'N/A'}": r.id for r in batches}
         batch_combo = ctk.CTkComboBox(row1, values=list(batch_map.keys()), state="readonly", width=600)
         if batches:
             batch_combo.set(list(batch_map.keys())[0])
@@ -1124,40 +1163,113 @@ class AwardsView:
         sep1 = ctk.CTkFrame(form_frame, fg_color="#e2e8f0", height=2)
         sep1.pack(fill="x", padx=12, pady=12)
 
-        # Phân cho nhân viên
+        # Phân cho nhân viên: lọc theo phòng ban / vị trí, chọn nhiều người rồi phân 1 lần
         staff_frame = ctk.CTkFrame(form_frame, fg_color="transparent")
         staff_frame.pack(fill="x", padx=12, pady=8)
-        
-        ctk.CTkLabel(staff_frame, text="👤 Phân cho nhân viên (Cá nhân)", 
+
+        ctk.CTkLabel(staff_frame, text="👤 Phân cho nhân viên (Cá nhân)",
                     font=ctk.CTkFont(size=13, weight="bold"),
                     text_color="#10b981").pack(anchor="w")
-        
-        staff_row = ctk.CTkFrame(staff_frame, fg_color="transparent")
-        staff_row.pack(fill="x", pady=4)
-        
-        staffs = self.db.get_all_staffs()
-        staff_map = {f"{s[2]} (ID:{s[0]})": s[0] for s in staffs}
-        staff_combo = ctk.CTkComboBox(staff_row, values=list(staff_map.keys()), 
-                                     state="readonly", width=400)
-        if staffs:
-            staff_combo.set(list(staff_map.keys())[0])
-        staff_combo.pack(side="left", padx=(0,8))
-        
-        note_staff = ctk.CTkEntry(staff_row, placeholder_text="Ghi chú (tùy chọn)", width=200)
-        note_staff.pack(side="left", padx=(0,8))
 
-        def add_staff_award():
-            if not batch_combo.get() or not staff_combo.get():
-                show_error("Lỗi", "Chọn đợt và nhân viên")
-                return
+        filter_row = ctk.CTkFrame(staff_frame, fg_color="transparent")
+        filter_row.pack(fill="x", pady=4)
+
+        all_depts = "Tất cả phòng ban"
+        filter_dept_map = {f"{d.name} (ID:{d.id})": d.id for d in self.db.get_all_departments()}
+        filter_dept = ctk.CTkComboBox(filter_row, values=[all_depts] + list(filter_dept_map.keys()),
+                                      state="readonly", width=260)
+        filter_dept.set(all_depts)
+        filter_dept.pack(side="left", padx=(0,8))
+        filter_pos = ctk.CTkEntry(filter_row, placeholder_text="Vị trí (ví dụ: Trưởng phòng)", width=200)
+        filter_pos.pack(side="left", padx=(0,8))
+
+        list_frame = ctk.CTkFrame(staff_frame, fg_color="white", corner_radius=8)
+        list_frame.pack(fill="x", pady=4)
+        cols = ("ID", "Họ và tên", "Vị trí", "Phòng ban", "Đã nhận")
+        staff_tree = ttk.Treeview(list_frame, columns=cols, show="headings", height=10, selectmode="extended")
+        for c, w in zip(cols, (60, 220, 180, 220, 80)):
+            staff_tree.heading(c, text=c)
+            staff_tree.column(c, width=w, anchor="center" if c in ("ID", "Đã nhận") else "w")
+        sb = ttk.Scrollbar(list_frame, orient="vertical", command=staff_tree.yview)
+        staff_tree.configure(yscrollcommand=sb.set)
+        staff_tree.pack(side="left", fill="both", expand=True, padx=(8,0), pady=8)
+        sb.pack(side="right", fill="y", pady=8, padx=(0,8))
+
+        action_row = ctk.CTkFrame(staff_frame, fg_color="transparent")
+        action_row.pack(fill="x", pady=4)
+        selected_label = ctk.CTkLabel(action_row, text="Đã chọn 0 nhân viên", text_color="#64748b")
+        note_staff = ctk.CTkEntry(action_row, placeholder_text="Ghi chú (tùy chọn)", width=200)
+
+        def staff_items(items=None):
+            """iid (= id nhân viên) của các dòng nhân viên, bỏ dòng "Đang tải..." """
+            return [i for i in (staff_tree.get_children() if items is None else items) if i.isdigit()]
+
+        def load_staff_list(*_):
+            dept = filter_dept.get()
+            filters = {"department_id": filter_dept_map.get(dept) if dept != all_depts else None,
+                       "position": filter_pos.get().strip() or None}
             batch_id = batch_map.get(batch_combo.get())
-            staff_id = staff_map.get(staff_combo.get())
-            self.db.add_staff_award(staff_id, batch_id, note_staff.get().strip())
-            show_info("Thành công", "Đã phân khen thưởng cho nhân viên")
-            note_staff.delete(0, "end")
+            selected = set(staff_items(staff_tree.selection()))
+            show_tree_placeholder(staff_tree)
+            update_selected()
+
+            def show(result):
+                rows, holders = result
+                staff_tree.delete(*staff_tree.get_children())
+                for r in rows:
+                    staff_tree.insert("", "end", iid=str(r.id),
+                                      values=(r.id, r.full_name, r.position or "-", r.department or "-",
+                                              "✓" if r.id in holders else ""))
+                # giữ các nhân viên đang chọn (theo id) nếu vẫn còn trong danh sách mới
+                staff_tree.selection_set([i for i in staff_items() if i in selected])
+                update_selected()
+
+            self.app.adb.submit(self._load_assign_staffs, filters, sort.order_by, batch_id, owner=staff_tree,
+                                key="award_assign_staffs", on_done=show,
+                                on_error=lambda e: show_tree_placeholder(staff_tree, f"Lỗi: {e}"))
+
+        def update_selected(*_):
+            selected_label.configure(
+                text=f"Đã chọn {len(staff_items(staff_tree.selection()))} / {len(staff_items())} nhân viên")
+
+        def select_all():
+            staff_tree.selection_set(staff_items())
 
-        ctk.CTkButton(staff_row, text="➕ Phân cho NV", command=add_staff_award, 
-                     fg_color="#10b981", width=140).pack(side="left")
+        def add_staff_awards():
+            batch_id = batch_map.get(batch_combo.get())
+            staff_ids = [int(i) for i in staff_items(staff_tree.selection())]
+            if not batch_id or not staff_ids:
+                show_error("Lỗi", "Chọn đợt và ít nhất 1 nhân viên")
+                return
+            if not ask_confirm("Xác nhận", f"Phân đợt khen thưởng này cho {len(staff_ids)} nhân viên?"):
+                return
+            try:
+                results = self.db.add_staff_awards_bulk(batch_id, staff_ids, note_staff.get().strip() or None)
+            except Exception as e:
+                show_error("Lỗi", f"Không thể phân khen thưởng: {e}")
+                return
+            self._show_assign_report(results, {int(i): staff_tree.item(i)["values"][1] for i in staff_items()})
+            note_staff.delete(0, "end")
+            load_staff_list()
+
+        ctk.CTkButton(filter_row, text="🔎 Lọc", command=load_staff_list, width=80).pack(side="left", padx=(0,8))
+        ctk.CTkButton(filter_row, text="Chọn tất cả", command=select_all, width=100,
+                      fg_color="#64748b").pack(side="left", padx=(0,8))
+        ctk.CTkButton(filter_row, text="Bỏ chọn", width=80, fg_color="#94a3b8",
+                      command=lambda: staff_tree.selection_set(())).pack(side="left")
+        selected_label.pack(side="left", padx=(0,12))
+        note_staff.pack(side="left", padx=(0,8))
+        ctk.CTkButton(action_row, text="➕ Phân cho NV đã chọn", command=add_staff_awards,
+                     fg_color="#10b981", width=180).pack(side="left")
+
+        # mặc định theo phòng ban rồi STT (như trước), bấm tiêu đề cột để đổi
+        sort = self._heading_sort(staff_tree, "award_assign_staffs", ASSIGN_SORT_FIELDS, load_staff_list,
+                                  ("department", "stt"), listing="staffs")
+        staff_tree.bind("<<TreeviewSelect>>", update_selected)
+        filter_pos.bind("<Return>", load_staff_list)
+        filter_dept.configure(command=load_staff_list)
+        batch_combo.configure(command=load_staff_list)
+        load_staff_list()
 
         # Separator
         sep2 = ctk.CTkFrame(form_frame, fg_color="#e2e8f0", height=2)
@@ -1175,7 +1287,7 @@ class AwardsView:
         dept_row.pack(fill="x", pady=4)
         
         depts = self.db.get_all_departments()
-        dept_map = {f"{d[1]} (ID:{d[0]})": d[0] for d in depts}
+        dept_map = {f"{d.name} (ID:{d.id})": d.id for d in depts}
         dept_combo = ctk.CTkComboBox(dept_row, values=list(dept_map.keys()), 
                                     state="readonly", width=400)
         if depts:
@@ -1191,13 +1303,30 @@ class AwardsView:
                 return
             batch_id = batch_map.get(batch_combo.get())
             dept_id = dept_map.get(dept_combo.get())
-            self.db.add_department_award(dept_id, batch_id, note_dept.get().strip())
-            show_info("Thành công", "Đã phân khen thưởng cho phòng ban")
+            if self.db.add_department_award(dept_id, batch_id, note_dept.get().strip()):
+                show_info("Thành công", "Đã phân khen thưởng cho phòng ban")
+            else:
+                show_info("Đã có", "Phòng ban đã có khen thưởng của đợt này (ghi chú nếu có nhập đã được cập nhật)")
             note_dept.delete(0, "end")
 
         ctk.CTkButton(dept_row, text="➕ Phân cho PB", command=add_dept_award, 
                      fg_color="#06b6d4", width=140).pack(side="left")
 
+    @staticmethod
+    def _load_assign_staffs(db, filters, order_by, batch_id):
+        """Chạy trên thread db: nhân viên theo bộ lọc + tập id đã nhận đợt batch_id (cột "Đã nhận")"""
+        rows = db.list_page("staffs", limit=None, order_by=order_by, filters=filters).rows
+        return rows, db.get_staff_ids_with_award_batch(batch_id) if batch_id else set()
+
+    def _show_assign_report(self, results, names):
+        """Báo cáo kết quả add_staff_awards_bulk theo từng nhân viên"""
+        labels = {"added": "đã phân", "duplicate": "bỏ qua - đã có khen thưởng của đợt này",
+                  "missing_staff": "bỏ qua - nhân viên không còn tồn tại"}
+        added = sum(1 for r in results if r.status == "added")
+        lines = [f"Đã phân: {added}    Bỏ qua: {len(results) - added}", ""]
+        lines += [f"{names.get(r.staff_id, r.staff_id)} (ID:{r.staff_id}): {labels[r.status]}" for r in results]
+        show_text(self.app, "Kết quả phân khen thưởng", "\n".join(lines), width=560, height=420)
+
     # ========================== TRANG 7: TRA CỨU CÁ NHÂN ==========================
     def show_staff_lookup_page(self):
         self.clear_content()
@@ -1219,30 +1348,40 @@ class AwardsView:
         ctk.CTkLabel(search_row, text="Chọn nhân viên:", 
                     font=ctk.CTkFont(size=12)).pack(side="left", padx=(0,8))
         
-        staffs = self.db.get_all_staffs()
-        staff_map = {f"{s[2]} - {s[3] or 'N/A'} (ID:{s[0]})": s[0] for s in staffs}
-        staff_combo = ctk.CTkComboBox(search_row, values=list(staff_map.keys()), 
-                                     state="readonly", width=400)
-        if staffs:
-            staff_combo.set(list(staff_map.keys())[0])
+        # danh sách nhân viên đọc trên thread db (có thể rất dài); combo bị khóa tới khi có
+        staffs = {}  # id -> họ tên
+        staff_map = {}
+        staff_combo = ctk.CTkComboBox(search_row, values=["⏳ Đang tải danh sách..."],
+                                     state="disabled", width=400)
+        staff_combo.set("⏳ Đang tải danh sách...")
         staff_combo.pack(side="left", padx=(0,8))
 
+        def on_staffs(rows):
+            # rows là ResultSet: đọc theo cột, không tạo namedtuple cho từng nhân viên
+            staffs.update(rows.select(("id", "full_name")))
+            staff_map.update((f"{name} - {position or 'N/A'} (ID:{staff_id})", staff_id)
+                             for staff_id, name, position in rows.select(("id", "full_name", "position")))
+            staff_combo.configure(values=list(staff_map.keys()), state="readonly")
+            staff_combo.set(next(iter(staff_map), ""))
+
+        self.app.adb.call("get_all_staffs", owner=staff_combo, on_done=on_staffs)
+
         # Filter options
         filter_frame = ctk.CTkFrame(search_row, fg_color="transparent")
         filter_frame.pack(side="left", padx=8)
         
         ctk.CTkLabel(filter_frame, text="Năm:", font=ctk.CTkFont(size=11)).pack(side="left", padx=4)
-        years = ["Tất cả"] + [str(y[1]) for y in self.db.get_all_award_years()]
+        years = ["Tất cả"] + [str(y.year) for y in self.db.get_all_award_years()]
         year_filter = ctk.CTkComboBox(filter_frame, values=years, state="readonly", width=100)
         year_filter.set("Tất cả")
         year_filter.pack(side="left", padx=4)
 
         def search():
-            if not staff_combo.get():
+            if staff_combo.get() not in staff_map:
                 show_error("Lỗi", "Chọn nhân viên")
                 return
             staff_id = staff_map.get(staff_combo.get())
-            year_val = None if year_filter.get() == "Tất cả" else year_filter.get()
+            year_val = None if year_filter.get() == "Tất cả" else int(year_filter.get())
             load_staff_awards(staff_id, year_val)
 
         ctk.CTkButton(search_row, text="🔍 Tra cứu", command=search, 
@@ -1279,65 +1418,39 @@ class AwardsView:
         tree.configure(yscrollcommand=sb.set)
         tree.pack(side="left", fill="both", expand=True)
         sb.pack(side="right", fill="y")
+        # bấm tiêu đề cột: tra cứu lại với thứ tự mới (sắp xếp trong SQLite)
+        looked_up = []
+        sort = self._heading_sort(tree, "staff_awards", STAFF_AWARD_SORT_FIELDS,
+                                  lambda order_by: load_staff_awards(*looked_up) if looked_up else None,
+                                  ("-year", "-decision_date"))
 
         def load_staff_awards(staff_id, year_filter=None):
-            # Clear tree
-            for i in tree.get_children():
-                tree.delete(i)
+            staff_name = staffs.get(staff_id)
+            if staff_name is None:
+                return
+            looked_up[:] = (staff_id, year_filter)
+            show_tree_placeholder(tree)
+            self.staff_info_label.configure(text=f"👤 {staff_name} - ⏳ Đang tra cứu...")
 
-            # Get staff info
-            staff = next((s for s in staffs if s[0] == staff_id), None)
-            if staff:
-                conn = self.db.get_connection()
-                cur = conn.cursor()
-                
-                # Count total
-                cur.execute("SELECT COUNT(*) FROM staff_awards WHERE staff_id=?", (staff_id,))
-                total = cur.fetchone()[0]
-                
+            def show(result):
+                total, rows = result
                 self.staff_info_label.configure(
-                    text=f"👤 {staff[2]} - Tổng số: {total} khen thưởng"
+                    text=f"👤 {staff_name} - Tổng số: {total} khen thưởng"
                 )
+                fill_tree(tree, rows, STAFF_AWARD_FORMAT)
 
-                # Get awards
-                if year_filter:
-                    cur.execute('''
-                        SELECT sa.id, ay.year, at.name, at.level, aa.name, ab.decision_no, 
-                               ab.decision_date, sa.note
-                        FROM staff_awards sa
-                        JOIN award_batches ab ON sa.award_batch_id = ab.id
-                        JOIN award_titles at ON ab.award_title_id = at.id
-                        JOIN award_years ay ON ab.award_year_id = ay.id
-                        LEFT JOIN award_authorities aa ON ab.authority_id = aa.id
-                        WHERE sa.staff_id = ? AND ay.year = ?
-                        ORDER BY ab.decision_date DESC
-                    ''', (staff_id, year_filter))
-                else:
-                    cur.execute('''
-                        SELECT sa.id, ay.year, at.name, at.level, aa.name, ab.decision_no, 
-                               ab.decision_date, sa.note
-                        FROM staff_awards sa
-                        JOIN award_batches ab ON sa.award_batch_id = ab.id
-                        JOIN award_titles at ON ab.award_title_id = at.id
-                        JOIN award_years ay ON ab.award_year_id = ay.id
-                        LEFT JOIN award_authorities aa ON ab.authority_id = aa.id
-                        WHERE sa.staff_id = ?
-                        ORDER BY ab.decision_date DESC
-                    ''', (staff_id,))
-                
-                rows = cur.fetchall()
-                conn.close()
+            def failed(e):
+                show_tree_placeholder(tree, f"Lỗi: {e}")
 
-                for r in rows:
-                    display = (r[0], r[1], r[2], r[3], r[4] or "-", r[5] or "-", 
-                              r[6] or "-", r[7] or "")
-                    tree.insert("", "end", values=display)
+            # truy vấn chạy trên thread db; tra cứu mới hơn (key) thay thế tra cứu đang chờ
+            self.app.adb.call("lookup_staff_awards", staff_id, year_filter, sort.order_by, owner=tree,
+                              key="staff_lookup", on_done=show, on_error=failed)
 
         # Context menu delete
         if self.app.is_admin:
             def on_right(event):
                 item = tree.identify_row(event.y)
-                if not item:
+                if not item or "placeholder" in tree.item(item, "tags"):
                     return
                 tree.selection_set(item)
                 menu = tk.Menu(self.app, tearoff=0)
@@ -1380,7 +1493,7 @@ class AwardsView:
                     font=ctk.CTkFont(size=12)).pack(side="left", padx=(0,8))
         
         depts = self.db.get_all_departments()
-        dept_map = {f"{d[1]} (ID:{d[0]})": d[0] for d in depts}
+        dept_map = {f"{d.name} (ID:{d.id})": d.id for d in depts}
         dept_combo = ctk.CTkComboBox(search_row, values=list(dept_map.keys()), 
                                     state="readonly", width=350)
         if depts:
@@ -1392,7 +1505,7 @@ class AwardsView:
         filter_frame.pack(side="left", padx=8)
         
         ctk.CTkLabel(filter_frame, text="Năm:", font=ctk.CTkFont(size=11)).pack(side="left", padx=4)
-        years = ["Tất cả"] + [str(y[1]) for y in self.db.get_all_award_years()]
+        years = ["Tất cả"] + [str(y.year) for y in self.db.get_all_award_years()]
         year_filter = ctk.CTkComboBox(filter_frame, values=years, state="readonly", width=100)
         year_filter.set("Tất cả")
         year_filter.pack(side="left", padx=4)
@@ -1402,7 +1515,7 @@ class AwardsView:
                 show_error("Lỗi", "Chọn phòng ban")
                 return
             dept_id = dept_map.get(dept_combo.get())
-            year_val = None if year_filter.get() == "Tất cả" else year_filter.get()
+            year_val = None if year_filter.get() == "Tất cả" else int(year_filter.get())
             load_dept_awards(dept_id, year_val)
 
         ctk.CTkButton(search_row, text="🔍 Tra cứu", command=search, 
@@ -1438,62 +1551,37 @@ class AwardsView:
         tree.configure(yscrollcommand=sb.set)
         tree.pack(side="left", fill="both", expand=True)
         sb.pack(side="right", fill="y")
+        looked_up = []
+        sort = self._heading_sort(tree, "department_awards", DEPARTMENT_AWARD_SORT_FIELDS,
+                                  lambda order_by: load_dept_awards(*looked_up) if looked_up else None,
+                                  ("-year", "-decision_date"))
 
         def load_dept_awards(dept_id, year_filter=None):
-            # Clear tree
-            for i in tree.get_children():
-                tree.delete(i)
+            dept = next((d for d in depts if d.id == dept_id), None)
+            if not dept:
+                return
+            looked_up[:] = (dept_id, year_filter)
+            show_tree_placeholder(tree)
+            self.dept_info_label.configure(text=f"🏢 {dept.name} - ⏳ Đang tra cứu...")
 
-            # Get dept info
-            dept = next((d for d in depts if d[0] == dept_id), None)
-            if dept:
-                conn = self.db.get_connection()
-                cur = conn.cursor()
-                
-                # Count total
-                cur.execute("SELECT COUNT(*) FROM department_awards WHERE department_id=?", (dept_id,))
-                total = cur.fetchone()[0]
-                
+            def show(result):
+                total, rows = result
                 self.dept_info_label.configure(
-                    text=f"🏢 {dept[1]} - Tổng số: {total} khen thưởng"
+                    text=f"🏢 {dept.name} - Tổng số: {total} khen thưởng"
                 )
+                fill_tree(tree, rows, DEPARTMENT_AWARD_FORMAT)
 
-                # Get awards
-                if year_filter:
-                    cur.execute('''
-                        SELECT da.id, ay.year, at.name, at.level, ab.decision_no, 
-                               ab.decision_date, da.note
-                        FROM department_awards da
-                        JOIN award_batches ab ON da.award_batch_id = ab.id
-                        JOIN award_titles at ON ab.award_title_id = at.id
-                        JOIN award_years ay ON ab.award_year_id = ay.id
-                        WHERE da.department_id = ? AND ay.year = ?
-                        ORDER BY ab.decision_date DESC
-                    ''', (dept_id, year_filter))
-                else:
-                    cur.execute('''
-                        SELECT da.id, ay.year, at.name, at.level, ab.decision_no, 
-                               ab.decision_date, da.note
-                        FROM department_awards da
-                        JOIN award_batches ab ON da.award_batch_id = ab.id
-                        JOIN award_titles at ON ab.award_title_id = at.id
-                        JOIN award_years ay ON ab.award_year_id = ay.id
-                        WHERE da.department_id = ?
-                        ORDER BY ab.decision_date DESC
-                    ''', (dept_id,))
-                
-                rows = cur.fetchall()
-                conn.close()
+            def failed(e):
+                show_tree_placeholder(tree, f"Lỗi: {e}")
 
-                for r in rows:
-                    display = (r[0], r[1], r[2], r[3], r[4] or "-", r[5] or "-", r[6] or "")
-                    tree.insert("", "end", values=display)
+            self.app.adb.call("lookup_department_awards", dept_id, year_filter, sort.order_by, owner=tree,
+                              key="dept_lookup", on_done=show, on_error=failed)
 
         # Context menu delete
         if self.app.is_admin:
             def on_right(event):
                 item = tree.identify_row(event.y)
-                if not item:
+                if not item or "placeholder" in tree.item(item, "tags"):
                     return
                 tree.selection_set(item)
                 menu = tk.Menu(self.app, tearoff=0)
@@ -1532,26 +1620,26 @@ class AwardsView:
         # Form fields
         ctk.CTkLabel(frm, text="Năm:", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(8,2))
         years = self.db.get_all_award_years()
-        year_map = {str(y[1]): y[0] for y in years}
-        year_combo = ctk.CTkComboBox(frm, values=[str(y[1]) for y in years], state="readonly")
+        year_map = {str(y.year): y.id for y in years}
+        year_combo = ctk.CTkComboBox(frm, values=[str(y.year) for y in years], state="readonly")
         if years:
-            year_combo.set(str(years[0][1]))
+            year_combo.set(str(years[0].year))
         year_combo.pack(fill="x", pady=(0,8))
 
         ctk.CTkLabel(frm, text="Danh hiệu:", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(8,2))
         titles = self.db.get_all_award_titles()
-        title_map = {t[1]: t[0] for t in titles}
-        title_combo = ctk.CTkComboBox(frm, values=[t[1] for t in titles], state="readonly")
+        title_map = {t.name: t.id for t in titles}
+        title_combo = ctk.CTkComboBox(frm, values=[t.name for t in titles], state="readonly")
         if titles:
-            title_combo.set(titles[0][1])
+            title_combo.set(titles[0].name)
         title_combo.pack(fill="x", pady=(0,8))
 
         ctk.CTkLabel(frm, text="Cơ quan ban hành (tùy chọn):", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(8,2))
         auths = self.db.get_all_award_authorities()
-        auth_map = {a[1]: a[0] for a in auths}
-        auth_combo = ctk.CTkComboBox(frm, values=[a[1] for a in auths], state="readonly")
+        auth_map = {a.name: a.id for a in auths}
+        auth_combo = ctk.CTkComboBox(frm, values=[a.name for a in auths], state="readonly")
         if auths:
-            auth_combo.set(auths[0][1])
+            auth_combo.set(auths[0].name)
         auth_combo.pack(fill="x", pady=(0,8))
 
         ctk.CTkLabel(frm, text="Số quyết định:", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(8,2))
@@ -1606,45 +1694,45 @@ class AwardsView:
                     font=ctk.CTkFont(size=16, weight="bold")).pack(pady=(0,16))
 
         years = self.db.get_all_award_years()
-        year_map = {str(y[1]): y[0] for y in years}
+        year_map = {str(y.year): y.id for y in years}
         
         ctk.CTkLabel(frm, text="Năm:", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(8,2))
-        year_combo = ctk.CTkComboBox(frm, values=[str(y[1]) for y in years], state="readonly")
-        year_combo.set(str(batch[1]))
+        year_combo = ctk.CTkComboBox(frm, values=[str(y.year) for y in years], state="readonly")
+        year_combo.set(str(batch.year))
         year_combo.pack(fill="x", pady=(0,8))
 
         titles = self.db.get_all_award_titles()
-        title_map = {t[1]: t[0] for t in titles}
+        title_map = {t.name: t.id for t in titles}
         
         ctk.CTkLabel(frm, text="Danh hiệu:", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(8,2))
-        title_combo = ctk.CTkComboBox(frm, values=[t[1] for t in titles], state="readonly")
-        title_combo.set(batch[2])
+        title_combo = ctk.CTkComboBox(frm, values=[t.name for t in titles], state="readonly")
+        title_combo.set(batch.title)
         title_combo.pack(fill="x", pady=(0,8))
 
         auths = self.db.get_all_award_authorities()
-        auth_map = {a[1]: a[0] for a in auths}
+        auth_map = {a.name: a.id for a in auths}
         
         ctk.CTkLabel(frm, text="Cơ quan:", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(8,2))
-        auth_combo = ctk.CTkComboBox(frm, values=[a[1] for a in auths], state="readonly")
-        if batch[4]:
-            auth_combo.set(batch[4])
+        auth_combo = ctk.CTkComboBox(frm, values=[a.name for a in auths], state="readonly")
+        if batch.authority:
+            auth_combo.set(batch.authority)
         elif auths:
-            auth_combo.set(auths[0][1])
+            auth_combo.set(auths[0].name)
         auth_combo.pack(fill="x", pady=(0,8))
 
         ctk.CTkLabel(frm, text="Số quyết định:", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(8,2))
         dec_ent = ctk.CTkEntry(frm)
-        dec_ent.insert(0, batch[5] or "")
+        dec_ent.insert(0, batch.decision_no or "")
         dec_ent.pack(fill="x", pady=(0,8))
 
         ctk.CTkLabel(frm, text="Ngày quyết định:", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(8,2))
         date_ent = ctk.CTkEntry(frm)
-        date_ent.insert(0, batch[6] or "")
+        date_ent.insert(0, batch.decision_date or "")
         date_ent.pack(fill="x", pady=(0,8))
 
         ctk.CTkLabel(frm, text="Ghi chú:", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(8,2))
         note_txt = ctk.CTkTextbox(frm, height=80)
-        note_txt.insert("1.0", batch[7] or "")
+        note_txt.insert("1.0", batch.note or "")
         note_txt.pack(fill="x", pady=(0,12))
 
         def save():
@@ -1655,7 +1743,7 @@ class AwardsView:
             decision_date = date_ent.get().strip()
             note = note_txt.get("1.0","end").strip()
             try:
-                self.db.update_award_batch(batch[0], award_year_id, award_title_id, 
+                self.db.update_award_batch(batch.id, award_year_id, award_title_id, 
                                           authority_id, decision_no, decision_date, note)
                 show_info("Thành công", "Đã cập nhật")
                 dlg.destroy()
@@ -1,15 +1,19 @@
 """
 dashboard.py
 View tổng quan: hiển thị 4 card thống kê và biểu đồ khen thưởng theo năm.
+Số liệu được đọc trên thread db (app.adb); trong lúc chờ card hiện "…" và khung biểu đồ hiện "Đang tải".
 """
 import customtkinter as ctk
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 class DashboardView:
-    def __init__(self, app, db):
+    # Bảng dữ liệu view hiển thị: HRMApp gọi refresh() khi mở lại view mà các bảng này đã đổi
+    TABLES = ("departments", "staffs", "documents", "staff_awards", "department_awards",
+              "award_batches", "award_titles", "award_years", "award_authorities")
+    def __init__(self, app, db, parent=None):
         self.app = app
         self.db = db
+        # Frame chứa view (HRMApp tạo 1 frame riêng cho mỗi view để giữ lại trong cache)
+        self.parent = parent if parent is not None else app.content_frame
 
     def create_stat_card(self, parent, title, value, color, column):
         card = ctk.CTkFrame(parent, fg_color="white", corner_radius=12, border_width=1, border_color="#e2e8f0")
@@ -17,90 +21,76 @@ class DashboardView:
         parent.grid_columnconfigure(column, weight=1)
 
         ctk.CTkLabel(card, text=title, font=ctk.CTkFont(size=12, weight="bold"), text_color="#64748b").pack(pady=(12,6))
-        ctk.CTkLabel(card, text=value, font=ctk.CTkFont(size=28, weight="bold"), text_color=color).pack(pady=(0,12))
+        value_label = ctk.CTkLabel(card, text=value, font=ctk.CTkFont(size=28, weight="bold"), text_color=color)
+        value_label.pack(pady=(0,12))
+        return value_label
 
-    def get_awards_by_year(self):
+    @staticmethod
+    def load_data(db):
+        """Chạy trên thread db: (get_statistics, số khen thưởng theo năm, theo cấp)"""
+        return db.get_statistics(), db.get_award_counts("year"), db.get_award_counts("level")
+
+    def get_awards_by_year(self, rows):
         """
-        Lấy thống kê số lượng khen thưởng (cả cá nhân và tập thể) theo năm
-        Returns: dict {year: count}
+        Thống kê số lượng khen thưởng (cả cá nhân và tập thể) theo năm từ db.get_award_counts("year")
+        Returns: (total_awards, staff_awards, dept_awards) - mỗi cái là dict {year: count}
         """
-        conn = self.db.get_connection()
-        cur = conn.cursor()
-        
-        # Thống kê khen thưởng cá nhân theo năm
-        cur.execute('''
-            SELECT ay.year, COUNT(sa.id) as count
-            FROM award_years ay
-            LEFT JOIN award_batches ab ON ab.award_year_id = ay.id
-            LEFT JOIN staff_awards sa ON sa.award_batch_id = ab.id
-            GROUP BY ay.year
-            ORDER BY ay.year
-        ''')
-        staff_awards = {row[0]: row[1] for row in cur.fetchall()}
-        
-        # Thống kê khen thưởng tập thể theo năm
-        cur.execute('''
-            SELECT ay.year, COUNT(da.id) as count
-            FROM award_years ay
-            LEFT JOIN award_batches ab ON ab.award_year_id = ay.id
-            LEFT JOIN department_awards da ON da.award_batch_id = ab.id
-            GROUP BY ay.year
-            ORDER BY ay.year
-        ''')
-        dept_awards = {row[0]: row[1] for row in cur.fetchall()}
-        
-        conn.close()
-        
-        # Gộp cả hai loại khen thưởng
-        all_years = set(staff_awards.keys()) | set(dept_awards.keys())
-        total_awards = {}
-        for year in all_years:
-            total_awards[year] = staff_awards.get(year, 0) + dept_awards.get(year, 0)
-        
+        total_awards = {r.key: r.total for r in rows}
+        staff_awards = {r.key: r.staff_awards for r in rows}
+        dept_awards = {r.key: r.department_awards for r in rows}
         return total_awards, staff_awards, dept_awards
 
-    def get_awards_by_level(self):
+    def get_awards_by_level(self, rows):
         """
-        Lấy thống kê khen thưởng theo cấp (co_so, tinh, trung_uong)
-        Returns: dict {level: count}
+        Thống kê khen thưởng theo cấp (co_so, tinh, trung_uong) từ db.get_award_counts("level")
+        Returns: dict {level: count}, sắp theo số lượng giảm dần
         """
-        conn = self.db.get_connection()
-        cur = conn.cursor()
-        
-        cur.execute('''
-            SELECT at.level, COUNT(sa.id) + COUNT(da.id) as total
-            FROM award_titles at
-            LEFT JOIN award_batches ab ON ab.award_title_id = at.id
-            LEFT JOIN staff_awards sa ON sa.award_batch_id = ab.id
-            LEFT JOIN department_awards da ON da.award_batch_id = ab.id
-            GROUP BY at.level
-            ORDER BY total DESC
-        ''')
-        
-        levels = {}
-        for row in cur.fetchall():
-            if row[0]:  # Kiểm tra level không null
-                levels[row[0]] = row[1]
-        
-        conn.close()
-        return levels
+        rows = sorted(rows, key=lambda r: r.total, reverse=True)
+        return {r.key: r.total for r in rows if r.key}  # bỏ danh hiệu chưa có level
 
     def render(self):
-        # Lấy thống kê tổng quan
-        dept_count, staff_count, award_count, doc_count = self.db.get_statistics()
-
-        # Card thống kê tổng quan
-        stats_frame = ctk.CTkFrame(self.app.content_frame, fg_color="transparent")
+        # Card thống kê tổng quan ("…" tới khi số liệu về)
+        stats_frame = ctk.CTkFrame(self.parent, fg_color="transparent")
         stats_frame.pack(fill="x", pady=(0, 16))
-        self.create_stat_card(stats_frame, "🏢 Phòng ban", str(dept_count), "#3b82f6", 0)
-        self.create_stat_card(stats_frame, "👥 Nhân sự", str(staff_count), "#8b5cf6", 1)
-        self.create_stat_card(stats_frame, "🏆 Khen thưởng", str(award_count), "#eab308", 2)
-        self.create_stat_card(stats_frame, "📄 Văn bản", str(doc_count), "#10b981", 3)
+        cards = [
+            self.create_stat_card(stats_frame, "🏢 Phòng ban", "…", "#3b82f6", 0),
+            self.create_stat_card(stats_frame, "👥 Nhân sự", "…", "#8b5cf6", 1),
+            self.create_stat_card(stats_frame, "🏆 Khen thưởng", "…", "#eab308", 2),
+            self.create_stat_card(stats_frame, "📄 Văn bản", "…", "#10b981", 3),
+        ]
 
         # Container cho các biểu đồ
-        charts_container = ctk.CTkFrame(self.app.content_frame, fg_color="transparent")
+        charts_container = ctk.CTkFrame(self.parent, fg_color="transparent")
         charts_container.pack(fill="both", expand=True, pady=6)
 
+        # Biểu đồ vẽ sau khi có số liệu (matplotlib nạp chậm, chỉ import khi cần)
+        loading = ctk.CTkLabel(charts_container, text="Đang tải biểu đồ...", text_color="#94a3b8")
+        loading.pack(pady=40)
+
+        def on_error(e):
+            loading.configure(text=f"Không tải được số liệu: {e}", text_color="#ef4444")
+
+        self.app.adb.submit(self.load_data, owner=charts_container, key="dashboard", on_error=on_error,
+                            on_done=lambda data: self._on_data(data, cards, charts_container, loading))
+
+    def _on_data(self, data, cards, charts_container, loading):
+        statistics, by_year, by_level = data
+        for label, value in zip(cards, statistics):
+            label.configure(text=str(value))
+        loading.destroy()
+        self.render_charts(charts_container, by_year, by_level)
+
+    def refresh(self):
+        """Vẽ lại toàn bộ (số liệu đọc từ bảng thống kê nên rất nhanh)"""
+        for w in self.parent.winfo_children():
+            w.destroy()
+        self.render()
+
+    def render_charts(self, charts_container, by_year, by_level):
+        """by_year / by_level: db.get_award_counts("year" / "level") (đọc sẵn trên thread db)"""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         # Biểu đồ 1: Thống kê khen thưởng theo năm
         chart_frame_1 = ctk.CTkFrame(charts_container, fg_color="white", corner_radius=12)
         chart_frame_1.pack(fill="both", expand=True, pady=(0, 8))
@@ -109,7 +99,7 @@ class DashboardView:
                     font=ctk.CTkFont(size=14, weight="bold")).pack(pady=12)
 
         # Lấy dữ liệu
-        total_awards, staff_awards, dept_awards = self.get_awards_by_year()
+        total_awards, staff_awards, dept_awards = self.get_awards_by_year(by_year)
         
         if total_awards:
             years = sorted(total_awards.keys())
@@ -157,7 +147,7 @@ class DashboardView:
         ctk.CTkLabel(chart_frame_2, text="🏅 THỐNG KÊ THEO CẤP KHEN THƯỞNG", 
                     font=ctk.CTkFont(size=14, weight="bold")).pack(pady=12)
 
-        levels_data = self.get_awards_by_level()
+        levels_data = self.get_awards_by_level(by_level)
         
         if levels_data:
             # Mapping tên cấp
@@ -5,21 +5,32 @@ import tkinter as tk
 from tkinter import ttk
 
 from ..dialogs import center_window, show_info, show_error, ask_confirm
+from ..repository import Staff
+from ..widgets import RowFormat, VirtualTreeview, KeysetSource, HeadingSort
+
+MEMBER_FORMAT = RowFormat(Staff, ("id", "stt", "full_name", "position", "phone", "dob"))
+# cột -> trường order_by của repository.LISTINGS["departments"] / LISTINGS["staffs"] (dialog nhân viên)
+SORT_FIELDS = {"ID": "id", "Tên phòng ban": "name", "Mô tả": "description"}
+MEMBER_SORT_FIELDS = {"ID": "id", "STT": "stt", "Họ và tên": "full_name", "Vị trí": "position",
+                      "Điện thoại": "phone", "Ngày sinh": "dob"}
 
 class DepartmentsView:
-    def __init__(self, app, db):
+    TABLES = ("departments",)
+    def __init__(self, app, db, parent=None):
         self.app = app
         self.db = db
+        # Frame chứa view (HRMApp tạo 1 frame riêng cho mỗi view để giữ lại trong cache)
+        self.parent = parent if parent is not None else app.content_frame
 
     def render(self):
-        header = ctk.CTkFrame(self.app.content_frame, fg_color="transparent")
+        header = ctk.CTkFrame(self.parent, fg_color="transparent")
         header.pack(fill="x", pady=(0,14))
         if self.app.is_admin:
             add_btn = ctk.CTkButton(header, text="➕ Thêm phòng ban", fg_color="#4f46e5", hover_color="#4338ca",
                                     command=self.open_add_dialog)
             add_btn.pack(side="right", padx=4)
 
-        table_frame = ctk.CTkFrame(self.app.content_frame, fg_color="white", corner_radius=12)
+        table_frame = ctk.CTkFrame(self.parent, fg_color="white", corner_radius=12)
         table_frame.pack(fill="both", expand=True)
 
         columns = ("ID","Tên phòng ban","Mô tả")
@@ -34,6 +45,9 @@ class DepartmentsView:
         self.tree.column("ID", width=60, anchor="center")
         self.tree.column("Tên phòng ban", width=320)
         self.tree.column("Mô tả", width=520)
+        self.sort = HeadingSort(self.tree, SORT_FIELDS, lambda order_by: self.load_departments(),
+                                order_by=self.db.get_view_sort("departments", default=("id",)),
+                                save=lambda order_by: self.db.set_view_sort("departments", order_by))
 
         scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
         self.tree.configure(yscrollcommand=scrollbar.set)
@@ -49,11 +63,40 @@ class DepartmentsView:
         # Double-click -> mở dialog hiển thị nhân viên thuộc phòng ban
         self.tree.bind("<Double-1>", self.on_double_click)
 
+        # Cập nhật từng dòng theo sự kiện thay đổi từ DatabaseManager
+        self.live = True
+        unsubscribe = self.db.changes.subscribe(self.on_change, tables=self.TABLES)
+        self.tree.bind("<Destroy>", lambda e: unsubscribe(), add="+")
+
+    def refresh(self):
+        self.load_departments()
+
     def load_departments(self):
         self.tree.delete(*self.tree.get_children())
-        depts = self.db.get_all_departments()
+        # ít dòng: lấy hết 1 lần, sắp xếp trong SQLite theo tiêu đề cột
+        depts = self.db.list_page("departments", limit=None, order_by=self.sort.order_by).rows
         for d in depts:
-            self.tree.insert("", "end", values=d)
+            self.tree.insert("", "end", iid=str(d.id), values=d)
+
+    def on_change(self, event):
+        """ChangeEvent từ db.changes: thêm/sửa/xóa đúng dòng phòng ban"""
+        iid = str(event.row_id)
+        if event.op == "reload":
+            self.load_departments()
+        elif event.op == "delete":
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+        else:
+            row = self.db.get_department(event.row_id)
+            if row is None:
+                return
+            if self.sort.order_by != ("id",):
+                # dòng thêm/sửa có thể đổi chỗ theo thứ tự đang chọn
+                self.load_departments()
+            elif self.tree.exists(iid):
+                self.tree.item(iid, values=row)
+            else:
+                self.tree.insert("", "end", iid=iid, values=row)
 
     def on_right_click(self, event):
         item = self.tree.identify_row(event.y)
@@ -72,8 +115,6 @@ class DepartmentsView:
             return
         values = self.tree.item(item)['values']
         dept_id, dept_name = values[0], values[1]
-        # Lấy danh sách nhân viên của phòng ban
-        staffs = self.db.get_staffs_by_department(dept_id)
 
         dialog = ctk.CTkToplevel(self.app)
         dialog.title(f"Nhân viên thuộc {dept_name}")
@@ -81,9 +122,12 @@ class DepartmentsView:
         dialog.transient(self.app)
         dialog.grab_set()
 
-        # Treeview hiển thị nhân viên
+        # Treeview hiển thị nhân viên (nạp theo trang, sắp xếp trong SQLite)
         cols = ("ID","STT","Họ và tên","Vị trí","Điện thoại","Ngày sinh")
-        tree = ttk.Treeview(dialog, columns=cols, show="headings", height=18)
+        table_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        table_frame.pack(fill="both", expand=True, padx=12, pady=12)
+        table = VirtualTreeview(table_frame, columns=cols, height=18)
+        tree = table.tree
         for c in cols:
             tree.heading(c, text=c)
         tree.column("ID", width=50, anchor="center")
@@ -92,11 +136,17 @@ class DepartmentsView:
         tree.column("Vị trí", width=160)
         tree.column("Điện thoại", width=120, anchor="center")
         tree.column("Ngày sinh", width=120, anchor="center")
-        tree.pack(fill="both", expand=True, padx=12, pady=12)
+        tree.pack(side="left", fill="both", expand=True)
+        table.scrollbar.pack(side="right", fill="y")
+
+        def load_members(order_by):
+            table.set_source(KeysetSource.listing(self.db, "staffs", order_by=order_by,
+                                                  filters={"department_id": dept_id}, values=MEMBER_FORMAT))
 
-        for s in staffs:
-            # s = (id, stt, full_name, position, phone, dob, dept_name)
-            tree.insert("", "end", values=(s[0], s[1], s[2], s[3], s[4], s[5]))
+        sort = HeadingSort(tree, MEMBER_SORT_FIELDS, load_members,
+                           order_by=self.db.get_view_sort("department_members", "staffs", default=("stt",)),
+                           save=lambda order_by: self.db.set_view_sort("department_members", order_by))
+        load_members(sort.order_by)
 
     def open_add_dialog(self):
         dialog = ctk.CTkToplevel(self.app)
@@ -124,7 +174,6 @@ class DepartmentsView:
             if ok:
                 show_info("Thành công", "Đã thêm phòng ban mới")
                 dialog.destroy()
-                self.load_departments()
             else:
                 show_error("Lỗi", "Tên phòng ban đã tồn tại")
 
@@ -162,7 +211,6 @@ class DepartmentsView:
             self.db.update_department(dept_id, new_name, new_desc)
             show_info("Thành công", "Đã cập nhật phòng ban")
             dialog.destroy()
-            self.load_departments()
 
         ctk.CTkButton(dialog, text="💾 Cập nhật", command=update, fg_color="#f59e0b").pack(padx=16, pady=12, fill="x")
 
@@ -176,6 +224,5 @@ class DepartmentsView:
             try:
                 self.db.delete_department(dept_id)
                 show_info("Thành công", "Đã xóa phòng ban")
-                self.load_departments()
             except Exception as e:
                 show_error("Lỗi", f"Không thể xóa phòng ban: {e}")
\ No newline at end of file
@@ -0,0 +1,122 @@
+# hrm_app/views/diagnostics.py
+# Trang Chẩn đoán: số liệu đo của DatabaseManager (db.instrumentation) - hàm nào / câu SQL nào
+# tốn thời gian nhất, histogram độ trễ và slow log kèm EXPLAIN QUERY PLAN.
+# Nút "Xuất JSON" ghi db.dump_diagnostics() ra file để gửi kèm báo lỗi.
+import customtkinter as ctk
+from datetime import datetime
+from tkinter import ttk, filedialog
+
+from ..dialogs import show_info, show_error, show_text
+from ..instrumentation import HISTOGRAM_BOUNDS_MS
+
+
+def format_histogram(histogram):
+    """[3, 1, 0, ...] -> "≤1ms:3 ≤5ms:1" (bỏ ô 0)"""
+    labels = [f"≤{b}ms" for b in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+    return " ".join(f"{label}:{n}" for label, n in zip(labels, histogram) if n)
+
+
+class DiagnosticsView:
+    # số liệu không gắn với bảng nào: tự làm mới mỗi lần trang được hiện lại (<Map>)
+    TABLES = ()
+    TOP = 200
+
+    def __init__(self, app, db, parent=None):
+        self.app = app
+        self.db = db
+        # Frame chứa view (HRMApp tạo 1 frame riêng cho mỗi view để giữ lại trong cache)
+        self.parent = parent if parent is not None else app.content_frame
+        self.slow = []
+
+    def render(self):
+        header = ctk.CTkFrame(self.parent, fg_color="transparent")
+        header.pack(fill="x", pady=(0, 10))
+        self.summary = ctk.CTkLabel(header, text="", font=ctk.CTkFont(size=13))
+        self.summary.pack(side="left", padx=4)
+        if self.db.instrumentation is None:
+            self.summary.configure(text="Đo hiệu năng đang tắt (DatabaseManager(instrument=False))")
+            return
+        ctk.CTkButton(header, text="💾 Xuất JSON", fg_color="#4f46e5", hover_color="#4338ca",
+                      command=self.export_json).pack(side="right", padx=4)
+        ctk.CTkButton(header, text="🧹 Xóa số liệu", fg_color="#64748b", hover_color="#475569",
+                      command=self.reset).pack(side="right", padx=4)
+        ctk.CTkButton(header, text="🔄 Làm mới", fg_color="#0ea5e9", hover_color="#0284c7",
+                      command=self.refresh).pack(side="right", padx=4)
+
+        stat_cols = ("Lần gọi", "Tổng (ms)", "TB (ms)", "Max (ms)", "Dòng", "Lỗi", "Phân bố")
+        self.methods_tree = self._table("⏱️ Hàm DatabaseManager (theo tổng thời gian)", ("Hàm",) + stat_cols,
+                                        {"Hàm": 220, "Phân bố": 320}, height=8)
+        self.queries_tree = self._table("🧾 Câu SQL (kể cả SQL trong view)", ("SQL",) + stat_cols,
+                                        {"SQL": 520, "Phân bố": 320}, height=8)
+        self.slow_tree = self._table("🐢 Câu chậm (double-click xem EXPLAIN QUERY PLAN)",
+                                     ("Lúc", "ms", "Dòng", "Hàm", "Vị trí", "SQL"),
+                                     {"Lúc": 150, "Hàm": 180, "Vị trí": 260, "SQL": 520}, height=8)
+        self.slow_tree.bind("<Double-1>", self.show_slow_detail)
+
+        self.load()
+        # ViewCache chỉ pack lại frame khi hiện lại trang: làm mới số liệu lúc đó
+        self.parent.bind("<Map>", lambda e: self.load() if e.widget is self.parent else None, add="+")
+
+    def _table(self, title, columns, widths, height):
+        frame = ctk.CTkFrame(self.parent, fg_color="white", corner_radius=12)
+        frame.pack(fill="both", expand=True, pady=(0, 10))
+        ctk.CTkLabel(frame, text=title, font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w", padx=12, pady=(8, 4))
+        tree = ttk.Treeview(frame, columns=columns, show="headings", height=height)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=widths.get(col, 90), anchor="w" if col in widths else "e")
+        sb = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=sb.set)
+        tree.pack(side="left", fill="both", expand=True, padx=(12, 0), pady=(0, 12))
+        sb.pack(side="right", fill="y", pady=(0, 12), padx=(0, 12))
+        return tree
+
+    def refresh(self):
+        if self.db.instrumentation is not None:
+            self.load()
+
+    def load(self):
+        snap = self.db.instrumentation.snapshot(top=self.TOP)
+        self.summary.configure(text=f"Từ {snap['started_at'].replace('T', ' ')} · câu chậm: ≥ {snap['slow_ms']:g} ms "
+                                    f"· {len(snap['slow_queries'])} câu trong slow log")
+        for tree, rows, name in ((self.methods_tree, snap["methods"], "name"),
+                                 (self.queries_tree, snap["queries"], "sql")):
+            tree.delete(*tree.get_children())
+            for r in rows:
+                tree.insert("", "end", values=(r[name], r["calls"], f"{r['total_ms']:.1f}", f"{r['avg_ms']:.2f}",
+                                               f"{r['max_ms']:.1f}", r["rows"], r["errors"],
+                                               format_histogram(r["histogram"])))
+        self.slow = snap["slow_queries"]
+        self.slow_tree.delete(*self.slow_tree.get_children())
+        for i, s in enumerate(self.slow):
+            self.slow_tree.insert("", "end", iid=str(i), values=(s["at"].replace("T", " "), f"{s['ms']:.1f}", s["rows"],
+                                                                 s["method"] or "-", s["caller"] or "-", s["sql"]))
+
+    def show_slow_detail(self, event=None):
+        sel = self.slow_tree.selection()
+        if not sel:
+            return
+        s = self.slow[int(sel[0])]
+        lines = [f"Lúc: {s['at']}", f"Thời gian: {s['ms']:.1f} ms, {s['rows']} dòng",
+                 f"Hàm: {s['method'] or '-'}", f"Vị trí: {s['caller'] or '-'}", "", "SQL:", s["sql"],
+                 "", f"Tham số: {s['params']}", "", "EXPLAIN QUERY PLAN:"]
+        lines += [f"  {step}" for step in s["plan"]] or ["  (không có)"]
+        show_text(self.app, "Câu chậm", "\n".join(lines), width=760, height=420)
+
+    def reset(self):
+        self.db.instrumentation.reset()
+        self.load()
+
+    def export_json(self):
+        path = filedialog.asksaveasfilename(
+            title="Lưu số liệu chẩn đoán", defaultextension=".json",
+            initialfile=f"hrm_diagnostics_{datetime.now():%Y%m%d_%H%M%S}.json",
+            filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            self.db.dump_diagnostics(path)
+        except (OSError, ValueError) as e:
+            show_error("Lỗi", str(e))
+            return
+        show_info("Thành công", f"Đã lưu số liệu chẩn đoán vào\n{path}")
@@ -3,24 +3,37 @@
 import customtkinter as ctk
 from tkinter import ttk, Menu
 from ..dialogs import center_window, show_info, show_error, ask_confirm
+from ..widgets import VirtualTreeview, KeysetSource, HeadingSort
+
+# cột -> trường order_by của repository.LISTINGS["documents"]
+SORT_FIELDS = {"ID": "id", "Nhân viên": "staff_name", "Loại hồ sơ": "loai_ho_so", "Số ký hiệu": "so_va_ky_hieu",
+               "Ngày tháng": "ngay_thang", "File": "file_url"}
+# dialog "Hồ sơ của ..." -> LISTINGS["staff_documents"]
+STAFF_DOC_SORT_FIELDS = {"ID": "id", "Loại hồ sơ": "loai_ho_so", "Số ký hiệu": "so_va_ky_hieu",
+                         "Ngày tháng": "ngay_thang", "Trích yếu": "ten_loai_trich_yeu_noi_dung", "Số tờ": "so_to",
+                         "Ghi chú": "ghi_chu", "File": "file_url", "Ngày tạo": "created_at"}
 
 class DocumentsView:
-    def __init__(self, app, db):
+    TABLES = ("documents", "staffs")
+    def __init__(self, app, db, parent=None):
         self.app = app
         self.db = db
+        # Frame chứa view (HRMApp tạo 1 frame riêng cho mỗi view để giữ lại trong cache)
+        self.parent = parent if parent is not None else app.content_frame
 
     def render(self):
-        header = ctk.CTkFrame(self.app.content_frame, fg_color="transparent")
+        header = ctk.CTkFrame(self.parent, fg_color="transparent")
         header.pack(fill="x", pady=(0,14))
         if self.app.is_admin:
             add_btn = ctk.CTkButton(header, text="➕ Thêm tài liệu", fg_color="#4f46e5", hover_color="#4338ca", command=self.open_add_dialog)
             add_btn.pack(side="right", padx=4)
 
-        table_frame = ctk.CTkFrame(self.app.content_frame, fg_color="white", corner_radius=12)
+        table_frame = ctk.CTkFrame(self.parent, fg_color="white", corner_radius=12)
         table_frame.pack(fill="both", expand=True)
 
         columns = ("ID","Nhân viên","Loại hồ sơ","Số ký hiệu","Ngày tháng","File")
-        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=14)
+        self.table = VirtualTreeview(table_frame, columns=columns, height=14)
+        self.tree = self.table.tree
         for c in columns:
             self.tree.heading(c, text=c)
         self.tree.column("ID", width=50, anchor="center")
@@ -29,23 +42,30 @@ class DocumentsView:
         self.tree.column("Số ký hiệu", width=150)
         self.tree.column("Ngày tháng", width=120, anchor="center")
         self.tree.column("File", width=260)
+        self.sort = HeadingSort(self.tree, SORT_FIELDS, self.on_sort,
+                                order_by=self.db.get_view_sort("documents", default=("id",)),
+                                save=lambda order_by: self.db.set_view_sort("documents", order_by))
 
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
         self.tree.pack(side="left", fill="both", expand=True, padx=12, pady=12)
-        scrollbar.pack(side="right", fill="y", pady=12, padx=(0,12))
+        self.table.scrollbar.pack(side="right", fill="y", pady=12, padx=(0,12))
+
+        self.load_documents()
 
+    def refresh(self):
         self.load_documents()
 
     def load_documents(self):
-        try:
-            self.tree.delete(*self.tree.get_children())
-        except Exception:
-            pass
-        docs = self.db.get_all_documents()
-        for d in docs:
-            # d = (id, staff_full_name, loai_ho_so, so_va_ky_hieu, ngay_thang, file_url)
-            self.tree.insert("", "end", values=d)
+        # d = (id, staff_full_name, loai_ho_so, so_va_ky_hieu, ngay_thang, file_url)
+        if getattr(self, "table", None) is None:
+            # DocumentsView dùng làm helper dialog (từ StaffView) thì không có bảng chính
+            return
+        if self.table.source is None:
+            self.on_sort(self.sort.order_by)
+        else:
+            self.table.refresh()
+
+    def on_sort(self, order_by):
+        self.table.set_source(KeysetSource.listing(self.db, "documents", order_by=order_by))
 
     def open_add_dialog(self, preset_staff_id=None):
         """
@@ -64,8 +84,8 @@ class DocumentsView:
         # Nhân viên
         ctk.CTkLabel(scroll, text="Chọn nhân viên:", font=ctk.CTkFont(size=12, weight="bold")).pack(anchor="w", pady=(8,4))
         staffs = self.db.get_all_staffs()
-        staff_names = [f"{s[2]} (ID: {s[0]})" for s in staffs]
-        staff_map = {f"{s[2]} (ID: {s[0]})": s[0] for s in staffs}
+        staff_names = [f"{s.full_name} (ID: {s.id})" for s in staffs]
+        staff_map = {f"{s.full_name} (ID: {s.id})": s.id for s in staffs}
         staff_combo = ctk.CTkComboBox(scroll, values=staff_names, state="readonly")
         if staff_names:
             # nếu có preset_staff_id thì set tương ứng
@@ -160,14 +180,18 @@ class DocumentsView:
 
         tree.pack(fill="both", expand=True, padx=8, pady=8)
 
-        # Load documents for staff
-        def load_staff_docs():
+        # Load documents for staff (sắp xếp trong SQLite theo tiêu đề cột đang chọn)
+        def load_staff_docs(order_by=None):
             tree.delete(*tree.get_children())
-            docs = self.db.get_documents_by_staff(staff_id)
+            docs = self.db.list_page("staff_documents", limit=None, order_by=order_by or sort.order_by,
+                                     filters={"staff_id": staff_id}).rows
             for d in docs:
                 # d = (id, loai_ho_so, so_va_ky_hieu, ngay_thang, ten_loai_trich_yeu_noi_dung, so_to, ghi_chu, file_url, created_at)
                 tree.insert("", "end", values=d)
 
+        sort = HeadingSort(tree, STAFF_DOC_SORT_FIELDS, load_staff_docs,
+                           order_by=self.db.get_view_sort("staff_documents", default=("-created_at",)),
+                           save=lambda order_by: self.db.set_view_sort("staff_documents", order_by))
         load_staff_docs()
 
         # Context menu for each document (edit / delete)
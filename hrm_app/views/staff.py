@@ -1,21 +1,39 @@
 # hrm_app/views/staff.py
 # Cập nhật UI: bỏ trường STT trong form Thêm/Sửa; STT được hệ thống xử lý tự động trong DB.
 
+import os
+
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import ttk
+from tkinter import filedialog
 
-from ..dialogs import center_window, show_info, show_error, ask_confirm
+from .. import importer
+from .. import staff_filter
+from ..staff_filter import StaffFilter, AWARD_CHOICES
+from ..dialogs import center_window, show_info, show_error, ask_confirm, ProgressDialog, show_text, run_export
+from ..widgets import VirtualTreeview, KeysetSource, ListSource, HeadingSort, sort_rows, DebouncedQuery, BackgroundTask
 from .documents import DocumentsView
 
+# cột -> trường order_by của repository.LISTINGS["staffs"]
+SORT_FIELDS = {"ID": "id", "STT": "stt", "Họ và tên": "full_name", "Vị trí": "position",
+               "Điện thoại": "phone", "Ngày sinh": "dob", "Phòng ban": "department"}
+
 class StaffView:
-    def __init__(self, app, db):
+    TABLES = ("staffs", "departments", "staff_awards")
+    SEARCH_LIMIT = 500  # số kết quả tìm kiếm tối đa hiển thị
+    SEARCH_DELAY_MS = 250  # chờ ngừng gõ bao lâu thì mới tìm
+    FILTER_DELAY_MS = 300  # chờ ngừng sửa bộ lọc bao lâu thì mới đếm số nhân viên khớp
+    ALL_DEPARTMENTS = "Tất cả phòng ban"
+
+    def __init__(self, app, db, parent=None):
         self.app = app
         self.db = db
+        # Frame chứa view (HRMApp tạo 1 frame riêng cho mỗi view để giữ lại trong cache)
+        self.parent = parent if parent is not None else app.content_frame
         self.docs_view = DocumentsView(app, db)
 
     def render(self):
-        header = ctk.CTkFrame(self.app.content_frame, fg_color="transparent")
+        header = ctk.CTkFrame(self.parent, fg_color="transparent")
         header.pack(fill="x", pady=(0,8))
 
         # Search box
@@ -26,17 +44,43 @@ class StaffView:
         self.search_entry = ctk.CTkEntry(search_frame, placeholder_text="Nhập tên cần tìm...")
         self.search_entry.pack(side="left", fill="x", expand=True, padx=(0,8))
         ctk.CTkButton(search_frame, text="🔎", width=40, command=self.on_search).pack(side="left")
+        # Số kết quả + thời gian truy vấn
+        self.search_status = ctk.CTkLabel(search_frame, text="", text_color="#64748b", font=ctk.CTkFont(size=11))
+        self.search_status.pack(side="left", padx=(8,0))
+
+        # Tìm khi gõ: truy vấn chạy trên thread db, kết quả giao lại main thread qua app.adb
+        self.search_query = DebouncedQuery(self.search_entry, self.app.adb, self._run_search,
+                                           self._on_search_result, on_error=self._on_search_error,
+                                           delay_ms=self.SEARCH_DELAY_MS)
+        self.search_entry.bind("<KeyRelease>", self.on_search_key)
+        self.search_entry.bind("<Return>", lambda e: self.on_search())
 
         if self.app.is_admin:
             add_btn = ctk.CTkButton(header, text="➕ Thêm nhân viên", fg_color="#4f46e5", hover_color="#4338ca",
                                     command=self.open_add_dialog)
             add_btn.pack(side="right", padx=4)
-
-        table_frame = ctk.CTkFrame(self.app.content_frame, fg_color="white", corner_radius=12)
+            import_btn = ctk.CTkButton(header, text="📥 Nhập từ file", fg_color="#0ea5e9", hover_color="#0284c7",
+                                       command=self.open_import_dialog)
+            import_btn.pack(side="right", padx=4)
+        self.export_btn = ctk.CTkButton(header, text="📤 Xuất file", fg_color="#0ea5e9", hover_color="#0284c7",
+                                        command=self.open_export_menu)
+        self.export_btn.pack(side="right", padx=4)
+        ctk.CTkButton(header, text="🧰 Bộ lọc", fg_color="#64748b", hover_color="#475569",
+                      command=self.toggle_filter_panel).pack(side="right", padx=4)
+
+        # Bộ lọc kết hợp (ẩn tới khi bấm "🧰 Bộ lọc")
+        self.staff_filter = None    # StaffFilter đang áp dụng cho danh sách đầy đủ
+        self.filter_panel = ctk.CTkFrame(self.parent, fg_color="white", corner_radius=12)
+        self._build_filter_panel(self.filter_panel)
+
+        table_frame = ctk.CTkFrame(self.parent, fg_color="white", corner_radius=12)
         table_frame.pack(fill="both", expand=True, pady=(8,0))
+        self.table_frame = table_frame
 
         columns = ("ID","STT","Họ và tên","Vị trí","Điện thoại","Ngày sinh","Phòng ban")
-        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=14)
+        # Bảng ảo: chỉ giữ các dòng đang nhìn thấy, lấy dữ liệu theo trang khi cuộn
+        self.table = VirtualTreeview(table_frame, columns=columns, height=14)
+        self.tree = self.table.tree
         for col in columns:
             self.tree.heading(col, text=col)
         self.tree.column("ID", width=50, anchor="center")
@@ -46,32 +90,150 @@ class StaffView:
         self.tree.column("Điện thoại", width=120, anchor="center")
         self.tree.column("Ngày sinh", width=120, anchor="center")
         self.tree.column("Phòng ban", width=200)
+        # bấm tiêu đề cột (Shift + bấm: thêm khóa phụ): sắp xếp trong SQLite (danh sách đầy đủ) / tại chỗ
+        # (kết quả tìm kiếm); thứ tự được lưu lại cho lần mở sau
+        self.sort = HeadingSort(self.tree, SORT_FIELDS, self.on_sort,
+                                order_by=self.db.get_view_sort("staffs", default=("id",)),
+                                save=lambda order_by: self.db.set_view_sort("staffs", order_by))
 
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
         self.tree.pack(side="left", fill="both", expand=True, padx=12, pady=12)
-        scrollbar.pack(side="right", fill="y", pady=12, padx=(0,12))
+        self.table.scrollbar.pack(side="right", fill="y", pady=12, padx=(0,12))
 
+        self._last_query = None
+        self._shown_filter = None
+        self._search_rows = None
+        self._search_order = None   # None = theo độ liên quan
         self.load_staffs()
 
+        # Bảng được cập nhật từng dòng theo sự kiện thay đổi từ DatabaseManager
+        self.live = True
+        unsubscribe = self.db.changes.subscribe(self.on_change, tables=self.TABLES)
+        self.tree.bind("<Destroy>", lambda e: unsubscribe(), add="+")
+
         if self.app.is_admin:
             self.tree.bind("<Button-3>", self.on_right_click)
         else:
             self.tree.bind("<Double-1>", self.on_double_click_view_docs)
 
     def load_staffs(self, query=None):
-        self.tree.delete(*self.tree.get_children())
+        # r = (id, stt, full_name, position, phone, dob, dept_name)
         if query:
-            rows = self.db.search_staffs_by_name(query)
+            # FTS5: không phân biệt dấu, khớp tiền tố, xếp theo độ liên quan
+            self._show_search_result(query, self.db.search_staffs(query, limit=self.SEARCH_LIMIT))
+            return
+        self.search_query.cancel()
+        # Tải lại cùng danh sách (sau thêm/sửa/xóa) thì giữ nguyên vị trí cuộn
+        same_list = query == self._last_query and self.staff_filter == self._shown_filter
+        self.table.set_source(self._listing_source(self.sort.order_by), keep_offset=same_list)
+        self._last_query = query
+        self._shown_filter = self.staff_filter
+        self._update_count()
+
+    def _listing_source(self, order_by):
+        """Danh sách đầy đủ (hoặc theo bộ lọc đang áp dụng) - lọc, sắp xếp, phân trang trong SQLite"""
+        flt = self.staff_filter
+        if flt is None:
+            return KeysetSource.listing(self.db, "staffs", order_by=order_by)
+        # 1 câu SQL cho cả tổ hợp lọc; số dòng lấy qua count_staff_filter (đã đếm lúc xem trước)
+        return KeysetSource.listing(self.db, "staffs", order_by=order_by, filters=staff_filter.to_filters(flt),
+                                    count=lambda: self.db.count_staff_filter(flt))
+
+    def _update_count(self):
+        if self._last_query is None:
+            suffix = " khớp bộ lọc" if self.staff_filter is not None else ""
+            self.search_status.configure(text=f"{self.table.total} nhân viên{suffix}")
+
+    def on_change(self, event):
+        """Cập nhật đúng dòng bị thêm/sửa/xóa (ChangeEvent từ db.changes)"""
+        if event.table == "departments":
+            # tên phòng ban hiển thị trong bảng; phòng mới chưa có nhân viên nào
+            if event.op != "insert":
+                self.table.refresh()
+            return
+        if event.table == "staff_awards":
+            # chỉ ảnh hưởng danh sách khi đang lọc theo tình trạng khen thưởng
+            if self._last_query is None and self.staff_filter is not None and self.staff_filter.award is not None:
+                self.table.refresh()
+                self._update_count()
+            return
+        if event.op == "reload":
+            self.table.refresh()
+        elif event.op == "delete":
+            self.table.remove_row(event.row_id)
         else:
-            rows = self.db.get_all_staffs()
-        for r in rows:
-            # r = (id, stt, full_name, position, phone, dob, dept_name)
-            self.tree.insert("", "end", values=r)
+            row = self.db.get_staff_row(event.row_id)
+            if row is None:
+                return
+            if self._last_query is None and self.staff_filter is not None:
+                # thêm / sửa có thể đưa nhân viên vào hoặc ra khỏi bộ lọc
+                self.table.refresh()
+            elif event.op == "update":
+                self.table.update_row(row)
+            elif self._last_query is None:
+                if self.sort.order_by == ("id",):
+                    # danh sách đầy đủ sắp theo id: nhân viên mới nằm cuối
+                    self.table.insert_row(row)
+                else:
+                    self.table.refresh()
+        self._update_count()
+
+    def refresh(self):
+        """Tải lại danh sách (giữ từ khóa tìm kiếm và vị trí cuộn)"""
+        self.load_staffs(self._current_query())
+
+    def on_sort(self, order_by):
+        if self._last_query is None:
+            self.table.set_source(self._listing_source(order_by))
+        else:
+            self._search_order = order_by
+            self.table.set_source(ListSource(sort_rows(self._search_rows, order_by)))
+
+    def _show_search_result(self, query, rows, elapsed_ms=None):
+        if query != self._last_query:
+            self._search_order = None
+        self._search_rows = rows
+        if self._search_order is not None:
+            rows = sort_rows(rows, self._search_order)
+        self.table.set_source(ListSource(rows), keep_offset=(query == self._last_query))
+        self._last_query = query
+        text = f"{len(rows)}{'+' if len(rows) >= self.SEARCH_LIMIT else ''} kết quả"
+        if elapsed_ms is not None:
+            text += f" · {elapsed_ms:.0f} ms"
+        self.search_status.configure(text=text)
+
+    # --------- Tìm kiếm khi gõ ----------
+    def _current_query(self):
+        q = self.search_entry.get().strip()
+        return q if q else None
+
+    def on_search_key(self, event):
+        if event.keysym in ("Return", "KP_Enter"):
+            return
+        query = self._current_query()
+        if query == self._last_query:
+            return
+        if query is None:
+            self.load_staffs()
+        else:
+            self.search_query.schedule(query)
 
     def on_search(self):
-        q = self.search_entry.get().strip()
-        self.load_staffs(query=q if q else None)
+        query = self._current_query()
+        if query is None:
+            self.load_staffs()
+        else:
+            self.search_query.run_now(query)
+
+    def _run_search(self, db, query):
+        # chạy trên thread db (pool cấp kết nối đọc riêng cho thread này)
+        return db.search_staffs(query, limit=self.SEARCH_LIMIT)
+
+    def _on_search_result(self, query, rows, elapsed_ms):
+        self._show_search_result(query, rows, elapsed_ms)
+
+    def _on_search_error(self, query, error):
+        self.search_status.configure(text="Lỗi tìm kiếm")
+        show_error("Lỗi", f"Không thể tìm kiếm: {error}")
 
     def on_right_click(self, event):
         item = self.tree.identify_row(event.y)
@@ -80,6 +242,7 @@ class StaffView:
         self.tree.selection_set(item)
         menu = tk.Menu(self.app, tearoff=0)
         menu.add_command(label="📄 Xem hồ sơ", command=self.open_view_documents_for_selected)
+        menu.add_command(label="📤 Xuất khen thưởng", command=self.export_awards_for_selected)
         menu.add_separator()
         menu.add_command(label="✏️ Sửa", command=self.open_edit_dialog)
         menu.add_command(label="🗑️ Xóa", command=self.delete_selected)
@@ -103,6 +266,167 @@ class StaffView:
         staff_name = values[2]
         self.docs_view.open_staff_documents_dialog(staff_id, staff_name)
 
+    # --------- Bộ lọc kết hợp ----------
+    def _build_filter_panel(self, panel):
+        """Phòng ban, vị trí, khoảng năm sinh, tình trạng khen thưởng + số nhân viên khớp (đếm trước khi nạp)"""
+        font = ctk.CTkFont(size=12)
+        row1 = ctk.CTkFrame(panel, fg_color="transparent")
+        row1.pack(fill="x", padx=12, pady=(10,4))
+        ctk.CTkLabel(row1, text="Phòng ban:", font=font).pack(side="left", padx=(0,4))
+        self.filter_dept = ctk.CTkComboBox(row1, values=[], state="readonly", width=220,
+                                           command=self.on_filter_input)
+        self.filter_dept.pack(side="left", padx=(0,12))
+        ctk.CTkLabel(row1, text="Vị trí:", font=font).pack(side="left", padx=(0,4))
+        self.filter_pos = ctk.CTkEntry(row1, placeholder_text="chứa chuỗi", width=160)
+        self.filter_pos.pack(side="left", padx=(0,12))
+        ctk.CTkLabel(row1, text="Năm sinh từ:", font=font).pack(side="left", padx=(0,4))
+        self.filter_born_from = ctk.CTkEntry(row1, placeholder_text="YYYY", width=70)
+        self.filter_born_from.pack(side="left", padx=(0,4))
+        ctk.CTkLabel(row1, text="đến:", font=font).pack(side="left", padx=(0,4))
+        self.filter_born_to = ctk.CTkEntry(row1, placeholder_text="YYYY", width=70)
+        self.filter_born_to.pack(side="left")
+
+        row2 = ctk.CTkFrame(panel, fg_color="transparent")
+        row2.pack(fill="x", padx=12, pady=(4,10))
+        ctk.CTkLabel(row2, text="Khen thưởng:", font=font).pack(side="left", padx=(0,4))
+        self.filter_award = ctk.CTkComboBox(row2, values=list(AWARD_CHOICES.values()), state="readonly", width=180,
+                                            command=self.on_filter_input)
+        self.filter_award.set(AWARD_CHOICES[None])
+        self.filter_award.pack(side="left", padx=(0,4))
+        ctk.CTkLabel(row2, text="từ năm:", font=font).pack(side="left", padx=(0,4))
+        self.filter_award_since = ctk.CTkEntry(row2, placeholder_text="mọi năm", width=80)
+        self.filter_award_since.pack(side="left", padx=(0,12))
+        ctk.CTkButton(row2, text="✔ Áp dụng", width=90, fg_color="#4f46e5", hover_color="#4338ca",
+                      command=self.apply_filter).pack(side="left", padx=(0,4))
+        ctk.CTkButton(row2, text="✖ Bỏ lọc", width=80, fg_color="#94a3b8",
+                      command=self.clear_filter).pack(side="left", padx=(0,12))
+        self.filter_count = ctk.CTkLabel(row2, text="", text_color="#64748b", font=ctk.CTkFont(size=11))
+        self.filter_count.pack(side="left")
+        # đếm trên thread db; lần sửa mới hơn thay thế lần đếm đang chờ
+        self.filter_query = DebouncedQuery(self.filter_count, self.app.adb, self._count_filter,
+                                           self._on_filter_count, on_error=self._on_filter_count_error,
+                                           delay_ms=self.FILTER_DELAY_MS, prepare=self._prepare_filter_count)
+        self.filter_recent = ctk.CTkComboBox(row2, values=[], state="readonly", width=300,
+                                             command=self.on_recent_filter)
+        self.filter_recent.pack(side="right")
+        ctk.CTkLabel(row2, text="Gần đây:", font=font).pack(side="right", padx=(0,4))
+
+        for entry in (self.filter_pos, self.filter_born_from, self.filter_born_to, self.filter_award_since):
+            entry.bind("<KeyRelease>", self.on_filter_input)
+            entry.bind("<Return>", lambda e: self.apply_filter())
+        self._filter_departments = {}
+        self._recent_filters = {}
+
+    def toggle_filter_panel(self):
+        if self.filter_panel.winfo_ismapped():
+            self.filter_panel.pack_forget()
+            return
+        # danh sách phòng ban / tổ hợp gần đây đọc lại mỗi lần mở panel
+        self._filter_departments = {d.id: d.name for d in self.db.get_all_departments()}
+        names = [self.ALL_DEPARTMENTS] + list(self._filter_departments.values())
+        current = self.filter_dept.get()
+        self.filter_dept.configure(values=names)
+        self.filter_dept.set(current if current in names else names[0])
+        self._load_recent_filters()
+        self.filter_panel.pack(fill="x", pady=(0,8), before=self.table_frame)
+        self.on_filter_input()
+
+    def _read_filter(self):
+        """StaffFilter từ các ô của panel (ValueError nếu năm sai dạng / khoảng năm ngược)"""
+        dept_ids = {name: dept_id for dept_id, name in self._filter_departments.items()}
+        award = next(key for key, label in AWARD_CHOICES.items() if label == self.filter_award.get())
+        return staff_filter.normalize(StaffFilter(
+            department_id=dept_ids.get(self.filter_dept.get()),
+            position=self.filter_pos.get(),
+            born_from=staff_filter.parse_year(self.filter_born_from.get()),
+            born_to=staff_filter.parse_year(self.filter_born_to.get()),
+            award=award,
+            award_since=staff_filter.parse_year(self.filter_award_since.get())))
+
+    def _fill_filter(self, flt):
+        self.filter_dept.set(self._filter_departments.get(flt.department_id, self.ALL_DEPARTMENTS))
+        self.filter_award.set(AWARD_CHOICES[flt.award])
+        for entry, value in ((self.filter_pos, flt.position), (self.filter_born_from, flt.born_from),
+                             (self.filter_born_to, flt.born_to), (self.filter_award_since, flt.award_since)):
+            entry.delete(0, "end")
+            if value is not None:
+                entry.insert(0, str(value))
+
+    def on_filter_input(self, *_):
+        """Sửa bộ lọc: đếm lại số nhân viên khớp sau FILTER_DELAY_MS (chưa nạp dòng nào)"""
+        self.filter_query.schedule(None)
+
+    def _prepare_filter_count(self, _):
+        # main thread, lúc hết FILTER_DELAY_MS: đọc bộ lọc từ các ô (ValueError -> _on_filter_count_error)
+        flt = self._read_filter()
+        self.filter_count.configure(text="⏳ Đang đếm...", text_color="#64748b")
+        return flt
+
+    @staticmethod
+    def _count_filter(db, flt):
+        # chạy trên thread db
+        return db.count_staff_filter(flt)
+
+    def _on_filter_count(self, flt, count, elapsed_ms):
+        self.filter_count.configure(text=f"{count} nhân viên khớp")
+
+    def _on_filter_count_error(self, flt, error):
+        text = str(error) if isinstance(error, ValueError) else f"Lỗi: {error}"
+        self.filter_count.configure(text=text, text_color="#dc2626")
+
+    def apply_filter(self):
+        try:
+            flt = self._read_filter()
+        except ValueError as e:
+            show_error("Lỗi", str(e))
+            return
+        self.staff_filter = None if staff_filter.is_empty(flt) else flt
+        # danh sách lọc thay cho kết quả tìm theo tên; số dòng đếm qua count_staff_filter (thường đã có trong
+        # cache từ lúc xem trước) nên tổ hợp này vào danh sách "Gần đây"
+        self.search_entry.delete(0, "end")
+        self.load_staffs()
+        self._load_recent_filters()
+
+    def clear_filter(self):
+        self._fill_filter(StaffFilter())
+        self.staff_filter = None
+        self.load_staffs()
+        self.on_filter_input()
+
+    def _load_recent_filters(self):
+        recent = [flt for flt in self.db.staff_filters.recent() if not staff_filter.is_empty(flt)]
+        self._recent_filters = {staff_filter.describe(flt, self._filter_departments): flt for flt in recent}
+        self.filter_recent.configure(values=list(self._recent_filters))
+        self.filter_recent.set("")
+
+    def on_recent_filter(self, label):
+        flt = self._recent_filters.get(label)
+        if flt is not None:
+            self._fill_filter(flt)
+            self.apply_filter()
+
+    # --------- Xuất file ----------
+    def open_export_menu(self):
+        menu = tk.Menu(self.app, tearoff=0)
+        menu.add_command(label="👥 Danh sách nhân viên",
+                         command=lambda: run_export(self.app, self.db, "staffs"))
+        menu.add_command(label="🏆 Khen thưởng cá nhân (tất cả nhân viên)",
+                         command=lambda: run_export(self.app, self.db, "staff_awards"))
+        menu.add_command(label="📝 Quá trình công tác (tất cả nhân viên)",
+                         command=lambda: run_export(self.app, self.db, "work_histories"))
+        x = self.export_btn.winfo_rootx()
+        y = self.export_btn.winfo_rooty() + self.export_btn.winfo_height()
+        menu.post(x, y)
+
+    def export_awards_for_selected(self):
+        sel = self.tree.selection()
+        if not sel:
+            return
+        values = self.tree.item(sel[0])['values']
+        staff_id, staff_name = values[0], values[2]
+        run_export(self.app, self.db, "staff_awards", staff_id=staff_id,
+                   initialfile=f"Khen thưởng - {staff_name}")
+
     # --------- Add staff (không có STT input) ----------
     def open_add_dialog(self):
         dialog = ctk.CTkToplevel(self.app)
@@ -133,8 +457,8 @@ class StaffView:
         # Phòng ban (combo)
         ctk.CTkLabel(scroll, text="Phòng ban:", font=ctk.CTkFont(size=12, weight="bold")).pack(anchor="w", pady=(8,4))
         depts = self.db.get_all_departments()
-        dept_names = [d[1] for d in depts]
-        dept_map = {d[1]: d[0] for d in depts}
+        dept_names = [d.name for d in depts]
+        dept_map = {d.name: d.id for d in depts}
         dept_combo = ctk.CTkComboBox(scroll, values=dept_names, height=34, state="readonly")
         if dept_names:
             dept_combo.set(dept_names[0])
@@ -154,10 +478,68 @@ class StaffView:
             self.db.add_staff(None, name, dob if dob else None, pos, phone, dept_id)
             show_info("Thành công", "Đã thêm nhân viên")
             dialog.destroy()
-            self.load_staffs()
 
         ctk.CTkButton(scroll, text="💾 Lưu nhân viên", command=save, fg_color="#10b981").pack(fill="x", pady=12)
 
+    # --------- Nhập từ file CSV / Excel ----------
+    def open_import_dialog(self):
+        path = filedialog.askopenfilename(
+            parent=self.app, title="Chọn file danh sách nhân viên",
+            filetypes=[("Excel / CSV", "*.xlsx *.csv"), ("Excel", "*.xlsx"), ("CSV", "*.csv")])
+        if not path:
+            return
+        # Bước 1: kiểm tra toàn bộ file (không ghi), xem báo cáo rồi mới nhập
+        self._run_import(path, dry_run=True)
+
+    def _run_import(self, path, dry_run, total=None):
+        """Chạy importer.import_staffs trên thread nền, hiện tiến độ; total: số dòng (biết sau bước kiểm tra)"""
+        verb = "Đang kiểm tra" if dry_run else "Đang nhập"
+        progress = ProgressDialog(self.app, "Nhập nhân viên", f"{verb} {os.path.basename(path)}...",
+                                  on_cancel=lambda: task.cancel())
+
+        def work(report_progress, cancel_event):
+            return importer.import_staffs(self.db, path, dry_run=dry_run,
+                                          progress=report_progress, cancel_event=cancel_event)
+
+        def on_progress(done):
+            progress.update(done, total, f"{verb}: {done}{f' / {total}' if total else ''} dòng")
+
+        def on_done(report):
+            progress.close()
+            if report.cancelled:
+                show_info("Đã hủy", report.cancelled_message())
+            elif report.error is not None and dry_run:
+                show_error("Lỗi", f"Không thể kiểm tra file: {report.error_message()}")
+            elif report.error is not None:
+                # các lô trước lỗi đã được ghi: báo số nhân viên đã thêm để không nhập lại trùng
+                show_text(self.app, "Nhập nhân viên bị dừng vì lỗi", report.summary())
+            elif dry_run:
+                self._show_import_preview(path, report)
+            else:
+                show_text(self.app, "Kết quả nhập nhân viên", report.summary())
+
+        def on_error(error):
+            progress.close()
+            show_error("Lỗi", f"Không thể nhập file: {error}")
+
+        task = BackgroundTask(self.tree, work, on_done, on_error=on_error, on_progress=on_progress).start()
+
+    def _show_import_preview(self, path, report):
+        win = show_text(self.app, "Kiểm tra file nhân viên", report.summary())
+        buttons = ctk.CTkFrame(win, fg_color="transparent")
+        buttons.pack(fill="x", padx=12, pady=12)
+        ctk.CTkButton(buttons, text="Đóng", width=100, fg_color="#64748b",
+                      command=win.destroy).pack(side="right", padx=4)
+        if report.valid:
+            def start_import():
+                win.destroy()
+                self._run_import(path, dry_run=False, total=report.total)
+            text = f"📥 Nhập {report.valid} nhân viên hợp lệ"
+            skipped = report.total - report.valid
+            if skipped:
+                text += f" (bỏ qua {skipped} dòng lỗi)"
+            ctk.CTkButton(buttons, text=text, fg_color="#10b981", command=start_import).pack(side="right", padx=4)
+
     # --------- Edit staff (không cho sửa STT trực tiếp) ----------
     def open_edit_dialog(self):
         sel = self.tree.selection()
@@ -192,8 +574,8 @@ class StaffView:
 
         ctk.CTkLabel(scroll, text="Phòng ban:", font=ctk.CTkFont(size=12, weight="bold")).pack(anchor="w", pady=(8,4))
         depts = self.db.get_all_departments()
-        dept_names = [d[1] for d in depts]
-        dept_map = {d[1]: d[0] for d in depts}
+        dept_names = [d.name for d in depts]
+        dept_map = {d.name: d.id for d in depts}
         dept_combo = ctk.CTkComboBox(scroll, values=dept_names, height=34, state="readonly")
         if dept_name in dept_names:
             dept_combo.set(dept_name)
@@ -215,7 +597,6 @@ class StaffView:
             self.db.update_staff(staff_id, None, new_name, new_dob if new_dob else None, new_pos, new_phone, new_dept_id)
             show_info("Thành công", "Đã cập nhật nhân viên")
             dialog.destroy()
-            self.load_staffs()
 
         ctk.CTkButton(scroll, text="💾 Cập nhật", command=update, fg_color="#f59e0b").pack(fill="x", pady=12)
 
@@ -229,6 +610,5 @@ class StaffView:
             try:
                 self.db.delete_staff(staff_id)
                 show_info("Thành công", "Đã xóa nhân viên")
-                self.load_staffs()
             except Exception as e:
                 show_error("Lỗi", f"Không thể xóa nhân viên: {e}")
\ No newline at end of file
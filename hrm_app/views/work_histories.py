@@ -3,21 +3,35 @@ work_histories.py
 View quản lý Quá trình công tác (Work History)
 - Hiển thị tất cả bản ghi (kèm tên nhân viên)
 - Thêm / Sửa / Xóa bản ghi
-- Tìm/filter theo nhân viên (combo)
+- Tìm/filter theo nhân viên (combo), bấm tiêu đề cột để sắp xếp - lọc / sắp xếp / phân trang trong SQLite
 """
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import ttk
 
-from ..dialogs import center_window, show_info, show_error, ask_confirm
+from ..dialogs import center_window, show_info, show_error, ask_confirm, run_export
+from ..repository import WorkHistory
+from ..widgets import VirtualTreeview, KeysetSource, HeadingSort, RowFormat
+
+HISTORY_FORMAT = RowFormat(WorkHistory, ("id", "staff_name", "decision_no", "ngay_quyet_dinh", "cac_vi_tri_cong_tac",
+                                         "giu_chuc_vu", "cong_tac_tai_cq", "ghi_chu"),
+                           blanks={"staff_name": "-", "decision_no": "-", "ngay_quyet_dinh": "-",
+                                   "cac_vi_tri_cong_tac": "-", "giu_chuc_vu": "-", "cong_tac_tai_cq": "-",
+                                   "ghi_chu": ""})
+# cột -> trường order_by của repository.LISTINGS["work_histories"]
+SORT_FIELDS = {"ID": "id", "Nhân viên": "staff_name", "Số quyết định": "decision_no",
+               "Ngày quyết định": "ngay_quyet_dinh", "Các vị trí công tác": "cac_vi_tri_cong_tac",
+               "Giữ chức vụ": "giu_chuc_vu", "Công tác tại CQ": "cong_tac_tai_cq", "Ghi chú": "ghi_chu"}
 
 class WorkHistoriesView:
-    def __init__(self, app, db):
+    TABLES = ("work_histories", "staffs")
+    def __init__(self, app, db, parent=None):
         self.app = app
         self.db = db
+        # Frame chứa view (HRMApp tạo 1 frame riêng cho mỗi view để giữ lại trong cache)
+        self.parent = parent if parent is not None else app.content_frame
 
     def render(self):
-        header = ctk.CTkFrame(self.app.content_frame, fg_color="transparent")
+        header = ctk.CTkFrame(self.parent, fg_color="transparent")
         header.pack(fill="x", pady=(0,10))
 
         # Filter theo nhân viên (combo) và nút reload
@@ -25,11 +39,9 @@ class WorkHistoriesView:
         filter_frame.pack(side="left", fill="x", expand=True, padx=(0,12))
 
         ctk.CTkLabel(filter_frame, text="Lọc nhân viên:", font=ctk.CTkFont(size=12)).pack(side="left", padx=(0,8))
-        staffs = self.db.get_all_staffs()
-        staff_names = ["Tất cả"] + [f"{s[2]} (ID:{s[0]})" for s in staffs]
-        self.staff_map = {f"{s[2]} (ID:{s[0]})": s[0] for s in staffs}
-        self.staff_combo = ctk.CTkComboBox(filter_frame, values=staff_names, state="readonly", width=300)
+        self.staff_combo = ctk.CTkComboBox(filter_frame, values=["Tất cả"], state="readonly", width=300)
         self.staff_combo.set("Tất cả")
+        self.load_staff_filter()
         self.staff_combo.pack(side="left", padx=(0,8))
 
         ctk.CTkButton(filter_frame, text="🔁 Lọc", command=self.on_filter).pack(side="left")
@@ -37,13 +49,16 @@ class WorkHistoriesView:
         if self.app.is_admin:
             add_btn = ctk.CTkButton(header, text="➕ Thêm quá trình", fg_color="#4f46e5", command=self.open_add_dialog)
             add_btn.pack(side="right", padx=4)
+        ctk.CTkButton(header, text="📤 Xuất file", fg_color="#0ea5e9", hover_color="#0284c7",
+                      command=self.export_histories).pack(side="right", padx=4)
 
         # Table
-        table_frame = ctk.CTkFrame(self.app.content_frame, fg_color="white", corner_radius=12)
+        table_frame = ctk.CTkFrame(self.parent, fg_color="white", corner_radius=12)
         table_frame.pack(fill="both", expand=True)
 
         cols = ("ID", "Nhân viên", "Số quyết định", "Ngày quyết định", "Các vị trí công tác", "Giữ chức vụ", "Công tác tại CQ", "Ghi chú")
-        self.tree = ttk.Treeview(table_frame, columns=cols, show="headings", height=18)
+        self.table = VirtualTreeview(table_frame, columns=cols, height=18)
+        self.tree = self.table.tree
         for c in cols:
             self.tree.heading(c, text=c)
         self.tree.column("ID", width=60, anchor="center")
@@ -54,42 +69,77 @@ class WorkHistoriesView:
         self.tree.column("Giữ chức vụ", width=120, anchor="center")
         self.tree.column("Công tác tại CQ", width=120, anchor="center")
         self.tree.column("Ghi chú", width=220)
+        self.sort = HeadingSort(self.tree, SORT_FIELDS, lambda order_by: self.on_filter(),
+                                order_by=self.db.get_view_sort("work_histories", default=("-id",)),
+                                save=lambda order_by: self.db.set_view_sort("work_histories", order_by))
 
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
         self.tree.pack(side="left", fill="both", expand=True, padx=12, pady=12)
-        scrollbar.pack(side="right", fill="y", pady=12, padx=(0,12))
+        self.table.scrollbar.pack(side="right", fill="y", pady=12, padx=(0,12))
 
-        self.load_all_histories()
+        self.on_filter()
 
         if self.app.is_admin:
             self.tree.bind("<Button-3>", self.on_right_click)
 
-    def load_all_histories(self):
-        self.tree.delete(*self.tree.get_children())
-        rows = self.db.get_all_work_histories()
-        for r in rows:
-            # r = (wh.id, staff_name, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu, staff_id)
-            display = (r[0], r[1] or "-", r[2] or "-", r[3] or "-", r[4] or "-", r[5] or "-", r[6] or "-", r[7] or "")
-            self.tree.insert("", "end", values=display)
+        # Cập nhật từng dòng theo sự kiện thay đổi từ DatabaseManager
+        self.live = True
+        unsubscribe = self.db.changes.subscribe(self.on_change, tables=self.TABLES)
+        self.tree.bind("<Destroy>", lambda e: unsubscribe(), add="+")
 
-    def on_filter(self):
-        sel = self.staff_combo.get()
-        if sel == "Tất cả":
-            self.load_all_histories()
+    def load_staff_filter(self):
+        """Nạp danh sách nhân viên cho combo lọc (giữ lựa chọn hiện tại nếu còn)"""
+        staffs = self.db.get_all_staffs()
+        staff_names = ["Tất cả"] + [f"{s.full_name} (ID:{s.id})" for s in staffs]
+        self.staff_map = {f"{s.full_name} (ID:{s.id})": s.id for s in staffs}
+        self.staff_combo.configure(values=staff_names)
+        if self.staff_combo.get() not in self.staff_map:
+            self.staff_combo.set("Tất cả")
+
+    def refresh(self):
+        self.load_staff_filter()
+        self.on_filter(keep_offset=True)
+
+    def on_change(self, event):
+        """ChangeEvent từ db.changes"""
+        if event.table == "staffs":
+            self.load_staff_filter()
+            if event.op != "insert":
+                # tên nhân viên hiển thị trong bảng / bản ghi bị xóa theo nhân viên
+                # (nhân viên đang lọc bị xóa thì combo đã về "Tất cả")
+                self.on_filter(keep_offset=True)
             return
+        if self.table.source.filters["staff_id"] is not None:
+            # đang lọc theo 1 nhân viên: đếm / nạp lại trang hiện tại
+            self.table.refresh()
+        elif event.op == "reload":
+            self.table.refresh()
+        elif event.op == "delete":
+            self.table.remove_row(event.row_id)
+        else:
+            row = self.db.get_work_history_row(event.row_id)
+            if row is None:
+                return
+            if event.op == "update":
+                self.table.update_row(row)
+            elif self.sort.order_by == ("-id",):
+                # danh sách sắp theo id giảm dần: bản ghi mới nằm đầu
+                self.table.insert_row(row, at_start=True)
+            else:
+                self.table.refresh()
+
+    def export_histories(self):
+        """Xuất quá trình công tác (của nhân viên đang lọc, hoặc tất cả)"""
+        sel = self.staff_combo.get()
         staff_id = self.staff_map.get(sel)
-        if staff_id is None:
-            self.load_all_histories()
-            return
-        rows = self.db.get_work_histories_by_staff(staff_id)
-        self.tree.delete(*self.tree.get_children())
-        # rows: (id, decision_no, ngay_quyet_dinh, cac_vi_tri_cong_tac, giu_chuc_vu, cong_tac_tai_cq, ghi_chu)
-        # Need staff name too:
-        staff_name = sel.split(" (ID:")[0]
-        for r in rows:
-            display = (r[0], staff_name, r[1] or "-", r[2] or "-", r[3] or "-", r[4] or "-", r[5] or "-", r[6] or "")
-            self.tree.insert("", "end", values=display)
+        name = f"Quá trình công tác - {sel.split(' (ID:')[0]}" if staff_id is not None else None
+        run_export(self.app, self.db, "work_histories", staff_id=staff_id, initialfile=name)
+
+    def on_filter(self, keep_offset=False):
+        """Tất cả / nhân viên đang chọn trong combo, theo thứ tự của tiêu đề cột"""
+        staff_id = self.staff_map.get(self.staff_combo.get())
+        source = KeysetSource.listing(self.db, "work_histories", order_by=self.sort.order_by,
+                                      filters={"staff_id": staff_id}, values=HISTORY_FORMAT)
+        self.table.set_source(source, keep_offset=keep_offset)
 
     def on_right_click(self, event):
         item = self.tree.identify_row(event.y)
@@ -114,7 +164,7 @@ class WorkHistoriesView:
         # Chọn nhân viên
         ctk.CTkLabel(frm, text="Chọn nhân viên:", font=ctk.CTkFont(size=12)).pack(anchor="w", pady=(4,6))
         staffs = self.db.get_all_staffs()
-        staff_map = {f"{s[2]} (ID:{s[0]})": s[0] for s in staffs}
+        staff_map = {f"{s.full_name} (ID:{s.id})": s.id for s in staffs}
         staff_combo = ctk.CTkComboBox(frm, values=list(staff_map.keys()), state="readonly")
         if staff_map:
             staff_combo.set(list(staff_map.keys())[0])
@@ -149,7 +199,6 @@ class WorkHistoriesView:
                 self.db.add_work_history(staff_id, decision_no, ngay, vitri, giu, cq, ghi)
                 show_info("Thành công", "Đã thêm quá trình công tác")
                 dlg.destroy()
-                self.load_all_histories()
             except Exception as e:
                 show_error("Lỗi", f"Không thể thêm: {e}")
 
@@ -198,7 +247,6 @@ class WorkHistoriesView:
                 self.db.update_work_history(wh_id, decision_no, ngay, vitri, giu, cq, ghi)
                 show_info("Thành công", "Đã cập nhật quá trình công tác")
                 dlg.destroy()
-                self.load_all_histories()
             except Exception as e:
                 show_error("Lỗi", f"Không thể cập nhật: {e}")
 
@@ -214,6 +262,5 @@ class WorkHistoriesView:
             try:
                 self.db.delete_work_history(wh_id)
                 show_info("Thành công", "Đã xóa bản ghi")
-                self.load_all_histories()
             except Exception as e:
                 show_error("Lỗi", f"Không thể xóa: {e}")
\ No newline at end of file
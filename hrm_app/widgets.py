@@ -0,0 +1,573 @@
+"""
+widgets.py
+Widget dùng chung cho các view:
+- VirtualTreeview: ttk.Treeview "ảo", chỉ giữ các dòng đang hiển thị (+ một ít dòng đệm)
+  và lấy dữ liệu theo trang khi người dùng cuộn
+- KeysetSource / ListSource: nguồn dữ liệu cho VirtualTreeview
+- HeadingSort: bấm tiêu đề cột để sắp xếp, Shift + bấm thêm khóa phụ (view gửi order_by xuống SQLite
+  qua KeysetSource.listing / db.list_page)
+- RowFormat / fill_tree: đưa dòng (namedtuple / repository.ResultSet) vào Treeview, định dạng ô trống
+  chỉ lúc chèn
+- DebouncedQuery: debounce cho truy vấn chạy qua AsyncDatabase (ví dụ tìm kiếm khi gõ)
+- BackgroundTask: chạy 1 công việc dài (nhập / xuất file) trên thread nền, báo tiến độ, hủy được
+- show_tree_placeholder: dòng "Đang tải..." trong ttk.Treeview khi chờ kết quả truy vấn nền
+"""
+import queue
+import threading
+import time
+import tkinter as tk
+from operator import attrgetter, itemgetter
+from tkinter import ttk
+
+from .repository import Page, ResultSet
+
+
+class RowFormat:
+    """
+    Cách hiện 1 kiểu dòng của repository trên Treeview: các trường fields theo thứ tự cột,
+    ô rỗng (None, "") của trường có trong blanks hiện bằng blanks[trường], ví dụ {"note": "", "phone": "-"}.
+    - fmt(row) -> values: dùng làm values= của KeysetSource / ListSource (chỉ chạy cho dòng được chèn)
+    - fmt.iter_values(rows): với ResultSet lấy thẳng từ các cột, không tạo namedtuple cho từng dòng
+    Dòng không có ô nào cần thay thì giữ nguyên tuple lấy ra (không chép thêm).
+    """
+    def __init__(self, row_type, fields, blanks=None):
+        self.fields = tuple(fields)
+        indexes = [row_type._fields.index(field) for field in self.fields]
+        self._get = itemgetter(*indexes) if len(indexes) > 1 else (lambda row: (row[indexes[0]],))
+        blanks = blanks or {}
+        self._blanks = [(pos, blanks[field]) for pos, field in enumerate(self.fields) if field in blanks]
+
+    def __call__(self, row):
+        return self._fill(self._get(row))
+
+    def _fill(self, values):
+        for pos, _ in self._blanks:
+            if not values[pos]:
+                break
+        else:
+            return values
+        values = list(values)
+        for pos, text in self._blanks:
+            if not values[pos]:
+                values[pos] = text
+        return values
+
+    def iter_values(self, rows):
+        source = rows.select(self.fields) if isinstance(rows, ResultSet) else map(self._get, rows)
+        return map(self._fill, source)
+
+
+def fill_tree(tree, rows, fmt):
+    """Xóa hết dòng của ttk.Treeview rồi chèn rows theo RowFormat fmt"""
+    tree.delete(*tree.get_children())
+    insert = tree.insert
+    for values in fmt.iter_values(rows):
+        insert("", "end", values=values)
+
+
+class KeysetSource:
+    """
+    Nguồn dữ liệu lấy từ database theo trang với phân trang keyset (WHERE id > ? LIMIT ?).
+    - count(): tổng số dòng
+    - fetch_page(after_key, limit): trang bắt đầu ngay sau after_key (None = từ đầu); trả về list dòng
+      hoặc repository.Page - khi đó mốc là page.cursor thay vì key(dòng cuối)
+    - key_at(offset): khóa của dòng ở vị trí offset - dùng khi nhảy tới vị trí chưa biết mốc
+    Mốc (khóa dòng cuối mỗi trang) được nhớ lại để cuộn tuần tự không cần OFFSET.
+    KeysetSource.listing(db, "staffs", order_by, filters): danh sách trong repository.LISTINGS,
+    lọc / sắp xếp trong SQLite (count: hàm đếm thay cho db.count_listing, ví dụ số đã đếm có cache).
+    """
+    MAX_ANCHORS = 2000
+
+    def __init__(self, count, fetch_page, key_at, key=None, values=None):
+        self._count = count
+        self._fetch_page = fetch_page
+        self._key_at = key_at
+        self.key = key or (lambda row: row[0])
+        self.values = values or (lambda row: row)
+        self._anchors = {}
+        self.order_by = None
+        self.filters = None
+
+    @classmethod
+    def listing(cls, db, name, order_by=None, filters=None, values=None, count=None):
+        source = cls(count or (lambda: db.count_listing(name, filters)),
+                     lambda cursor, limit: db.list_page(name, limit, cursor, order_by, filters),
+                     lambda offset: db.listing_cursor_at(name, offset, order_by, filters),
+                     values=values)
+        source.order_by = order_by
+        source.filters = filters
+        return source
+
+    def count(self):
+        return self._count()
+
+    def rows(self, offset, limit):
+        if offset <= 0:
+            after = None
+        elif offset in self._anchors:
+            after = self._anchors[offset]
+        else:
+            after = self._key_at(offset - 1)
+            if after is None:
+                return []
+        rows = self._fetch_page(after, limit)
+        if isinstance(rows, Page):
+            rows, anchor = rows.rows, rows.cursor
+        else:
+            anchor = self.key(rows[-1]) if rows else None
+        if anchor is not None:
+            if len(self._anchors) >= self.MAX_ANCHORS:
+                self._anchors.clear()
+            self._anchors[offset + len(rows)] = anchor
+        return rows
+
+    def invalidate(self):
+        self._anchors.clear()
+
+    # thêm/sửa/xóa 1 dòng: dữ liệu nằm trong database, chỉ cần bỏ các mốc đã nhớ (vị trí đã lệch)
+    def add(self, row, at_start=False):
+        self._anchors.clear()
+
+    def replace(self, row):
+        pass
+
+    def remove(self, key):
+        self._anchors.clear()
+
+
+class HeadingSort:
+    """
+    Bấm tiêu đề cột của ttk.Treeview để sắp xếp. fields: {cột: tên trường order_by} (chỉ các cột có trong
+    fields bấm được).
+    - Bấm: sắp theo cột đó (đang là khóa đầu thì đổi chiều)
+    - Shift + bấm: thêm cột làm khóa phụ (đã có thì đổi chiều cột đó), ví dụ phòng ban rồi ngày sinh
+    Tiêu đề hiện ▲ (tăng) / ▼ (giảm), kèm thứ tự khóa khi sắp theo nhiều cột.
+    on_sort(order_by) nhận tuple ("department", "-dob") - view tạo lại nguồn dữ liệu với thứ tự đó;
+    save(order_by) (tùy chọn) để lưu lại, ví dụ db.set_view_sort.
+    """
+    ARROWS = ("▲", "▼")
+
+    def __init__(self, tree, fields, on_sort, order_by=None, save=None):
+        self.tree = tree
+        self.fields = fields
+        self.on_sort = on_sort
+        self.save = save
+        self.order_by = (order_by,) if isinstance(order_by, str) else tuple(order_by or ())
+        self._titles = {column: tree.heading(column, "text") for column in fields}
+        for column in fields:
+            tree.heading(column, command=lambda c=column: self.toggle(c))
+        tree.bind("<Shift-Button-1>", self._on_shift_click, add="+")
+        self._draw()
+
+    def toggle(self, column, secondary=False):
+        field = self.fields[column]
+        fields = [item.lstrip("-") for item in self.order_by]
+        if field in fields and (secondary or fields[0] == field):
+            i = fields.index(field)
+            item = self.order_by[i]
+            flipped = item[1:] if item.startswith("-") else "-" + item
+            order_by = self.order_by[:i] + (flipped,) + self.order_by[i + 1:]
+            self.order_by = order_by if secondary else (flipped,)
+        elif secondary:
+            self.order_by = self.order_by + (field,)
+        else:
+            self.order_by = (field,)
+        self._draw()
+        if self.save is not None:
+            self.save(self.order_by)
+        self.on_sort(self.order_by)
+
+    def _on_shift_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != "heading":
+            return None
+        column = self.tree.column(self.tree.identify_column(event.x), "id")
+        if column in self.fields:
+            self.toggle(column, secondary=True)
+        return "break"
+
+    def _draw(self):
+        positions = {item.lstrip("-"): (i, item.startswith("-")) for i, item in enumerate(self.order_by)}
+        for column, title in self._titles.items():
+            if self.fields[column] not in positions:
+                self.tree.heading(column, text=title)
+                continue
+            i, descending = positions[self.fields[column]]
+            number = str(i + 1) if len(self.order_by) > 1 else ""
+            self.tree.heading(column, text=f"{title} {self.ARROWS[descending]}{number}")
+
+
+def sort_rows(rows, order_by):
+    """
+    Sắp list dòng (namedtuple) trong bộ nhớ theo order_by như list_page (ô rỗng xếp trước) - chỉ dùng cho
+    kết quả đã giới hạn số dòng (tìm kiếm, vài chục dòng mới nhất), danh sách đầy đủ thì sắp trong SQLite
+    """
+    rows = list(rows)
+    # sort ổn định: sắp theo khóa cuối trước, khóa đầu sau cùng
+    for item in reversed((order_by,) if isinstance(order_by, str) else tuple(order_by)):
+        get = attrgetter(item.lstrip("-"))
+        rows.sort(key=lambda row: (get(row) is not None, get(row)), reverse=item.startswith("-"))
+    return rows
+
+
+class ListSource:
+    """Nguồn dữ liệu từ list có sẵn (ví dụ kết quả tìm kiếm); ResultSet được giữ nguyên, không chép thành list"""
+    def __init__(self, rows, key=None, values=None):
+        self._rows = rows if isinstance(rows, ResultSet) else list(rows)
+        self.key = key or (lambda row: row[0])
+        self.values = values or (lambda row: row)
+
+    def count(self):
+        return len(self._rows)
+
+    def rows(self, offset, limit):
+        return self._rows[offset:offset + limit]
+
+    def invalidate(self):
+        pass
+
+    def add(self, row, at_start=False):
+        if at_start:
+            self._rows.insert(0, row)
+        else:
+            self._rows.append(row)
+
+    def replace(self, row):
+        key = self.key(row)
+        for i, r in enumerate(self._rows):
+            if self.key(r) == key:
+                self._rows[i] = row
+                return
+
+    def remove(self, key):
+        for i in reversed(range(len(self._rows))):
+            if self.key(self._rows[i]) == key:
+                del self._rows[i]
+
+
+class VirtualTreeview:
+    """
+    Treeview chỉ chứa cửa sổ dòng đang nhìn thấy cộng overscan dòng mỗi phía.
+    Thanh cuộn (self.scrollbar) phản ánh toàn bộ dữ liệu; khi cuộn ra ngoài cửa sổ
+    đã nạp, widget lấy trang mới từ source và dựng lại cửa sổ.
+
+    self.tree là ttk.Treeview bình thường nên các view vẫn cấu hình cột, bind
+    chuột phải / double-click, selection, item(...)['values'] như trước.
+    iid của mỗi dòng là str(source.key(row)).
+    """
+    def __init__(self, parent, columns, height=14, overscan=30, **tree_kwargs):
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings", height=height, **tree_kwargs)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+        self.tree.configure(yscrollcommand=self._on_tree_scrolled)
+        self.overscan = overscan
+        self.source = None
+        self.total = 0
+        self.offset = 0                 # vị trí dòng đầu tiên đang nhìn thấy
+        self._window_start = 0          # vị trí (trong toàn bộ dữ liệu) của dòng đầu trong tree
+        self._window_len = 0
+        self._rendering = False
+        self._pending = None
+        self.tree.bind("<Configure>", lambda e: self._schedule_render())
+
+    # -----------------------
+    # Public API
+    # -----------------------
+    def set_source(self, source, keep_offset=False):
+        self.source = source
+        self.total = source.count()
+        if not keep_offset:
+            self.offset = 0
+        self._window_len = 0  # buộc dựng lại
+        self._render()
+
+    def refresh(self):
+        """Lấy lại tổng số dòng và cửa sổ hiện tại (giữ vị trí cuộn)"""
+        if self.source is None:
+            return
+        self.source.invalidate()
+        self.set_source(self.source, keep_offset=True)
+
+    # -----------------------
+    # Cập nhật từng dòng (không tải lại cả bảng)
+    # -----------------------
+    def insert_row(self, row, at_start=False):
+        """Thêm dòng mới ở đầu (at_start) hoặc cuối thứ tự sắp xếp"""
+        if self.source is None:
+            return
+        self.source.add(row, at_start=at_start)
+        self.total += 1
+        if at_start:
+            if self._window_start == 0:
+                self._insert_item(row, 0)
+            else:
+                # các dòng đang nạp lùi xuống 1 vị trí
+                self._window_start += 1
+                self.offset += 1
+        elif self._window_start + self._window_len == self.total - 1:
+            self._insert_item(row, "end")
+        self._update_scrollbar(self.visible_rows())
+
+    def update_row(self, row):
+        """Sửa 1 dòng: chỉ đổi item nếu dòng đang nằm trong cửa sổ đã nạp"""
+        if self.source is None:
+            return
+        self.source.replace(row)
+        iid = str(self.source.key(row))
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=self.source.values(row))
+
+    def remove_row(self, key):
+        if self.source is None:
+            return
+        self.source.remove(key)
+        self.total = max(0, self.total - 1)
+        iid = str(key)
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+            self._window_len -= 1
+            # nạp thêm nếu cửa sổ không còn phủ hết phần đang nhìn thấy
+            self._render()
+        else:
+            self._update_scrollbar(self.visible_rows())
+
+    def _insert_item(self, row, index):
+        iid = str(self.source.key(row))
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=self.source.values(row))
+            return
+        self.tree.insert("", index, iid=iid, values=self.source.values(row))
+        self._window_len += 1
+
+    def visible_rows(self):
+        height = self.tree.winfo_height()
+        rowheight = self._rowheight()
+        if height <= 1:
+            return int(self.tree.cget("height"))
+        # trừ phần tiêu đề cột (xấp xỉ 1 dòng)
+        return max(1, height // rowheight - 1)
+
+    # -----------------------
+    # Render
+    # -----------------------
+    def _rowheight(self):
+        try:
+            return int(ttk.Style().lookup(self.tree.cget("style") or "Treeview", "rowheight") or 20)
+        except (tk.TclError, ValueError):
+            return 20
+
+    def _clamp_offset(self):
+        visible = self.visible_rows()
+        self.offset = max(0, min(self.offset, max(0, self.total - visible)))
+
+    def _schedule_render(self):
+        if self._pending is None:
+            self._pending = self.tree.after_idle(self._render)
+
+    def _render(self):
+        self._pending = None
+        if self.source is None:
+            return
+        self._clamp_offset()
+        visible = self.visible_rows()
+        window_end = self._window_start + self._window_len
+        inside = (self._window_len and self.offset >= self._window_start
+                  and min(self.offset + visible, self.total) <= window_end)
+        self._rendering = True
+        try:
+            if not inside:
+                start = max(0, self.offset - self.overscan)
+                rows = self.source.rows(start, visible + 2 * self.overscan)
+                selected = self.tree.selection()
+                self.tree.delete(*self.tree.get_children())
+                for row in rows:
+                    self.tree.insert("", "end", iid=str(self.source.key(row)), values=self.source.values(row))
+                # giữ lại dòng đang chọn nếu vẫn nằm trong cửa sổ mới
+                keep = [iid for iid in selected if self.tree.exists(iid)]
+                if keep:
+                    self.tree.selection_set(keep)
+                self._window_start = start
+                self._window_len = len(rows)
+            if self._window_len:
+                self.tree.yview_moveto((self.offset - self._window_start) / self._window_len)
+        finally:
+            self._rendering = False
+        self._update_scrollbar(visible)
+
+    def _update_scrollbar(self, visible):
+        if self.total <= 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first = self.offset / self.total
+        last = min(1.0, (self.offset + visible) / self.total)
+        self.scrollbar.set(first, last)
+
+    # -----------------------
+    # Scroll callbacks
+    # -----------------------
+    def _on_scrollbar(self, *args):
+        visible = self.visible_rows()
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * self.total)
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.offset += step * visible if args[2] == "pages" else step
+        self._render()
+
+    def _on_tree_scrolled(self, first, last):
+        """Tree tự cuộn bên trong cửa sổ (con lăn chuột, phím mũi tên): cập nhật offset"""
+        if self._rendering or not self._window_len:
+            return
+        self.offset = self._window_start + int(round(float(first) * self._window_len))
+        visible = self.visible_rows()
+        self._update_scrollbar(visible)
+        near_top = self.offset - self._window_start < self.overscan // 2 and self._window_start > 0
+        near_bottom = (self._window_start + self._window_len - (self.offset + visible) < self.overscan // 2
+                       and self._window_start + self._window_len < self.total)
+        if near_top or near_bottom:
+            self._window_len = 0
+            self._schedule_render()
+
+
+class DebouncedQuery:
+    """
+    Debounce cho truy vấn chạy qua AsyncDatabase (ví dụ tìm kiếm khi gõ): func(db, arg) chạy trên thread db
+    sau khi người dùng ngừng gõ delay_ms mili giây.
+    - schedule(arg): gọi ở mỗi phím bấm; chỉ lần cuối trong khoảng delay_ms được chạy
+    - run_now(arg): chạy ngay (Enter / nút tìm)
+    - prepare(arg) -> arg: tùy chọn, chạy trên main thread ngay trước khi gửi truy vấn (đọc / kiểm tra ô nhập);
+      ValueError -> on_error(arg, exc), không gửi truy vấn
+    - on_result(arg, result, elapsed_ms) / on_error(arg, exc) gọi trên Tk main thread: kết quả giao qua
+      adb.drain() trong HRMApp._drain_changes như mọi truy vấn nền khác
+    Mỗi DebouncedQuery có 1 key riêng trong adb: truy vấn cũ bị hủy nếu chưa chạy; nếu đã chạy xong mà có
+    truy vấn mới hơn thì kết quả bị bỏ qua. Widget bị hủy thì kết quả cũng bị bỏ qua (owner).
+    """
+    def __init__(self, widget, adb, func, on_result, on_error=None, delay_ms=250, prepare=None):
+        self.widget = widget
+        self.adb = adb
+        self.func = func
+        self.on_result = on_result
+        self.on_error = on_error
+        self.delay_ms = delay_ms
+        self.prepare = prepare
+        self.key = ("debounced", id(self))
+        self._timer = None
+        self._closed = False
+        widget.bind("<Destroy>", self._on_destroy, add="+")
+
+    def schedule(self, arg):
+        if self._closed:
+            return
+        if self._timer is not None:
+            self.widget.after_cancel(self._timer)
+        self._timer = self.widget.after(self.delay_ms, lambda: self.run_now(arg))
+
+    def run_now(self, arg):
+        if self._closed:
+            return
+        self.cancel()
+        if self.prepare is not None:
+            try:
+                arg = self.prepare(arg)
+            except ValueError as e:
+                if self.on_error is not None:
+                    self.on_error(arg, e)
+                return
+        on_error = None if self.on_error is None else (lambda e: self.on_error(arg, e))
+        self.adb.submit(self._timed, arg, owner=self.widget, key=self.key,
+                        on_done=lambda result: self.on_result(arg, *result), on_error=on_error)
+
+    def cancel(self):
+        """Bỏ truy vấn đang chờ / đang chạy (kết quả của nó sẽ không được giao)"""
+        if self._timer is not None:
+            self.widget.after_cancel(self._timer)
+            self._timer = None
+        self.adb.cancel(self.key)
+
+    def _timed(self, db, arg):
+        # chạy trên thread db
+        start = time.perf_counter()
+        result = self.func(db, arg)
+        return result, (time.perf_counter() - start) * 1000
+
+    def _on_destroy(self, event):
+        if event.widget is not self.widget:
+            return
+        self._closed = True
+        if self._timer is not None:
+            try:
+                self.widget.after_cancel(self._timer)
+            except tk.TclError:
+                pass
+            self._timer = None
+        self.adb.cancel(self.key)
+
+
+class BackgroundTask:
+    """
+    Chạy func(progress, cancel_event) 1 lần trên thread riêng (nhập / xuất file...).
+    - progress(value): func gọi từ worker; on_progress(value) nhận giá trị mới nhất trên main thread
+    - on_done(result) / on_error(exc): gọi trên Tk main thread khi func kết thúc
+    - cancel(): đặt cancel_event, func tự kiểm tra và dừng
+    Widget bị hủy trước khi xong thì kết quả bị bỏ qua.
+    """
+    POLL_MS = 50
+
+    def __init__(self, widget, func, on_done, on_error=None, on_progress=None):
+        self.widget = widget
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancel_event = threading.Event()
+        self._results = queue.Queue()
+        self._progress = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._work, name="background-task", daemon=True)
+        self._thread.start()
+        self.widget.after(self.POLL_MS, self._poll)
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _report(self, value):
+        self._progress = value  # chỉ cần giá trị mới nhất, main thread đọc khi poll
+
+    def _work(self):
+        try:
+            self._results.put((self.func(self._report, self.cancel_event), None))
+        except Exception as e:
+            self._results.put((None, e))
+
+    def _poll(self):
+        try:
+            if not self.widget.winfo_exists():
+                self.cancel_event.set()
+                return
+        except tk.TclError:
+            self.cancel_event.set()
+            return
+        if self._progress is not None and self.on_progress is not None:
+            self.on_progress(self._progress)
+        try:
+            result, error = self._results.get_nowait()
+        except queue.Empty:
+            self.widget.after(self.POLL_MS, self._poll)
+            return
+        if error is None:
+            self.on_done(result)
+        elif self.on_error is not None:
+            self.on_error(error)
+
+
+def show_tree_placeholder(tree, text="⏳ Đang tải..."):
+    """Xóa các dòng của ttk.Treeview và hiện 1 dòng thông báo (đang tải / không có dữ liệu / lỗi) ở cột rộng nhất"""
+    tree.delete(*tree.get_children())
+    columns = tree["columns"]
+    values = [""] * len(columns)
+    if values:
+        widest = max(range(len(columns)), key=lambda i: tree.column(columns[i], "width"))
+        values[widest] = text
+    tree.tag_configure("placeholder", foreground="#94a3b8")
+    tree.insert("", "end", values=values, tags=("placeholder",))
@@ -1,10 +1,37 @@
 """
 main.py
 Entry point: tạo và chạy HRMApp
+
+    python main.py [--sample-data] [--profile-startup] [--db-profile performance] [--db hrm_ultimate.db]
 """
-from hrm_app.gui import HRMApp
+import time
+
+_START = time.perf_counter()
+
+import argparse
+
+from hrm_app.tuning import PROFILES
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="QUANGNINH ULTIMATE - quản lý nhân sự")
+    parser.add_argument("--db", default="hrm_ultimate.db", help="đường dẫn file database")
+    parser.add_argument("--db-profile", default="default", choices=sorted(PROFILES),
+                        help='bộ PRAGMA ("performance" bật WAL khi nhiều người dùng chung file)')
+    parser.add_argument("--sample-data", action="store_true", help="thêm dữ liệu mẫu vào các bảng còn trống")
+    parser.add_argument("--profile-startup", action="store_true", help="in thời gian từng giai đoạn khởi động")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
+    args = parse_args()
+
+    from hrm_app.startup import StartupTimer
+    timer = StartupTimer(enabled=args.profile_startup, start=_START)
+    with timer.phase("import giao diện"):
+        from hrm_app.gui import HRMApp
+
     # is_admin=True cho phép thêm/sửa/xóa. Đặt False nếu bạn muốn chỉ chế độ xem.
-    app = HRMApp(is_admin=True)
-    app.mainloop()
\ No newline at end of file
+    app = HRMApp(is_admin=True, db_name=args.db, db_profile=args.db_profile,
+                 sample_data=args.sample_data, startup_timer=timer)
+    app.mainloop()
@@ -6,7 +6,16 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # view được import khi mở lần đầu (xem hrm_app/views/__init__.py)
+    hiddenimports=[
+        'hrm_app.views.dashboard',
+        'hrm_app.views.departments',
+        'hrm_app.views.staff',
+        'hrm_app.views.awards',
+        'hrm_app.views.documents',
+        'hrm_app.views.work_histories',
+        'hrm_app.views.diagnostics',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,113 @@
+"""
+Đối chiếu award_stats.award_counts (rollups do trigger cập nhật + đếm trực tiếp) với cách đếm tham chiếu
+bằng Python thuần, trên database tạm có nhiều cá nhân và nhiều tập thể trong cùng 1 đợt
+(trường hợp gây nhân bản khi JOIN cả staff_awards lẫn department_awards).
+
+Chạy: python -m pytest tests/test_award_stats.py
+"""
+import os
+import random
+import sqlite3
+
+import pytest
+
+from hrm_app import award_stats
+from hrm_app.db import DatabaseManager
+
+
+def naive_award_counts(conn, dimension, year=None):
+    """Cách đếm tham chiếu: đọc toàn bộ bảng vào Python rồi đếm bằng dict"""
+    years = dict(conn.execute("SELECT id, year FROM award_years"))
+    titles = {tid: (scope, level) for tid, scope, level in conn.execute("SELECT id, scope, level FROM award_titles")}
+    authorities = dict(conn.execute("SELECT id, name FROM award_authorities"))
+    batch_key = {}
+    for bid, year_id, title_id, auth_id in conn.execute(
+            "SELECT id, award_year_id, award_title_id, authority_id FROM award_batches"):
+        if year_id not in years or title_id not in titles:
+            continue  # JOIN trong SQL cũng bỏ đợt không có năm / danh hiệu
+        if year is not None and years[year_id] != year:
+            continue
+        batch_key[bid] = {
+            "year": years[year_id],
+            "scope": titles[title_id][0],
+            "level": titles[title_id][1],
+            "authority": authorities.get(auth_id),
+        }[dimension]
+    counts = {}
+    for key in batch_key.values():
+        counts.setdefault(key, [0, 0])
+    for (bid,) in conn.execute("SELECT award_batch_id FROM staff_awards"):
+        if bid in batch_key:
+            counts[batch_key[bid]][0] += 1
+    for (bid,) in conn.execute("SELECT award_batch_id FROM department_awards"):
+        if bid in batch_key:
+            counts[batch_key[bid]][1] += 1
+    ordered = sorted(counts.items(), key=lambda kv: (kv[0] is not None, kv[0]))
+    return [award_stats.AwardCount(k, s, d, s + d) for k, (s, d) in ordered]
+
+
+def _fill_random(db, seed=7, batches=300, staffs=400, departments=12):
+    rnd = random.Random(seed)
+    with db.get_connection() as conn:
+        cur = conn.cursor()
+        for i in range(departments):
+            cur.execute("INSERT INTO departments (name, description) VALUES (?, '')", (f"Phòng kiểm tra {i}",))
+        dept_ids = [r[0] for r in cur.execute("SELECT id FROM departments")]
+        cur.executemany("INSERT INTO staffs (stt, full_name, department_id) VALUES (?, ?, ?)",
+                        [(i, f"Nhân viên {i}", rnd.choice(dept_ids)) for i in range(staffs)])
+        staff_ids = [r[0] for r in cur.execute("SELECT id FROM staffs")]
+        year_ids = [r[0] for r in cur.execute("SELECT id FROM award_years")]
+        title_ids = [r[0] for r in cur.execute("SELECT id FROM award_titles")]
+        auth_ids = [r[0] for r in cur.execute("SELECT id FROM award_authorities")] + [None]
+        for _ in range(batches):
+            cur.execute("INSERT INTO award_batches (award_year_id, award_title_id, authority_id) VALUES (?, ?, ?)",
+                        (rnd.choice(year_ids), rnd.choice(title_ids), rnd.choice(auth_ids)))
+            bid = cur.lastrowid
+            cur.executemany("INSERT INTO staff_awards (staff_id, award_batch_id) VALUES (?, ?)",
+                            [(sid, bid) for sid in rnd.sample(staff_ids, rnd.randint(0, 12))])
+            cur.executemany("INSERT INTO department_awards (department_id, award_batch_id) VALUES (?, ?)",
+                            [(did, bid) for did in rnd.sample(dept_ids, rnd.randint(0, 4))])
+        conn.commit()
+        # xóa bớt để kiểm tra cả trigger DELETE / xóa dây chuyền
+        cur.execute("DELETE FROM staffs WHERE id % 7 = 0")
+        cur.execute("DELETE FROM award_batches WHERE id % 11 = 0")
+        conn.commit()
+
+
+@pytest.fixture(scope="module")
+def conn(tmp_path_factory):
+    db_name = os.path.join(tmp_path_factory.mktemp("award_stats"), "award_stats.db")
+    # dữ liệu mẫu cho năm / danh hiệu / cơ quan, rồi thêm đợt và khen thưởng ngẫu nhiên
+    db = DatabaseManager(db_name=db_name, pool_readers=0, instrument=False)
+    _fill_random(db)
+    db.close()
+    conn = sqlite3.connect(db_name)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("use_rollups", (True, False))
+@pytest.mark.parametrize("dimension", tuple(award_stats.DIMENSIONS))
+def test_award_counts_match_reference(conn, dimension, use_rollups):
+    years = [r[0] for r in conn.execute("SELECT year FROM award_years")] + [None]
+    for year in years:
+        expected = naive_award_counts(conn, dimension, year=year)
+        assert award_stats.award_counts(conn, dimension, year=year, use_rollups=use_rollups) == expected, year
+
+
+def test_batch_with_many_staff_and_departments_is_not_double_counted(conn):
+    # 1 đợt có 3 cá nhân + 2 tập thể phải ra 3 + 2, không phải 6 + 6
+    cur = conn.cursor()
+    year_id = cur.execute("INSERT INTO award_years (year) VALUES (2099)").lastrowid
+    title_id = cur.execute("SELECT id FROM award_titles LIMIT 1").fetchone()[0]
+    bid = cur.execute("INSERT INTO award_batches (award_year_id, award_title_id) VALUES (?, ?)",
+                      (year_id, title_id)).lastrowid
+    cur.executemany("INSERT INTO staff_awards (staff_id, award_batch_id) VALUES (?, ?)",
+                    [(sid, bid) for (sid,) in cur.execute("SELECT id FROM staffs LIMIT 3").fetchall()])
+    cur.executemany("INSERT INTO department_awards (department_id, award_batch_id) VALUES (?, ?)",
+                    [(did, bid) for (did,) in cur.execute("SELECT id FROM departments LIMIT 2").fetchall()])
+    try:
+        for use_rollups in (True, False):
+            assert award_stats.award_summary(conn, 2099, use_rollups=use_rollups) == (2099, 3, 2, 5)
+    finally:
+        conn.rollback()
@@ -0,0 +1,105 @@
+"""
+repository: mọi câu trong STATEMENTS / LISTINGS biên dịch được trên schema hiện tại (số cột khớp kiểu dòng),
+và phân trang keyset (list_page theo cursor, cursor_at) ra đúng thứ tự của danh sách không phân trang
+với mọi trường sắp xếp, 2 chiều, cả khi nhiều dòng trùng khóa / NULL.
+
+Chạy: python -m pytest tests/test_repository.py
+"""
+import os
+import re
+import sqlite3
+
+import pytest
+
+from hrm_app import repository
+from hrm_app.db import DatabaseManager
+
+PAGE_SIZE = 4
+
+
+def _dummy_params(sql):
+    # 0 thay vì NULL: LIMIT / OFFSET không nhận NULL
+    names = re.findall(r":(\w+)", sql)
+    if names:
+        return dict.fromkeys(names, 0)
+    return (0,) * sql.count("?")
+
+
+def _orders(listing):
+    """Mọi trường 2 chiều + nhiều cột khác chiều (mỗi trường làm khóa phụ sau trường đứng trước)"""
+    fields = list(listing.sorts)
+    orders = [(field,) for field in fields] + [("-" + field,) for field in fields]
+    orders += [(fields[i - 1], "-" + fields[i]) for i in range(1, len(fields))]
+    return orders
+
+
+LISTING_ORDERS = [(name, order_by) for name, listing in repository.LISTINGS.items() for order_by in _orders(listing)]
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    db = DatabaseManager(db_name=os.path.join(tmp_path_factory.mktemp("repository"), "repository.db"),
+                         pool_readers=0, instrument=False)
+    # thêm nhân viên trùng tên / ngày sinh / vị trí và để trống để phân trang phải qua các khóa bằng nhau
+    departments = [d.id for d in db.get_all_departments()]
+    db.add_staffs_bulk([("Nguyễn Văn Trùng", None if i % 3 else "1990-05-05", None if i % 2 else "Chuyên viên",
+                         None, departments[i % len(departments)]) for i in range(25)])
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def conn(db):
+    with db.get_connection(readonly=True) as conn:
+        yield conn
+
+
+@pytest.mark.parametrize("name", list(repository.STATEMENTS))
+def test_statement_matches_schema(db, conn, name):
+    statement = repository.STATEMENTS[name]
+    if name == "staffs.search_fts" and not db.fts_enabled:
+        pytest.skip("SQLite không có FTS5")
+    cur = conn.execute(statement.sql, _dummy_params(statement.sql))
+    if statement.row is not None:
+        assert len(cur.description) == len(statement.row._fields)
+    cur.close()
+
+
+@pytest.mark.parametrize("name", list(repository.LISTINGS))
+def test_listing_matches_schema(conn, name):
+    listing = repository.LISTINGS[name]
+    cur = conn.execute(f"SELECT {listing.columns} {listing.source} LIMIT 0")
+    assert len(cur.description) == len(listing.row._fields)
+    # mọi bộ lọc cùng lúc
+    repository.count_listing(conn, name, dict.fromkeys(listing.filters, 0))
+
+
+@pytest.mark.parametrize("name, order_by", LISTING_ORDERS)
+def test_keyset_paging_matches_unpaged_order(conn, name, order_by):
+    expected = list(repository.list_page(conn, name, order_by, limit=None).rows)
+    assert expected, f"LISTINGS[{name!r}] không có dữ liệu để kiểm tra"
+    assert repository.count_listing(conn, name) == len(expected)
+
+    paged = []
+    cursor = None
+    while True:
+        page = repository.list_page(conn, name, order_by, cursor=cursor, limit=PAGE_SIZE)
+        paged.extend(page.rows)
+        if page.cursor is None:
+            break
+        cursor = page.cursor
+    assert paged == expected
+
+    # nhảy tới vị trí bất kỳ: cursor_at(offset) rồi list_page lấy tiếp từ dòng offset + 1
+    for offset in range(0, len(expected), 3):
+        cursor = repository.cursor_at(conn, name, offset, order_by)
+        page = repository.list_page(conn, name, order_by, cursor=cursor, limit=PAGE_SIZE)
+        assert list(page.rows) == expected[offset + 1:offset + 1 + PAGE_SIZE]
+    assert repository.cursor_at(conn, name, len(expected), order_by) is None
+
+
+def test_unknown_sort_or_filter_is_rejected(conn):
+    with pytest.raises(ValueError):
+        repository.list_page(conn, "staffs", order_by="password")
+    with pytest.raises(ValueError):
+        repository.list_page(conn, "staffs", filters={"evil": "1 OR 1=1"})